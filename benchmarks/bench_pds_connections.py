@@ -0,0 +1,132 @@
+"""Measures repeated downloads from one storage node through
+``StorageServiceFactory.create_preservation_data_service``, comparing a reused
+preservation data service against building a new one for every download.
+
+Usage::
+
+    python benchmarks/bench_pds_connections.py --downloads 500
+"""
+from __future__ import print_function
+
+import argparse
+import threading
+import time
+
+from py42.services._connection import Connection
+from py42.services.storage._service_factory import StorageServiceFactory
+from py42.services.storage.preservationdata import StoragePreservationDataService
+
+try:
+    from http.server import BaseHTTPRequestHandler
+    from http.server import HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler
+    from BaseHTTPServer import HTTPServer
+    from SocketServer import ThreadingMixIn
+
+_TOKEN = b"PDSDownloadToken=token"
+
+
+def _create_handler(payload, stats):
+    class StorageNodeHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # keep-alive responses are small, don't let Nagle delay them
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            BaseHTTPRequestHandler.setup(self)
+            stats["connections"] += 1
+
+        def do_GET(self):
+            body = _TOKEN if "FileDownloadToken" in self.path else payload
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return StorageNodeHandler
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def _start_server(payload, stats):
+    server = _ThreadingHTTPServer(("127.0.0.1", 0), _create_handler(payload, stats))
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+def _create_uncached_service(factory, host):
+    # how create_preservation_data_service built the service before it was cached
+    return StoragePreservationDataService(
+        factory._connection.clone(host), Connection.from_host_address(host)
+    )
+
+
+def _create_cached_service(factory, host):
+    return factory.create_preservation_data_service(host)
+
+
+def _download(service):
+    token = service.get_download_token(u"archiveguid", u"fileid", 0)
+    response = service.get_file(token.text)
+    return sum(len(chunk) for chunk in response.iter_content())
+
+
+def _run(name, create_service, factory, host, downloads, stats):
+    stats["connections"] = 0
+    setup_time = 0.0
+    start = time.time()
+    for _ in range(downloads):
+        setup_start = time.time()
+        service = create_service(factory, host)
+        setup_time += time.time() - setup_start
+        _download(service)
+    elapsed = time.time() - start
+    print(
+        u"{:<10} {:>6} downloads  {:>7.3f}s total  {:>8.1f}us setup/download  "
+        u"{:>6.2f}ms/download  {:>4} connections opened".format(
+            name,
+            downloads,
+            elapsed,
+            setup_time / downloads * 1000000,
+            elapsed / downloads * 1000,
+            stats["connections"],
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(u"--downloads", type=int, default=500)
+    parser.add_argument(u"--size", type=int, default=64 * 1024)
+    args = parser.parse_args()
+
+    stats = {"connections": 0}
+    server = _start_server(b"x" * args.size, stats)
+    host = u"http://127.0.0.1:{}".format(server.server_address[1])
+    factory = StorageServiceFactory(Connection.from_host_address(host), None, None)
+    try:
+        _run(
+            u"uncached",
+            _create_uncached_service,
+            factory,
+            host,
+            args.downloads,
+            stats,
+        )
+        _run(u"cached", _create_cached_service, factory, host, args.downloads, stats)
+    finally:
+        server.shutdown()
+
+
+if __name__ == u"__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Measures building and serializing file event queries with large ``is_in`` filter
+groups, as done before every page request of a search, and the throughput of the query
+serializer against the format strings it replaced.
+
+Usage::
+
+    python benchmarks/bench_query_serialization.py --sizes 10 1000 100000 --pages 10
+"""
+from __future__ import print_function
+
+import argparse
+import time
+
+from py42.sdk.queries.fileevents.file_event_query import FileEventQuery
+from py42.sdk.queries.fileevents.filters.file_filter import FileName
+from py42.sdk.queries.fileevents.filters.file_filter import SHA256
+from py42.sdk.queries.query_filter import create_query_filter
+from py42.sdk.queries.query_serializer import serialize_filter_group
+
+
+def _time(func):
+    start = time.time()
+    result = func()
+    return result, time.time() - start
+
+
+def _format_filter(query_filter):
+    # the format strings used before the serializer, which did not escape values
+    value = query_filter.value
+    value = u"null" if value is None else u'"{}"'.format(value)
+    return u'{{"operator":"{0}", "term":"{1}", "value":{2}}}'.format(
+        query_filter.operator, query_filter.term, value
+    )
+
+
+def _format_filter_group(filter_clause, filters):
+    filters_string = u",".join(_format_filter(f) for f in filters)
+    return u'{{"filterClause":"{0}", "filters":[{1}]}}'.format(
+        filter_clause, filters_string
+    )
+
+
+def _run_throughput(size):
+    values = [u"C:\\Users\\test\\{}.txt".format(i) for i in range(size)]
+    for name, serialize_group in (
+        (u"format strings", _format_filter_group),
+        (u"serializer", serialize_filter_group),
+    ):
+        # new filters each time, so no serialized form is cached yet
+        filters = [create_query_filter(u"filePath", u"IS", v) for v in values]
+        _, elapsed = _time(lambda: serialize_group(u"OR", filters))
+        print(
+            u"{:>14}: {} filters in {:.2f}ms, {:,.0f} filters/s".format(
+                name, size, elapsed * 1000, size / elapsed
+            )
+        )
+
+
+def _run(size, pages):
+    hashes = [u"{:064x}".format(i) for i in range(size)]
+    query, build_time = _time(
+        lambda: FileEventQuery.all(SHA256.is_in(hashes), FileName.eq(u"test.txt"))
+    )
+    _, first_time = _time(lambda: str(query))
+
+    def serialize_pages():
+        for page_number in range(1, pages + 1):
+            query.page_number = page_number
+            str(query)
+
+    _, pages_time = _time(serialize_pages)
+    group = query._filter_group_list[0]
+    _, hash_time = _time(lambda: [hash(group) for _ in range(pages)])
+    _, dict_time = _time(lambda: dict(query))
+
+    print(
+        u"{:>7} filters  build {:>9.2f}ms  first str {:>9.2f}ms  "
+        u"{} page strs {:>9.2f}ms  {} hashes {:>9.2f}ms  dict {:>9.2f}ms".format(
+            size,
+            build_time * 1000,
+            first_time * 1000,
+            pages,
+            pages_time * 1000,
+            pages,
+            hash_time * 1000,
+            dict_time * 1000,
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        u"--sizes", type=int, nargs=u"+", default=[10, 100, 1000, 10000, 100000]
+    )
+    parser.add_argument(u"--pages", type=int, default=10)
+    parser.add_argument(u"--throughput", type=int, default=100000)
+    args = parser.parse_args()
+    for size in args.sizes:
+        _run(size, args.pages)
+    _run_throughput(args.throughput)
+
+
+if __name__ == u"__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Measures the throughput of the ``Py42Response`` streaming APIs against a local HTTP
+server that serves a payload of the given size.
+
+Usage::
+
+    python benchmarks/bench_response_streaming.py --size 1073741824
+"""
+from __future__ import print_function
+
+import argparse
+import threading
+import time
+
+from py42.services._connection import Connection
+
+try:
+    from http.server import BaseHTTPRequestHandler
+    from http.server import HTTPServer
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler
+    from BaseHTTPServer import HTTPServer
+
+_BLOCK = b"x" * (1024 * 1024)
+_MIB = 1024.0 * 1024.0
+
+
+def _create_handler(payload_size):
+    class PayloadHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(payload_size))
+            self.end_headers()
+            remaining = payload_size
+            while remaining:
+                block = _BLOCK[: min(remaining, len(_BLOCK))]
+                self.wfile.write(block)
+                remaining -= len(block)
+
+        def log_message(self, *args):
+            pass
+
+    return PayloadHandler
+
+
+def _start_server(payload_size):
+    server = HTTPServer(("127.0.0.1", 0), _create_handler(payload_size))
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+def _consume_iter_content(response, chunk_size):
+    total = 0
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        total += len(chunk)
+    return total
+
+
+def _consume_iter_content_into(response, chunk_size):
+    total = 0
+    for chunk in response.iter_content_into(bytearray(chunk_size)):
+        total += len(chunk)
+    return total
+
+
+def _run(connection, name, consume, chunk_size, expected_size):
+    response = connection.get(u"/payload", stream=True)
+    start = time.time()
+    total = consume(response, chunk_size)
+    elapsed = time.time() - start
+    assert total == expected_size, u"read {} of {} bytes".format(total, expected_size)
+    print(
+        u"{:<22} chunk={:>8}  {:>8.2f}s  {:>9.1f} MiB/s".format(
+            name, chunk_size, elapsed, total / _MIB / elapsed
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(u"--size", type=int, default=1024 * 1024 * 1024)
+    parser.add_argument(
+        u"--chunk-sizes", type=int, nargs=u"+", default=[128, 64 * 1024, 1024 * 1024]
+    )
+    args = parser.parse_args()
+
+    server = _start_server(args.size)
+    host = u"http://127.0.0.1:{}".format(server.server_address[1])
+    connection = Connection.from_host_address(host)
+    print(u"Streaming {:.0f} MiB from {}".format(args.size / _MIB, host))
+    try:
+        for chunk_size in args.chunk_sizes:
+            _run(
+                connection,
+                u"iter_content",
+                _consume_iter_content,
+                chunk_size,
+                args.size,
+            )
+            _run(
+                connection,
+                u"iter_content_into",
+                _consume_iter_content_into,
+                chunk_size,
+                args.size,
+            )
+    finally:
+        server.shutdown()
+
+
+if __name__ == u"__main__":
+    main()
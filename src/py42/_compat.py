@@ -13,6 +13,8 @@ if is_py2:
     from urllib import quote
     from urllib import urlencode
 
+    from httplib import IncompleteRead
+
     from urlparse import urljoin
     from urlparse import urlparse
 
@@ -26,12 +28,16 @@ if is_py2:
 
     from UserList import UserList
 
+    import Queue as queue
+
 else:
     from urllib.parse import urljoin
     from urllib.parse import urlparse
     from urllib.parse import quote
     from urllib.parse import urlencode
 
+    from http.client import IncompleteRead
+
     str = str
 
     import reprlib
@@ -40,3 +46,5 @@ else:
 
     from collections import UserDict
     from collections import UserList
+
+    import queue
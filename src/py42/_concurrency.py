@@ -0,0 +1,292 @@
+import time
+from collections import deque
+from itertools import islice
+from threading import Event
+from threading import Lock
+from threading import Thread
+
+from py42._compat import queue
+
+# matches the per-host connection pool size of the py42 session adapter, more workers
+# than that only wait on the pool
+DEFAULT_MAX_WORKERS = 4
+
+_STOP = object()
+
+
+def iter_batches(items, size):
+    """Splits ``items`` into lists of at most ``size`` items.
+
+    Args:
+        items (iterable): The items to split.
+        size (int): The maximum number of items in each batch.
+
+    Returns:
+        generator: An object that iterates over lists of items.
+    """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def iter_concurrently(func, items, max_workers=None):
+    """Calls ``func`` for each item on a pool of worker threads and yields the outcomes in
+    the order they complete. Items are pulled from ``items`` lazily, so only a bounded
+    number of them are in flight at once.
+
+    An exception raised by ``func`` is yielded as the outcome of its item instead of being
+    raised, so one failure does not abort the rest. Closing the generator early stops the
+    workers once their current call returns.
+
+    Args:
+        func (callable): Called with each item.
+        items (iterable): The items to process.
+        max_workers (int, optional): The number of worker threads. Defaults to 4.
+
+    Returns:
+        generator: An object that iterates over ``(item, result, error)`` tuples, where
+        ``error`` is the exception raised by ``func`` or None.
+    """
+    max_workers = max_workers or DEFAULT_MAX_WORKERS
+    tasks = queue.Queue()
+    results = queue.Queue()
+    stopped = Event()
+    workers = [_start_worker(func, tasks, results, stopped) for _ in range(max_workers)]
+    in_flight = 0
+    try:
+        for item in items:
+            tasks.put(item)
+            in_flight += 1
+            # keep every worker busy while the next item is queued behind it
+            if in_flight >= max_workers * 2:
+                yield results.get()
+                in_flight -= 1
+        while in_flight:
+            yield results.get()
+            in_flight -= 1
+    finally:
+        stopped.set()
+        for _ in workers:
+            tasks.put(_STOP)
+
+
+def iter_batch_results(
+    func, items, batch_size, max_workers=None, rate_limiter=None, fatal_errors=()
+):
+    """Calls ``func`` with batches of at most ``batch_size`` items concurrently. A batch
+    whose call raises is split in half and each half is retried once, so one bad item
+    fails only the half it is in. A call that raises one of ``fatal_errors`` fails every
+    batch alike, so the error is raised instead and no more batches are sent.
+
+    Args:
+        func (callable): Called with each list of items.
+        items (iterable): The items to split into batches.
+        batch_size (int): The maximum number of items in each batch.
+        max_workers (int, optional): The number of worker threads. Defaults to 4.
+        rate_limiter (:class:`RateLimiter`, optional): Waited on before each call,
+            including retries. Defaults to None, for no limit.
+        fatal_errors (tuple, optional): The exception types raised instead of splitting
+            the batch. Defaults to ().
+
+    Returns:
+        generator: An object that iterates over ``(batch, result, error)`` tuples in the
+        order the batches complete. A split batch yields one tuple for each half.
+    """
+
+    def call(batch):
+        if rate_limiter is not None:
+            rate_limiter.wait()
+        return func(batch)
+
+    def call_or_split(batch):
+        try:
+            return [(batch, call(batch), None)]
+        except fatal_errors:
+            raise
+        except Exception as ex:
+            if len(batch) < 2:
+                return [(batch, None, ex)]
+        outcomes = []
+        middle = len(batch) // 2
+        for half in (batch[:middle], batch[middle:]):
+            try:
+                outcomes.append((half, call(half), None))
+            except fatal_errors:
+                raise
+            except Exception as ex:
+                outcomes.append((half, None, ex))
+        return outcomes
+
+    batches = iter_concurrently(
+        call_or_split, iter_batches(items, batch_size), max_workers=max_workers
+    )
+    try:
+        for _, outcomes, error in batches:
+            # only fatal errors escape call_or_split
+            if error is not None:
+                raise error
+            for outcome in outcomes:
+                yield outcome
+    finally:
+        batches.close()
+
+
+def chain_prefetched(iterables, max_workers=None, buffer_size=2):
+    """Yields the items of each iterable in turn, like ``itertools.chain``, while the next
+    ``max_workers`` iterables are read ahead on their own threads. Each iterable read ahead
+    buffers at most ``buffer_size`` items, so memory stays bounded however many iterables
+    there are.
+
+    An exception raised by an iterable is raised when its items are reached. Closing the
+    generator early stops the iterables read ahead once their current item is produced.
+
+    Args:
+        iterables (iterable): The iterables to chain, pulled lazily.
+        max_workers (int, optional): The number of iterables read at once. Defaults to 4.
+        buffer_size (int, optional): The maximum number of items buffered for each
+            iterable. Defaults to 2.
+
+    Returns:
+        generator: An object that iterates over the items of every iterable, in order.
+    """
+    max_workers = max_workers or DEFAULT_MAX_WORKERS
+    iterables = iter(iterables)
+    readers = deque(
+        _Prefetcher(iterable, buffer_size) for iterable in islice(iterables, max_workers)
+    )
+    try:
+        while readers:
+            for item in readers[0]:
+                yield item
+            readers.popleft()
+            iterable = next(iterables, _STOP)
+            if iterable is not _STOP:
+                readers.append(_Prefetcher(iterable, buffer_size))
+    finally:
+        for reader in readers:
+            reader.stop()
+
+
+class _Prefetcher(object):
+    def __init__(self, iterable, buffer_size):
+        self._items = queue.Queue(buffer_size)
+        self._stopped = Event()
+        thread = Thread(target=self._run, args=(iterable,))
+        thread.daemon = True
+        thread.start()
+
+    def __iter__(self):
+        while True:
+            item, error = self._items.get()
+            if error is not None:
+                raise error
+            if item is _STOP:
+                return
+            yield item
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self, iterable):
+        try:
+            for item in iterable:
+                if not self._put(item, None):
+                    return
+        except Exception as ex:
+            self._put(_STOP, ex)
+            return
+        self._put(_STOP, None)
+
+    def _put(self, item, error):
+        # waits for room in the buffer, giving up once the reader stops
+        while not self._stopped.is_set():
+            try:
+                self._items.put((item, error), timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+
+class RateLimiter(object):
+    """Spaces calls to :meth:`wait` made from any number of threads at least
+    ``1 / calls_per_second`` seconds apart."""
+
+    def __init__(self, calls_per_second):
+        self._interval = 1.0 / calls_per_second
+        self._next_time = 0
+        self._lock = Lock()
+
+    def wait(self):
+        """Blocks until the next call is allowed."""
+        with self._lock:
+            now = time.time()
+            delay = self._next_time - now
+            self._next_time = max(now, self._next_time) + self._interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def submit(func, *args):
+    """Starts calling ``func`` with ``args`` on a new thread.
+
+    Args:
+        func (callable): The function to call.
+
+    Returns:
+        :class:`PendingResult`: An object whose ``result()`` waits for the call to finish.
+    """
+    return PendingResult(func, args)
+
+
+class PendingResult(object):
+    """The eventual outcome of a call started by :func:`submit`."""
+
+    def __init__(self, func, args):
+        self._func = func
+        self._args = args
+        self._result = None
+        self._error = None
+        self._thread = Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def result(self):
+        """Waits for the call to finish.
+
+        Returns:
+            The value returned by the call. An exception raised by the call is raised again.
+        """
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def _run(self):
+        try:
+            self._result = self._func(*self._args)
+        except Exception as ex:
+            self._error = ex
+
+
+def _start_worker(func, tasks, results, stopped):
+    worker = Thread(target=_work, args=(func, tasks, results, stopped))
+    worker.daemon = True
+    worker.start()
+    return worker
+
+
+def _work(func, tasks, results, stopped):
+    while True:
+        item = tasks.get()
+        if item is _STOP or stopped.is_set():
+            return
+        try:
+            results.put((item, func(item), None))
+        except Exception as ex:
+            results.put((item, None, ex))
@@ -3,6 +3,8 @@ import time
 from collections import namedtuple
 
 from py42.exceptions import Py42ArchiveFileNotFoundError
+from py42.services.storage._download import download_to
+from py42.services.storage._zipstream import extract_zip_stream
 from py42.settings import debug
 from py42.util import format_dict
 
@@ -111,6 +113,30 @@ class ArchiveAccessor(object):
         )
         return self._restore_job_manager.get_stream(file_selections)
 
+    def download_from_backup(
+        self, file_paths, save_as, file_size_calc_timeout=None, progress_callback=None
+    ):
+        file_selections = self._create_file_selections(
+            file_paths, file_size_calc_timeout
+        )
+        return self._restore_job_manager.download_to(
+            file_selections, save_as, progress_callback=progress_callback
+        )
+
+    def extract_from_backup(
+        self,
+        file_paths,
+        extract_to=None,
+        entry_callback=None,
+        file_size_calc_timeout=None,
+    ):
+        file_selections = self._create_file_selections(
+            file_paths, file_size_calc_timeout
+        )
+        return self._restore_job_manager.extract_to(
+            file_selections, extract_to=extract_to, entry_callback=entry_callback
+        )
+
     def _create_file_selections(self, file_paths, file_size_calc_timeout):
         if not isinstance(file_paths, (list, tuple)):
             file_paths = [file_paths]
@@ -270,6 +296,26 @@ class RestoreJobManager(_RestorePoller):
         self._wait_for_job(job_id)
         return self._get_stream(job_id)
 
+    def download_to(self, file_selections, save_as, progress_callback=None):
+        response = self._start_restore(file_selections)
+        job_id = response["jobId"]
+        self._wait_for_job(job_id)
+
+        def stream_func(headers):
+            return self._get_stream(job_id, headers=headers)
+
+        return download_to(stream_func, save_as, progress_callback=progress_callback)
+
+    def extract_to(self, file_selections, extract_to=None, entry_callback=None):
+        # always zip the result so single files stream through the same extraction path
+        response = self._start_restore(file_selections, force_zip=True)
+        job_id = response["jobId"]
+        self._wait_for_job(job_id)
+        stream = self._get_stream(job_id)
+        return extract_zip_stream(
+            stream, extract_to=extract_to, entry_callback=entry_callback
+        )
+
     def _wait_for_job(self, job_id):
         while not self._is_job_complete(job_id):
             time.sleep(self._job_polling_interval)
@@ -285,11 +331,11 @@ class RestoreJobManager(_RestorePoller):
         debug.logger.debug(format_dict(percentage_dict))
         return is_done
 
-    def _start_restore(self, file_selections):
+    def _start_restore(self, file_selections, force_zip=False):
         num_files = sum([fs.num_files for fs in file_selections])
         num_dirs = sum([fs.num_dirs for fs in file_selections])
         size = sum([fs.size for fs in file_selections])
-        zip_result = _check_for_multiple_files(file_selections) or None
+        zip_result = force_zip or _check_for_multiple_files(file_selections) or None
         return self._storage_archive_service.start_restore(
             guid=self._device_guid,
             web_restore_session_id=self._archive_session_id,
@@ -301,8 +347,10 @@ class RestoreJobManager(_RestorePoller):
             show_deleted=True,
         )
 
-    def _get_stream(self, job_id):
-        response = self._storage_archive_service.stream_restore_result(job_id)
+    def _get_stream(self, job_id, headers=None):
+        response = self._storage_archive_service.stream_restore_result(
+            job_id, headers=headers
+        )
         return response
 
 
@@ -0,0 +1,226 @@
+import copy
+import json
+import sqlite3
+from collections import namedtuple
+from threading import Lock
+
+from py42._concurrency import iter_batches
+from py42.sdk.queries.alerts.alert_query import AlertQuery
+from py42.sdk.queries.alerts.filters import AlertState
+from py42.sdk.queries.alerts.filters import DateObserved
+from py42.services._time_windows import parse_timestamp
+
+# states an alert can still move out of, re-read on every sync to find state changes
+DEFAULT_ACTIVE_STATES = (AlertState.OPEN, AlertState.PENDING, AlertState.IN_PROGRESS)
+
+_WRITE_BATCH_SIZE = 500
+_COLUMNS = (u"state", u"severity", u"actor", u"rule_id")
+
+AlertSyncResult = namedtuple(u"AlertSyncResult", u"created, updated")
+
+
+class AlertSync(object):
+    """Keeps a local SQLite mirror of alerts up to date by pulling only what changed since
+    the last sync, so dashboards can read alerts locally instead of searching for all of
+    them again.
+
+    Each :meth:`sync` searches for the alerts created since the newest mirrored alert, then
+    re-reads the alerts in an active state (``OPEN``, ``PENDING``, ``IN_PROGRESS``) to find
+    state changes. Mirrored alerts that left the active states are refreshed from their
+    details.
+
+    Usage example::
+
+        alert_sync = AlertSync(sdk.alerts, "alerts.db")
+        alert_sync.sync()
+        open_alerts = alert_sync.get_alerts(state=AlertState.OPEN, severity=Severity.HIGH)
+
+    Args:
+        alerts_client (:class:`py42.clients.alerts.AlertsClient`): The client to search
+            alerts with, such as ``sdk.alerts``.
+        path (str): The path of the database file. It is created if it does not exist.
+        query (:class:`py42.sdk.queries.alerts.alert_query.AlertQuery`, optional): A query
+            whose filter groups, joined with ``AND``, limit the alerts mirrored. Defaults to
+            None, for every alert.
+        active_states (iter[str], optional): The states re-read on every sync. Defaults to
+            ``OPEN``, ``PENDING`` and ``IN_PROGRESS``.
+        max_workers (int, optional): The number of requests run at once. Defaults to 4.
+    """
+
+    def __init__(
+        self,
+        alerts_client,
+        path,
+        query=None,
+        active_states=DEFAULT_ACTIVE_STATES,
+        max_workers=None,
+    ):
+        self._alerts_client = alerts_client
+        self._query = query or AlertQuery()
+        self._active_states = list(active_states)
+        self._max_workers = max_workers
+        self._sync_lock = Lock()
+        self._db_lock = Lock()
+        # access is serialized by the database lock, so the connection is shared by threads
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                u"CREATE TABLE IF NOT EXISTS alerts ("
+                u"id TEXT PRIMARY KEY, created_at TEXT, state TEXT, severity TEXT, "
+                u"actor TEXT, rule_id TEXT, alert TEXT NOT NULL)"
+            )
+            for column in (u"created_at",) + _COLUMNS:
+                self._db.execute(
+                    u"CREATE INDEX IF NOT EXISTS alerts_{0} ON alerts ({0})".format(column)
+                )
+
+    @property
+    def high_water_mark(self):
+        """The ``createdAt`` of the newest mirrored alert, or None if none are mirrored."""
+        return self._execute(u"SELECT MAX(created_at) FROM alerts")[0][0]
+
+    def sync(self):
+        """Pulls the alerts created and the states changed since the last sync into the
+        mirror. Only one sync runs at a time.
+
+        Returns:
+            :class:`AlertSyncResult`: A named tuple of the number of alerts ``created`` in the
+            mirror and the number whose state was ``updated``.
+        """
+        with self._sync_lock:
+            count = self.count()
+            self._sync_new_alerts()
+            created = self.count() - count
+            updated = self._sync_states()
+        return AlertSyncResult(created, updated)
+
+    def get_alerts(
+        self, state=None, severity=None, actor=None, rule_id=None, limit=None
+    ):
+        """Gets mirrored alerts, newest first.
+
+        Args:
+            state (str, optional): Only alerts in this state. Defaults to None.
+            severity (str, optional): Only alerts of this severity. Defaults to None.
+            actor (str, optional): Only alerts of this actor. Defaults to None.
+            rule_id (str, optional): Only alerts of this rule. Defaults to None.
+            limit (int, optional): The maximum number of alerts. Defaults to None, for all.
+
+        Returns:
+            list: The alert dicts, as returned by an alert search.
+        """
+        where, params = _get_where_clause(state, severity, actor, rule_id)
+        sql = u"SELECT alert FROM alerts{} ORDER BY created_at DESC".format(where)
+        if limit is not None:
+            sql += u" LIMIT ?"
+            params.append(limit)
+        return [json.loads(row[0]) for row in self._execute(sql, params)]
+
+    def count(self, state=None, severity=None, actor=None, rule_id=None):
+        """Counts mirrored alerts.
+
+        Args:
+            state (str, optional): Only alerts in this state. Defaults to None.
+            severity (str, optional): Only alerts of this severity. Defaults to None.
+            actor (str, optional): Only alerts of this actor. Defaults to None.
+            rule_id (str, optional): Only alerts of this rule. Defaults to None.
+
+        Returns:
+            int
+        """
+        where, params = _get_where_clause(state, severity, actor, rule_id)
+        return self._execute(u"SELECT COUNT(*) FROM alerts" + where, params)[0][0]
+
+    def close(self):
+        """Closes the database file."""
+        with self._db_lock:
+            self._db.close()
+
+    def _sync_new_alerts(self):
+        query = self._create_query()
+        high_water_mark = self.high_water_mark
+        if high_water_mark is not None:
+            # inclusive, so alerts created in the same millisecond are not missed
+            query._filter_group_list.append(
+                DateObserved.on_or_after(parse_timestamp(high_water_mark))
+            )
+        query.sort_key = u"CreatedAt"
+        query.sort_direction = u"asc"
+        alerts = self._alerts_client.search_all(query, max_workers=self._max_workers)
+        for batch in iter_batches(alerts, _WRITE_BATCH_SIZE):
+            self._store(batch)
+
+    def _sync_states(self):
+        query = self._create_query()
+        query._filter_group_list.append(AlertState.is_in(self._active_states))
+        active = {
+            alert[u"id"]: alert
+            for alert in self._alerts_client.search_all(
+                query, max_workers=self._max_workers
+            )
+        }
+        states = self._get_active_states()
+        # mirrored alerts that are no longer active changed to some other state
+        inactive_ids = [alert_id for alert_id in states if alert_id not in active]
+        changed = [
+            alert for alert in active.values() if states.get(alert[u"id"]) != alert[u"state"]
+        ]
+        if inactive_ids:
+            details = self._alerts_client.get_details_chunked(
+                inactive_ids, max_workers=self._max_workers, parse_observations=False
+            )
+            for alert in details:
+                alert.pop(u"observations", None)
+                changed.append(alert)
+        for batch in iter_batches(changed, _WRITE_BATCH_SIZE):
+            self._store(batch)
+        return len(changed)
+
+    def _create_query(self):
+        query = copy.copy(self._query)
+        query._filter_group_list = list(self._query._filter_group_list)
+        query._group_clause = u"AND"
+        return query
+
+    def _get_active_states(self):
+        placeholders = u", ".join(u"?" for _ in self._active_states)
+        rows = self._execute(
+            u"SELECT id, state FROM alerts WHERE state IN ({})".format(placeholders),
+            self._active_states,
+        )
+        return dict(rows)
+
+    def _store(self, alerts):
+        rows = [
+            (
+                alert[u"id"],
+                alert.get(u"createdAt"),
+                alert.get(u"state"),
+                alert.get(u"severity"),
+                alert.get(u"actor"),
+                alert.get(u"ruleId"),
+                json.dumps(alert),
+            )
+            for alert in alerts
+        ]
+        with self._db_lock:
+            with self._db:
+                self._db.executemany(
+                    u"INSERT OR REPLACE INTO alerts VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+                )
+
+    def _execute(self, sql, params=()):
+        with self._db_lock:
+            return self._db.execute(sql, params).fetchall()
+
+
+def _get_where_clause(state, severity, actor, rule_id):
+    conditions = []
+    params = []
+    for column, value in zip(_COLUMNS, (state, severity, actor, rule_id)):
+        if value is not None:
+            conditions.append(u"{} = ?".format(column))
+            params.append(value)
+    if not conditions:
+        return u"", params
+    return u" WHERE " + u" AND ".join(conditions), params
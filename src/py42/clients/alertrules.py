@@ -1,3 +1,5 @@
+from threading import Lock
+
 from py42 import settings
 from py42.exceptions import Py42InternalServerError
 from py42.exceptions import Py42InvalidRuleOperationError
@@ -7,6 +9,51 @@ class AlertRulesClient(object):
     def __init__(self, alerts_service, alert_rules_service):
         self._alerts_service = alerts_service
         self._alert_rules_service = alert_rules_service
+        self._metadata_index = None
+
+    @property
+    def metadata_index(self):
+        """The index :meth:`get_metadata_by_observer_id()` and
+        :meth:`get_all_metadata_by_name()` look rules up in, or None when they query the
+        rule metadata on every call. See :meth:`enable_metadata_index()`.
+
+        Returns:
+            :class:`py42.services.alerts.RuleMetadataIndex`
+        """
+        return self._metadata_index
+
+    def enable_metadata_index(self, ttl=None, min_refresh_interval=None):
+        """Makes :meth:`get_metadata_by_observer_id()` and
+        :meth:`get_all_metadata_by_name()` look rules up in an in-memory index of every
+        rule instead of querying the rule metadata on every call. The index is reloaded in
+        the background once it is older than ``ttl``.
+
+        Args:
+            ttl (int, optional): Seconds before the index is reloaded. Defaults to 300.
+            min_refresh_interval (int, optional): The minimum seconds between reloads caused
+                by lookups of rules missing from the index. Defaults to 30.
+
+        Returns:
+            :class:`py42.services.alerts.RuleMetadataIndex`
+        """
+        # imported here, as py42.services.alerts imports this module through py42.sdk
+        from py42.services.alerts import DEFAULT_RULE_METADATA_MIN_REFRESH_INTERVAL
+        from py42.services.alerts import DEFAULT_RULE_METADATA_TTL
+        from py42.services.alerts import RuleMetadataIndex
+
+        if ttl is None:
+            ttl = DEFAULT_RULE_METADATA_TTL
+        if min_refresh_interval is None:
+            min_refresh_interval = DEFAULT_RULE_METADATA_MIN_REFRESH_INTERVAL
+        self._metadata_index = RuleMetadataIndex(
+            self._alerts_service, ttl=ttl, min_refresh_interval=min_refresh_interval
+        )
+        return self._metadata_index
+
+    def disable_metadata_index(self):
+        """Makes :meth:`get_metadata_by_observer_id()` and
+        :meth:`get_all_metadata_by_name()` query the rule metadata on every call again."""
+        self._metadata_index = None
 
     @property
     def exfiltration(self):
@@ -48,7 +95,7 @@ class AlertRulesClient(object):
         try:
             return self._alert_rules_service.add_user(rule_id, user_id)
         except Py42InternalServerError as err:
-            rules = self.get_by_observer_id(rule_id)[u"ruleMetadata"]
+            rules = self._get_rules_for_system_check(rule_id)
             _check_if_system_rule(err, rules)
             raise
 
@@ -65,10 +112,69 @@ class AlertRulesClient(object):
         try:
             return self._alert_rules_service.remove_user(rule_id, user_id)
         except Py42InternalServerError as err:
-            rules = self.get_by_observer_id(rule_id)[u"ruleMetadata"]
+            rules = self._get_rules_for_system_check(rule_id)
             _check_if_system_rule(err, rules)
             raise
 
+    def add_users(self, rule_id, user_ids, batch_size=None, max_workers=None):
+        """Update alert rule to monitor the aliases of many users, fetching their profiles
+        concurrently and adding them in batches that run concurrently.
+
+        Args:
+            rule_id (str): Observer Id of a rule to be updated.
+            user_ids (iter[str]): The Code42 userUids of the users to add to the alert.
+            batch_size (int, optional): The maximum number of users in one request.
+                Defaults to 100.
+            max_workers (int, optional): The number of requests run at once. Defaults to 4.
+
+        Returns:
+            list: A :class:`py42.services.alertrules.AlertRuleUsersResult` for each batch,
+            with the ``user_ids`` of the batch and the ``error`` that failed it, or None.
+        """
+        return self._alert_rules_service.add_users(
+            rule_id,
+            user_ids,
+            batch_size=batch_size,
+            max_workers=max_workers,
+            check_error=self._create_system_rule_check(rule_id),
+        )
+
+    def remove_users(self, rule_id, user_ids, batch_size=None, max_workers=None):
+        """Update alert rule criteria to remove many users and all their aliases from a rule,
+        in batches that run concurrently.
+
+        Args:
+            rule_id (str): Observer rule Id of a rule to be updated.
+            user_ids (iter[str]): The Code42 userUids of the users to remove from the alert.
+            batch_size (int, optional): The maximum number of users in one request.
+                Defaults to 100.
+            max_workers (int, optional): The number of requests run at once. Defaults to 4.
+
+        Returns:
+            list: A :class:`py42.services.alertrules.AlertRuleUsersResult` for each batch,
+            with the ``user_ids`` of the batch and the ``error`` that failed it, or None.
+        """
+        return self._alert_rules_service.remove_users(
+            rule_id,
+            user_ids,
+            batch_size=batch_size,
+            max_workers=max_workers,
+            check_error=self._create_system_rule_check(rule_id),
+        )
+
+    def _create_system_rule_check(self, rule_id):
+        # batches fail concurrently, so the rule type is looked up once for all of them
+        lock = Lock()
+        rules = []
+
+        def check(error):
+            with lock:
+                if not rules:
+                    rules.append(self._get_rules_for_system_check(rule_id))
+            _check_if_system_rule(error, rules[0])
+
+        return check
+
     def remove_all_users(self, rule_id):
         """Update alert rule criteria to remove all users the from the alert rule.
 
@@ -81,7 +187,7 @@ class AlertRulesClient(object):
         try:
             return self._alert_rules_service.remove_all_users(rule_id)
         except Py42InternalServerError as err:
-            rules = self.get_by_observer_id(rule_id)[u"ruleMetadata"]
+            rules = self._get_rules_for_system_check(rule_id)
             _check_if_system_rule(err, rules)
             raise
 
@@ -151,6 +257,45 @@ class AlertRulesClient(object):
         """
         return self._alerts_service.get_rule_by_observer_id(observer_id)
 
+    def get_metadata_by_observer_id(self, observer_id):
+        """Gets the metadata of the rule with the matching observer ID, from the metadata
+        index when it is enabled.
+
+        Args:
+            observer_id (str): The observer ID of the rule to return.
+
+        Returns:
+            dict: The rule metadata, or None if there is no such rule.
+        """
+        index = self._metadata_index
+        if index is not None:
+            return index.get_by_observer_id(observer_id)
+        rules = self.get_by_observer_id(observer_id)[u"ruleMetadata"]
+        return rules[0] if rules else None
+
+    def get_all_metadata_by_name(self, rule_name):
+        """Gets the metadata of the rules with a matching name, from the metadata index when
+        it is enabled.
+
+        Args:
+            rule_name (str): Rule name to search for, case insensitive search.
+
+        Returns:
+            list: The rule metadata dicts.
+        """
+        index = self._metadata_index
+        if index is not None:
+            return index.get_all_by_name(rule_name)
+        return [
+            rule
+            for page in self.get_all_by_name(rule_name)
+            for rule in page[u"ruleMetadata"]
+        ]
+
+    def _get_rules_for_system_check(self, rule_id):
+        rule = self.get_metadata_by_observer_id(rule_id)
+        return [rule] if rule is not None else []
+
 
 def _check_if_system_rule(base_err, rules):
     """You cannot add or remove users from system rules this way; use the specific
@@ -29,18 +29,88 @@ class AlertsClient(object):
         """
         return self._alert_service.search(query)
 
-    def get_details(self, alert_ids):
+    def search_chunked(self, query, max_values=None, max_workers=None):
+        """Searches all alerts matching the given
+        :class:`py42.sdk.queries.alerts.alert_query.AlertQuery`, splitting ``is_in`` and
+        ``not_in`` filter groups with more values than a single request should carry across
+        several requests that run concurrently. At most 100 requests are split off, and a
+        split request matching more than 10,000 alerts is split into time windows.
+
+        Args:
+            query (:class:`py42.sdk.queries.alerts.alert_query.AlertQuery`): An alert query.
+            max_values (int, optional): The maximum number of values of an ``is_in`` or
+                ``not_in`` group in one request. Defaults to 1000.
+            max_workers (int, optional): The number of split requests started at once.
+                Defaults to 4.
+
+        Returns:
+            generator: An object that iterates over alert dicts, de-duplicated by ID.
+        """
+        return self._alert_service.search_chunked(
+            query, max_values=max_values, max_workers=max_workers
+        )
+
+    def search_all(self, query, max_workers=None, max_results=None):
+        """Searches every alert matching the given
+        :class:`py42.sdk.queries.alerts.alert_query.AlertQuery`, paging through the results
+        with the following pages fetched concurrently. When more alerts match than can be
+        paged through, the search is split into ``createdAt`` time windows.
+
+        Args:
+            query (:class:`py42.sdk.queries.alerts.alert_query.AlertQuery`): An alert query.
+            max_workers (int, optional): The number of pages fetched at once. Defaults to 4.
+            max_results (int, optional): The maximum number of alerts paged through for one
+                search before it is split into time windows. Defaults to 10000.
+
+        Returns:
+            generator: An object that iterates over alert dicts, de-duplicated by ID.
+        """
+        return self._alert_service.search_all(
+            query, max_workers=max_workers, max_results=max_results
+        )
+
+    def get_details(self, alert_ids, parse_observations=True):
         """Gets the details for the alerts with the given IDs, including the file event query that,
         when passed into a search, would result in events that could have triggered the alerts.
 
         Args:
             alert_ids (iter[str]): The identification numbers of the alerts for which you want to
                 get details for.
+            parse_observations (bool, optional): Whether to parse the JSON string ``data`` of
+                each observation into an object. Set to False to leave it as a str for
+                callers that do not need it, or to parse it only when needed. Defaults to True.
 
         Returns:
             :class:`py42.response.Py42Response`: A response containing the alert details.
         """
-        return self._alert_service.get_details(alert_ids)
+        return self._alert_service.get_details(
+            alert_ids, parse_observations=parse_observations
+        )
+
+    def get_details_chunked(
+        self, alert_ids, batch_size=None, max_workers=None, parse_observations=True
+    ):
+        """Gets the details for a large number of alerts, requesting them in batches that
+        run concurrently and yielding the alerts of each batch as it arrives.
+
+        Args:
+            alert_ids (iter[str]): The identification numbers of the alerts for which you want to
+                get details for.
+            batch_size (int, optional): The maximum number of IDs in one request. Defaults
+                to 100.
+            max_workers (int, optional): The number of requests run at once. Defaults to 4.
+            parse_observations (bool, optional): Whether to parse the JSON string ``data`` of
+                each observation into an object. Defaults to True.
+
+        Returns:
+            generator: An object that iterates over alert detail dicts.
+        """
+        return self._alert_service.get_details_chunked(
+            alert_ids,
+            batch_size=batch_size,
+            max_workers=max_workers,
+            parse_observations=parse_observations,
+        )
 
     def resolve(self, alert_ids, reason=None):
         """Resolves the alerts with the given IDs.
@@ -80,3 +150,39 @@ class AlertsClient(object):
             :class:`py42.response.Py42Response`
         """
         return self._alert_service.update_state(status, alert_ids, note=note)
+
+    def bulk_update_state(
+        self,
+        status,
+        alert_ids,
+        note=None,
+        batch_size=None,
+        max_workers=None,
+        requests_per_second=None,
+    ):
+        """Updates the status of many alerts, such as resolving thousands of stale alerts with
+        :attr:`AlertState.DISMISSED`. The IDs are sent in batches that run concurrently, and a
+        failed batch is split in half and each half retried once.
+
+        Args:
+            status (str): Status to set from OPEN, RESOLVED, PENDING, IN_PROGRESS
+            alert_ids (iter[str]): The identification numbers for the alerts to update.
+            note (str, optional): User note regarding the status. Defaults to None.
+            batch_size (int, optional): The maximum number of IDs in one request. Defaults
+                to 100.
+            max_workers (int, optional): The number of requests run at once. Defaults to 4.
+            requests_per_second (float, optional): The maximum rate of requests. Defaults to
+                None, for no limit.
+
+        Returns:
+            list: A :class:`py42.services.alerts.AlertStateUpdateResult` for each batch, with
+            the ``alert_ids`` of the batch and the ``error`` that failed it, or None.
+        """
+        return self._alert_service.bulk_update_state(
+            status,
+            alert_ids,
+            note=note,
+            batch_size=batch_size,
+            max_workers=max_workers,
+            requests_per_second=requests_per_second,
+        )
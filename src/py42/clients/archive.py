@@ -76,15 +76,17 @@ class ArchiveClient(object):
 
             stream_response = sdk.archive.stream_from_backup("/full/path/to/file.txt", "1234567890")
             with open("/path/to/my/file", "wb") as f:
-                for chunk in stream_response.iter_content(chunk_size=128):
-                    if chunk:
-                        f.write(chunk)
+                for chunk in stream_response.iter_content_into():
+                    f.write(chunk)
 
         If downloading multiple files, you will need to unzip the results::
 
             import zipfile
             with zipfile.ZipFile("downloaded_directory.zip", "r") as zf:
                 zf.extractall(".")
+
+        To extract multiple files without writing the zip to disk first, use
+        :meth:`extract_from_backup` instead.
         """
         archive_accessor = self._archive_accessor_manager.get_archive_accessor(
             device_guid,
@@ -96,6 +98,131 @@ class ArchiveClient(object):
             file_paths, file_size_calc_timeout=file_size_calc_timeout
         )
 
+    def download_from_backup(
+        self,
+        file_paths,
+        device_guid,
+        save_as,
+        destination_guid=None,
+        archive_password=None,
+        encryption_key=None,
+        file_size_calc_timeout=_FILE_SIZE_CALC_TIMEOUT,
+        progress_callback=None,
+    ):
+        """Downloads a file from a backup archive directly to disk in large chunks. If the
+        connection drops, the download resumes where it left off when the storage node supports
+        range requests. If downloading multiple files, the results will be zipped.
+        `REST Documentation <https://console.us.code42.com/apidocviewer/#WebRestoreJobResult-get>`__
+
+        Args:
+            file_paths (str or list of str): The path or list of paths to the files or directories in
+                your archive.
+            device_guid (str): The GUID of the device the file belongs to.
+            save_as (str): The path of the file to write the restored content to.
+            destination_guid (str, optional): The GUID of the destination that stores the backup
+                of the file. If None, it will use the first destination GUID it finds for your
+                device. Defaults to None.
+            archive_password (str or None, optional): The password for the archive, if password-
+                protected. Defaults to None.
+            encryption_key (str or None, optional): A custom encryption key for decrypting an archive's
+                file contents. Defaults to None.
+            file_size_calc_timeout (int, optional): Set to limit the amount of seconds spent calculating
+                file sizes when crafting the request. Set to 0 or None to ignore file sizes altogether.
+                Defaults to 10.
+            progress_callback (callable, optional): Called after each chunk is written with the
+                bytes written so far, the total bytes (or None if unknown), and the average bytes
+                per second. Defaults to None.
+
+        Returns:
+            :class:`py42.services.storage._download.DownloadResult`: A named tuple containing the
+            ``path``, ``size``, ``elapsed`` seconds and ``bytes_per_second`` of the download.
+
+        Usage example::
+
+            def print_progress(written, total, rate):
+                print("{} of {} bytes ({:.0f} B/s)".format(written, total, rate))
+
+            sdk.archive.download_from_backup(
+                "/full/path/to/file.txt",
+                "1234567890",
+                "/path/to/my/file",
+                progress_callback=print_progress,
+            )
+        """
+        archive_accessor = self._archive_accessor_manager.get_archive_accessor(
+            device_guid,
+            destination_guid=destination_guid,
+            private_password=archive_password,
+            encryption_key=encryption_key,
+        )
+        return archive_accessor.download_from_backup(
+            file_paths,
+            save_as,
+            file_size_calc_timeout=file_size_calc_timeout,
+            progress_callback=progress_callback,
+        )
+
+    def extract_from_backup(
+        self,
+        file_paths,
+        device_guid,
+        extract_to=None,
+        entry_callback=None,
+        destination_guid=None,
+        archive_password=None,
+        encryption_key=None,
+        file_size_calc_timeout=_FILE_SIZE_CALC_TIMEOUT,
+    ):
+        """Restores files from a backup archive and extracts them from the zipped restore stream
+        as it arrives, without staging the full zip on disk. Each file is written under
+        ``extract_to`` or handed to ``entry_callback``.
+        `REST Documentation <https://console.us.code42.com/apidocviewer/#WebRestoreJobResult-get>`__
+
+        Args:
+            file_paths (str or list of str): The path or list of paths to the files or directories in
+                your archive.
+            device_guid (str): The GUID of the device the file belongs to.
+            extract_to (str, optional): The directory to write the restored files to. Defaults
+                to None.
+            entry_callback (callable, optional): Called for each restored file with its path in the
+                zip and an iterator over its bytes, instead of writing it under ``extract_to``.
+                Defaults to None.
+            destination_guid (str, optional): The GUID of the destination that stores the backup
+                of the file. If None, it will use the first destination GUID it finds for your
+                device. Defaults to None.
+            archive_password (str or None, optional): The password for the archive, if password-
+                protected. Defaults to None.
+            encryption_key (str or None, optional): A custom encryption key for decrypting an archive's
+                file contents. Defaults to None.
+            file_size_calc_timeout (int, optional): Set to limit the amount of seconds spent calculating
+                file sizes when crafting the request. Set to 0 or None to ignore file sizes altogether.
+                Defaults to 10.
+
+        Returns:
+            list[:class:`py42.services.storage._zipstream.ZipStreamEntry`]: The ``name``, written
+            ``path`` and ``size`` of each restored file.
+
+        Usage example::
+
+            sdk.archive.extract_from_backup(
+                ["/Users/qa/Documents", "/Users/qa/Desktop/notes.txt"],
+                "1234567890",
+                extract_to="/path/to/restore/dir",
+            )
+        """
+        archive_accessor = self._archive_accessor_manager.get_archive_accessor(
+            device_guid,
+            destination_guid=destination_guid,
+            private_password=archive_password,
+            encryption_key=encryption_key,
+        )
+        return archive_accessor.extract_from_backup(
+            file_paths,
+            extract_to=extract_to,
+            entry_callback=entry_callback,
+            file_size_calc_timeout=file_size_calc_timeout,
+        )
+
     def get_backup_sets(self, device_guid, destination_guid):
         """Gets all backup set names/identifiers referring to a single destination for a specific
         device.
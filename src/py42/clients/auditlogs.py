@@ -95,3 +95,115 @@ class AuditLogsClient(object):
             affected_usernames=affected_usernames,
             **kwargs
         )
+
+    def get_all_in_time_windows(
+        self,
+        begin_time,
+        end_time,
+        windows=None,
+        max_workers=None,
+        event_types=None,
+        user_ids=None,
+        usernames=None,
+        user_ip_addresses=None,
+        affected_user_ids=None,
+        affected_usernames=None,
+        **kwargs
+    ):
+        """Retrieve the audit logs from ``begin_time`` to ``end_time``, filtered based on given
+        arguments, by splitting the time range into windows that are paged through
+        concurrently. The events of every window are yielded in one newest-first stream,
+        with at most two pages of each window read ahead held in memory. Adjacent windows
+        share the millisecond between them, and the events returned by both are yielded once.
+
+        Args:
+            begin_time (int or float or str or datetime): Timestamp in seconds or
+                str format "yyyy-MM-DD HH:MM:SS" or a datetime instance.
+            end_time (int or float or str or datetime): Timestamp in seconds or
+                str format "yyyy-MM-DD HH:MM:SS" or a datetime instance.
+            windows (int, optional): The number of windows to split the time range into.
+                Defaults to 8.
+            max_workers (int, optional): The number of windows paged through at once.
+                Defaults to 4.
+            event_types (str or list, optional): A str or list of str of valid event types. Defaults to None.
+            user_ids (str or list, optional): A str or list of str of Code42 userUids. Defaults to None.
+            usernames (str or list, optional): A str or list of str of Code42 usernames. Defaults to None.
+            user_ip_addresses (str or list, optional): A str or list of str of user ip addresses. Defaults to None.
+            affected_user_ids (str or list, optional): A str or list of str of affected Code42 userUids. Defaults to None.
+            affected_usernames  (str or list, optional): A str or list of str of affected Code42 usernames. Defaults to None.
+
+        Returns:
+            generator: An object that iterates over audit log event dicts.
+        """
+        return self._audit_log_service.get_all_in_time_windows(
+            begin_time,
+            end_time,
+            windows=windows,
+            max_workers=max_workers,
+            event_types=event_types,
+            user_ids=user_ids,
+            usernames=usernames,
+            user_ip_addresses=user_ip_addresses,
+            affected_user_ids=affected_user_ids,
+            affected_usernames=affected_usernames,
+            **kwargs
+        )
+
+    def export(
+        self,
+        output,
+        format=u"CSV",
+        page_size=None,
+        begin_time=None,
+        end_time=None,
+        event_types=None,
+        user_ids=None,
+        usernames=None,
+        user_ip_addresses=None,
+        affected_user_ids=None,
+        affected_usernames=None,
+        **kwargs
+    ):
+        """Export audit logs, filtered based on given arguments, in CSV or CEF format. Each page
+        is written to ``output`` as it is read from the response, without being parsed or held
+        in memory, which makes forwarding audit logs to a file or a SIEM socket cheap.
+
+        Usage example::
+
+            with open("audit_logs.csv", "wb") as f:
+                result = sdk.auditlogs.export(f, format="CSV", begin_time="2020-06-01 00:00:00")
+
+        Args:
+            output (file or socket): A binary file-like object with a ``write()`` method, or a
+                connected socket, which is written to with ``sendall()``.
+            format (str, optional): ``CSV`` or ``CEF``. Defaults to ``CSV``.
+            page_size (int, optional): The number of events per page. Defaults to `py42.settings.items_per_page`.
+            begin_time (int or float or str or datetime, optional): Timestamp in seconds or
+                str format "yyyy-MM-DD HH:MM:SS" or a datetime instance. Defaults to None.
+            end_time (int or float or str or datetime, optional): Timestamp in seconds or
+                str format "yyyy-MM-DD HH:MM:SS" or a datetime instance. Defaults to None.
+            event_types (str or list, optional): A str or list of str of valid event types. Defaults to None.
+            user_ids (str or list, optional): A str or list of str of Code42 userUids. Defaults to None.
+            usernames (str or list, optional): A str or list of str of Code42 usernames. Defaults to None.
+            user_ip_addresses (str or list, optional): A str or list of str of user ip addresses. Defaults to None.
+            affected_user_ids (str or list, optional): A str or list of str of affected Code42 userUids. Defaults to None.
+            affected_usernames  (str or list, optional): A str or list of str of affected Code42 usernames. Defaults to None.
+
+        Returns:
+            :class:`py42.services.auditlogs.AuditLogExportResult`: A named tuple of the number
+            of ``events`` exported and the number of ``bytes_written``.
+        """
+        return self._audit_log_service.export(
+            output,
+            format=format,
+            page_size=page_size,
+            begin_time=begin_time,
+            end_time=end_time,
+            event_types=event_types,
+            user_ids=user_ids,
+            usernames=usernames,
+            user_ip_addresses=user_ip_addresses,
+            affected_user_ids=affected_user_ids,
+            affected_usernames=affected_usernames,
+            **kwargs
+        )
@@ -0,0 +1,250 @@
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from threading import Lock
+
+DEFAULT_TTL = 60 * 60
+DEFAULT_NEGATIVE_TTL = 5 * 60
+DEFAULT_MAX_SIZE = 10000
+
+# the parts of a file version needed to request a download token and verify the download
+_VERSION_KEYS = (
+    u"storageNodeURL",
+    u"archiveGuid",
+    u"fileId",
+    u"versionTimestamp",
+    u"fileMD5",
+    u"fileSHA256",
+)
+
+
+class FileVersionCache(object):
+    """An in-memory cache of the file versions resolved for (MD5, SHA256) hash pairs when
+    streaming or downloading files from :class:`py42.clients.securitydata.SecurityDataClient`.
+    Hashes with no available version are cached too, so repeated lookups of a missing file
+    don't query the storage nodes again. A cached version is also found by either of its
+    hashes, so streaming a file by a hash that resolved before skips the forensic search.
+
+    Usage example::
+
+        sdk.securitydata.file_version_cache = FileVersionCache(ttl=600)
+
+    Args:
+        ttl (int, optional): Seconds a resolved version is kept. Defaults to 3600.
+        negative_ttl (int, optional): Seconds a hash pair with no available version is kept.
+            Defaults to 300.
+        max_size (int, optional): The number of hash pairs kept before the oldest are
+            evicted. Defaults to 10000.
+    """
+
+    def __init__(
+        self, ttl=DEFAULT_TTL, negative_ttl=DEFAULT_NEGATIVE_TTL, max_size=DEFAULT_MAX_SIZE
+    ):
+        self._ttl = ttl
+        self._negative_ttl = negative_ttl
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        self._keys_by_hash = {}
+        self._lock = Lock()
+
+    def get(self, md5, sha256):
+        """Gets the cached file version for the given hashes.
+
+        Args:
+            md5 (str): MD5 hash of the file.
+            sha256 (str): SHA256 hash of the file.
+
+        Returns:
+            dict: The ``storageNodeURL``, ``archiveGuid``, ``fileId``, ``versionTimestamp``,
+            ``fileMD5`` and ``fileSHA256`` of the version, or None if the hashes are cached as
+            having no available version.
+
+        Raises:
+            KeyError: When the hashes are not cached or their entry has expired.
+        """
+        key = _get_key(md5, sha256)
+        with self._lock:
+            entry = self._load(key)
+            if entry is None:
+                raise KeyError(key)
+            version, expires_at = entry
+            if expires_at <= time.time():
+                self._delete(key)
+                raise KeyError(key)
+            return version
+
+    def find(self, md5=None, sha256=None):
+        """Finds a cached, available file version by only one of its hashes, such as the hash
+        a file is requested by before its events are searched.
+
+        Args:
+            md5 (str, optional): MD5 hash of the file. Defaults to None.
+            sha256 (str, optional): SHA256 hash of the file, used when ``md5`` is not given.
+                Defaults to None.
+
+        Returns:
+            dict: The ``storageNodeURL``, ``archiveGuid``, ``fileId``, ``versionTimestamp``,
+            ``fileMD5`` and ``fileSHA256`` of the version.
+
+        Raises:
+            KeyError: When no unexpired, available version with the hash is cached.
+        """
+        if md5:
+            hash_key = (u"md5", md5.lower())
+        else:
+            hash_key = (u"sha256", (sha256 or u"").lower())
+        with self._lock:
+            key = self._find_key(hash_key)
+            entry = self._load(key) if key is not None else None
+            if entry is None or entry[0] is None:
+                raise KeyError(hash_key)
+            version, expires_at = entry
+            if expires_at <= time.time():
+                self._delete(key)
+                raise KeyError(hash_key)
+            return version
+
+    def set(self, md5, sha256, version):
+        """Caches the file version resolved for the given hashes.
+
+        Args:
+            md5 (str): MD5 hash of the file.
+            sha256 (str): SHA256 hash of the file.
+            version (dict or :class:`py42.response.Py42Response`): The resolved version, or
+                None when no version is available.
+        """
+        record = _get_version_record(version)
+        ttl = self._negative_ttl if record is None else self._ttl
+        with self._lock:
+            self._store(_get_key(md5, sha256), record, time.time() + ttl)
+
+    def clear(self):
+        """Removes every cached entry."""
+        with self._lock:
+            self._clear()
+
+    def _find_key(self, hash_key):
+        return self._keys_by_hash.get(hash_key)
+
+    def _load(self, key):
+        return self._entries.get(key)
+
+    def _store(self, key, record, expires_at):
+        self._entries.pop(key, None)
+        self._entries[key] = (record, expires_at)
+        if record is not None:
+            for hash_key in _get_hash_keys(key):
+                self._keys_by_hash[hash_key] = key
+        while len(self._entries) > self._max_size:
+            evicted, _ = self._entries.popitem(last=False)
+            self._unindex(evicted)
+
+    def _delete(self, key):
+        self._entries.pop(key, None)
+        self._unindex(key)
+
+    def _clear(self):
+        self._entries.clear()
+        self._keys_by_hash.clear()
+
+    def _unindex(self, key):
+        for hash_key in _get_hash_keys(key):
+            if self._keys_by_hash.get(hash_key) == key:
+                del self._keys_by_hash[hash_key]
+
+
+class DiskFileVersionCache(FileVersionCache):
+    """A :class:`FileVersionCache` kept in a SQLite database file, so resolved versions are
+    reused across processes and sessions.
+
+    Usage example::
+
+        sdk.securitydata.file_version_cache = DiskFileVersionCache("versions.db")
+
+    Args:
+        path (str): The path of the database file. It is created if it does not exist.
+        ttl (int, optional): Seconds a resolved version is kept. Defaults to 3600.
+        negative_ttl (int, optional): Seconds a hash pair with no available version is kept.
+            Defaults to 300.
+    """
+
+    def __init__(self, path, ttl=DEFAULT_TTL, negative_ttl=DEFAULT_NEGATIVE_TTL):
+        super(DiskFileVersionCache, self).__init__(ttl=ttl, negative_ttl=negative_ttl)
+        # access is serialized by the cache lock, so the connection is shared by threads
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                u"CREATE TABLE IF NOT EXISTS file_versions ("
+                u"md5 TEXT NOT NULL, sha256 TEXT NOT NULL, version TEXT, "
+                u"expires_at REAL NOT NULL, PRIMARY KEY (md5, sha256))"
+            )
+            self._db.execute(
+                u"CREATE INDEX IF NOT EXISTS file_versions_sha256 "
+                u"ON file_versions (sha256)"
+            )
+
+    def close(self):
+        """Closes the database file."""
+        with self._lock:
+            self._db.close()
+
+    def _find_key(self, hash_key):
+        # the column name comes from find(), never from the caller
+        column, value = hash_key
+        row = self._db.execute(
+            u"SELECT md5, sha256 FROM file_versions "
+            u"WHERE {} = ? AND version IS NOT NULL "
+            u"ORDER BY expires_at DESC LIMIT 1".format(column),
+            (value,),
+        ).fetchone()
+        return tuple(row) if row is not None else None
+
+    def _load(self, key):
+        row = self._db.execute(
+            u"SELECT version, expires_at FROM file_versions WHERE md5 = ? AND sha256 = ?",
+            key,
+        ).fetchone()
+        if row is None:
+            return None
+        version, expires_at = row
+        return (json.loads(version) if version is not None else None), expires_at
+
+    def _store(self, key, record, expires_at):
+        version = None if record is None else json.dumps(record)
+        with self._db:
+            self._db.execute(
+                u"INSERT OR REPLACE INTO file_versions VALUES (?, ?, ?, ?)",
+                key + (version, expires_at),
+            )
+
+    def _delete(self, key):
+        with self._db:
+            self._db.execute(
+                u"DELETE FROM file_versions WHERE md5 = ? AND sha256 = ?", key
+            )
+
+    def _clear(self):
+        with self._db:
+            self._db.execute(u"DELETE FROM file_versions")
+
+
+def _get_key(md5, sha256):
+    return (md5 or u"").lower(), (sha256 or u"").lower()
+
+
+def _get_hash_keys(key):
+    md5, sha256 = key
+    return [hash_key for hash_key in ((u"md5", md5), (u"sha256", sha256)) if hash_key[1]]
+
+
+def _get_version_record(version):
+    if version is None:
+        return None
+    record = {}
+    for key in _VERSION_KEYS:
+        try:
+            record[key] = version[key]
+        except KeyError:
+            pass
+    return record
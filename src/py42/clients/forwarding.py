@@ -0,0 +1,687 @@
+"""Forwards audit logs, file events and alerts to a SIEM.
+
+A :class:`ForwardingPipeline` reads events from a source, renders each one with a
+formatter and sends them in batches to a sink::
+
+    source = AlertSource(sdk.alerts)
+    sink = SyslogSink("siem.example.com", port=6514, protocol="tls")
+    pipeline = ForwardingPipeline(source, CefFormatter(), sink, "checkpoints.json")
+    pipeline.run()
+
+Delivery is at-least-once: a run resumes from the checkpoint of the last event sent,
+inclusive, so events sharing its timestamp are sent again.
+"""
+import copy
+import json
+import os
+import re
+import socket
+import ssl
+import time
+from collections import namedtuple
+from datetime import datetime
+from threading import Event
+from threading import local
+from threading import Lock
+from threading import Thread
+
+import requests
+
+from py42.__version__ import __version__
+from py42._compat import queue
+from py42._compat import str
+from py42._compat import string_type
+from py42._concurrency import DEFAULT_MAX_WORKERS
+from py42._concurrency import iter_batches
+from py42.sdk.queries.alerts.alert_query import AlertQuery
+from py42.sdk.queries.alerts.filters import DateObserved
+from py42.sdk.queries.fileevents.file_event_query import FileEventQuery
+from py42.sdk.queries.fileevents.filters import InsertionTimestamp
+from py42.services._time_windows import parse_timestamp
+from py42.settings import debug
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_QUEUE_SIZE = 8
+DEFAULT_MAX_RETRIES = 3
+
+_RETRY_DELAY = 0.5
+_MAX_RETRY_DELAY = 30
+_STOP = object()
+
+ForwardingResult = namedtuple(u"ForwardingResult", u"events, batches, checkpoint")
+
+
+class AuditLogSource(object):
+    """Reads audit log events.
+
+    The server returns audit log events newest first, so the checkpoint of a run is only
+    saved once all of its events were sent.
+
+    Args:
+        auditlogs_client (:class:`py42.clients.auditlogs.AuditLogsClient`): The client to
+            read events with, such as ``sdk.auditlogs``.
+        begin_time (int or float or str or datetime, optional): Where the first run starts
+            when there is no checkpoint. Defaults to None, for every event.
+        name (str, optional): The key of the checkpoint. Defaults to ``auditlogs``.
+        **filters: Passed to ``get_all()``, such as ``event_types``.
+    """
+
+    ordered = False
+
+    def __init__(self, auditlogs_client, begin_time=None, name=u"auditlogs", **filters):
+        self.name = name
+        self._client = auditlogs_client
+        self._begin_time = begin_time
+        self._filters = filters
+
+    def iter_events(self, checkpoint):
+        """Iterates over the events from ``checkpoint`` on, or from the beginning if None."""
+        begin_time = (
+            self._begin_time if checkpoint is None else parse_timestamp(checkpoint)
+        )
+        for page in self._client.get_all(begin_time=begin_time, **self._filters):
+            for event in page[u"events"]:
+                yield event
+
+    def get_checkpoint(self, event):
+        """Returns the checkpoint of an event, which orders events the way they are read."""
+        return _to_checkpoint(event.get(u"timestamp"))
+
+
+class FileEventSource(object):
+    """Reads file events in the order they were added to the event store.
+
+    A search pages through at most the first 10,000 results, so instead of paging deeper
+    each search starts on or after the ``insertionTimestamp`` of the last event read,
+    skipping the events at that timestamp that were already read.
+
+    Args:
+        securitydata_client (:class:`py42.clients.securitydata.SecurityDataClient`): The
+            client to search with, such as ``sdk.securitydata``.
+        query (:class:`py42.sdk.queries.fileevents.file_event_query.FileEventQuery`,
+            optional): A query whose filter groups, joined with ``AND``, limit the events
+            read. Defaults to None, for every event.
+        name (str, optional): The key of the checkpoint. Defaults to ``fileevents``.
+    """
+
+    ordered = True
+
+    def __init__(self, securitydata_client, query=None, name=u"fileevents"):
+        self.name = name
+        self._client = securitydata_client
+        self._query = query
+
+    def iter_events(self, checkpoint):
+        """Iterates over the events from ``checkpoint`` on, or from the beginning if None."""
+        bound = checkpoint
+        # IDs of the events read whose timestamp is the bound
+        bound_event_ids = set()
+        page_number = 1
+        while True:
+            query = _create_query(
+                self._query or FileEventQuery(), InsertionTimestamp, bound
+            )
+            query.sort_key = u"insertionTimestamp"
+            query.sort_direction = u"asc"
+            query.page_number = page_number
+            events = self._client.search_file_events(query)[u"fileEvents"]
+            for event in events:
+                if event.get(u"eventId") not in bound_event_ids:
+                    yield event
+            if len(events) < query.page_size:
+                return
+            last = self.get_checkpoint(events[-1])
+            if last == bound:
+                # a whole page at one timestamp can't move the bound, so page within it
+                page_number += 1
+            else:
+                bound = last
+                bound_event_ids = set()
+                page_number = 1
+            bound_event_ids.update(
+                event.get(u"eventId")
+                for event in events
+                if self.get_checkpoint(event) == bound
+            )
+
+    def get_checkpoint(self, event):
+        """Returns the checkpoint of an event, which orders events the way they are read."""
+        return _to_checkpoint(event.get(u"insertionTimestamp"))
+
+
+class AlertSource(object):
+    """Reads alerts in the order they were created.
+
+    Args:
+        alerts_client (:class:`py42.clients.alerts.AlertsClient`): The client to search
+            with, such as ``sdk.alerts``.
+        query (:class:`py42.sdk.queries.alerts.alert_query.AlertQuery`, optional): A query
+            whose filter groups, joined with ``AND``, limit the alerts read. Defaults to
+            None, for every alert.
+        name (str, optional): The key of the checkpoint. Defaults to ``alerts``.
+    """
+
+    ordered = True
+
+    def __init__(self, alerts_client, query=None, name=u"alerts"):
+        self.name = name
+        self._client = alerts_client
+        self._query = query
+
+    def iter_events(self, checkpoint):
+        """Iterates over the alerts from ``checkpoint`` on, or from the beginning if None."""
+        query = _create_query(self._query or AlertQuery(), DateObserved, checkpoint)
+        query.sort_key = u"CreatedAt"
+        query.sort_direction = u"asc"
+        return self._client.search_all(query)
+
+    def get_checkpoint(self, event):
+        """Returns the checkpoint of an alert, which orders alerts the way they are read."""
+        return _to_checkpoint(event.get(u"createdAt"))
+
+
+class JsonFormatter(object):
+    """Formats each event as one line of compact JSON."""
+
+    def format(self, event):
+        return json.dumps(event, sort_keys=True, separators=(u",", u":"))
+
+
+class CefFormatter(object):
+    """Formats each event as an ArcSight Common Event Format (CEF) line. Every top-level
+    field of the event becomes an extension field, with dicts and lists encoded as JSON.
+
+    Args:
+        vendor (str, optional): The device vendor. Defaults to ``Code42``.
+        product (str, optional): The device product. Defaults to ``py42``.
+        version (str, optional): The device version. Defaults to the py42 version.
+    """
+
+    def __init__(self, vendor=u"Code42", product=u"py42", version=__version__):
+        self._header = [u"CEF:0"] + [
+            _escape_cef_header(v) for v in (vendor, product, version)
+        ]
+
+    def format(self, event):
+        event_type = _get_event_type(event)
+        header = self._header + [
+            _escape_cef_header(event_type),
+            _escape_cef_header(event.get(u"name") or event_type),
+            str(_get_cef_severity(event)),
+        ]
+        extension = u" ".join(
+            u"{}={}".format(key, _escape_cef_value(value))
+            for key, value in _iter_fields(event)
+        )
+        return u"|".join(header) + u"|" + extension
+
+
+class LeefFormatter(object):
+    """Formats each event as an IBM QRadar Log Event Extended Format (LEEF) 2.0 line of
+    tab-delimited attributes. Every top-level field of the event becomes an attribute,
+    with dicts and lists encoded as JSON.
+
+    Args:
+        vendor (str, optional): The vendor. Defaults to ``Code42``.
+        product (str, optional): The product. Defaults to ``py42``.
+        version (str, optional): The product version. Defaults to the py42 version.
+    """
+
+    def __init__(self, vendor=u"Code42", product=u"py42", version=__version__):
+        self._header = [u"LEEF:2.0"] + [
+            _escape_leef_header(v) for v in (vendor, product, version)
+        ]
+
+    def format(self, event):
+        header = self._header + [_escape_leef_header(_get_event_type(event)), u"x09"]
+        attributes = u"\t".join(
+            u"{}={}".format(key, _LEEF_SPECIAL_CHARACTERS.sub(u" ", value))
+            for key, value in _iter_fields(event)
+        )
+        return u"|".join(header) + u"|" + attributes
+
+
+class SyslogSink(object):
+    """Sends messages to a syslog collector in RFC 5424 format. Over TCP and TLS each
+    message is terminated by a newline, and each worker thread keeps its own connection,
+    reconnecting after an error.
+
+    Args:
+        host (str): The host name of the collector.
+        port (int, optional): The port of the collector. Defaults to 514.
+        protocol (str, optional): ``udp``, ``tcp`` or ``tls``. Defaults to ``udp``.
+        ssl_context (:class:`ssl.SSLContext`, optional): The context to connect over TLS
+            with. Defaults to one that verifies the collector's certificate.
+        facility (int, optional): The syslog facility of the messages. Defaults to 1, for
+            user-level messages.
+        app_name (str, optional): The APP-NAME of the messages. Defaults to ``py42``.
+        timeout (float, optional): The socket timeout in seconds. Defaults to 30.
+    """
+
+    def __init__(
+        self,
+        host,
+        port=514,
+        protocol=u"udp",
+        ssl_context=None,
+        facility=1,
+        app_name=u"py42",
+        timeout=30,
+    ):
+        protocol = protocol.lower()
+        if protocol not in (u"udp", u"tcp", u"tls"):
+            raise ValueError(u"Unsupported syslog protocol {}.".format(protocol))
+        if protocol == u"tls" and ssl_context is None:
+            ssl_context = ssl.create_default_context()
+        self._address = (host, port)
+        self._protocol = protocol
+        self._ssl_context = ssl_context
+        # informational severity
+        self._prefix = u"<{}>1 ".format(facility * 8 + 6)
+        self._suffix = u" {} {} - - - ".format(socket.gethostname() or u"-", app_name)
+        self._timeout = timeout
+        self._local = local()
+        self._sockets = []
+        self._lock = Lock()
+
+    def send(self, messages):
+        """Sends a batch of messages."""
+        timestamp = datetime.utcnow().strftime(u"%Y-%m-%dT%H:%M:%S.%fZ")
+        frames = [
+            (self._prefix + timestamp + self._suffix + message).encode(u"utf-8")
+            for message in messages
+        ]
+        sock = self._get_socket()
+        try:
+            if self._protocol == u"udp":
+                for frame in frames:
+                    sock.sendto(frame, self._address)
+            else:
+                sock.sendall(b"\n".join(frames) + b"\n")
+        except Exception:
+            self._close_socket(sock)
+            raise
+
+    def close(self):
+        """Closes the connections of every thread."""
+        with self._lock:
+            sockets = self._sockets
+            self._sockets = []
+        for sock in sockets:
+            sock.close()
+
+    def _get_socket(self):
+        sock = getattr(self._local, u"socket", None)
+        if sock is None:
+            sock = self._connect()
+            self._local.socket = sock
+            with self._lock:
+                self._sockets.append(sock)
+        return sock
+
+    def _connect(self):
+        if self._protocol == u"udp":
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.settimeout(self._timeout)
+            return sock
+        sock = socket.create_connection(self._address, timeout=self._timeout)
+        if self._protocol == u"tls":
+            sock = self._ssl_context.wrap_socket(sock, server_hostname=self._address[0])
+        return sock
+
+    def _close_socket(self, sock):
+        self._local.socket = None
+        with self._lock:
+            if sock in self._sockets:
+                self._sockets.remove(sock)
+        sock.close()
+
+
+class FileSink(object):
+    """Appends messages to a file, one per line.
+
+    Args:
+        path (str): The path of the file. It is created if it does not exist.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, u"ab")
+        self._lock = Lock()
+
+    def send(self, messages):
+        """Appends a batch of messages."""
+        data = u"".join(message + u"\n" for message in messages).encode(u"utf-8")
+        with self._lock:
+            self._file.write(data)
+            self._file.flush()
+
+    def close(self):
+        """Closes the file."""
+        with self._lock:
+            self._file.close()
+
+
+class HttpSink(object):
+    """Posts each batch of messages to an HTTP collector as one newline-delimited body.
+
+    Args:
+        url (str): The URL to post to.
+        headers (dict, optional): Headers of each request, such as an ``Authorization``
+            header. Defaults to None.
+        session (:class:`requests.Session`, optional): The session to post with, which
+            pools connections across the worker threads. Defaults to a new session.
+        timeout (float, optional): The request timeout in seconds. Defaults to 30.
+    """
+
+    def __init__(self, url, headers=None, session=None, timeout=30):
+        self._url = url
+        self._headers = {u"Content-Type": u"text/plain; charset=utf-8"}
+        self._headers.update(headers or {})
+        self._session = session or requests.Session()
+        self._timeout = timeout
+
+    def send(self, messages):
+        """Posts a batch of messages, raising an error unless the collector accepts it."""
+        data = u"\n".join(messages).encode(u"utf-8")
+        response = self._session.post(
+            self._url, data=data, headers=self._headers, timeout=self._timeout
+        )
+        response.raise_for_status()
+
+    def close(self):
+        """Closes the session."""
+        self._session.close()
+
+
+class ForwardingPipeline(object):
+    """Reads events from a source, formats them and sends them to a sink in batches on a
+    pool of worker threads.
+
+    Formatted batches wait in a bounded queue for a worker, so reading pauses while the
+    sink falls behind, and memory stays bounded. A batch that fails to send is retried
+    with a growing delay; once its retries run out the run stops and the error is raised.
+
+    After each run, and after each batch for sources that read events in order, the
+    checkpoint of the newest event sent is saved, and the next run resumes from it.
+
+    Args:
+        source: Where events are read from, such as an :class:`AlertSource`,
+            :class:`FileEventSource` or :class:`AuditLogSource`.
+        formatter: Renders each event as a str, such as a :class:`JsonFormatter`,
+            :class:`CefFormatter` or :class:`LeefFormatter`.
+        sink: Where batches are sent, such as a :class:`SyslogSink`, :class:`FileSink` or
+            :class:`HttpSink`. Its ``send()`` is called from several threads at once.
+        checkpoint_path (str, optional): The path of a JSON file of checkpoints, keyed by
+            source name, which can be shared by pipelines of differently named sources.
+            Defaults to None, to always start from the beginning.
+        batch_size (int, optional): The number of events sent at once. Defaults to 500.
+        queue_size (int, optional): The number of formatted batches waiting to be sent
+            before reading pauses. Defaults to 8.
+        max_workers (int, optional): The number of batches sent at once. Defaults to 4.
+        max_retries (int, optional): The number of times a failed batch is sent again.
+            Defaults to 3.
+    """
+
+    def __init__(
+        self,
+        source,
+        formatter,
+        sink,
+        checkpoint_path=None,
+        batch_size=None,
+        queue_size=None,
+        max_workers=None,
+        max_retries=None,
+    ):
+        self._source = source
+        self._formatter = formatter
+        self._sink = sink
+        self._checkpoints = _CheckpointFile(checkpoint_path)
+        self._batch_size = batch_size or DEFAULT_BATCH_SIZE
+        self._queue_size = queue_size or DEFAULT_QUEUE_SIZE
+        self._max_workers = max_workers or DEFAULT_MAX_WORKERS
+        self._max_retries = (
+            DEFAULT_MAX_RETRIES if max_retries is None else max_retries
+        )
+
+    @property
+    def checkpoint(self):
+        """The checkpoint the next run resumes from, or None to start from the beginning."""
+        return self._checkpoints.get(self._source.name)
+
+    def run(self):
+        """Forwards the events since the checkpoint.
+
+        Returns:
+            :class:`ForwardingResult`: A named tuple of the number of ``events`` and
+            ``batches`` sent and the ``checkpoint`` saved.
+        """
+        progress = _Progress(self._source, self._checkpoints)
+        batches = queue.Queue(self._queue_size)
+        failed = Event()
+        workers = [
+            Thread(target=self._work, args=(batches, progress, failed))
+            for _ in range(self._max_workers)
+        ]
+        for worker in workers:
+            worker.daemon = True
+            worker.start()
+
+        try:
+            events = self._source.iter_events(self.checkpoint)
+            for number, batch in enumerate(iter_batches(events, self._batch_size)):
+                if failed.is_set():
+                    break
+                messages = [self._formatter.format(event) for event in batch]
+                checkpoint = _get_newest(self._source.get_checkpoint, batch)
+                # blocks while the queue is full, pausing the source
+                batches.put((number, messages, checkpoint))
+        finally:
+            for _ in workers:
+                batches.put(_STOP)
+            for worker in workers:
+                worker.join()
+
+        if progress.error is not None:
+            raise progress.error
+        return progress.finish()
+
+    def _work(self, batches, progress, failed):
+        while True:
+            item = batches.get()
+            if item is _STOP:
+                return
+            if failed.is_set():
+                # keep draining so the source is never blocked on a full queue
+                continue
+            number, messages, checkpoint = item
+            try:
+                self._send(messages)
+            except Exception as ex:
+                progress.fail(ex)
+                failed.set()
+            else:
+                progress.complete(number, len(messages), checkpoint)
+
+    def _send(self, messages):
+        retries = 0
+        while True:
+            try:
+                self._sink.send(messages)
+                return
+            except Exception as ex:
+                if retries >= self._max_retries:
+                    raise
+                delay = min(_RETRY_DELAY * 2 ** retries, _MAX_RETRY_DELAY)
+                retries += 1
+                debug.logger.info(
+                    u"Sending {} events failed, retrying in {}s: {}".format(
+                        len(messages), delay, ex
+                    )
+                )
+                time.sleep(delay)
+
+
+class _Progress(object):
+    # batches complete out of order, so a checkpoint is only saved once every batch before
+    # it was sent too
+    def __init__(self, source, checkpoints):
+        self.error = None
+        self._source = source
+        self._checkpoints = checkpoints
+        self._completed = {}
+        self._next_number = 0
+        self._events = 0
+        self._checkpoint = None
+        self._lock = Lock()
+
+    def complete(self, number, events, checkpoint):
+        with self._lock:
+            self._completed[number] = (events, checkpoint)
+            advanced = False
+            while self._next_number in self._completed:
+                events, checkpoint = self._completed.pop(self._next_number)
+                self._next_number += 1
+                self._events += events
+                self._checkpoint = _max(self._checkpoint, checkpoint)
+                advanced = True
+            if advanced and self._source.ordered:
+                self._save()
+
+    def fail(self, error):
+        with self._lock:
+            if self.error is None:
+                self.error = error
+
+    def finish(self):
+        with self._lock:
+            self._save()
+            return ForwardingResult(
+                self._events,
+                self._next_number,
+                self._checkpoints.get(self._source.name),
+            )
+
+    def _save(self):
+        if self._checkpoint is not None:
+            self._checkpoints.set(self._source.name, self._checkpoint)
+
+
+class _CheckpointFile(object):
+    def __init__(self, path):
+        self._path = path
+        self._checkpoints = {}
+        self._lock = Lock()
+        if path is not None and os.path.exists(path):
+            with open(path) as f:
+                self._checkpoints = json.load(f)
+
+    def get(self, name):
+        with self._lock:
+            return self._checkpoints.get(name)
+
+    def set(self, name, checkpoint):
+        with self._lock:
+            self._checkpoints[name] = checkpoint
+            if self._path is None:
+                return
+            # written to a temporary file first so a crash never leaves a partial file
+            temp_path = self._path + u".tmp"
+            with open(temp_path, u"w") as f:
+                f.write(str(json.dumps(self._checkpoints, sort_keys=True)))
+            _replace(temp_path, self._path)
+
+
+def _replace(source, destination):
+    replace = getattr(os, u"replace", None)
+    if replace is not None:
+        replace(source, destination)
+        return
+    # python 2 cannot rename over an existing file on Windows
+    if os.name == u"nt" and os.path.exists(destination):
+        os.remove(destination)
+    os.rename(source, destination)
+
+
+def _create_query(query, timestamp_filter, checkpoint):
+    created = copy.copy(query)
+    created._filter_group_list = list(query._filter_group_list)
+    created._group_clause = u"AND"
+    if checkpoint is not None:
+        created._filter_group_list.append(
+            timestamp_filter.on_or_after(parse_timestamp(checkpoint))
+        )
+    return created
+
+
+def _to_checkpoint(timestamp):
+    # normalized to millisecond precision so checkpoints compare as strs
+    if not timestamp:
+        return None
+    parsed = parse_timestamp(timestamp)
+    return u"{}.{:03d}Z".format(
+        parsed.strftime(u"%Y-%m-%dT%H:%M:%S"), parsed.microsecond // 1000
+    )
+
+
+def _get_newest(get_checkpoint, events):
+    newest = None
+    for event in events:
+        newest = _max(newest, get_checkpoint(event))
+    return newest
+
+
+def _max(first, second):
+    if first is None:
+        return second
+    if second is None:
+        return first
+    return max(first, second)
+
+
+_EVENT_TYPE_KEYS = (u"eventType", u"type$", u"type")
+_CEF_SEVERITIES = {u"LOW": 3, u"MEDIUM": 6, u"HIGH": 8, u"CRITICAL": 10}
+_CEF_KEY_CHARACTERS = re.compile(r"[^A-Za-z0-9_.]")
+_LEEF_SPECIAL_CHARACTERS = re.compile(r"[\t\r\n]")
+
+
+def _get_event_type(event):
+    for key in _EVENT_TYPE_KEYS:
+        value = event.get(key)
+        if value:
+            return str(value)
+    return u"event"
+
+
+def _get_cef_severity(event):
+    severity = event.get(u"severity")
+    if isinstance(severity, string_type):
+        return _CEF_SEVERITIES.get(severity.upper(), 5)
+    return 5
+
+
+def _iter_fields(event):
+    for key in sorted(event):
+        value = event[key]
+        if value is None:
+            continue
+        if not isinstance(value, string_type):
+            value = json.dumps(value, sort_keys=True, separators=(u",", u":"))
+        yield _CEF_KEY_CHARACTERS.sub(u"", key), value
+
+
+def _escape_cef_header(value):
+    return str(value).replace(u"\\", u"\\\\").replace(u"|", u"\\|")
+
+
+def _escape_cef_value(value):
+    return (
+        value.replace(u"\\", u"\\\\")
+        .replace(u"=", u"\\=")
+        .replace(u"\r", u"\\r")
+        .replace(u"\n", u"\\n")
+    )
+
+
+def _escape_leef_header(value):
+    return _LEEF_SPECIAL_CHARACTERS.sub(u" ", str(value)).replace(u"|", u"\\|")
@@ -1,5 +1,9 @@
+from collections import namedtuple
 from threading import Lock
 
+from py42 import settings
+from py42._concurrency import iter_batches
+from py42._concurrency import iter_concurrently
 from py42.exceptions import Py42ChecksumNotFoundError
 from py42.exceptions import Py42Error
 from py42.exceptions import Py42HTTPError
@@ -8,6 +12,14 @@ from py42.exceptions import Py42SecurityPlanConnectionError
 from py42.sdk.queries.fileevents.file_event_query import FileEventQuery
 from py42.sdk.queries.fileevents.filters.file_filter import MD5
 from py42.sdk.queries.fileevents.filters.file_filter import SHA256
+from py42.settings import debug
+
+# the number of hashes looked up by each forensic search of a bulk retrieval
+HASH_SEARCH_BATCH_SIZE = 100
+
+FileRetrievalResult = namedtuple(u"FileRetrievalResult", u"checksum, result, error")
+
+_EVENT_CHECKSUM_KEYS = {u"MD5": u"md5Checksum", u"SHA256": u"sha256Checksum"}
 
 
 class SecurityDataClient(object):
@@ -18,6 +30,7 @@ class SecurityDataClient(object):
         preservation_data_service,
         saved_search_service,
         storage_service_factory,
+        file_version_cache=None,
     ):
         self._security_service = security_service
         self._file_event_service = file_event_service
@@ -26,6 +39,7 @@ class SecurityDataClient(object):
         self._storage_service_factory = storage_service_factory
         self._client_cache = {}
         self._client_cache_lock = Lock()
+        self._file_version_cache = file_version_cache
 
     @property
     def savedsearches(self):
@@ -36,6 +50,22 @@ class SecurityDataClient(object):
         """
         return self._saved_search_service
 
+    @property
+    def file_version_cache(self):
+        """An optional cache of the file versions resolved for file hashes when streaming or
+        downloading files, so repeated requests for the same file skip the version lookups.
+        A file requested by a hash whose version is cached also skips the forensic search for
+        its events. Defaults to None.
+
+        Returns:
+            :class:`py42.clients.file_version_cache.FileVersionCache`
+        """
+        return self._file_version_cache
+
+    @file_version_cache.setter
+    def file_version_cache(self, value):
+        self._file_version_cache = value
+
     def get_security_plan_storage_info_list(self, user_uid):
         """Gets IDs (plan UID, node GUID, and destination GUID) for the storage nodes containing
         the file activity event data for the user with the given UID.
@@ -185,6 +215,56 @@ class SecurityDataClient(object):
         """
         return self._file_event_service.search(query)
 
+    def search_file_events_chunked(self, query, max_values=None, max_workers=None):
+        """Searches for all file events matching the query, splitting ``is_in`` and ``not_in``
+        filter groups with more values than a single request should carry, such as tens of
+        thousands of hashes, across several requests that run concurrently. At most 100
+        requests are split off, and a split request matching more than 10,000 events is
+        split into time windows.
+
+        Args:
+            query (:class:`py42.sdk.queries.fileevents.file_event_query.FileEventQuery`): The
+                query to search.
+            max_values (int, optional): The maximum number of values of an ``is_in`` or
+                ``not_in`` group in one request. Defaults to 1000.
+            max_workers (int, optional): The number of split requests started at once.
+                Defaults to 4.
+
+        Returns:
+            generator: An object that iterates over file event dicts, de-duplicated by
+            ``eventId``.
+        """
+        return self._file_event_service.search_chunked(
+            query, max_values=max_values, max_workers=max_workers
+        )
+
+    def search_file_events_in_time_windows(
+        self, query, begin_time, end_time, windows=4
+    ):
+        """Searches for file events by splitting the time range from ``begin_time`` to
+        ``end_time`` into disjoint windows that are searched concurrently, which is faster for
+        searches over wide ranges. The results are merged in the sort order of the query. A
+        window holding more than the 10,000 events a search can page through is split into
+        narrower windows.
+
+        Args:
+            query (:class:`py42.sdk.queries.fileevents.file_event_query.FileEventQuery`): Also
+                accepts a raw JSON str. Its filter groups must be joined with ``AND``.
+            begin_time (int or float or str or datetime): The start of the searched range, as
+                a POSIX timestamp in seconds, a str in format ``yyyy-MM-dd HH:MM:SS``, or a
+                datetime.
+            end_time (int or float or str or datetime): The inclusive end of the searched
+                range.
+            windows (int, optional): The number of windows searched concurrently. Defaults
+                to 4.
+
+        Returns:
+            generator: An object that iterates over file event dicts.
+        """
+        return self._file_event_service.search_in_time_windows(
+            query, begin_time, end_time, windows=windows
+        )
+
     def stream_file_by_sha256(self, checksum):
         """Stream file based on SHA256 checksum.
 
@@ -194,12 +274,8 @@ class SecurityDataClient(object):
         Returns:
             Returns a stream of the requested file.
         """
-        response = self._search_by_hash(checksum, SHA256)
-        events = response[u"fileEvents"]
-        info = _get_version_lookup_info(events)
-        if not len(events) or not info:
-            raise Py42ChecksumNotFoundError(response, u"SHA256", checksum)
-        return self._stream_file(checksum, info)
+        version = self._get_version_by_hash(checksum, SHA256, u"SHA256")
+        return self._stream_version(version)
 
     def stream_file_by_md5(self, checksum):
         """Stream file based on MD5 checksum.
@@ -210,12 +286,185 @@ class SecurityDataClient(object):
         Returns:
             Returns a stream of the requested file.
         """
-        response = self._search_by_hash(checksum, MD5)
-        events = response[u"fileEvents"]
-        info = _get_version_lookup_info(events)
-        if not len(events) or not info:
-            raise Py42ChecksumNotFoundError(response, u"MD5", checksum)
-        return self._stream_file(checksum, info)
+        version = self._get_version_by_hash(checksum, MD5, u"MD5")
+        return self._stream_version(version)
+
+    def download_file_by_sha256(self, checksum, save_as, progress_callback=None):
+        """Downloads a file based on SHA256 checksum directly to disk. The download resumes
+        after a dropped connection when possible and the content is verified against the
+        checksums of the file version as it is written.
+
+        Args:
+            checksum (str): SHA256 hash of the file.
+            save_as (str): The path to write the file to.
+            progress_callback (callable, optional): Called after each chunk is written with the
+                bytes written so far, the total bytes (or None if unknown), and the average bytes
+                per second. Defaults to None.
+
+        Returns:
+            :class:`py42.services.storage._download.DownloadResult`: A named tuple containing the
+            ``path``, ``size``, ``elapsed`` seconds and ``bytes_per_second`` of the download.
+        """
+        version = self._get_version_by_hash(checksum, SHA256, u"SHA256")
+        return self._download_version(version, save_as, progress_callback)
+
+    def download_file_by_md5(self, checksum, save_as, progress_callback=None):
+        """Downloads a file based on MD5 checksum directly to disk. The download resumes
+        after a dropped connection when possible and the content is verified against the
+        checksums of the file version as it is written.
+
+        Args:
+            checksum (str): MD5 hash of the file.
+            save_as (str): The path to write the file to.
+            progress_callback (callable, optional): Called after each chunk is written with the
+                bytes written so far, the total bytes (or None if unknown), and the average bytes
+                per second. Defaults to None.
+
+        Returns:
+            :class:`py42.services.storage._download.DownloadResult`: A named tuple containing the
+            ``path``, ``size``, ``elapsed`` seconds and ``bytes_per_second`` of the download.
+        """
+        version = self._get_version_by_hash(checksum, MD5, u"MD5")
+        return self._download_version(version, save_as, progress_callback)
+
+    def stream_files_by_sha256(self, checksums, sink, max_workers=None):
+        """Streams the files with the given SHA256 checksums into ``sink``. The hashes are
+        looked up with one forensic search per batch, then their file versions are resolved
+        and the files streamed concurrently. A hash that fails is reported in its result
+        instead of aborting the rest.
+
+        Args:
+            checksums (iter[str]): SHA256 hashes of the files.
+            sink (callable): Called with each checksum and the stream of its file, as returned
+                by :meth:`stream_file_by_sha256()`. Called from worker threads, so it must be
+                thread-safe. The stream is closed once ``sink`` returns, so it must be read
+                before then.
+            max_workers (int, optional): The number of files retrieved at once. Defaults to 4.
+
+        Returns:
+            list[:class:`py42.clients.securitydata.FileRetrievalResult`]: A named tuple for each
+            unique checksum containing the ``checksum``, the value returned by ``sink`` as the
+            ``result``, and the ``error`` raised while retrieving the file (or None).
+        """
+        return self._stream_files(checksums, SHA256, u"SHA256", sink, max_workers)
+
+    def stream_files_by_md5(self, checksums, sink, max_workers=None):
+        """Streams the files with the given MD5 checksums into ``sink``. The hashes are
+        looked up with one forensic search per batch, then their file versions are resolved
+        and the files streamed concurrently. A hash that fails is reported in its result
+        instead of aborting the rest.
+
+        Args:
+            checksums (iter[str]): MD5 hashes of the files.
+            sink (callable): Called with each checksum and the stream of its file, as returned
+                by :meth:`stream_file_by_md5()`. Called from worker threads, so it must be
+                thread-safe. The stream is closed once ``sink`` returns, so it must be read
+                before then.
+            max_workers (int, optional): The number of files retrieved at once. Defaults to 4.
+
+        Returns:
+            list[:class:`py42.clients.securitydata.FileRetrievalResult`]: A named tuple for each
+            unique checksum containing the ``checksum``, the value returned by ``sink`` as the
+            ``result``, and the ``error`` raised while retrieving the file (or None).
+        """
+        return self._stream_files(checksums, MD5, u"MD5", sink, max_workers)
+
+    def _stream_files(self, checksums, checksum_type, checksum_name, sink, max_workers):
+        checksums = _get_unique_checksums(checksums)
+        lookups = self._get_bulk_version_lookup_info(
+            checksums, checksum_type, checksum_name, max_workers
+        )
+
+        def retrieve(checksum):
+            lookup = lookups[checksum]
+            if isinstance(lookup, Exception):
+                raise lookup
+            if isinstance(lookup, tuple):
+                # found by a search, rather than already cached by the checksum
+                lookup = self._get_version_for_download(checksum, lookup)
+            response = self._stream_version(lookup)
+            try:
+                return sink(checksum, response)
+            finally:
+                # a sink that raises or stops reading early would otherwise keep the
+                # connection out of the pool
+                response.close()
+
+        results = {}
+        for checksum, result, error in iter_concurrently(
+            retrieve, checksums, max_workers=max_workers
+        ):
+            if error:
+                debug.logger.info(
+                    u"Failed to retrieve file with {} {}: {}".format(
+                        checksum_name, checksum, error
+                    )
+                )
+            results[checksum] = FileRetrievalResult(checksum, result, error)
+        return [results[checksum] for checksum in checksums]
+
+    def _get_bulk_version_lookup_info(
+        self, checksums, checksum_type, checksum_name, max_workers
+    ):
+        checksum_key = _EVENT_CHECKSUM_KEYS[checksum_name]
+        lookups = {}
+        truncated = []
+        uncached = []
+        for checksum in checksums:
+            version = self._find_cached_version(checksum, checksum_name)
+            if version is not None:
+                lookups[checksum] = version
+            else:
+                uncached.append(checksum)
+
+        def search_batch(batch):
+            return self._search_by_hashes(batch, checksum_type)
+
+        for batch, response, error in iter_concurrently(
+            search_batch,
+            iter_batches(uncached, HASH_SEARCH_BATCH_SIZE),
+            max_workers=max_workers,
+        ):
+            if error:
+                lookups.update({checksum: error for checksum in batch})
+                continue
+            events = response[u"fileEvents"]
+            events_by_checksum = _group_events_by_checksum(events, checksum_key)
+            is_truncated = len(events) >= settings.security_events_per_page
+            for checksum in batch:
+                info = _get_version_lookup_info(
+                    events_by_checksum.get(checksum.lower(), [])
+                )
+                if info:
+                    lookups[checksum] = info
+                elif is_truncated:
+                    # the page filled up before the events for this hash were reached
+                    truncated.append(checksum)
+                else:
+                    lookups[checksum] = Py42ChecksumNotFoundError(
+                        response, checksum_name, checksum
+                    )
+
+        def search_one(checksum):
+            return self._search_by_hash(checksum, checksum_type)
+
+        for checksum, response, error in iter_concurrently(
+            search_one, truncated, max_workers=max_workers
+        ):
+            if error:
+                lookups[checksum] = error
+                continue
+            info = _get_version_lookup_info(response[u"fileEvents"])
+            lookups[checksum] = info or Py42ChecksumNotFoundError(
+                response, checksum_name, checksum
+            )
+        return lookups
+
+    def _search_by_hashes(self, checksums, checksum_type):
+        query = FileEventQuery.all(checksum_type.is_in(checksums))
+        query.sort_key = u"eventTimestamp"
+        query.sort_direction = u"desc"
+        return self.search_file_events(query)
 
     def _search_by_hash(self, checksum, checksum_type):
         query = FileEventQuery.all(checksum_type.eq(checksum))
@@ -224,21 +473,59 @@ class SecurityDataClient(object):
         response = self.search_file_events(query)
         return response
 
-    def _stream_file(self, checksum, version_info):
+    def _get_version_by_hash(self, checksum, checksum_type, checksum_name):
+        # a version cached by the requested hash is used without searching its events
+        version = self._find_cached_version(checksum, checksum_name)
+        if version is not None:
+            return version
+        response = self._search_by_hash(checksum, checksum_type)
+        events = response[u"fileEvents"]
+        info = _get_version_lookup_info(events)
+        if not len(events) or not info:
+            raise Py42ChecksumNotFoundError(response, checksum_name, checksum)
+        return self._get_version_for_download(checksum, info)
+
+    def _find_cached_version(self, checksum, checksum_name):
+        cache = self._file_version_cache
+        if cache is None:
+            return None
+        try:
+            if checksum_name == u"MD5":
+                return cache.find(md5=checksum)
+            return cache.find(sha256=checksum)
+        except KeyError:
+            return None
+
+    def _stream_version(self, version):
+        pds = self._storage_service_factory.create_preservation_data_service(
+            version[u"storageNodeURL"]
+        )
+        token = pds.get_download_token(
+            version[u"archiveGuid"], version[u"fileId"], version[u"versionTimestamp"],
+        )
+        return pds.get_file(str(token))
+
+    def _download_version(self, version, save_as, progress_callback):
+        pds = self._storage_service_factory.create_preservation_data_service(
+            version[u"storageNodeURL"]
+        )
+        return pds.download_file(
+            version[u"archiveGuid"],
+            version[u"fileId"],
+            version[u"versionTimestamp"],
+            save_as,
+            md5=_get_version_checksum(version, u"fileMD5"),
+            sha256=_get_version_checksum(version, u"fileSHA256"),
+            progress_callback=progress_callback,
+        )
+
+    def _get_version_for_download(self, checksum, version_info):
         (device_guid, md5_hash, sha256_hash, path) = version_info
         version = self._get_file_version_for_stream(
             device_guid, md5_hash, sha256_hash, path
         )
         if version:
-            pds = self._storage_service_factory.create_preservation_data_service(
-                version[u"storageNodeURL"]
-            )
-            token = pds.get_download_token(
-                version[u"archiveGuid"],
-                version[u"fileId"],
-                version[u"versionTimestamp"],
-            )
-            return pds.get_file(str(token))
+            return version
 
         raise Py42Error(
             u"No file with hash {} available for download on any storage node.".format(
@@ -247,11 +534,20 @@ class SecurityDataClient(object):
         )
 
     def _get_file_version_for_stream(self, device_guid, md5_hash, sha256_hash, path):
+        cache = self._file_version_cache
+        if cache is not None:
+            try:
+                return cache.get(md5_hash, sha256_hash)
+            except KeyError:
+                pass
+
         version = self._get_device_file_version(
             device_guid, md5_hash, sha256_hash, path
         )
         if not version:
             version = self._get_other_file_location_version(md5_hash, sha256_hash)
+        if cache is not None:
+            cache.set(md5_hash, sha256_hash, version)
         return version
 
     def _get_device_file_version(self, device_guid, md5_hash, sha256_hash, path):
@@ -427,6 +723,33 @@ def _get_version_lookup_info(events):
             return device_guid, md5, sha256, path
 
 
+def _get_unique_checksums(checksums):
+    unique = []
+    seen = set()
+    for checksum in checksums:
+        key = checksum.lower()
+        if key not in seen:
+            seen.add(key)
+            unique.append(checksum)
+    return unique
+
+
+def _group_events_by_checksum(events, checksum_key):
+    events_by_checksum = {}
+    for event in events:
+        checksum = event.get(checksum_key)
+        if checksum:
+            events_by_checksum.setdefault(checksum.lower(), []).append(event)
+    return events_by_checksum
+
+
+def _get_version_checksum(version, key):
+    try:
+        return version[key]
+    except KeyError:
+        return None
+
+
 class PlanStorageInfo(object):
     def __init__(self, plan_uid, destination_guid, node_guid):
         self._plan_uid = plan_uid
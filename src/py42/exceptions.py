@@ -38,6 +38,27 @@ class Py42ChecksumNotFoundError(Py42ResponseError):
         super(Py42ChecksumNotFoundError, self).__init__(response, message)
 
 
+class Py42ChecksumMismatchError(Py42Error):
+    """An exception raised when downloaded content does not match its expected checksum."""
+
+    def __init__(self, path, checksum_name, expected, actual):
+        message = u"Content written to {} has {} checksum {}, expected {}".format(
+            path, checksum_name, actual, expected
+        )
+        super(Py42ChecksumMismatchError, self).__init__(message)
+        self._path = path
+
+    @property
+    def path(self):
+        """The path of the file that failed verification."""
+        return self._path
+
+
+class Py42UnsatisfiableQueryError(Py42Error):
+    """An exception raised when a query contains contradictory filters and so cannot match
+    any results."""
+
+
 class Py42FeatureUnavailableError(Py42ResponseError):
     """An exception raised when a requested feature is not supported in your Code42 environment."""
 
@@ -1,14 +1,30 @@
+import io
 import json
+import socket
+from functools import partial
 
+from requests.exceptions import ChunkedEncodingError
+from requests.exceptions import ConnectionError
+from requests.exceptions import ContentDecodingError
+from requests.exceptions import SSLError
+from urllib3.exceptions import DecodeError
+from urllib3.exceptions import ProtocolError
+from urllib3.exceptions import ReadTimeoutError
+from urllib3.exceptions import SSLError as Urllib3SSLError
+
+from py42._compat import IncompleteRead
 from py42._compat import reprlib
 from py42._compat import str
 from py42.exceptions import Py42Error
 
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
 
 class Py42Response(object):
     def __init__(self, requests_response):
         self._response = requests_response
         self._data = None
+        self._content_reader = None
 
     def __getitem__(self, key):
         try:
@@ -44,7 +60,12 @@ class Py42Response(object):
         """A case-insensitive dictionary of response headers."""
         return self._response.headers
 
-    def iter_content(self, chunk_size=1, decode_unicode=False):
+    def close(self):
+        """Releases the connection of a streamed response back to the pool, discarding any
+        response data not yet read."""
+        self._response.close()
+
+    def iter_content(self, chunk_size=DEFAULT_CHUNK_SIZE, decode_unicode=False):
         """Iterates over the response data. When ``stream=True`` is set on the request, this avoids
         reading the content at once into memory for large responses.
 
@@ -53,7 +74,7 @@ class Py42Response(object):
                 None will function differently depending on the value of `stream`. stream=True will
                 read data as it arrives in whatever size the chunks are received. If stream=False,
                 data is returned as a single chunk. This is not necessarily the length of each
-                item. Defaults to 1.
+                item. Defaults to 1 MiB.
             decode_unicode (bool, optional): If True, content will be decoded using the best
                 available encoding based on the response. Defaults to False.
         """
@@ -61,6 +82,45 @@ class Py42Response(object):
             chunk_size=chunk_size, decode_unicode=decode_unicode
         )
 
+    def iter_content_into(self, buffer=None):
+        """Iterates over the response data, reading each chunk into the same writable buffer
+        instead of allocating a new ``bytes`` object per chunk. Each item is a ``memoryview``
+        of the buffer that is only valid until the next item is requested, so write or copy it
+        before continuing.
+
+        Args:
+            buffer (bytearray, optional): The buffer to read into. Its length sets the maximum
+                chunk size. Defaults to a new 1 MiB ``bytearray``.
+
+        Usage example::
+
+            with open("/path/to/my/file", "wb") as f:
+                for chunk in response.iter_content_into():
+                    f.write(chunk)
+        """
+        if buffer is None:
+            buffer = bytearray(DEFAULT_CHUNK_SIZE)
+        view = memoryview(buffer)
+        while True:
+            size = self.readinto(view)
+            if not size:
+                break
+            yield view[:size]
+
+    def readinto(self, buffer):
+        """Reads up to ``len(buffer)`` bytes of the decoded response data into the given writable
+        buffer. Uncompressed streams are read straight from the socket into the buffer.
+
+        Args:
+            buffer (bytearray or memoryview): The buffer to read into.
+
+        Returns:
+            int: The number of bytes read, or 0 when the response data is exhausted.
+        """
+        if self._content_reader is None:
+            self._content_reader = _create_content_reader(self._response)
+        return self._content_reader(memoryview(buffer))
+
     @property
     def raw_text(self):
         """The ``response.Response.text`` property. It contains raw metadata that is not included in
@@ -90,7 +150,8 @@ class Py42Response(object):
         return str(self._data_root)
 
     def __repr__(self):
-        if not self._response._content_consumed:
+        # a response whose state is unknown is not read, so repr() never consumes a stream
+        if not getattr(self._response, u"_content_consumed", False):
             data = "<streamed>"
         else:
             data = self._data_root
@@ -119,3 +180,79 @@ class Py42Response(object):
             self._data = self._response.text or u""
 
         return self._data
+
+
+def _create_content_reader(requests_response):
+    # Response._content_consumed of requests and HTTPResponse._fp of urllib3 are private.
+    # They were checked against requests 2.34.2 with urllib3 2.8.0, and match urllib3 1.x.
+    # When one is missing, the body is read through the public APIs instead.
+    if getattr(requests_response, u"_content_consumed", True):
+        return io.BytesIO(requests_response.content).readinto
+
+    raw = requests_response.raw
+    encoding = requests_response.headers.get(u"Content-Encoding", u"identity")
+    fp = getattr(raw, u"_fp", None)
+    # only bypass urllib3 when it has no buffered or compressed data of its own
+    if (
+        encoding.lower() == u"identity"
+        and hasattr(fp, u"readinto")
+        and hasattr(raw, u"length_remaining")
+        and not raw.tell()
+    ):
+        return _RawContentReader(raw, fp)
+    return partial(_read_decoded_into, raw)
+
+
+class _RawContentReader(object):
+    """Reads an uncompressed body straight from the socket. Bypassing urllib3 also bypasses
+    its checks, so a body cut short and a dropped connection raise here the same errors
+    ``requests`` raises from ``iter_content()``."""
+
+    def __init__(self, raw, fp):
+        self._raw = raw
+        self._fp = fp
+        self._remaining = raw.length_remaining
+
+    def __call__(self, view):
+        try:
+            size = self._fp.readinto(view)
+        except IncompleteRead as ex:
+            self._raw.close()
+            raise ChunkedEncodingError(ex)
+        except socket.error as ex:
+            self._raw.close()
+            raise ConnectionError(ex)
+        if size:
+            if self._remaining is not None:
+                self._remaining -= size
+            return size
+        if self._remaining:
+            # like urllib3, a broken connection is closed rather than pooled
+            self._raw.close()
+            raise ChunkedEncodingError(
+                u"Connection closed with {} bytes of the response body unread.".format(
+                    self._remaining
+                )
+            )
+        # the body is fully read, so the connection can go back to the pool
+        self._raw.release_conn()
+        return 0
+
+
+def _read_decoded_into(raw, view):
+    data = b""
+    # a compressed stream may decode to nothing until more data arrives
+    while not data and not raw.closed:
+        try:
+            data = raw.read(len(view), decode_content=True)
+        except ProtocolError as ex:
+            raise ChunkedEncodingError(ex)
+        except DecodeError as ex:
+            raise ContentDecodingError(ex)
+        except ReadTimeoutError as ex:
+            raise ConnectionError(ex)
+        except Urllib3SSLError as ex:
+            raise SSLError(ex)
+    size = len(data)
+    view[:size] = data
+    return size
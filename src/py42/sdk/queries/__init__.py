@@ -1,5 +1,6 @@
 from py42 import settings
 from py42.sdk.queries.query_filter import FilterGroup
+from py42.sdk.queries.query_optimizer import optimize_query
 
 
 class BaseQuery(object):
@@ -25,3 +26,18 @@ class BaseQuery(object):
     @classmethod
     def all(cls, *args):
         return cls(*args)
+
+    def optimize(self):
+        """Returns an equivalent copy of this query with redundant filter groups merged,
+        such as duplicate groups, overlapping timestamp ranges, and ``eq`` groups on the
+        same term joined with ``OR``. Equivalent queries optimize to the same query.
+
+        Raises:
+            :class:`~py42.exceptions.Py42UnsatisfiableQueryError`: If the query contains
+            contradictory filters and so cannot match any results, in which case there is
+            no need to search.
+
+        Returns:
+            A query of the same type.
+        """
+        return optimize_query(self)
@@ -1,5 +1,5 @@
-from py42._compat import str
 from py42.sdk.queries import BaseQuery
+from py42.sdk.queries.query_serializer import serialize_query
 
 
 class AlertQuery(BaseQuery):
@@ -28,18 +28,7 @@ class AlertQuery(BaseQuery):
         self.sort_direction = u"desc"
 
     def __str__(self):
-        groups_string = u",".join(
-            str(group_item) for group_item in self._filter_group_list
-        )
-        json = u'{{"tenantId": null, "groupClause":"{0}", "groups":[{1}], "pgNum":{2}, "pgSize":{3}, "srtDirection":"{4}", "srtKey":"{5}"}}'.format(
-            self._group_clause,
-            groups_string,
-            self.page_number,
-            self.page_size,
-            self.sort_direction,
-            self.sort_key,
-        )
-        return json
+        return serialize_query(self, u"srtDirection", include_tenant_id=True)
 
     def __iter__(self):
         filter_group_list = [dict(item) for item in self._filter_group_list]
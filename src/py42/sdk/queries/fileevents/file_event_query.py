@@ -1,10 +1,10 @@
-from py42._compat import str
 from py42.sdk.queries import BaseQuery
 from py42.sdk.queries.query_filter import create_filter_group
 from py42.sdk.queries.query_filter import create_query_filter
 from py42.sdk.queries.query_filter import create_within_the_last_filter_group
 from py42.sdk.queries.query_filter import QueryFilterStringField
 from py42.sdk.queries.query_filter import QueryFilterTimestampField
+from py42.sdk.queries.query_serializer import serialize_query
 
 
 class FileEventQuery(BaseQuery):
@@ -31,18 +31,7 @@ class FileEventQuery(BaseQuery):
         self.sort_key = u"eventId"
 
     def __str__(self):
-        groups_string = u",".join(
-            str(group_item) for group_item in self._filter_group_list
-        )
-        json = u'{{"groupClause":"{0}", "groups":[{1}], "pgNum":{2}, "pgSize":{3}, "srtDir":"{4}", "srtKey":"{5}"}}'.format(
-            self._group_clause,
-            groups_string,
-            self.page_number,
-            self.page_size,
-            self.sort_direction,
-            self.sort_key,
-        )
-        return json
+        return serialize_query(self, u"srtDir")
 
     def __iter__(self):
         filter_group_list = [dict(item) for item in self._filter_group_list]
@@ -3,6 +3,8 @@ from datetime import datetime
 
 from py42._compat import str
 from py42._compat import string_type
+from py42.sdk.queries.query_serializer import serialize_filter
+from py42.sdk.queries.query_serializer import serialize_filter_group
 from py42.util import convert_datetime_to_epoch
 from py42.util import convert_datetime_to_timestamp_str
 from py42.util import DATE_STR_FORMAT
@@ -378,6 +380,9 @@ class QueryFilter(object):
         self._term = term
         self._operator = operator
         self._value = value
+        # a filter never changes after creation, so its serialized form is cached, which
+        # also caches its hash as strings keep their own
+        self._str = None
 
     @classmethod
     def from_dict(cls, _dict):
@@ -413,10 +418,9 @@ class QueryFilter(object):
         return self._value
 
     def __str__(self):
-        value = u"null" if self._value is None else u'"{}"'.format(self._value)
-        return u'{{"operator":"{0}", "term":"{1}", "value":{2}}}'.format(
-            self._operator, self._term, value
-        )
+        if self._str is None:
+            self._str = serialize_filter(self._term, self._operator, self._value)
+        return self._str
 
     def __iter__(self):
         output_dict = OrderedDict()
@@ -427,13 +431,22 @@ class QueryFilter(object):
             yield key, output_dict[key]
 
     def __eq__(self, other):
-        if isinstance(other, (QueryFilter, tuple, list)):
+        if isinstance(other, QueryFilter):
+            return (self._operator, self._term, self._value) == (
+                other._operator,
+                other._term,
+                other._value,
+            )
+        elif isinstance(other, (tuple, list)):
             return tuple(self) == tuple(other)
         elif isinstance(other, string_type):
             return str(self) == other
         else:
             return False
 
+    def __ne__(self, other):
+        return not self == other
+
     def __hash__(self):
         return hash(str(self))
 
@@ -456,6 +469,9 @@ class FilterGroup(object):
     def __init__(self, filter_list, filter_clause=u"AND"):
         self._filter_list = filter_list
         self._filter_clause = filter_clause
+        self._cached_filters = None
+        self._cached_filter_set = None
+        self._cached_str = None
 
     @classmethod
     def from_dict(cls, _dict):
@@ -490,16 +506,29 @@ class FilterGroup(object):
         """The clause joining the filters, such as ``AND`` or ``OR``."""
 
         self._filter_clause = value
+        self._cached_str = None
 
     @property
     def _filter_set(self):
-        return sorted(list(set(self.filter_list)), key=str)
+        self._update_cache()
+        return self._cached_filter_set
+
+    def _update_cache(self):
+        # filter_list is a plain list that callers may change in place, so the cached
+        # de-duplicated and sorted filters are rebuilt whenever its contents differ
+        filters = tuple(self._filter_list)
+        if filters != self._cached_filters:
+            self._cached_filter_set = sorted(set(filters), key=str)
+            self._cached_filters = filters
+            self._cached_str = None
 
     def __str__(self):
-        filters_string = u",".join(str(filter_item) for filter_item in self._filter_set)
-        return u'{{"filterClause":"{0}", "filters":[{1}]}}'.format(
-            self._filter_clause, filters_string
-        )
+        self._update_cache()
+        if self._cached_str is None:
+            self._cached_str = serialize_filter_group(
+                self._filter_clause, self._cached_filter_set
+            )
+        return self._cached_str
 
     def __iter__(self):
         filter_list = [dict(item) for item in self._filter_set]
@@ -520,5 +549,11 @@ class FilterGroup(object):
         else:
             return False
 
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(str(self))
+
     def __contains__(self, item):
         return item in self._filter_set
@@ -0,0 +1,237 @@
+import copy
+from collections import OrderedDict
+from datetime import datetime
+
+from py42._compat import str
+from py42.exceptions import Py42UnsatisfiableQueryError
+from py42.sdk.queries.query_filter import FilterGroup
+from py42.sdk.queries.query_filter import QueryFilter
+
+_NEGATED_OPERATORS = {
+    u"IS": u"IS_NOT",
+    u"IS_NOT": u"IS",
+    u"EXISTS": u"DOES_NOT_EXIST",
+    u"DOES_NOT_EXIST": u"EXISTS",
+    u"CONTAINS": u"DOES_NOT_CONTAIN",
+    u"DOES_NOT_CONTAIN": u"CONTAINS",
+}
+_LOWER_BOUND = u"ON_OR_AFTER"
+_UPPER_BOUND = u"ON_OR_BEFORE"
+_TIMESTAMP_FORMAT = u"%Y-%m-%dT%H:%M:%S.%fZ"
+
+
+def optimize_query(query):
+    """Returns an equivalent copy of ``query`` with redundant filter groups removed:
+
+    * Duplicate filters and groups are removed, and groups of a single filter are joined
+      with ``AND``.
+    * Timestamp ranges (``on_or_after``, ``on_or_before``, ``in_range``) on the same term
+      are intersected when the query joins its groups with ``AND``, and overlapping ones
+      are combined when it joins them with ``OR``.
+    * ``eq`` and ``is_in`` groups on the same term are combined into one ``is_in`` group
+      when the query joins its groups with ``OR``.
+    * ``is_in`` groups already satisfied by a filter the query requires are removed.
+
+    Raises:
+        :class:`~py42.exceptions.Py42UnsatisfiableQueryError`: If the query contains
+        contradictory filters, such as ``eq`` and ``not_eq`` of the same value or an empty
+        timestamp range, and so cannot match any results.
+    """
+    groups = [_optimize_group(group) for group in query._filter_group_list]
+    if query._group_clause == u"OR":
+        groups = _optimize_any_groups(groups)
+    else:
+        groups = _optimize_all_groups(groups)
+
+    optimized = copy.copy(query)
+    optimized._filter_group_list = sorted(_unique(groups), key=str)
+    if len(optimized._filter_group_list) == 1:
+        optimized._group_clause = u"AND"
+    return optimized
+
+
+def _optimize_group(group):
+    filters = _unique(group.filter_list)
+    if len(filters) == 1:
+        return FilterGroup(filters, u"AND")
+    if group.filter_clause != u"AND":
+        return FilterGroup(filters, group.filter_clause)
+    if _find_contradiction(filters):
+        return None
+
+    # intersect the timestamp bounds on each term, keeping the first position of each
+    ranges = OrderedDict()
+    remaining = []
+    for query_filter in filters:
+        if _get_bound(query_filter) is None:
+            remaining.append(query_filter)
+        else:
+            ranges.setdefault(query_filter.term, []).append(query_filter)
+    for term, bound_filters in ranges.items():
+        lower, upper = _intersect([_get_range(FilterGroup(bound_filters))])
+        if _is_empty_range(lower, upper):
+            return None
+        remaining.extend(_create_range_filters(lower, upper))
+    return FilterGroup(remaining, u"AND")
+
+
+def _optimize_all_groups(groups):
+    if None in groups:
+        raise Py42UnsatisfiableQueryError(
+            u"A filter group of the query contains contradictory filters."
+        )
+
+    # every filter of an AND group is required when the groups are joined with AND
+    required = set()
+    for group in groups:
+        if group.filter_clause == u"AND":
+            required.update(group.filter_list)
+    contradiction = _find_contradiction(required)
+    if contradiction:
+        raise Py42UnsatisfiableQueryError(
+            u"The query requires both {} and {}.".format(*contradiction)
+        )
+
+    optimized = []
+    ranges = OrderedDict()
+    for group in groups:
+        range_ = _get_range(group)
+        if range_ is not None:
+            ranges.setdefault(range_[0], []).append(range_)
+        elif group.filter_clause == u"OR" and required.intersection(group.filter_list):
+            continue
+        else:
+            optimized.append(group)
+    for term, term_ranges in ranges.items():
+        lower, upper = _intersect(term_ranges)
+        if _is_empty_range(lower, upper):
+            raise Py42UnsatisfiableQueryError(
+                u"The query requires an empty range of {}.".format(term)
+            )
+        optimized.append(FilterGroup(_create_range_filters(lower, upper)))
+    return optimized
+
+
+def _optimize_any_groups(groups):
+    groups = [group for group in groups if group is not None]
+    if not groups:
+        raise Py42UnsatisfiableQueryError(
+            u"Every filter group of the query contains contradictory filters."
+        )
+
+    optimized = []
+    ranges = OrderedDict()
+    values = OrderedDict()
+    for group in groups:
+        range_ = _get_range(group)
+        term = _get_is_in_term(group)
+        if range_ is not None:
+            ranges.setdefault(range_[0], []).append(range_)
+        elif term is not None:
+            values.setdefault(term, []).extend(group.filter_list)
+        else:
+            optimized.append(group)
+    for term, term_ranges in ranges.items():
+        for lower, upper in _union(term_ranges):
+            optimized.append(FilterGroup(_create_range_filters(lower, upper)))
+    for term, filters in values.items():
+        filters = _unique(filters)
+        optimized.append(FilterGroup(filters, u"OR" if len(filters) > 1 else u"AND"))
+    return optimized
+
+
+def _find_contradiction(filters):
+    filters = set(filters)
+    for query_filter in filters:
+        negated_operator = _NEGATED_OPERATORS.get(query_filter.operator)
+        if negated_operator is None:
+            continue
+        negated = QueryFilter(query_filter.term, negated_operator, query_filter.value)
+        if negated in filters:
+            return query_filter, negated
+    return None
+
+
+def _get_is_in_term(group):
+    terms = {f.term for f in group.filter_list}
+    operators = {f.operator for f in group.filter_list}
+    if len(terms) != 1 or operators != {u"IS"}:
+        return None
+    if len(group.filter_list) > 1 and group.filter_clause != u"OR":
+        return None
+    return terms.pop()
+
+
+def _get_range(group):
+    # a group of only timestamp bounds on one term, as (term, lower, upper) where each
+    # bound is a (datetime, filter) tuple or None when unbounded
+    if not group.filter_list or group.filter_clause != u"AND":
+        return None
+    terms = {f.term for f in group.filter_list}
+    if len(terms) != 1:
+        return None
+    bounds = [_get_bound(f) for f in group.filter_list]
+    if None in bounds:
+        return None
+    lowers = [b for b in bounds if b[1].operator == _LOWER_BOUND]
+    uppers = [b for b in bounds if b[1].operator == _UPPER_BOUND]
+    lower = max(lowers, key=_get_time) if lowers else None
+    upper = min(uppers, key=_get_time) if uppers else None
+    return terms.pop(), lower, upper
+
+
+def _get_bound(query_filter):
+    if query_filter.operator not in (_LOWER_BOUND, _UPPER_BOUND):
+        return None
+    try:
+        time = datetime.strptime(query_filter.value, _TIMESTAMP_FORMAT)
+    except (TypeError, ValueError):
+        return None
+    return time, query_filter
+
+
+def _get_time(bound):
+    return bound[0]
+
+
+def _intersect(ranges):
+    lowers = [r[1] for r in ranges if r[1] is not None]
+    uppers = [r[2] for r in ranges if r[2] is not None]
+    lower = max(lowers, key=_get_time) if lowers else None
+    upper = min(uppers, key=_get_time) if uppers else None
+    return lower, upper
+
+
+def _union(ranges):
+    # unbounded lower ends sort first
+    ranges = sorted(ranges, key=lambda r: (r[1] is not None, r[1] and r[1][0]))
+    merged = []
+    for _, lower, upper in ranges:
+        if merged:
+            last_lower, last_upper = merged[-1]
+            if last_upper is None or lower is None or lower[0] <= last_upper[0]:
+                if upper is None or last_upper is None:
+                    merged[-1] = (last_lower, None)
+                else:
+                    merged[-1] = (last_lower, max(last_upper, upper, key=_get_time))
+                continue
+        merged.append((lower, upper))
+    return merged
+
+
+def _is_empty_range(lower, upper):
+    return lower is not None and upper is not None and lower[0] > upper[0]
+
+
+def _create_range_filters(lower, upper):
+    return [bound[1] for bound in (lower, upper) if bound is not None]
+
+
+def _unique(items):
+    seen = set()
+    unique = []
+    for item in items:
+        if item not in seen:
+            seen.add(item)
+            unique.append(item)
+    return unique
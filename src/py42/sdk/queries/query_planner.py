@@ -0,0 +1,135 @@
+import copy
+import itertools
+from collections import namedtuple
+
+from py42._concurrency import iter_batches
+from py42.exceptions import Py42Error
+from py42.sdk.queries.query_filter import FilterGroup
+
+DEFAULT_MAX_VALUES = 1000
+DEFAULT_MAX_QUERIES = 100
+
+QueryPlan = namedtuple(u"QueryPlan", u"queries, excluded_values")
+
+
+def plan_queries(query, max_values=None, max_queries=None):
+    """Splits a query whose ``is_in`` or ``not_in`` filter groups hold more than
+    ``max_values`` values into several queries of bounded size, so no single request body
+    grows with the number of values.
+
+    The union of the results of the planned queries equals the results of the original
+    query once the ``excluded_values`` of the plan are removed:
+
+    * An oversized ``is_in`` group is split into groups of at most ``max_values`` values,
+      each searched by its own query.
+    * An oversized ``not_in`` group of an ``AND`` query keeps its first ``max_values`` values.
+      The rest are returned in ``excluded_values`` to be filtered out of the results by the
+      field named by the filter term.
+
+    Several oversized ``is_in`` groups of an ``AND`` query take a query for every
+    combination of their chunks, so a plan of more than ``max_queries`` queries raises
+    :class:`py42.exceptions.Py42Error` instead.
+
+    Args:
+        query (:class:`~py42.sdk.queries.BaseQuery`): The query to split.
+        max_values (int, optional): The maximum number of values of an ``is_in`` or
+            ``not_in`` group. Defaults to 1000.
+        max_queries (int, optional): The maximum number of planned queries. Defaults to
+            100.
+
+    Returns:
+        :class:`QueryPlan`: A named tuple containing the list of ``queries`` and a dict of
+        ``excluded_values`` mapping each filter term to the set of values to filter out.
+    """
+    max_values = max_values or DEFAULT_MAX_VALUES
+    max_queries = max_queries or DEFAULT_MAX_QUERIES
+    if query._group_clause == u"OR":
+        return _plan_any_query(query, max_values, max_queries)
+    return _plan_all_query(query, max_values, max_queries)
+
+
+def _plan_all_query(query, max_values, max_queries):
+    group_options = []
+    excluded_values = {}
+    for group in query._filter_group_list:
+        term, operator = _get_group_term_and_operator(group)
+        if len(group.filter_list) <= max_values or operator is None:
+            group_options.append([group])
+        elif operator == u"IS":
+            group_options.append(_split_is_in_group(group, max_values))
+        else:
+            kept = group.filter_list[:max_values]
+            group_options.append([FilterGroup(kept, group.filter_clause)])
+            excluded = excluded_values.setdefault(term, set())
+            excluded.update(f.value for f in group.filter_list[max_values:])
+
+    query_count = 1
+    for options in group_options:
+        query_count *= len(options)
+    _check_query_count(query_count, max_queries)
+    # every combination of the split groups, which together cover the original query
+    queries = [
+        _copy_with_groups(query, list(groups))
+        for groups in itertools.product(*group_options)
+    ]
+    return QueryPlan(queries, excluded_values)
+
+
+def _plan_any_query(query, max_values, max_queries):
+    small_groups = []
+    queries = []
+    for group in query._filter_group_list:
+        term, operator = _get_group_term_and_operator(group)
+        if len(group.filter_list) <= max_values or operator is None:
+            small_groups.append(group)
+        elif operator == u"IS":
+            queries.extend(
+                _copy_with_groups(query, [chunk])
+                for chunk in _split_is_in_group(group, max_values)
+            )
+        else:
+            raise Py42Error(
+                u"Cannot split the not_in group on {} of a query whose groups are "
+                u"joined with OR.".format(term)
+            )
+    if small_groups:
+        queries.insert(0, _copy_with_groups(query, small_groups))
+    _check_query_count(len(queries), max_queries)
+    return QueryPlan(queries, {})
+
+
+def _check_query_count(query_count, max_queries):
+    if query_count > max_queries:
+        raise Py42Error(
+            u"Splitting the query takes {} queries, more than the maximum of {}. Raise "
+            u"max_values or split fewer filter groups.".format(query_count, max_queries)
+        )
+
+
+def _get_group_term_and_operator(group):
+    # only single-term groups of IS filters joined with OR (is_in) or IS_NOT filters
+    # joined with AND (not_in) can be split
+    terms = {f.term for f in group.filter_list}
+    operators = {f.operator for f in group.filter_list}
+    if len(terms) != 1 or len(operators) != 1:
+        return None, None
+    term = terms.pop()
+    operator = operators.pop()
+    if operator == u"IS" and group.filter_clause == u"OR":
+        return term, operator
+    if operator == u"IS_NOT" and group.filter_clause == u"AND":
+        return term, operator
+    return None, None
+
+
+def _split_is_in_group(group, max_values):
+    return [
+        FilterGroup(filters, u"OR")
+        for filters in iter_batches(group.filter_list, max_values)
+    ]
+
+
+def _copy_with_groups(query, groups):
+    planned = copy.copy(query)
+    planned._filter_group_list = groups
+    return planned
@@ -0,0 +1,101 @@
+from json.encoder import encode_basestring
+
+from py42._compat import str
+from py42._compat import string_type
+
+
+def serialize_filter(term, operator, value):
+    """Serializes the parts of a :class:`~py42.sdk.queries.query_filter.QueryFilter` into
+    its JSON string. A ``value`` that is not a str is serialized as its str form, and a
+    ``value`` of None as ``null``.
+
+    Args:
+        term (str): The term of the filter.
+        operator (str): The operator of the filter.
+        value (object): The value of the filter.
+
+    Returns:
+        str: The JSON string of the filter.
+    """
+    value = u"null" if value is None else _encode(value)
+    return u"".join(
+        (
+            u'{"operator":',
+            _encode(operator),
+            u', "term":',
+            _encode(term),
+            u', "value":',
+            value,
+            u"}",
+        )
+    )
+
+
+def serialize_filter_group(filter_clause, filters):
+    """Serializes the parts of a :class:`~py42.sdk.queries.query_filter.FilterGroup` into
+    its JSON string.
+
+    Args:
+        filter_clause (str): The clause joining the filters, such as ``AND`` or ``OR``.
+        filters (iterable): The :class:`~py42.sdk.queries.query_filter.QueryFilter`
+            objects of the group, in the order to serialize them.
+
+    Returns:
+        str: The JSON string of the filter group.
+    """
+    parts = [u'{"filterClause":', _encode(filter_clause), u', "filters":[']
+    _write_items(parts, filters)
+    parts.append(u"]}")
+    return u"".join(parts)
+
+
+def serialize_query(query, sort_direction_key, include_tenant_id=False):
+    """Serializes a query into the JSON string of its request body.
+
+    Args:
+        query (:class:`~py42.sdk.queries.BaseQuery`): The query to serialize.
+        sort_direction_key (str): The key of the sort direction, which is ``srtDir`` for
+            file event queries and ``srtDirection`` for alert queries.
+        include_tenant_id (bool, optional): Whether to start the body with a ``null``
+            ``tenantId``, as alert queries do. Defaults to False.
+
+    Returns:
+        str: The JSON string of the query.
+    """
+    parts = [u'{"tenantId": null, ' if include_tenant_id else u"{"]
+    parts.append(u'"groupClause":')
+    parts.append(_encode(query._group_clause))
+    parts.append(u', "groups":[')
+    _write_items(parts, query._filter_group_list)
+    parts.extend(
+        (
+            u'], "pgNum":',
+            str(query.page_number),
+            u', "pgSize":',
+            str(query.page_size),
+            u', "',
+            sort_direction_key,
+            u'":',
+            _encode(query.sort_direction),
+            u', "srtKey":',
+            _encode(query.sort_key),
+            u"}",
+        )
+    )
+    return u"".join(parts)
+
+
+def _write_items(parts, items):
+    # filters and groups cache their own strings, so they are written as is
+    first = True
+    for item in items:
+        if not first:
+            parts.append(u",")
+        parts.append(str(item))
+        first = False
+
+
+def _encode(value):
+    if not isinstance(value, string_type):
+        value = str(value)
+    return encode_basestring(value)
@@ -0,0 +1,106 @@
+import time
+
+from requests.exceptions import ConnectionError
+from requests.exceptions import ConnectTimeout
+from requests.exceptions import Timeout
+from urllib3.exceptions import NewConnectionError
+
+from py42._concurrency import iter_concurrently
+from py42._concurrency import RateLimiter
+from py42.exceptions import Py42HTTPError
+from py42.exceptions import Py42InternalServerError
+from py42.settings import debug
+
+DEFAULT_MAX_RETRIES = 3
+
+_RETRY_DELAY = 0.5
+_MAX_RETRY_DELAY = 30
+_TOO_MANY_REQUESTS = 429
+
+
+def iter_bulk_results(
+    func,
+    items,
+    idempotent,
+    max_workers=None,
+    requests_per_second=None,
+    max_retries=None,
+):
+    """Calls ``func`` for each item concurrently, retrying calls that fail for reasons
+    that may pass, with exponential backoff between attempts.
+
+    A call rejected with status 429, or whose connection could not be made, never reached
+    the server and is always retried. A call that failed with a 5xx status, or whose
+    connection broke or timed out, may have been applied anyway, so it is only retried
+    when ``idempotent`` is True.
+
+    Args:
+        func (callable): Called with each item.
+        items (iterable): The items to process, pulled lazily. Duplicate items are
+            processed once.
+        idempotent (bool): Whether calling ``func`` again for an item that was already
+            processed leaves the same state.
+        max_workers (int, optional): The number of calls run at once. Defaults to 4.
+        requests_per_second (float, optional): The maximum rate of calls, including
+            retries. Defaults to None, for no limit.
+        max_retries (int, optional): The maximum number of retries of each item.
+            Defaults to 3.
+
+    Returns:
+        generator: An object that iterates over ``(item, result, error)`` tuples in the
+        order the items complete, where ``error`` is the exception of the last attempt or
+        None.
+    """
+    max_retries = DEFAULT_MAX_RETRIES if max_retries is None else max_retries
+    rate_limiter = RateLimiter(requests_per_second) if requests_per_second else None
+
+    def call_with_retries(item):
+        retries = 0
+        while True:
+            if rate_limiter is not None:
+                rate_limiter.wait()
+            try:
+                return func(item)
+            except Exception as ex:
+                if retries >= max_retries or not _can_retry(ex, idempotent):
+                    raise
+                delay = min(_RETRY_DELAY * 2 ** retries, _MAX_RETRY_DELAY)
+                retries += 1
+                message = u"Request for {} failed, retrying in {}s: {}"
+                debug.logger.info(message.format(item, delay, ex))
+                time.sleep(delay)
+
+    return iter_concurrently(call_with_retries, _unique(items), max_workers=max_workers)
+
+
+def _unique(items):
+    seen = set()
+    for item in items:
+        if item not in seen:
+            seen.add(item)
+            yield item
+
+
+def _can_retry(error, idempotent):
+    if isinstance(error, ConnectTimeout) or _is_new_connection_error(error):
+        return True
+    if isinstance(error, Py42HTTPError) and not isinstance(
+        error, Py42InternalServerError
+    ):
+        return error.response.status_code == _TOO_MANY_REQUESTS
+    if isinstance(error, (Py42InternalServerError, ConnectionError, Timeout)):
+        return idempotent
+    return False
+
+
+def _is_new_connection_error(error):
+    # requests wraps urllib3's MaxRetryError, whose reason is the error that failed the
+    # last attempt
+    while error is not None:
+        if isinstance(error, NewConnectionError):
+            return True
+        cause = getattr(error, u"reason", None)
+        if cause is None and error.args:
+            cause = error.args[0]
+        error = cause if isinstance(cause, Exception) else None
+    return False
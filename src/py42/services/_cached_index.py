@@ -0,0 +1,100 @@
+import time
+from threading import Lock
+
+from py42._concurrency import submit
+from py42.settings import debug
+
+
+class CachedIndex(object):
+    """The base of in-memory indexes of every item of some kind, for looking items up
+    without a request each time.
+
+    The index loads every item on first use. Once it is older than ``ttl`` it keeps
+    answering from the loaded items while it is reloaded on a background thread. Looking
+    up an item that is not in the index reloads it right away, at most once per
+    ``min_refresh_interval``, so items created since the last load are found.
+
+    Subclasses implement :meth:`_load_indexes` and look items up with :meth:`_get`.
+    """
+
+    # names what is indexed in log messages
+    _description = u"index"
+
+    def __init__(self, ttl, min_refresh_interval):
+        self._ttl = ttl
+        self._min_refresh_interval = min_refresh_interval
+        self._lock = Lock()
+        self._refresh_lock = Lock()
+        self._refreshing = False
+        self._loaded_at = None
+        self._indexes = None
+
+    @property
+    def loaded_at(self):
+        """The POSIX timestamp of the last load, or None if the index was never loaded."""
+        with self._lock:
+            return self._loaded_at
+
+    def refresh(self):
+        """Reloads every item into the index."""
+        with self._refresh_lock:
+            self._load()
+
+    def _load_indexes(self):
+        """Loads every item and returns the object that lookups are passed."""
+        raise NotImplementedError()
+
+    def _get(self, lookup, fetch_missing=None):
+        """Calls ``lookup`` with the loaded indexes and returns what it found. When it finds
+        None, ``fetch_missing`` is called with the indexes instead if given, otherwise the
+        index is reloaded if older than ``min_refresh_interval`` and looked up again."""
+        with self._lock:
+            loaded_at = self._loaded_at
+        if loaded_at is None:
+            loaded_at = self._reload(loaded_at)
+        elif time.time() - loaded_at >= self._ttl:
+            self._refresh_in_background()
+        with self._lock:
+            indexes = self._indexes
+            found = lookup(indexes)
+        if found is not None:
+            return found
+        if fetch_missing is not None:
+            return fetch_missing(indexes)
+        if time.time() - loaded_at >= self._min_refresh_interval:
+            self._reload(loaded_at)
+            with self._lock:
+                found = lookup(self._indexes)
+        return found
+
+    def _reload(self, loaded_at):
+        # threads that missed at the same time load the items once
+        with self._refresh_lock:
+            if self._loaded_at == loaded_at:
+                self._load()
+            return self._loaded_at
+
+    def _load(self):
+        indexes = self._load_indexes()
+        with self._lock:
+            self._indexes = indexes
+            self._loaded_at = time.time()
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        submit(self._run_background_refresh)
+
+    def _run_background_refresh(self):
+        try:
+            self.refresh()
+        except Exception as ex:
+            # lookups keep using the loaded items, and the next one retries
+            debug.logger.warning(
+                u"Failed to refresh {}: {}".format(self._description, ex)
+            )
+        finally:
+            with self._lock:
+                self._refreshing = False
@@ -0,0 +1,118 @@
+from py42._compat import str
+from py42._concurrency import DEFAULT_MAX_WORKERS
+from py42._concurrency import submit
+from py42.exceptions import Py42Error
+from py42.services._time_windows import merge_sorted
+
+_END = object()
+
+
+def search_chunked(search_all, query, id_key, max_values=None, max_workers=None):
+    """Runs the queries planned by :func:`py42.sdk.queries.query_planner.plan_queries()`,
+    reading every result of each, and merges them in the sort order of the query with
+    duplicates removed. Results are merged as they are read, so only the current page of
+    each query is held in memory. A query is started once the merge is within
+    ``max_workers`` queries of it, so at most that many first searches run at once.
+
+    The ``not_in`` values the plan could not send are filtered out by the top-level field
+    of each result named by the filter term, compared exactly as str. Results that lack
+    the field, or whose field holds a list or dict, raise
+    :class:`py42.exceptions.Py42Error`.
+
+    Args:
+        search_all (callable): Called with a query and returns a generator that iterates
+            over every result of the query in its sort order, paging past the result limit
+            of one search. The query is not searched until the generator is read.
+        query (:class:`~py42.sdk.queries.BaseQuery`): The query to search.
+        id_key (str): The key identifying each result, such as ``eventId``.
+        max_values (int, optional): The maximum number of values of an ``is_in`` or
+            ``not_in`` group in one request. Defaults to 1000.
+        max_workers (int, optional): The number of queries started at once. Defaults to 4.
+
+    Returns:
+        generator: An object that iterates over the result dicts.
+    """
+    # imported here because py42.sdk imports the services that use this module
+    from py42.sdk.queries.query_planner import plan_queries
+
+    plan = plan_queries(query, max_values=max_values)
+    starter = _QueryStarter(
+        search_all, plan.queries, max_workers or DEFAULT_MAX_WORKERS
+    )
+    merged = merge_sorted(
+        [starter.iter_results(index) for index in range(len(plan.queries))],
+        key=lambda item: get_sort_value(item, query.sort_key),
+        reverse=(query.sort_direction or u"").lower() == u"desc",
+    )
+    excluded_values = {
+        term: {str(value) for value in values}
+        for term, values in plan.excluded_values.items()
+    }
+    return _filter_items(merged, id_key, excluded_values)
+
+
+class _QueryStarter(object):
+    # the merge reads the first result of each query in turn, so each query is started
+    # by reading its first result on a thread, at most max_workers queries ahead
+    def __init__(self, search_all, queries, max_workers):
+        self._search_all = search_all
+        self._queries = queries
+        self._max_workers = max_workers
+        self._started = {}
+
+    def iter_results(self, index):
+        # a generator, so the query is not started until the merge reaches it
+        for ahead in range(index, min(index + self._max_workers, len(self._queries))):
+            if ahead not in self._started:
+                results = self._search_all(self._queries[ahead])
+                self._started[ahead] = submit(_read_first, results)
+        first, results = self._started.pop(index).result()
+        if first is _END:
+            return
+        yield first
+        for item in results:
+            yield item
+
+
+def _read_first(results):
+    return next(results, _END), results
+
+
+def get_sort_value(item, sort_key):
+    if not sort_key:
+        return None
+    if sort_key in item:
+        return item[sort_key]
+    # alert queries sort by keys such as CreatedAt for the createdAt field
+    return item.get(sort_key[0].lower() + sort_key[1:])
+
+
+def _filter_items(items, id_key, excluded_values):
+    seen = set()
+    for item in items:
+        item_id = item.get(id_key)
+        if item_id is not None:
+            if item_id in seen:
+                continue
+            seen.add(item_id)
+        if _is_excluded(item, excluded_values):
+            continue
+        yield item
+
+
+def _is_excluded(item, excluded_values):
+    for term, values in excluded_values.items():
+        if term not in item:
+            raise Py42Error(
+                u"Cannot filter out the not_in values of {0} past max_values, as the "
+                u"results have no {0} field.".format(term)
+            )
+        value = item[term]
+        if isinstance(value, (list, dict)):
+            raise Py42Error(
+                u"Cannot filter out the not_in values of {} past max_values, as the "
+                u"field holds more than one value.".format(term)
+            )
+        if value is not None and str(value) in values:
+            return True
+    return False
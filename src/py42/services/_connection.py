@@ -204,14 +204,15 @@ class Connection(object):
         if json is not None:
             data = json_lib.dumps(json)
 
-        user_headers = {u"User-Agent": settings.get_user_agent_string()}
+        # per-request headers must not leak into later requests on a shared connection
+        request_headers = self._headers.copy()
+        request_headers[u"User-Agent"] = settings.get_user_agent_string()
         if headers:
-            user_headers.update(headers)
-        self._headers.update(user_headers)
+            request_headers.update(headers)
         request = Request(
             method=method,
             url=url,
-            headers=self._headers,
+            headers=request_headers,
             files=files,
             data=data,
             params=params,
@@ -0,0 +1,119 @@
+import heapq
+import re
+from datetime import datetime
+from datetime import timedelta
+
+from py42._compat import str
+from py42.exceptions import Py42Error
+from py42.util import convert_datetime_to_epoch
+from py42.util import DATE_STR_FORMAT
+
+_EPOCH = datetime.utcfromtimestamp(0)
+_TIMESTAMP_PATTERN = re.compile(r"(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d)(?:\.(\d+))?")
+_END = object()
+
+
+def split_time_range(begin_time, end_time, windows):
+    """Splits the time range from ``begin_time`` to ``end_time`` into disjoint windows of
+    about equal length.
+
+    Args:
+        begin_time (int or float or str or datetime): The start of the range, as a POSIX
+            timestamp in seconds, a str in format ``yyyy-MM-dd HH:MM:SS``, or a datetime.
+        end_time (int or float or str or datetime): The inclusive end of the range.
+        windows (int): The number of windows.
+
+    Returns:
+        list: ``(start, end)`` datetime tuples whose ranges are inclusive at millisecond
+        precision and do not overlap.
+    """
+    begin_ms = to_epoch_milliseconds(begin_time)
+    end_ms = to_epoch_milliseconds(end_time)
+    if end_ms < begin_ms:
+        raise Py42Error(u"The end of the time range is before its beginning.")
+    # there is no point in windows shorter than the millisecond precision of a query
+    windows = max(1, min(windows, end_ms - begin_ms + 1))
+    span = end_ms - begin_ms + 1
+    bounds = [begin_ms + span * i // windows for i in range(windows + 1)]
+    return [
+        (from_epoch_milliseconds(bounds[i]), from_epoch_milliseconds(bounds[i + 1] - 1))
+        for i in range(windows)
+    ]
+
+
+def to_epoch_milliseconds(timestamp):
+    if isinstance(timestamp, datetime):
+        timestamp = convert_datetime_to_epoch(timestamp)
+    elif isinstance(timestamp, str):
+        timestamp = convert_datetime_to_epoch(
+            datetime.strptime(timestamp, DATE_STR_FORMAT)
+        )
+    return int(round(timestamp * 1000))
+
+
+def from_epoch_milliseconds(milliseconds):
+    return _EPOCH + timedelta(milliseconds=milliseconds)
+
+
+def parse_timestamp(value):
+    """Parses a UTC timestamp str such as ``2020-02-14T20:11:29.5563480Z``, with any number of
+    fractional digits, into a datetime truncated to the millisecond precision of a query.
+    """
+    match = _TIMESTAMP_PATTERN.match(value)
+    if match is None:
+        raise Py42Error(u"Unrecognized timestamp {}.".format(value))
+    time = datetime.strptime(match.group(1), u"%Y-%m-%dT%H:%M:%S")
+    milliseconds = int((match.group(2) or u"0")[:3].ljust(3, u"0"))
+    return time + timedelta(milliseconds=milliseconds)
+
+
+def merge_sorted(iterables, key, reverse=False):
+    """Merges iterables that are each already sorted into one sorted stream, holding only the
+    next item of each iterable at a time.
+
+    Args:
+        iterables (list): The sorted iterables.
+        key (callable): Returns the value to sort an item by. Items whose value is None sort
+            before all others.
+        reverse (bool, optional): Whether the iterables are sorted in descending order.
+            Defaults to False.
+
+    Returns:
+        generator: An object that iterates over the merged items. Ties are yielded in the
+        order of the iterables.
+    """
+    heap = []
+    for index, iterable in enumerate(iterables):
+        iterator = iter(iterable)
+        item = next(iterator, _END)
+        if item is not _END:
+            heap.append(_MergeEntry(key(item), reverse, index, item, iterator))
+    heapq.heapify(heap)
+
+    while heap:
+        entry = heap[0]
+        yield entry.item
+        item = next(entry.iterator, _END)
+        if item is _END:
+            heapq.heappop(heap)
+        else:
+            heapq.heapreplace(
+                heap,
+                _MergeEntry(key(item), reverse, entry.index, item, entry.iterator),
+            )
+
+
+class _MergeEntry(object):
+    def __init__(self, sort_value, reverse, index, item, iterator):
+        self.sort_value = (sort_value is not None, sort_value)
+        self.reverse = reverse
+        self.index = index
+        self.item = item
+        self.iterator = iterator
+
+    def __lt__(self, other):
+        if self.sort_value == other.sort_value:
+            return self.index < other.index
+        if self.reverse:
+            return other.sort_value < self.sort_value
+        return self.sort_value < other.sort_value
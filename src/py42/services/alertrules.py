@@ -1,5 +1,16 @@
+from collections import namedtuple
+from collections import OrderedDict
+
+from py42._concurrency import iter_batch_results
+from py42._concurrency import iter_concurrently
+from py42.exceptions import Py42InternalServerError
+from py42.exceptions import Py42InvalidRuleOperationError
 from py42.services import BaseService
 
+RULE_USERS_BATCH_SIZE = 100
+
+AlertRuleUsersResult = namedtuple(u"AlertRuleUsersResult", u"user_ids, error")
+
 
 class AlertRulesService(BaseService):
     """A service to manage Alert Rules."""
@@ -53,6 +64,62 @@ class AlertRulesService(BaseService):
         uri = u"{}{}".format(self._api_prefix, u"add-users")
         return self._connection.post(uri, json=data)
 
+    def add_users(
+        self, rule_id, user_ids, batch_size=None, max_workers=None, check_error=None
+    ):
+        """Adds many users to a rule. The profiles of the users are fetched concurrently,
+        and the users are added in batches of at most ``batch_size`` that run concurrently.
+        A failed batch is split in half and each half is retried once.
+
+        Args:
+            rule_id (str): Observer ID of the rule.
+            user_ids (iter[str]): The Code42 userUids of the users to add. Duplicate IDs are
+                added once.
+            batch_size (int, optional): The maximum number of users in one request.
+                Defaults to 100.
+            max_workers (int, optional): The number of requests run at once. Defaults to 4.
+            check_error (callable, optional): Called with the error of a batch that fails
+                with a server error, before the batch is split. A
+                :class:`py42.exceptions.Py42InvalidRuleOperationError` it raises stops
+                sending batches and is raised. Defaults to None.
+
+        Returns:
+            list: An :class:`AlertRuleUsersResult` for each batch, and for each user whose
+            profile could not be fetched, whose ``error`` is None when its ``user_ids`` were
+            added.
+        """
+        tenant_id = self._user_context.get_current_tenant_id()
+        uri = u"{}{}".format(self._api_prefix, u"add-users")
+        results = []
+        users = []
+        for user_id, user_details, error in iter_concurrently(
+            self._user_profile_service.get_by_id,
+            OrderedDict.fromkeys(user_ids),
+            max_workers=max_workers,
+        ):
+            if error:
+                results.append(AlertRuleUsersResult([user_id], error))
+                continue
+            user_aliases = user_details.data.get(u"cloudUsernames") or []
+            users.append(
+                {u"userIdFromAuthority": user_id, u"userAliasList": user_aliases}
+            )
+
+        def add_batch(batch):
+            data = {u"tenantId": tenant_id, u"ruleId": rule_id, u"userList": batch}
+            return _post_checked(self._connection, uri, data, check_error)
+
+        for batch, _, error in iter_batch_results(
+            add_batch,
+            users,
+            batch_size or RULE_USERS_BATCH_SIZE,
+            max_workers=max_workers,
+            fatal_errors=(Py42InvalidRuleOperationError,),
+        ):
+            user_ids = [user[u"userIdFromAuthority"] for user in batch]
+            results.append(AlertRuleUsersResult(user_ids, error))
+        return results
+
     def remove_user(self, rule_id, user_id):
         user_ids = [user_id]
         tenant_id = self._user_context.get_current_tenant_id()
@@ -60,6 +127,46 @@ class AlertRulesService(BaseService):
         uri = u"{}{}".format(self._api_prefix, u"remove-users")
         return self._connection.post(uri, json=data)
 
+    def remove_users(
+        self, rule_id, user_ids, batch_size=None, max_workers=None, check_error=None
+    ):
+        """Removes many users from a rule in batches of at most ``batch_size`` that run
+        concurrently. A failed batch is split in half and each half is retried once.
+
+        Args:
+            rule_id (str): Observer ID of the rule.
+            user_ids (iter[str]): The Code42 userUids of the users to remove. Duplicate IDs
+                are removed once.
+            batch_size (int, optional): The maximum number of users in one request.
+                Defaults to 100.
+            max_workers (int, optional): The number of requests run at once. Defaults to 4.
+            check_error (callable, optional): Called with the error of a batch that fails
+                with a server error, before the batch is split. A
+                :class:`py42.exceptions.Py42InvalidRuleOperationError` it raises stops
+                sending batches and is raised. Defaults to None.
+
+        Returns:
+            list: An :class:`AlertRuleUsersResult` for each batch, whose ``error`` is None
+            when its ``user_ids`` were removed.
+        """
+        tenant_id = self._user_context.get_current_tenant_id()
+        uri = u"{}{}".format(self._api_prefix, u"remove-users")
+
+        def remove_batch(batch):
+            data = {u"tenantId": tenant_id, u"ruleId": rule_id, u"userIdList": batch}
+            return _post_checked(self._connection, uri, data, check_error)
+
+        return [
+            AlertRuleUsersResult(batch, error)
+            for batch, _, error in iter_batch_results(
+                remove_batch,
+                OrderedDict.fromkeys(user_ids),
+                batch_size or RULE_USERS_BATCH_SIZE,
+                max_workers=max_workers,
+                fatal_errors=(Py42InvalidRuleOperationError,),
+            )
+        ]
+
     def remove_all_users(self, rule_id):
         tenant_id = self._user_context.get_current_tenant_id()
         data = {u"tenantId": tenant_id, u"ruleId": rule_id}
@@ -67,6 +174,15 @@ class AlertRulesService(BaseService):
         return self._connection.post(uri, json=data)
 
 
+def _post_checked(connection, uri, data, check_error):
+    try:
+        return connection.post(uri, json=data)
+    except Py42InternalServerError as err:
+        if check_error is not None:
+            check_error(err)
+        raise
+
+
 class CloudShareService(BaseService):
 
     _version = u"v1"
@@ -1,11 +1,43 @@
+import copy
 import json
+from collections import deque
+from collections import namedtuple
+from collections import OrderedDict
+from datetime import timedelta
 
 from py42 import settings
 from py42._compat import str
+from py42._compat import string_type
+from py42._concurrency import DEFAULT_MAX_WORKERS
+from py42._concurrency import iter_batch_results
+from py42._concurrency import iter_batches
+from py42._concurrency import iter_concurrently
+from py42._concurrency import RateLimiter
+from py42._concurrency import submit
+from py42.exceptions import Py42Error
+from py42.sdk.queries.alerts.filters import DateObserved
 from py42.sdk.queries.query_filter import create_eq_filter_group
 from py42.services import BaseService
+from py42.services._cached_index import CachedIndex
+from py42.services._chunked_search import get_sort_value
+from py42.services._chunked_search import search_chunked
+from py42.services._time_windows import merge_sorted
+from py42.services._time_windows import parse_timestamp
+from py42.services._time_windows import split_time_range
 from py42.services.util import get_all_pages
 
+ALERT_DETAILS_BATCH_SIZE = 100
+ALERT_STATE_UPDATE_BATCH_SIZE = 100
+
+DEFAULT_RULE_METADATA_TTL = 5 * 60
+DEFAULT_RULE_METADATA_MIN_REFRESH_INTERVAL = 30
+
+AlertStateUpdateResult = namedtuple(u"AlertStateUpdateResult", u"alert_ids, error")
+
+# the deepest result a search pages to before it is split into createdAt windows
+MAX_SEARCH_RESULTS = 10000
+_ONE_MILLISECOND = timedelta(milliseconds=1)
+
 
 class AlertService(BaseService):
     _uri_prefix = u"/svc/api/v1/{0}"
@@ -22,15 +54,199 @@ class AlertService(BaseService):
         uri = self._uri_prefix.format(u"query-alerts")
         return self._connection.post(uri, data=query)
 
-    def get_details(self, alert_ids):
+    def search_chunked(self, query, max_values=None, max_workers=None):
+        """Searches for all alerts matching the query, splitting ``is_in`` and ``not_in``
+        filter groups with more than ``max_values`` values across several requests of bounded
+        size that run concurrently. Alerts are merged in the sort order of the query and
+        de-duplicated by ID. A split query matching more alerts than a search can page
+        through is split further into ``createdAt`` windows.
+
+        Args:
+            query (:class:`~py42.sdk.queries.alerts.alert_query.AlertQuery`): The query to
+                search.
+            max_values (int, optional): The maximum number of values of an ``is_in`` or
+                ``not_in`` group in one request. Defaults to 1000.
+            max_workers (int, optional): The number of split queries started at once.
+                Defaults to 4.
+
+        Returns:
+            generator: An object that iterates over alert dicts.
+        """
+        return search_chunked(
+            self._search_all,
+            query,
+            u"id",
+            max_values=max_values,
+            max_workers=max_workers,
+        )
+
+    def _search_all(self, query):
+        # the queries run concurrently, so each reads its own pages one at a time
+        return self._iter_window(query, None, 1, MAX_SEARCH_RESULTS)
+
+    def search_all(self, query, max_workers=None, max_results=None):
+        """Searches for every alert matching the query, fetching the pages following the
+        current one concurrently. When more alerts match than can be paged through, the
+        search is split into ``createdAt`` windows of at most ``max_results`` alerts each,
+        which are paged through in turn.
+
+        Args:
+            query (:class:`~py42.sdk.queries.alerts.alert_query.AlertQuery`): The query to
+                search. Its ``page_number`` is ignored. To be split into windows, its filter
+                groups must be joined with ``AND``.
+            max_workers (int, optional): The number of pages fetched at once. Defaults to 4.
+            max_results (int, optional): The maximum number of alerts paged through for one
+                search. Defaults to 10000.
+
+        Returns:
+            generator: An object that iterates over alert dicts, de-duplicated by ID. Alerts
+            are in the sort order of the query.
+        """
+        max_workers = max_workers or DEFAULT_MAX_WORKERS
+        max_results = max_results or MAX_SEARCH_RESULTS
+        seen = set()
+        for alert in self._iter_alerts(copy.copy(query), max_workers, max_results):
+            # alerts created while paging shift the pages, so some are read twice
+            alert_id = alert.get(u"id")
+            if alert_id is not None:
+                if alert_id in seen:
+                    continue
+                seen.add(alert_id)
+            yield alert
+
+    def _iter_alerts(self, query, max_workers, max_results, window=None):
+        query.page_number = 0
+        first_page = self.search(query)
+        total = first_page[u"totalCount"]
+        if total > max_results:
+            windows = self._split_created_at_range(query, total // max_results + 1)
+            # alerts a millisecond apart cannot be split further, so the window that
+            # holds them is paged through as it is
+            if len(windows) > 1 and _are_narrower(windows, window):
+                return self._iter_windows(query, windows, max_workers, max_results)
+        return self._iter_pages(query, first_page, total, max_workers)
+
+    def _iter_pages(self, query, first_page, total, max_workers):
+        for alert in first_page[u"alerts"]:
+            yield alert
+        page_count = (total + query.page_size - 1) // query.page_size
+        next_page = 1
+        pending = deque()
+        while next_page < page_count or pending:
+            # keep up to max_workers pages in flight while this one is read
+            while next_page < page_count and len(pending) < max_workers:
+                query.page_number = next_page
+                pending.append(submit(self.search, str(query)))
+                next_page += 1
+            for alert in pending.popleft().result()[u"alerts"]:
+                yield alert
+
+    def _iter_window(self, query, window, max_workers, max_results):
+        # a generator, so the window is not searched until it is read
+        for alert in self._iter_alerts(query, max_workers, max_results, window):
+            yield alert
+
+    def _split_created_at_range(self, query, windows):
+        if query._group_clause != u"AND" and len(query._filter_group_list) > 1:
+            raise Py42Error(
+                u"Too many alerts match the query to page through, and only queries whose "
+                u"filter groups are joined with AND can be split into time windows."
+            )
+        edge_query = copy.copy(query)
+        edge_query.page_number = 0
+        edge_query.page_size = 1
+        edge_query.sort_key = self._CREATED_AT
+        edge_query.sort_direction = u"asc"
+        oldest = submit(self.search, str(edge_query))
+        edge_query.sort_direction = u"desc"
+        newest = self.search(str(edge_query))[u"alerts"]
+        oldest = oldest.result()[u"alerts"]
+        if not oldest or not newest:
+            return []
+        begin_time = parse_timestamp(oldest[0][u"createdAt"])
+        end_time = parse_timestamp(newest[0][u"createdAt"])
+        # createdAt has sub-millisecond precision, so each window ends where the next one
+        # starts rather than a millisecond before it
+        return [
+            (start, end + _ONE_MILLISECOND)
+            for start, end in split_time_range(begin_time, end_time, windows)
+        ]
+
+    def _iter_windows(self, query, windows, max_workers, max_results):
+        window_alerts = []
+        for window in windows:
+            window_query = copy.copy(query)
+            window_query._group_clause = u"AND"
+            window_query._filter_group_list = query._filter_group_list + [
+                DateObserved.in_range(*window)
+            ]
+            window_alerts.append(
+                self._iter_window(window_query, window, max_workers, max_results)
+            )
+        reverse = (query.sort_direction or u"").lower() == u"desc"
+        if query.sort_key == self._CREATED_AT:
+            # the windows are already in order, so each is only searched once reached
+            for alerts in reversed(window_alerts) if reverse else window_alerts:
+                for alert in alerts:
+                    yield alert
+        else:
+            merged = merge_sorted(
+                window_alerts,
+                key=lambda alert: get_sort_value(alert, query.sort_key),
+                reverse=reverse,
+            )
+            for alert in merged:
+                yield alert
+
+    def get_details(self, alert_ids, parse_observations=True):
         if not isinstance(alert_ids, (list, tuple)):
             alert_ids = [alert_ids]
         tenant_id = self._user_context.get_current_tenant_id()
         uri = self._uri_prefix.format(u"query-details")
         data = {u"tenantId": tenant_id, u"alertIds": alert_ids}
         results = self._connection.post(uri, json=data)
+        if not parse_observations:
+            return results
         return _convert_observation_json_strings_to_objects(results)
 
+    def get_details_chunked(
+        self, alert_ids, batch_size=None, max_workers=None, parse_observations=True
+    ):
+        """Gets the details of the alerts with the given IDs in batches of at most
+        ``batch_size`` IDs that are requested concurrently. The alerts of each batch are
+        yielded as soon as it arrives.
+
+        Args:
+            alert_ids (iter[str]): The IDs of the alerts. Duplicate IDs are requested once.
+            batch_size (int, optional): The maximum number of IDs in one request. Defaults
+                to 100.
+            max_workers (int, optional): The number of requests run at once. Defaults to 4.
+            parse_observations (bool, optional): Whether to parse the JSON string ``data``
+                of each observation into an object. Defaults to True.
+
+        Returns:
+            generator: An object that iterates over alert detail dicts, in the order their
+            batches complete.
+        """
+        if isinstance(alert_ids, string_type):
+            alert_ids = [alert_ids]
+        batches = iter_batches(
+            OrderedDict.fromkeys(alert_ids), batch_size or ALERT_DETAILS_BATCH_SIZE
+        )
+
+        def get_batch_details(batch):
+            return self.get_details(batch, parse_observations=parse_observations)[
+                u"alerts"
+            ]
+
+        for _, alerts, error in iter_concurrently(
+            get_batch_details, batches, max_workers=max_workers
+        ):
+            if error:
+                raise error
+            for alert in alerts:
+                yield alert
+
     def update_state(self, state, alert_ids, note=""):
         if not isinstance(alert_ids, (list, tuple)):
             alert_ids = [alert_ids]
@@ -45,6 +261,51 @@ class AlertService(BaseService):
         }
         return self._connection.post(uri, json=data)
 
+    def bulk_update_state(
+        self,
+        state,
+        alert_ids,
+        note=u"",
+        batch_size=None,
+        max_workers=None,
+        requests_per_second=None,
+    ):
+        """Updates the state of many alerts in batches of at most ``batch_size`` IDs that
+        run concurrently. A batch that fails is split in half and each half is retried
+        once, so the report isolates the IDs that could not be updated.
+
+        Args:
+            state (str): The state to set, such as ``OPEN`` or ``DISMISSED``.
+            alert_ids (iter[str]): The IDs of the alerts. Duplicate IDs are updated once.
+            note (str, optional): A note about the state change. Defaults to an empty str.
+            batch_size (int, optional): The maximum number of IDs in one request. Defaults
+                to 100.
+            max_workers (int, optional): The number of requests run at once. Defaults to 4.
+            requests_per_second (float, optional): The maximum rate of requests, including
+                retries. Defaults to None, for no limit.
+
+        Returns:
+            list: An :class:`AlertStateUpdateResult` for each batch, in the order the batches
+            complete, whose ``error`` is None when its ``alert_ids`` were updated.
+        """
+        if isinstance(alert_ids, string_type):
+            alert_ids = [alert_ids]
+        rate_limiter = RateLimiter(requests_per_second) if requests_per_second else None
+
+        def update_batch(batch):
+            return self.update_state(state, batch, note=note)
+
+        return [
+            AlertStateUpdateResult(batch, error)
+            for batch, _, error in iter_batch_results(
+                update_batch,
+                OrderedDict.fromkeys(alert_ids),
+                batch_size or ALERT_STATE_UPDATE_BATCH_SIZE,
+                max_workers=max_workers,
+                rate_limiter=rate_limiter,
+            )
+        ]
+
     def _add_tenant_id_if_missing(self, query):
         query_dict = json.loads(str(query))
         tenant_id = query_dict.get(u"tenantId", None)
@@ -107,6 +368,82 @@ class AlertService(BaseService):
         return next(results)
 
 
+class RuleMetadataIndex(CachedIndex):
+    """An in-memory index of the metadata of every alert rule, keyed by observer ID, rule ID
+    and case-insensitive name.
+
+    Args:
+        alert_service (:class:`AlertService`): The service to load the rules with.
+        ttl (int, optional): Seconds before the index is reloaded. Defaults to 300.
+        min_refresh_interval (int, optional): The minimum seconds between reloads caused
+            by lookups of missing rules. Defaults to 30.
+    """
+
+    _description = u"alert rule metadata"
+
+    def __init__(
+        self,
+        alert_service,
+        ttl=DEFAULT_RULE_METADATA_TTL,
+        min_refresh_interval=DEFAULT_RULE_METADATA_MIN_REFRESH_INTERVAL,
+    ):
+        super(RuleMetadataIndex, self).__init__(ttl, min_refresh_interval)
+        self._alert_service = alert_service
+
+    def get_by_observer_id(self, observer_id):
+        """Gets the metadata of the rule with the given observer ID.
+
+        Args:
+            observer_id (str): The observer ID of the rule.
+
+        Returns:
+            dict: The rule metadata, or None if there is no such rule.
+        """
+        return self._get(lambda indexes: indexes.by_observer_id.get(observer_id))
+
+    def get_by_id(self, rule_id):
+        """Gets the metadata of the rule with the given rule ID.
+
+        Args:
+            rule_id (str): The ID of the rule.
+
+        Returns:
+            dict: The rule metadata, or None if there is no such rule.
+        """
+        return self._get(lambda indexes: indexes.by_id.get(rule_id))
+
+    def get_all_by_name(self, rule_name):
+        """Gets the metadata of the rules with the given name, ignoring case.
+
+        Args:
+            rule_name (str): The name of the rules.
+
+        Returns:
+            list: The rule metadata dicts.
+        """
+        return self._get(lambda indexes: indexes.by_name.get(rule_name.lower())) or []
+
+    def _load_indexes(self):
+        indexes = _RuleIndexes({}, {}, {})
+        for page in self._alert_service.get_all_rules():
+            for rule in page[u"ruleMetadata"]:
+                indexes.by_observer_id[rule.get(u"observerRuleId")] = rule
+                indexes.by_id[rule.get(u"id")] = rule
+                name = (rule.get(u"name") or u"").lower()
+                indexes.by_name.setdefault(name, []).append(rule)
+        return indexes
+
+
+def _are_narrower(windows, window):
+    if window is None:
+        return True
+    width = window[1] - window[0]
+    return all(end - start < width for start, end in windows)
+
+
+_RuleIndexes = namedtuple(u"_RuleIndexes", u"by_observer_id, by_id, by_name")
+
+
 def _convert_observation_json_strings_to_objects(results):
     for alert in results[u"alerts"]:
         if u"observations" in alert:
@@ -1,5 +1,13 @@
+import json
+from collections import Counter
+from collections import namedtuple
+
 from py42 import settings
+from py42._concurrency import chain_prefetched
+from py42.exceptions import Py42Error
 from py42.services import BaseService
+from py42.services._time_windows import parse_timestamp
+from py42.services._time_windows import split_time_range
 from py42.services.util import get_all_pages
 from py42.util import parse_timestamp_to_milliseconds_precision
 from py42.util import to_list
@@ -17,6 +25,13 @@ _FILTER_PARAMS = (
 
 HEADER_MAP = {"CSV": {"Accept": "text/csv"}, "CEF": {"Accept": "text/x-cef"}}
 
+DEFAULT_TIME_WINDOWS = 8
+
+_SEARCH_URI = u"/rpc/search/search-audit-log"
+_EXPORT_CHUNK_SIZE = 1024 * 1024
+
+AuditLogExportResult = namedtuple(u"AuditLogExportResult", u"events, bytes_written")
+
 
 class AuditLogsService(BaseService):
     """https://support.code42.com/Administrator/Cloud/Monitoring_and_managing/Search_Audit_Log_events_with_the_Code42_API"""
@@ -37,31 +52,21 @@ class AuditLogsService(BaseService):
         **kwargs
     ):
 
-        date_range = {}
-        if begin_time:
-            date_range["startTime"] = parse_timestamp_to_milliseconds_precision(
-                begin_time
-            )
-        if end_time:
-            date_range["endTime"] = parse_timestamp_to_milliseconds_precision(end_time)
-
-        uri = u"/rpc/search/search-audit-log"
-        page_size = page_size or settings.items_per_page
-        params = dict(
-            page=page_num - 1,
-            pageSize=page_size,
-            dateRange=date_range,
-            eventTypes=to_list(event_types),
-            actorIds=to_list(user_ids),
-            actorNames=to_list(usernames),
-            actorIpAddresses=to_list(user_ip_addresses),
-            affectedUserIds=to_list(affected_user_ids),
-            affectedUserNames=to_list(affected_usernames),
+        params = _create_page_params(
+            page_num,
+            page_size,
+            begin_time,
+            end_time,
+            event_types,
+            user_ids,
+            usernames,
+            user_ip_addresses,
+            affected_user_ids,
+            affected_usernames,
+            **kwargs
         )
-        params.update(**kwargs)
-
         headers = HEADER_MAP.get(format.upper()) if format else None
-        return self._connection.post(uri, json=params, headers=headers)
+        return self._connection.post(_SEARCH_URI, json=params, headers=headers)
 
     def get_all(
         self,
@@ -89,3 +94,264 @@ class AuditLogsService(BaseService):
             affected_usernames=affected_usernames,
             **kwargs
         )
+
+    def get_all_in_time_windows(
+        self,
+        begin_time,
+        end_time,
+        windows=None,
+        max_workers=None,
+        event_types=None,
+        user_ids=None,
+        usernames=None,
+        user_ip_addresses=None,
+        affected_user_ids=None,
+        affected_usernames=None,
+        **kwargs
+    ):
+        """Gets the audit log events from ``begin_time`` to ``end_time`` by splitting the range
+        into windows and paging through up to ``max_workers`` of them concurrently. Each
+        window read ahead buffers at most two pages, so memory stays bounded however many
+        windows there are.
+
+        The windows are chained rather than merged, so the stream is only newest first
+        because the server returns the events of a window newest first and the windows are
+        read from the newest.
+
+        Whether the server includes events at the ``endTime`` of a search is not
+        documented, so each window ends at the millisecond the next one starts. The events
+        at that millisecond are read by both windows, and those returned twice are yielded
+        once, identified by their ``timestamp`` and content.
+
+        Args:
+            begin_time (int or float or str or datetime): The start of the range, as a POSIX
+                timestamp in seconds, a str in format ``yyyy-MM-dd HH:MM:SS``, or a datetime.
+            end_time (int or float or str or datetime): The inclusive end of the range.
+            windows (int, optional): The number of windows to split the range into.
+                Defaults to 8.
+            max_workers (int, optional): The number of windows paged through at once.
+                Defaults to 4.
+            event_types (str or list, optional): Filters by event type. Defaults to None.
+            user_ids (str or list, optional): Filters by actor userUid. Defaults to None.
+            usernames (str or list, optional): Filters by actor username. Defaults to None.
+            user_ip_addresses (str or list, optional): Filters by actor ip address.
+                Defaults to None.
+            affected_user_ids (str or list, optional): Filters by affected userUid.
+                Defaults to None.
+            affected_usernames (str or list, optional): Filters by affected username.
+                Defaults to None.
+            **kwargs: Added to the search of each page, such as ``page_size``.
+
+        Returns:
+            generator: An object that iterates over audit log event dicts.
+        """
+        filters = dict(
+            event_types=event_types,
+            user_ids=user_ids,
+            usernames=usernames,
+            user_ip_addresses=user_ip_addresses,
+            affected_user_ids=affected_user_ids,
+            affected_usernames=affected_usernames,
+            **kwargs
+        )
+        time_windows = split_time_range(
+            begin_time, end_time, windows or DEFAULT_TIME_WINDOWS
+        )
+        # every window but the last ends where the next one starts
+        starts = [start for start, _ in time_windows]
+        time_windows = list(zip(starts, starts[1:] + [time_windows[-1][1]]))
+        window_pages = (
+            self._iter_window_pages(window, filters)
+            for window in reversed(time_windows)
+        )
+        pages = chain_prefetched(window_pages, max_workers=max_workers)
+        for event in _skip_boundary_duplicates(pages):
+            yield event
+
+    def _iter_window_pages(self, window, filters):
+        start, end = window
+        for response in get_all_pages(
+            self.get_page, u"events", begin_time=start, end_time=end, **filters
+        ):
+            yield window, response[u"events"]
+
+    def export(
+        self,
+        output,
+        format=u"CSV",
+        page_size=None,
+        begin_time=None,
+        end_time=None,
+        event_types=None,
+        user_ids=None,
+        usernames=None,
+        user_ip_addresses=None,
+        affected_user_ids=None,
+        affected_usernames=None,
+        **kwargs
+    ):
+        """Pages through the audit log events in CSV or CEF format, writing the bytes of each
+        page to ``output`` as they are read from the response instead of parsing them. The
+        CSV header is written once, and paging stops at the first page with fewer than
+        ``page_size`` events.
+
+        Returns:
+            :class:`AuditLogExportResult`: A named tuple of the number of ``events`` exported
+            and the number of ``bytes_written``.
+        """
+        format = (format or u"").upper()
+        if format not in HEADER_MAP:
+            raise Py42Error(
+                u"Audit logs can only be exported in {} format, not {}.".format(
+                    u" or ".join(sorted(HEADER_MAP)), format
+                )
+            )
+        write = getattr(output, u"sendall", None) or output.write
+        page_size = page_size or settings.items_per_page
+        has_header = format == u"CSV"
+        buffer = bytearray(_EXPORT_CHUNK_SIZE)
+        events = 0
+        bytes_written = 0
+        page_num = 0
+        page_events = page_size
+        last_byte = b"\n"
+        while page_events >= page_size:
+            page_num += 1
+            params = _create_page_params(
+                page_num,
+                page_size,
+                begin_time,
+                end_time,
+                event_types,
+                user_ids,
+                usernames,
+                user_ip_addresses,
+                affected_user_ids,
+                affected_usernames,
+                **kwargs
+            )
+            response = self._connection.post(
+                _SEARCH_URI, json=params, headers=HEADER_MAP[format], stream=True
+            )
+            counter = _RecordCounter(quoted=has_header)
+            # only the first page's header is written
+            skip_header = has_header and page_num > 1
+            # keeps the last record of a page that did not end with a newline apart from
+            # the first record of this one
+            separate = last_byte != b"\n"
+            try:
+                for chunk in response.iter_content_into(buffer):
+                    data = chunk.tobytes()
+                    counter.update(data)
+                    if skip_header:
+                        if b"\n" not in data:
+                            continue
+                        data = data.split(b"\n", 1)[1]
+                        skip_header = False
+                    if not data:
+                        continue
+                    if separate:
+                        data = b"\n" + data
+                        separate = False
+                    write(data)
+                    bytes_written += len(data)
+                    last_byte = data[-1:]
+            finally:
+                response.close()
+            page_events = counter.finish()
+            if has_header and page_events:
+                page_events -= 1
+            events += page_events
+        return AuditLogExportResult(events, bytes_written)
+
+
+def _skip_boundary_duplicates(window_pages):
+    # the windows are read newest first, so the events at the start of one window are
+    # read again at the end of the older window after it
+    window = None
+    newer_start_events = Counter()
+    start_events = Counter()
+    for page_window, events in window_pages:
+        if page_window != window:
+            window = page_window
+            newer_start_events, start_events = start_events, Counter()
+        start, end = window
+        for event in events:
+            timestamp = _get_event_time(event)
+            if timestamp == end or timestamp == start:
+                key = json.dumps(event, sort_keys=True)
+                if timestamp == end and newer_start_events[key]:
+                    newer_start_events[key] -= 1
+                    continue
+                if timestamp == start:
+                    start_events[key] += 1
+            yield event
+
+
+def _get_event_time(event):
+    timestamp = event.get(u"timestamp")
+    if not timestamp:
+        return None
+    return parse_timestamp(timestamp)
+
+
+def _create_page_params(
+    page_num,
+    page_size,
+    begin_time,
+    end_time,
+    event_types,
+    user_ids,
+    usernames,
+    user_ip_addresses,
+    affected_user_ids,
+    affected_usernames,
+    **kwargs
+):
+    date_range = {}
+    if begin_time:
+        date_range["startTime"] = parse_timestamp_to_milliseconds_precision(begin_time)
+    if end_time:
+        date_range["endTime"] = parse_timestamp_to_milliseconds_precision(end_time)
+
+    page_size = page_size or settings.items_per_page
+    params = dict(
+        page=page_num - 1,
+        pageSize=page_size,
+        dateRange=date_range,
+        eventTypes=to_list(event_types),
+        actorIds=to_list(user_ids),
+        actorNames=to_list(usernames),
+        actorIpAddresses=to_list(user_ip_addresses),
+        affectedUserIds=to_list(affected_user_ids),
+        affectedUserNames=to_list(affected_usernames),
+    )
+    params.update(**kwargs)
+    return params
+
+
+class _RecordCounter(object):
+    # counts the newline-terminated records of a text page read in chunks, ignoring the
+    # newlines inside quoted CSV fields
+    def __init__(self, quoted):
+        self._quoted = quoted
+        self._in_quotes = False
+        self._count = 0
+        self._last = b"\n"
+
+    def update(self, data):
+        if not data:
+            return
+        if self._quoted and (self._in_quotes or b'"' in data):
+            for index, part in enumerate(data.split(b'"')):
+                if index:
+                    self._in_quotes = not self._in_quotes
+                if not self._in_quotes:
+                    self._count += part.count(b"\n")
+        else:
+            self._count += data.count(b"\n")
+        self._last = data[-1:]
+
+    def finish(self):
+        # the last record may not end with a newline
+        return self._count + (0 if self._last == b"\n" else 1)
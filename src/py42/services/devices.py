@@ -1,12 +1,56 @@
 from collections import namedtuple
+from collections import OrderedDict
 from time import time
 
 from py42 import settings
 from py42._compat import str
+from py42._compat import string_type
 from py42.clients.settings.device_settings import DeviceSettings
+from py42.exceptions import Py42NotFoundError
 from py42.services import BaseService
+from py42.services._bulk import iter_bulk_results
+from py42.services._cached_index import CachedIndex
 from py42.services.util import get_all_pages
 
+DEFAULT_DEVICE_INVENTORY_TTL = 15 * 60
+DEFAULT_DEVICE_FIELDS = (
+    u"computerId",
+    u"guid",
+    u"name",
+    u"osHostname",
+    u"status",
+    u"active",
+    u"userUid",
+    u"orgUid",
+    u"osName",
+    u"version",
+    u"lastConnected",
+)
+BACKUP_USAGE_FIELDS = (
+    u"targetComputerGuid",
+    u"targetComputerName",
+    u"lastBackup",
+    u"lastCompletedBackup",
+    u"percentComplete",
+    u"archiveBytes",
+)
+
+_INDEXED_FIELDS = (u"computerId", u"guid", u"osHostname", u"userUid", u"orgUid")
+# values shared by many devices, stored once
+_REPEATED_FIELDS = (
+    u"status",
+    u"userUid",
+    u"orgUid",
+    u"osName",
+    u"version",
+    u"targetComputerGuid",
+    u"targetComputerName",
+)
+
+DeviceOperationResult = namedtuple(
+    u"DeviceOperationResult", u"device_id, response, error"
+)
+
 DeviceSettingsResponse = namedtuple(
     "DeviceSettingsResponse", ["error", "settings_response", "device_settings_response"]
 )
@@ -285,3 +329,383 @@ class DeviceService(BaseService):
         new_config_date_ms = str(int(time() * 1000))
         device_settings[u"settings"][u"configDateMs"] = new_config_date_ms
         return self._connection.put(uri, json=device_settings)
+
+
+class DeviceInventory(CachedIndex):
+    """An in-memory inventory of every device, indexed by GUID, computer ID, org UID, user
+    UID and hostname, for looking devices up without a request each time, such as when
+    mapping the ``deviceUid`` of file events to hostnames and users.
+
+    Only the ``fields`` of each device are kept, in a tuple rather than a dict, and values
+    that many devices share, such as org and user UIDs, are stored once, so large
+    inventories stay small in memory. Lookups return a new dict of the kept fields.
+
+    The inventory loads every device with :meth:`DeviceService.get_all` on first use. Once
+    it is older than ``ttl`` it keeps answering from the loaded devices while it is
+    reloaded on a background thread. Looking up a GUID or computer ID that is not in the
+    inventory requests just that device and adds it. Lookups by org, user or hostname answer
+    from the loaded devices, so an org or user with no devices does not reload the
+    inventory.
+
+    Usage example::
+
+        inventory = DeviceInventory(sdk.devices, active=True)
+        device = inventory.get_by_guid(event["deviceUid"])
+
+    Args:
+        device_service (:class:`DeviceService`): The service to load the devices with, such
+            as ``sdk.devices``.
+        ttl (int, optional): Seconds before the inventory is reloaded. Defaults to 900.
+        include_backup_usage (bool, optional): Whether to keep a summary of each device's
+            backup usage, with the :data:`BACKUP_USAGE_FIELDS` of each destination, under
+            ``backupUsage``. Defaults to False.
+        fields (iter[str], optional): The fields of each device to keep. The indexed fields
+            are always kept. Defaults to :data:`DEFAULT_DEVICE_FIELDS`.
+        **kwargs: Passed to :meth:`DeviceService.get_all` to limit the devices loaded, such
+            as ``active=True``.
+    """
+
+    _description = u"device inventory"
+
+    def __init__(
+        self,
+        device_service,
+        ttl=DEFAULT_DEVICE_INVENTORY_TTL,
+        include_backup_usage=False,
+        fields=DEFAULT_DEVICE_FIELDS,
+        **kwargs
+    ):
+        # every lookup answers for keys it does not find, so no lookup reloads the
+        # inventory and there is no interval between such reloads to set
+        super(DeviceInventory, self).__init__(ttl, min_refresh_interval=0)
+        self._device_service = device_service
+        self._include_backup_usage = include_backup_usage
+        self._fields = tuple(OrderedDict.fromkeys(_INDEXED_FIELDS + tuple(fields)))
+        self._filters = kwargs
+
+    def __len__(self):
+        return self._get(lambda indexes: len(indexes.by_guid))
+
+    def get_by_guid(self, guid):
+        """Gets the device with the given GUID.
+
+        Args:
+            guid (str): The GUID of the device.
+
+        Returns:
+            dict: The kept fields of the device, or None if there is no such device.
+        """
+        return self._get_device(u"by_guid", str(guid), self._fetch_by_guid)
+
+    def get_by_id(self, device_id):
+        """Gets the device with the given computer ID.
+
+        Args:
+            device_id (int or str): The computer ID of the device.
+
+        Returns:
+            dict: The kept fields of the device, or None if there is no such device.
+        """
+        return self._get_device(u"by_id", str(device_id), self._fetch_by_id)
+
+    def get_all_by_org_uid(self, org_uid):
+        """Gets the devices in the org with the given UID.
+
+        Args:
+            org_uid (str): The UID of the org.
+
+        Returns:
+            list: The kept fields of each device.
+        """
+        return self._get_devices(u"by_org_uid", org_uid)
+
+    def get_all_by_user_uid(self, user_uid):
+        """Gets the devices of the user with the given UID.
+
+        Args:
+            user_uid (str): The UID of the user.
+
+        Returns:
+            list: The kept fields of each device.
+        """
+        return self._get_devices(u"by_user_uid", user_uid)
+
+    def get_all_by_hostname(self, hostname):
+        """Gets the devices with the given OS hostname, ignoring case.
+
+        Args:
+            hostname (str): The OS hostname of the devices.
+
+        Returns:
+            list: The kept fields of each device.
+        """
+        return self._get_devices(u"by_hostname", hostname.lower())
+
+    def _get_device(self, index_name, key, fetch):
+        def lookup(indexes):
+            return getattr(indexes, index_name).get(key)
+
+        def fetch_missing(indexes):
+            if (index_name, key) in indexes.missing:
+                return None
+            device = fetch(key)
+            with self._lock:
+                if device is None:
+                    indexes.missing.add((index_name, key))
+                    return None
+                return self._add_device(indexes, device)
+
+        record = self._get(lookup, fetch_missing)
+        return self._to_dict(record) if record is not None else None
+
+    def _get_devices(self, index_name, key):
+        records = self._get(
+            lambda indexes: getattr(indexes, index_name).get(key),
+            lambda indexes: [],
+        )
+        return [self._to_dict(record) for record in records]
+
+    def _fetch_by_guid(self, guid):
+        try:
+            return self._device_service.get_by_guid(
+                guid, include_backup_usage=self._include_backup_usage
+            ).data
+        except Py42NotFoundError:
+            return None
+
+    def _fetch_by_id(self, device_id):
+        try:
+            return self._device_service.get_by_id(
+                device_id, include_backup_usage=self._include_backup_usage
+            ).data
+        except Py42NotFoundError:
+            return None
+
+    def _load_indexes(self):
+        indexes = _DeviceIndexes({}, {}, {}, {}, {}, {}, set())
+        pages = self._device_service.get_all(
+            include_backup_usage=self._include_backup_usage,
+            include_counts=False,
+            **self._filters
+        )
+        for page in pages:
+            for device in page[u"computers"]:
+                self._add_device(indexes, device)
+        return indexes
+
+    def _add_device(self, indexes, device):
+        values = [_get_value(indexes, device, field) for field in self._fields]
+        if self._include_backup_usage:
+            values.append(
+                tuple(
+                    tuple(_get_value(indexes, usage, f) for f in BACKUP_USAGE_FIELDS)
+                    for usage in device.get(u"backupUsage") or []
+                )
+            )
+        record = tuple(values)
+        indexes.by_guid[str(device.get(u"guid"))] = record
+        indexes.by_id[str(device.get(u"computerId"))] = record
+        for index, key in (
+            (indexes.by_org_uid, device.get(u"orgUid")),
+            (indexes.by_user_uid, device.get(u"userUid")),
+            (indexes.by_hostname, (device.get(u"osHostname") or u"").lower()),
+        ):
+            if key:
+                index.setdefault(key, []).append(record)
+        return record
+
+    def _to_dict(self, record):
+        device = dict(zip(self._fields, record))
+        if self._include_backup_usage:
+            device[u"backupUsage"] = [
+                dict(zip(BACKUP_USAGE_FIELDS, usage)) for usage in record[-1]
+            ]
+        return device
+
+
+class BulkDeviceOperations(object):
+    """Runs a device operation for many devices at once, such as when deactivating every
+    device that stopped connecting in a clean-up.
+
+    The operation runs for several devices concurrently, at most ``requests_per_second``
+    requests per second. Every device operation leaves the same state when run twice, so
+    requests that fail because of too many requests, a server error or a broken
+    connection are retried with backoff. One device failing does not stop the others.
+
+    The device IDs are read lazily, so devices selected with :meth:`iter_device_ids` are
+    processed while later pages are still being requested. Like
+    :class:`py42.services.users.BulkUserOperations`, every operation returns a
+    :class:`DeviceOperationResult` for each device once all of them complete.
+
+    Usage example::
+
+        bulk = BulkDeviceOperations(sdk.devices, requests_per_second=10)
+        device_ids = bulk.iter_device_ids(org_uid=org_uid, blocked=False)
+        for result in bulk.block(device_ids):
+            if result.error:
+                print(u"{} failed: {}".format(result.device_id, result.error))
+
+    Args:
+        device_service (:class:`DeviceService`): The service to run the operations with,
+            such as ``sdk.devices``.
+        max_workers (int, optional): The number of requests run at once. Defaults to 4.
+        requests_per_second (float, optional): The maximum rate of requests, including
+            retries. Defaults to None, for no limit.
+        max_retries (int, optional): The maximum number of retries for each device.
+            Defaults to 3.
+    """
+
+    def __init__(
+        self,
+        device_service,
+        max_workers=None,
+        requests_per_second=None,
+        max_retries=None,
+    ):
+        self._device_service = device_service
+        self._max_workers = max_workers
+        self._requests_per_second = requests_per_second
+        self._max_retries = max_retries
+
+    def iter_device_ids(self, requery=None, **kwargs):
+        """Iterates over the IDs of the devices matching filters of
+        :meth:`DeviceService.get_all`, requesting each page only once the IDs before it
+        were read.
+
+        Running an operation on the devices can change which devices match the filters,
+        such as deactivating devices selected with ``active=True``, which shifts later
+        pages. With ``requery``, the devices are therefore requested again from the first
+        page until no new device is found, so every matching device is included once.
+
+        Args:
+            requery (bool, optional): Whether to request the devices again until no new
+                device is found, for operations that change which devices match the
+                filters. Defaults to None, which requeries only when filtering by
+                ``active`` or ``blocked``, the states the operations of this class change.
+            **kwargs: Passed to :meth:`DeviceService.get_all`, such as ``org_uid`` and
+                ``active``.
+
+        Returns:
+            generator: An object that iterates over device IDs.
+        """
+        if requery is None:
+            requery = any(
+                kwargs.get(key) is not None for key in (u"active", u"blocked")
+            )
+        kwargs.setdefault(u"include_counts", False)
+        seen = set()
+        found_new = True
+        while found_new:
+            found_new = False
+            for page in self._device_service.get_all(**kwargs):
+                for device in page[u"computers"]:
+                    device_id = device.get(u"computerId")
+                    if device_id not in seen:
+                        seen.add(device_id)
+                        found_new = requery
+                        yield device_id
+
+    def block(self, device_ids):
+        """Blocks many devices. See :meth:`DeviceService.block`.
+
+        Args:
+            device_ids (iter[int]): The IDs of the devices. Duplicate IDs are blocked once.
+
+        Returns:
+            list: A :class:`DeviceOperationResult` for each device, in the order the
+            devices complete.
+        """
+        return self.run(self._device_service.block, device_ids, idempotent=True)
+
+    def unblock(self, device_ids):
+        """Unblocks many devices. See :meth:`DeviceService.unblock`.
+
+        Args:
+            device_ids (iter[int]): The IDs of the devices. Duplicate IDs are unblocked
+                once.
+
+        Returns:
+            list: A :class:`DeviceOperationResult` for each device, in the order the
+            devices complete.
+        """
+        return self.run(self._device_service.unblock, device_ids, idempotent=True)
+
+    def deactivate(self, device_ids):
+        """Deactivates many devices. See :meth:`DeviceService.deactivate`.
+
+        Args:
+            device_ids (iter[int]): The IDs of the devices. Duplicate IDs are deactivated
+                once.
+
+        Returns:
+            list: A :class:`DeviceOperationResult` for each device, in the order the
+            devices complete.
+        """
+        return self.run(self._device_service.deactivate, device_ids, idempotent=True)
+
+    def reactivate(self, device_ids):
+        """Reactivates many devices. See :meth:`DeviceService.reactivate`.
+
+        Args:
+            device_ids (iter[int]): The IDs of the devices. Duplicate IDs are reactivated
+                once.
+
+        Returns:
+            list: A :class:`DeviceOperationResult` for each device, in the order the
+            devices complete.
+        """
+        return self.run(self._device_service.reactivate, device_ids, idempotent=True)
+
+    def deauthorize(self, device_ids):
+        """Deauthorizes many devices. See :meth:`DeviceService.deauthorize`.
+
+        Args:
+            device_ids (iter[int]): The IDs of the devices. Duplicate IDs are deauthorized
+                once.
+
+        Returns:
+            list: A :class:`DeviceOperationResult` for each device, in the order the
+            devices complete.
+        """
+        return self.run(self._device_service.deauthorize, device_ids, idempotent=True)
+
+    def run(self, operation, device_ids, idempotent=False):
+        """Runs any operation for many devices, such as a function that makes several
+        requests for one device.
+
+        Args:
+            operation (callable): Called with each device ID.
+            device_ids (iter): The IDs of the devices. Duplicate IDs are run once.
+            idempotent (bool, optional): Whether running ``operation`` twice for a device
+                leaves the same state as running it once, so that it is retried after
+                server errors. Defaults to False.
+
+        Returns:
+            list: A :class:`DeviceOperationResult` for each device, in the order the
+            devices complete, whose ``response`` is what ``operation`` returned and whose
+            ``error`` is None when it succeeded.
+        """
+        return [
+            DeviceOperationResult(device_id, response, error)
+            for device_id, response, error in iter_bulk_results(
+                operation,
+                device_ids,
+                idempotent,
+                max_workers=self._max_workers,
+                requests_per_second=self._requests_per_second,
+                max_retries=self._max_retries,
+            )
+        ]
+
+
+_DeviceIndexes = namedtuple(
+    u"_DeviceIndexes",
+    u"by_guid, by_id, by_org_uid, by_user_uid, by_hostname, strings, missing",
+)
+
+
+def _get_value(indexes, item, field):
+    value = item.get(field)
+    if field in _REPEATED_FIELDS and isinstance(value, string_type):
+        return indexes.strings.setdefault(value, value)
+    return value
@@ -1,5 +1,17 @@
+import copy
+import json
+
 from py42._compat import str
+from py42._compat import string_type
+from py42._concurrency import submit
+from py42.exceptions import Py42Error
 from py42.services import BaseService
+from py42.services._chunked_search import search_chunked
+from py42.services._time_windows import merge_sorted
+from py42.services._time_windows import parse_timestamp
+from py42.services._time_windows import split_time_range
+
+MAX_SEARCH_RESULTS = 10000
 
 
 class FileEventService(BaseService):
@@ -25,6 +37,150 @@ class FileEventService(BaseService):
         uri = u"/forensic-search/queryservice/api/v1/fileevent"
         return self._connection.post(uri, data=query)
 
+    def search_chunked(self, query, max_values=None, max_workers=None):
+        """Searches for all file events matching the query criteria, splitting ``is_in`` and
+        ``not_in`` filter groups with more than ``max_values`` values across several
+        requests of bounded size that run concurrently. Events are merged in the sort order
+        of the query and de-duplicated by ``eventId``. A split query matching more events
+        than a search can page through is split further into ``eventTimestamp`` windows.
+
+        Args:
+            query (:class:`~py42.sdk.queries.fileevents.file_event_query.FileEventQuery`): The
+                query to search. Its remaining ``not_in`` values past ``max_values`` are
+                filtered out of the results by the top-level event field named by the filter
+                term, compared exactly.
+            max_values (int, optional): The maximum number of values of an ``is_in`` or
+                ``not_in`` group in one request. Defaults to 1000.
+            max_workers (int, optional): The number of split queries started at once.
+                Defaults to 4.
+
+        Returns:
+            generator: An object that iterates over file event dicts.
+        """
+        return search_chunked(
+            self._search_all,
+            query,
+            u"eventId",
+            max_values=max_values,
+            max_workers=max_workers,
+        )
+
+    def search_in_time_windows(
+        self, query, begin_time, end_time, windows=4, max_results=None
+    ):
+        """Searches for file events matching the query criteria by splitting the time range
+        from ``begin_time`` to ``end_time`` into disjoint ``eventTimestamp`` windows and
+        searching them concurrently. The events of every window are merged in the
+        ``sort_key`` and ``sort_direction`` order of the query as they are read, so only the
+        current page of each window is held in memory. A search only pages through its
+        first ``max_results`` events, so a window holding more is split into narrower
+        windows.
+
+        Args:
+            query (:class:`~py42.sdk.queries.fileevents.file_event_query.FileEventQuery` or str):
+                A composed :class:`~py42.sdk.queries.fileevents.file_event_query.FileEventQuery`
+                object or the raw query as a JSON formatted string. Its filter groups must be
+                joined with ``AND``.
+            begin_time (int or float or str or datetime): The start of the searched range,
+                as a POSIX timestamp in seconds, a str in format ``yyyy-MM-dd HH:MM:SS``, or a
+                datetime.
+            end_time (int or float or str or datetime): The inclusive end of the searched
+                range.
+            windows (int, optional): The number of windows searched concurrently. Defaults
+                to 4.
+            max_results (int, optional): The maximum number of events paged through for one
+                window. Defaults to 10000.
+
+        Returns:
+            generator: An object that iterates over the file event dicts of every window,
+            merged in the sort order of the query.
+        """
+        query_dict = json.loads(query) if isinstance(query, string_type) else dict(query)
+        if query_dict[u"groupClause"] != u"AND":
+            raise Py42Error(
+                u"Only queries whose filter groups are joined with AND can be split "
+                u"into time windows."
+            )
+        max_results = max_results or MAX_SEARCH_RESULTS
+        windows = split_time_range(begin_time, end_time, windows)
+        return self._merge_windows(query_dict, windows, max_results)
+
+    def _merge_windows(self, query_dict, windows, max_results):
+        window_events = [
+            self._iter_window_events(query_dict, window, max_results)
+            for window in windows
+        ]
+        sort_key = query_dict[u"srtKey"]
+        return merge_sorted(
+            window_events,
+            key=lambda event: event.get(sort_key),
+            reverse=query_dict[u"srtDir"].lower() == u"desc",
+        )
+
+    def _search_all(self, query):
+        query = copy.copy(query)
+        query.page_number = 1
+        query_dict = json.loads(str(query))
+        # a generator, so the query is not searched until it is read
+        return self._iter_pages(
+            query_dict,
+            None,
+            query,
+            lambda: self.search(str(query)),
+            MAX_SEARCH_RESULTS,
+        )
+
+    def _iter_window_events(self, query_dict, window, max_results):
+        query = _create_window_query(query_dict, *window)
+        # start the first search right away so the windows run concurrently
+        pending = submit(self.search, str(query))
+        return self._iter_pages(query_dict, window, query, pending.result, max_results)
+
+    def _iter_pages(self, query_dict, window, query, get_first_page, max_results):
+        response = get_first_page()
+        total = response[u"totalCount"]
+        if total > max_results and window is None:
+            window = self._get_time_range(query_dict)
+        if total > max_results:
+            windows = split_time_range(window[0], window[1], total // max_results + 1)
+            if len(windows) == 1:
+                raise Py42Error(
+                    u"More than {} file events match the query at {}, which is too many "
+                    u"to page through.".format(max_results, window[0])
+                )
+            for event in self._merge_windows(query_dict, windows, max_results):
+                yield event
+            return
+        while response is not None:
+            pending = None
+            if query.page_number * query.page_size < total:
+                # fetch the next page while this one is being merged
+                query.page_number += 1
+                pending = submit(self.search, str(query))
+            for event in response[u"fileEvents"]:
+                yield event
+            response = pending.result() if pending is not None else None
+
+    def _get_time_range(self, query_dict):
+        if query_dict[u"groupClause"] != u"AND" and len(query_dict[u"groups"]) > 1:
+            raise Py42Error(
+                u"Too many file events match the query to page through, and only queries "
+                u"whose filter groups are joined with AND can be split into time windows."
+            )
+        edge_query = dict(query_dict)
+        edge_query.update({u"pgNum": 1, u"pgSize": 1, u"srtKey": u"eventTimestamp"})
+        edge_query[u"srtDir"] = u"asc"
+        oldest = submit(self.search, json.dumps(edge_query))
+        edge_query[u"srtDir"] = u"desc"
+        newest = self.search(json.dumps(edge_query))[u"fileEvents"]
+        oldest = oldest.result()[u"fileEvents"]
+        if not oldest or not newest:
+            raise Py42Error(u"The file events matching the query changed while searching.")
+        return (
+            parse_timestamp(oldest[0][u"eventTimestamp"]),
+            parse_timestamp(newest[0][u"eventTimestamp"]),
+        )
+
     def get_file_location_detail_by_sha256(self, checksum):
         """Get file location details based on SHA256 hash.
 
@@ -36,3 +192,18 @@ class FileEventService(BaseService):
         """
         uri = u"/forensic-search/queryservice/api/v1/filelocations"
         return self._connection.get(uri, params={u"sha256": checksum})
+
+
+def _create_window_query(query_dict, start, end):
+    # imported here because py42.sdk.queries imports this module
+    from py42.sdk.queries.fileevents.file_event_query import FileEventQuery
+    from py42.sdk.queries.fileevents.filters.event_filter import EventTimestamp
+    from py42.sdk.queries.query_filter import FilterGroup
+
+    filter_groups = [FilterGroup.from_dict(group) for group in query_dict[u"groups"]]
+    filter_groups.append(EventTimestamp.in_range(start, end))
+    query = FileEventQuery.all(*filter_groups)
+    query.page_size = query_dict[u"pgSize"]
+    query.sort_key = query_dict[u"srtKey"]
+    query.sort_direction = query_dict[u"srtDir"]
+    return query
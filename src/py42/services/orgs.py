@@ -4,8 +4,12 @@ from py42 import settings
 from py42.clients.settings.org_settings import OrgSettings
 from py42.exceptions import Py42Error
 from py42.services import BaseService
+from py42.services._cached_index import CachedIndex
 from py42.services.util import get_all_pages
 
+DEFAULT_ORG_TREE_TTL = 15 * 60
+DEFAULT_ORG_TREE_MIN_REFRESH_INTERVAL = 60
+
 OrgSettingsResponse = namedtuple(
     u"OrgSettingsResponse", [u"error", u"org_response", u"org_settings_response"]
 )
@@ -244,3 +248,202 @@ class OrgService(BaseService):
             org_response=org_response,
             org_settings_response=org_settings_response,
         )
+
+
+class OrgTree(CachedIndex):
+    """An in-memory tree of every org, for walking the org hierarchy without getting every
+    org again each time, such as when applying settings to an org and all of its
+    descendants.
+
+    The tree loads every org with :meth:`OrgService.get_all` on first use. Once it is older
+    than ``ttl`` it keeps answering from the loaded orgs while it is reloaded on a background
+    thread. Looking up an org that is not in the tree reloads it right away, at most once per
+    ``min_refresh_interval``. Orgs whose parent is not visible to the authenticated user are
+    roots of the tree.
+
+    Usage example::
+
+        tree = OrgTree(sdk.orgs)
+        for org in tree.iter_subtree(org_uid):
+            sdk.orgs.block(org["orgId"])
+
+    Args:
+        org_service (:class:`OrgService`): The service to load the orgs with, such as
+            ``sdk.orgs``.
+        ttl (int, optional): Seconds before the tree is reloaded. Defaults to 900.
+        min_refresh_interval (int, optional): The minimum seconds between reloads caused by
+            lookups of orgs missing from the tree. Defaults to 60.
+    """
+
+    _description = u"org tree"
+
+    def __init__(
+        self,
+        org_service,
+        ttl=DEFAULT_ORG_TREE_TTL,
+        min_refresh_interval=DEFAULT_ORG_TREE_MIN_REFRESH_INTERVAL,
+    ):
+        super(OrgTree, self).__init__(ttl, min_refresh_interval)
+        self._org_service = org_service
+
+    def __len__(self):
+        return self._get(lambda indexes: len(indexes.by_uid))
+
+    def get_by_uid(self, org_uid):
+        """Gets the org with the given UID.
+
+        Args:
+            org_uid (str): The UID of the org.
+
+        Returns:
+            dict: The org, as returned by :meth:`OrgService.get_all`, or None if there is no
+            such org.
+        """
+        return self._get(lambda indexes: indexes.by_uid.get(org_uid))
+
+    def get_by_id(self, org_id):
+        """Gets the org with the given ID.
+
+        Args:
+            org_id (int): The ID of the org.
+
+        Returns:
+            dict: The org, or None if there is no such org.
+        """
+        org_uid = self.get_uid(org_id)
+        return self.get_by_uid(org_uid) if org_uid is not None else None
+
+    def get_uid(self, org_id):
+        """Gets the UID of the org with the given ID.
+
+        Args:
+            org_id (int): The ID of the org.
+
+        Returns:
+            str: The UID, or None if there is no such org.
+        """
+        return self._get(lambda indexes: indexes.uid_by_id.get(str(org_id)))
+
+    def get_id(self, org_uid):
+        """Gets the ID of the org with the given UID.
+
+        Args:
+            org_uid (str): The UID of the org.
+
+        Returns:
+            int: The ID, or None if there is no such org.
+        """
+        org = self.get_by_uid(org_uid)
+        return org.get(u"orgId") if org is not None else None
+
+    def get_roots(self):
+        """Gets the orgs without a parent in the tree.
+
+        Returns:
+            list: The root orgs.
+        """
+        indexes = self._get(lambda indexes: indexes)
+        return [indexes.by_uid[org_uid] for org_uid in indexes.roots]
+
+    def get_parent(self, org_uid):
+        """Gets the parent of the org with the given UID.
+
+        Args:
+            org_uid (str): The UID of the org.
+
+        Returns:
+            dict: The parent org, or None if the org is a root or there is no such org.
+        """
+        indexes = self._get_indexes_with(org_uid)
+        if indexes is None:
+            return None
+        parent_uid = indexes.by_uid[org_uid].get(u"parentOrgUid")
+        return indexes.by_uid.get(parent_uid)
+
+    def get_children(self, org_uid):
+        """Gets the child orgs of the org with the given UID.
+
+        Args:
+            org_uid (str): The UID of the org.
+
+        Returns:
+            list: The child orgs.
+        """
+        indexes = self._get_indexes_with(org_uid)
+        if indexes is None:
+            return []
+        return [indexes.by_uid[uid] for uid in indexes.children.get(org_uid, [])]
+
+    def get_ancestors(self, org_uid):
+        """Gets the ancestors of the org with the given UID, nearest first.
+
+        Args:
+            org_uid (str): The UID of the org.
+
+        Returns:
+            list: The parent org, its parent, and so on up to a root.
+        """
+        indexes = self._get_indexes_with(org_uid)
+        ancestors = []
+        if indexes is None:
+            return ancestors
+        seen = {org_uid}
+        parent_uid = indexes.by_uid[org_uid].get(u"parentOrgUid")
+        while parent_uid in indexes.by_uid and parent_uid not in seen:
+            seen.add(parent_uid)
+            ancestors.append(indexes.by_uid[parent_uid])
+            parent_uid = indexes.by_uid[parent_uid].get(u"parentOrgUid")
+        return ancestors
+
+    def iter_subtree(self, org_uid, include_root=True):
+        """Iterates over the org with the given UID and all of its descendants, each org
+        before its children. The iteration walks the tree as it was when it started, even if
+        the tree is reloaded meanwhile.
+
+        Args:
+            org_uid (str): The UID of the root of the subtree.
+            include_root (bool, optional): Whether to include the root org itself. Defaults
+                to True.
+
+        Returns:
+            generator: An object that iterates over org dicts, or over nothing if there is
+            no such org.
+        """
+        indexes = self._get_indexes_with(org_uid)
+        if indexes is None:
+            return iter([])
+        return _iter_subtree(indexes, org_uid, include_root)
+
+    def _get_indexes_with(self, org_uid):
+        return self._get(lambda indexes: indexes if org_uid in indexes.by_uid else None)
+
+    def _load_indexes(self):
+        indexes = _OrgIndexes({}, {}, {}, [])
+        for page in self._org_service.get_all():
+            for org in page[u"orgs"]:
+                indexes.by_uid[org.get(u"orgUid")] = org
+                indexes.uid_by_id[str(org.get(u"orgId"))] = org.get(u"orgUid")
+        for org_uid, org in indexes.by_uid.items():
+            parent_uid = org.get(u"parentOrgUid")
+            if parent_uid in indexes.by_uid and parent_uid != org_uid:
+                indexes.children.setdefault(parent_uid, []).append(org_uid)
+            else:
+                indexes.roots.append(org_uid)
+        return indexes
+
+
+_OrgIndexes = namedtuple(u"_OrgIndexes", u"by_uid, uid_by_id, children, roots")
+
+
+def _iter_subtree(indexes, org_uid, include_root):
+    stack = [org_uid]
+    seen = set()
+    while stack:
+        uid = stack.pop()
+        if uid in seen:
+            continue
+        seen.add(uid)
+        if uid != org_uid or include_root:
+            yield indexes.by_uid[uid]
+        # reversed, so children are walked in the order they were loaded
+        stack.extend(reversed(indexes.children.get(uid, [])))
@@ -0,0 +1,173 @@
+import hashlib
+import time
+from collections import namedtuple
+
+from requests.exceptions import ChunkedEncodingError
+from requests.exceptions import ConnectionError
+from requests.exceptions import Timeout
+
+from py42.exceptions import Py42ChecksumMismatchError
+from py42.exceptions import Py42Error
+from py42.settings import debug
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+DOWNLOAD_MAX_RETRIES = 3
+
+# errors raised mid-stream when the connection to the storage node drops
+_RETRYABLE_ERRORS = (ChunkedEncodingError, ConnectionError, Timeout)
+
+DownloadResult = namedtuple(u"DownloadResult", u"path, size, elapsed, bytes_per_second")
+
+
+def download_to(
+    stream_func,
+    path,
+    chunk_size=None,
+    md5=None,
+    sha256=None,
+    max_retries=None,
+    progress_callback=None,
+):
+    """Writes a streamed response to the file at the given path.
+
+    If the connection drops mid-transfer, the stream is requested again. When the server
+    advertises ``Accept-Ranges: bytes`` the download resumes from the last byte written,
+    otherwise it starts over.
+
+    Args:
+        stream_func (callable): Called with a dict of extra request headers (or None) and
+            returns a streamed :class:`py42.response.Py42Response`.
+        path (str): The path of the file to write.
+        chunk_size (int, optional): The number of bytes read and written at a time.
+            Defaults to 1 MiB.
+        md5 (str, optional): The expected MD5 hash of the content. Defaults to None.
+        sha256 (str, optional): The expected SHA256 hash of the content. Defaults to None.
+        max_retries (int, optional): The number of times to re-request the stream after a
+            dropped connection. Defaults to 3.
+        progress_callback (callable, optional): Called after each chunk with the bytes written
+            so far, the total size in bytes (or None if unknown), and the average bytes per
+            second. Defaults to None.
+
+    Returns:
+        :class:`DownloadResult`
+    """
+    chunk_size = chunk_size or DOWNLOAD_CHUNK_SIZE
+    max_retries = DOWNLOAD_MAX_RETRIES if max_retries is None else max_retries
+    expected_checksums = _get_expected_checksums(md5, sha256)
+    hashers = _create_hashers(expected_checksums)
+    bytes_written = 0
+    retries = 0
+    response = None
+    total_size = None
+    start_time = time.time()
+    buffer = bytearray(chunk_size)
+
+    with open(path, u"wb") as f:
+        while True:
+            try:
+                if response is None:
+                    response = _request_stream(stream_func, bytes_written)
+                    if bytes_written and response.status_code != 206:
+                        # the server ignored the range, start over
+                        bytes_written = 0
+                        hashers = _create_hashers(expected_checksums)
+                        f.seek(0)
+                        f.truncate()
+                    total_size = _get_total_size(response, bytes_written)
+
+                for chunk in response.iter_content_into(buffer):
+                    f.write(chunk)
+                    for hasher in hashers.values():
+                        hasher.update(chunk)
+                    bytes_written += len(chunk)
+                    if progress_callback:
+                        progress_callback(
+                            bytes_written,
+                            total_size,
+                            _get_rate(bytes_written, start_time),
+                        )
+                break
+            except _RETRYABLE_ERRORS as ex:
+                retries += 1
+                if retries > max_retries:
+                    raise Py42Error(
+                        u"Download of {} failed after {} retries, caused by: {}".format(
+                            path, max_retries, ex
+                        )
+                    )
+                debug.logger.info(
+                    u"Stream interrupted after {} bytes, retrying: {}".format(
+                        bytes_written, ex
+                    )
+                )
+                if response is not None and not _supports_resume(response):
+                    bytes_written = 0
+                    hashers = _create_hashers(expected_checksums)
+                    f.seek(0)
+                    f.truncate()
+                else:
+                    f.seek(bytes_written)
+                    f.truncate()
+                response = None
+
+    _verify_checksums(path, expected_checksums, hashers)
+    elapsed = time.time() - start_time
+    rate = _get_rate(bytes_written, start_time)
+    debug.logger.info(
+        u"Downloaded {} bytes to {} in {:.2f}s ({:.0f} bytes/s)".format(
+            bytes_written, path, elapsed, rate
+        )
+    )
+    return DownloadResult(path, bytes_written, elapsed, rate)
+
+
+def _request_stream(stream_func, offset):
+    headers = {u"Range": u"bytes={}-".format(offset)} if offset else None
+    return stream_func(headers)
+
+
+def _supports_resume(response):
+    headers = response.headers or {}
+    accepts_ranges = headers.get(u"Accept-Ranges", u"").lower() == u"bytes"
+    # range offsets refer to encoded bytes, so decoded streams can't be resumed
+    encoding = headers.get(u"Content-Encoding", u"identity").lower()
+    return accepts_ranges and encoding == u"identity"
+
+
+def _get_total_size(response, offset):
+    headers = response.headers or {}
+    if headers.get(u"Content-Encoding", u"identity").lower() != u"identity":
+        return None
+    content_range = headers.get(u"Content-Range")
+    if content_range and u"/" in content_range:
+        total = content_range.rsplit(u"/", 1)[1]
+        return int(total) if total.isdigit() else None
+    content_length = headers.get(u"Content-Length")
+    if content_length and content_length.isdigit():
+        return offset + int(content_length)
+    return None
+
+
+def _get_rate(bytes_written, start_time):
+    elapsed = time.time() - start_time
+    return bytes_written / elapsed if elapsed > 0 else 0.0
+
+
+def _get_expected_checksums(md5, sha256):
+    checksums = {}
+    if md5:
+        checksums[u"md5"] = md5.lower()
+    if sha256:
+        checksums[u"sha256"] = sha256.lower()
+    return checksums
+
+
+def _create_hashers(expected_checksums):
+    return {name: hashlib.new(name) for name in expected_checksums}
+
+
+def _verify_checksums(path, expected_checksums, hashers):
+    for name, expected in expected_checksums.items():
+        actual = hashers[name].hexdigest()
+        if actual != expected:
+            raise Py42ChecksumMismatchError(path, name.upper(), expected, actual)
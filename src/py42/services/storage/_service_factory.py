@@ -15,6 +15,8 @@ class StorageServiceFactory(object):
         self._connection = connection
         self._device_service = device_service
         self._connection_manager = connection_manager
+        self._preservation_data_services = {}
+        self._preservation_data_services_lock = Lock()
 
     def create_archive_service(self, device_guid, destination_guid=None):
         if destination_guid is None:
@@ -32,9 +34,20 @@ class StorageServiceFactory(object):
         return StorageSecurityDataService(connection)
 
     def create_preservation_data_service(self, host_address):
-        main_connection = self._connection.clone(host_address)
-        streaming_connection = Connection.from_host_address(host_address)
-        return StoragePreservationDataService(main_connection, streaming_connection)
+        # reuse the service per storage node so repeated downloads skip connection setup
+        key = host_address.lower()
+        service = self._preservation_data_services.get(key)
+        if service is None:
+            with self._preservation_data_services_lock:
+                service = self._preservation_data_services.get(key)
+                if service is None:
+                    main_connection = self._connection.clone(host_address)
+                    streaming_connection = Connection.from_host_address(host_address)
+                    service = StoragePreservationDataService(
+                        main_connection, streaming_connection
+                    )
+                    self._preservation_data_services[key] = service
+        return service
 
     def _auto_select_destination_guid(self, device_guid):
         response = self._device_service.get_by_guid(
@@ -0,0 +1,318 @@
+import os
+import struct
+import zlib
+from collections import namedtuple
+
+from py42.exceptions import Py42ChecksumMismatchError
+from py42.exceptions import Py42Error
+
+ZIP_READ_SIZE = 1024 * 1024
+
+_SIGNATURE = struct.Struct(u"<I")
+# local file header fields after the signature, see section 4.3.7 of the zip APPNOTE
+_LOCAL_FILE_HEADER = struct.Struct(u"<HHHHHIIIHH")
+_DATA_DESCRIPTOR = struct.Struct(u"<III")
+_ZIP64_DATA_DESCRIPTOR = struct.Struct(u"<IQQ")
+_EXTRA_FIELD_HEADER = struct.Struct(u"<HH")
+
+_LOCAL_FILE_HEADER_SIGNATURE = 0x04034B50
+_DATA_DESCRIPTOR_SIGNATURE = 0x08074B50
+_END_OF_ENTRIES_SIGNATURES = (0x02014B50, 0x06054B50, 0x06064B50)
+_ZIP64_EXTRA_FIELD_ID = 0x0001
+_ZIP64_LIMIT = 0xFFFFFFFF
+
+_FLAG_ENCRYPTED = 0x0001
+_FLAG_DATA_DESCRIPTOR = 0x0008
+_FLAG_UTF8 = 0x0800
+
+_STORED = 0
+_DEFLATED = 8
+
+ZipStreamEntry = namedtuple(u"ZipStreamEntry", u"name, path, size")
+
+_LocalFileHeader = namedtuple(
+    u"_LocalFileHeader",
+    u"name, flags, method, crc, compressed_size, size, is_zip64",
+)
+
+
+def extract_zip_stream(response, extract_to=None, entry_callback=None):
+    """Extracts the entries of a zip archive from a streamed response as they arrive, using
+    the local file header in front of each entry instead of the central directory at the end
+    of the archive. Nothing but the current chunk is held in memory.
+
+    Args:
+        response (:class:`py42.response.Py42Response`): A streamed response containing a zip
+            archive.
+        extract_to (str, optional): The directory to write the extracted files to. Defaults
+            to None.
+        entry_callback (callable, optional): Called for each file entry with the entry name and
+            an iterator over the entry's decompressed bytes. When given, files are handed to the
+            callback instead of being written to ``extract_to``. Defaults to None.
+
+    Returns:
+        list[:class:`ZipStreamEntry`]: The name, written path (None when handed to
+        ``entry_callback``), and size of each extracted file.
+    """
+    if extract_to is None and entry_callback is None:
+        raise Py42Error(u"Either extract_to or entry_callback must be provided.")
+
+    reader = _StreamReader(response)
+    entries = []
+    for header in _iter_local_file_headers(reader):
+        content = _EntryContent(reader, header)
+        is_dir = header.name.endswith(u"/")
+        path = None
+        if is_dir:
+            if entry_callback is None:
+                _make_dirs(_get_safe_path(extract_to, header.name))
+        elif entry_callback is not None:
+            entry_callback(header.name, content)
+        else:
+            path = _get_safe_path(extract_to, header.name)
+            _write_entry(path, content)
+
+        # drain anything the callback left unread so the stream stays aligned
+        for _ in content:
+            pass
+        if not is_dir:
+            entries.append(ZipStreamEntry(header.name, path, content.size))
+    return entries
+
+
+class _StreamReader(object):
+    def __init__(self, response):
+        self._response = response
+        self._buffer = bytearray(ZIP_READ_SIZE)
+        self._pending = b""
+
+    def read(self, size):
+        """Reads exactly ``size`` bytes unless the stream ends first."""
+        chunks = []
+        remaining = size
+        while remaining:
+            data = self.read_some(remaining)
+            if not data:
+                break
+            chunks.append(data)
+            remaining -= len(data)
+        return b"".join(chunks)
+
+    def read_exactly(self, size):
+        data = self.read(size)
+        if len(data) != size:
+            raise Py42Error(u"Zip stream ended unexpectedly.")
+        return data
+
+    def read_some(self, max_size):
+        if self._pending:
+            data = self._pending[:max_size]
+            self._pending = self._pending[max_size:]
+            return data
+        view = memoryview(self._buffer)[:max_size]
+        size = self._response.readinto(view)
+        return bytes(view[:size])
+
+    def unread(self, data):
+        self._pending = data + self._pending
+
+
+class _EntryContent(object):
+    """Iterates over the decompressed bytes of one entry and verifies its CRC-32 once the
+    entry has been read completely."""
+
+    def __init__(self, reader, header):
+        self._reader = reader
+        self._header = header
+        self._chunks = _iter_decompressed(reader, header)
+        self._crc = 0
+        self.size = 0
+        self._done = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._done:
+            raise StopIteration
+        try:
+            data = next(self._chunks)
+        except StopIteration:
+            self._done = True
+            self._verify()
+            raise
+        self._crc = zlib.crc32(data, self._crc)
+        self.size += len(data)
+        return data
+
+    next = __next__
+
+    def _verify(self):
+        expected = self._header.crc
+        if self._header.flags & _FLAG_DATA_DESCRIPTOR:
+            expected = _read_data_descriptor(self._reader, self._header.is_zip64)
+        actual = self._crc & 0xFFFFFFFF
+        if actual != expected:
+            raise Py42ChecksumMismatchError(
+                self._header.name,
+                u"CRC32",
+                u"{:08x}".format(expected),
+                u"{:08x}".format(actual),
+            )
+
+
+def _iter_local_file_headers(reader):
+    while True:
+        signature = reader.read(_SIGNATURE.size)
+        if len(signature) < _SIGNATURE.size:
+            return
+        (signature,) = _SIGNATURE.unpack(signature)
+        if signature in _END_OF_ENTRIES_SIGNATURES:
+            return
+        if signature != _LOCAL_FILE_HEADER_SIGNATURE:
+            raise Py42Error(
+                u"Invalid zip stream, unexpected signature {:#010x}.".format(signature)
+            )
+        yield _read_local_file_header(reader)
+
+
+def _read_local_file_header(reader):
+    (
+        _,
+        flags,
+        method,
+        _,
+        _,
+        crc,
+        compressed_size,
+        size,
+        name_length,
+        extra_length,
+    ) = _LOCAL_FILE_HEADER.unpack(reader.read_exactly(_LOCAL_FILE_HEADER.size))
+    raw_name = reader.read_exactly(name_length)
+    extra = reader.read_exactly(extra_length)
+    name = raw_name.decode(u"utf-8" if flags & _FLAG_UTF8 else u"cp437")
+
+    if flags & _FLAG_ENCRYPTED:
+        raise Py42Error(u"Encrypted zip entry {} is not supported.".format(name))
+    if method not in (_STORED, _DEFLATED):
+        raise Py42Error(
+            u"Zip entry {} uses unsupported compression method {}.".format(name, method)
+        )
+    if method == _STORED and flags & _FLAG_DATA_DESCRIPTOR:
+        raise Py42Error(
+            u"Zip entry {} is stored without a known size and cannot be "
+            u"streamed.".format(name)
+        )
+
+    is_zip64 = False
+    zip64_sizes = _get_zip64_sizes(extra)
+    if zip64_sizes:
+        is_zip64 = True
+        if size == _ZIP64_LIMIT:
+            size = zip64_sizes.pop(0)
+        if compressed_size == _ZIP64_LIMIT and zip64_sizes:
+            compressed_size = zip64_sizes.pop(0)
+
+    if flags & _FLAG_DATA_DESCRIPTOR:
+        compressed_size = None
+    return _LocalFileHeader(name, flags, method, crc, compressed_size, size, is_zip64)
+
+
+def _get_zip64_sizes(extra):
+    offset = 0
+    while offset + _EXTRA_FIELD_HEADER.size <= len(extra):
+        field_id, field_size = _EXTRA_FIELD_HEADER.unpack_from(extra, offset)
+        offset += _EXTRA_FIELD_HEADER.size
+        if field_id == _ZIP64_EXTRA_FIELD_ID:
+            count = min(field_size, 16) // 8
+            return list(struct.unpack_from(u"<{}Q".format(count), extra, offset))
+        offset += field_size
+    return None
+
+
+def _read_data_descriptor(reader, is_zip64):
+    descriptor = _ZIP64_DATA_DESCRIPTOR if is_zip64 else _DATA_DESCRIPTOR
+    data = reader.read_exactly(_SIGNATURE.size)
+    # the data descriptor signature is optional
+    if _SIGNATURE.unpack(data)[0] != _DATA_DESCRIPTOR_SIGNATURE:
+        reader.unread(data)
+    crc, _, _ = descriptor.unpack(reader.read_exactly(descriptor.size))
+    return crc
+
+
+def _iter_decompressed(reader, header):
+    if header.method == _STORED:
+        return _iter_stored(reader, header.compressed_size)
+    return _iter_deflated(reader, header.compressed_size)
+
+
+def _iter_stored(reader, compressed_size):
+    remaining = compressed_size
+    while remaining:
+        data = reader.read_some(min(remaining, ZIP_READ_SIZE))
+        if not data:
+            raise Py42Error(u"Zip stream ended unexpectedly.")
+        remaining -= len(data)
+        yield data
+
+
+def _iter_deflated(reader, compressed_size):
+    decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+    # compressed_size is None when the entry is followed by a data descriptor, in which case
+    # the end of the entry is found by the end of the deflate stream itself
+    remaining = compressed_size
+    while remaining is None or remaining:
+        read_size = ZIP_READ_SIZE if remaining is None else min(remaining, ZIP_READ_SIZE)
+        data = reader.read_some(read_size)
+        if not data:
+            raise Py42Error(u"Zip stream ended unexpectedly.")
+        if remaining is not None:
+            remaining -= len(data)
+
+        # bound the output per step so highly compressed entries don't balloon memory
+        output = decompressor.decompress(data, ZIP_READ_SIZE)
+        while True:
+            if output:
+                yield output
+            if not decompressor.unconsumed_tail or _is_finished(decompressor):
+                break
+            output = decompressor.decompress(
+                decompressor.unconsumed_tail, ZIP_READ_SIZE
+            )
+
+        if _is_finished(decompressor):
+            # whatever follows the deflate stream belongs to the next record
+            reader.unread(decompressor.unused_data)
+            break
+
+    output = decompressor.flush()
+    if output:
+        yield output
+
+
+def _is_finished(decompressor):
+    # Python 2 has no eof attribute, but input past the end lands in unused_data
+    return bool(decompressor.unused_data) or getattr(decompressor, u"eof", False)
+
+
+def _get_safe_path(extract_to, name):
+    parts = [p for p in name.replace(u"\\", u"/").split(u"/") if p not in (u"", u".")]
+    if parts and parts[0].endswith(u":"):
+        # drop drive letters so restored Windows paths stay under extract_to
+        parts = parts[1:]
+    if not parts or u".." in parts:
+        raise Py42Error(u"Refusing to extract zip entry with unsafe path {}.".format(name))
+    return os.path.join(extract_to, *parts)
+
+
+def _make_dirs(path):
+    if not os.path.isdir(path):
+        os.makedirs(path)
+
+
+def _write_entry(path, content):
+    _make_dirs(os.path.dirname(path))
+    with open(path, u"wb") as f:
+        for data in content:
+            f.write(data)
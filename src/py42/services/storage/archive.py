@@ -152,6 +152,6 @@ class StorageArchiveService(BaseService):
         json_dict = {u"jobId": job_id}
         return self._connection.delete(uri, json=json_dict)
 
-    def stream_restore_result(self, job_id):
+    def stream_restore_result(self, job_id, headers=None):
         uri = u"/api/WebRestoreJobResult/{}".format(job_id)
-        return self._connection.get(uri, stream=True)
+        return self._connection.get(uri, headers=headers, stream=True)
@@ -1,4 +1,5 @@
 from py42.services import BaseService
+from py42.services.storage._download import download_to
 
 
 class StoragePreservationDataService(BaseService):
@@ -29,11 +30,13 @@ class StoragePreservationDataService(BaseService):
         uri = "{}{}".format(self._base_uri, resource)
         return self._connection.get(uri, params=params)
 
-    def get_file(self, token):
+    def get_file(self, token, headers=None):
         """Streams a file.
 
         Args:
             token (str): PDS Download token.
+            headers (dict, optional): Additional request headers, such as ``Range``. Defaults
+                to None.
 
         Returns:
             Returns a stream of the requested token.
@@ -45,7 +48,48 @@ class StoragePreservationDataService(BaseService):
         else:
             replaced_token = token
         params = {u"PDSDownloadToken": replaced_token}
-        headers = {u"Accept": "*/*"}
+        request_headers = {u"Accept": "*/*"}
+        if headers:
+            request_headers.update(headers)
         return self._streaming_session.get(
-            uri, params=params, headers=headers, stream=True
+            uri, params=params, headers=request_headers, stream=True
+        )
+
+    def download_file(
+        self,
+        archive_guid,
+        file_id,
+        timestamp,
+        save_as,
+        md5=None,
+        sha256=None,
+        progress_callback=None,
+    ):
+        """Downloads a file version to disk, resuming the transfer if the connection drops.
+
+        Args:
+            archive_guid (str): Archive guid of the file
+            file_id (str): Id of the file.
+            timestamp (int): Last updated timestamp of the file in milliseconds.
+            save_as (str): The path to write the file to.
+            md5 (str, optional): The expected MD5 hash of the file. Defaults to None.
+            sha256 (str, optional): The expected SHA256 hash of the file. Defaults to None.
+            progress_callback (callable, optional): Called after each chunk with the bytes
+                written, the total bytes (or None), and the bytes per second. Defaults to None.
+
+        Returns:
+            :class:`py42.services.storage._download.DownloadResult`
+        """
+
+        def stream_func(headers):
+            # download tokens are requested per attempt so resumed requests stay valid
+            token = self.get_download_token(archive_guid, file_id, timestamp)
+            return self.get_file(str(token), headers=headers)
+
+        return download_to(
+            stream_func,
+            save_as,
+            md5=md5,
+            sha256=sha256,
+            progress_callback=progress_callback,
         )
@@ -1,8 +1,18 @@
+from collections import namedtuple
+
 from py42 import settings
 from py42._compat import quote
+from py42._compat import str
+from py42.exceptions import Py42NotFoundError
 from py42.services import BaseService
+from py42.services._bulk import iter_bulk_results
+from py42.services._cached_index import CachedIndex
 from py42.services.util import get_all_pages
 
+DEFAULT_USER_DIRECTORY_TTL = 15 * 60
+
+UserOperationResult = namedtuple(u"UserOperationResult", u"user_id, response, error")
+
 
 class UserService(BaseService):
     """A service for interacting with Code42 user APIs. Use the UserService to create and retrieve
@@ -321,3 +331,324 @@ class UserService(BaseService):
         role_name = quote(role_name)
         uri = u"/api/UserRole?userId={}&roleName={}".format(user_id, role_name)
         return self._connection.delete(uri)
+
+
+class UserDirectory(CachedIndex):
+    """An in-memory directory of every user, indexed by user ID, UID, username and email,
+    for looking users up without a request each time, such as when enriching events.
+
+    The directory loads every user with :meth:`UserService.get_all` on first use. Once it
+    is older than ``ttl`` it keeps answering from the loaded users while it is reloaded on a
+    background thread. Looking up a user that is not in the directory requests just that
+    user and adds it, and a user that does not exist is not requested again until the next
+    reload.
+
+    Usage example::
+
+        directory = UserDirectory(sdk.users)
+        user = directory.get_by_username(event["deviceUserName"])
+
+    Args:
+        user_service (:class:`UserService`): The service to load the users with, such as
+            ``sdk.users``.
+        ttl (int, optional): Seconds before the directory is reloaded. Defaults to 900.
+        **kwargs: Passed to :meth:`UserService.get_all` to limit the users loaded, such as
+            ``active=True``.
+    """
+
+    _description = u"user directory"
+
+    def __init__(self, user_service, ttl=DEFAULT_USER_DIRECTORY_TTL, **kwargs):
+        # missing users are requested one at a time instead of reloading every user
+        super(UserDirectory, self).__init__(ttl, None)
+        self._user_service = user_service
+        self._filters = kwargs
+
+    def __len__(self):
+        return self._get(lambda indexes: len(indexes.by_uid))
+
+    def get_by_id(self, user_id):
+        """Gets the user with the given ID.
+
+        Args:
+            user_id (int or str): The ID of the user.
+
+        Returns:
+            dict: The user, as returned by :meth:`UserService.get_by_id`, or None if there
+            is no such user.
+        """
+        return self._get_user(u"by_id", str(user_id), self._fetch_by_id)
+
+    def get_by_uid(self, user_uid):
+        """Gets the user with the given UID.
+
+        Args:
+            user_uid (str): The UID of the user.
+
+        Returns:
+            dict: The user, or None if there is no such user.
+        """
+        return self._get_user(u"by_uid", user_uid, self._fetch_by_uid)
+
+    def get_by_username(self, username):
+        """Gets the user with the given username, ignoring case.
+
+        Args:
+            username (str): The username of the user.
+
+        Returns:
+            dict: The user, or None if there is no such user.
+        """
+        return self._get_user(u"by_username", username.lower(), self._fetch_by_username)
+
+    def get_by_email(self, email):
+        """Gets the user with the given email, ignoring case.
+
+        Args:
+            email (str): The email of the user.
+
+        Returns:
+            dict: The user, or None if there is no such user.
+        """
+        return self._get_user(u"by_email", email.lower(), self._fetch_by_email)
+
+    def _get_user(self, index_name, key, fetch):
+        def lookup(indexes):
+            return getattr(indexes, index_name).get(key)
+
+        def fetch_missing(indexes):
+            if (index_name, key) in indexes.missing:
+                return None
+            user = fetch(key)
+            with self._lock:
+                if user is None:
+                    indexes.missing.add((index_name, key))
+                else:
+                    _add_user(indexes, user)
+            return user
+
+        return self._get(lookup, fetch_missing)
+
+    def _fetch_by_id(self, user_id):
+        try:
+            return self._user_service.get_by_id(user_id).data
+        except Py42NotFoundError:
+            return None
+
+    def _fetch_by_uid(self, user_uid):
+        try:
+            return self._user_service.get_by_uid(user_uid).data
+        except Py42NotFoundError:
+            return None
+
+    def _fetch_by_username(self, username):
+        users = self._user_service.get_by_username(username)[u"users"]
+        return users[0] if users else None
+
+    def _fetch_by_email(self, email):
+        users = self._user_service.get_page(1, email=email)[u"users"]
+        return users[0] if users else None
+
+    def _load_indexes(self):
+        indexes = _UserIndexes({}, {}, {}, {}, set())
+        for page in self._user_service.get_all(**self._filters):
+            for user in page[u"users"]:
+                _add_user(indexes, user)
+        return indexes
+
+
+class BulkUserOperations(object):
+    """Runs a user operation for many users at once, such as when blocking and
+    deactivating the users leaving in an offboarding wave.
+
+    The operation runs for several users concurrently, at most ``requests_per_second``
+    requests per second. A request that fails because of too many requests, or because
+    the server could not be reached, is retried with backoff. A request that fails with a
+    server error, or whose connection broke, may have been applied anyway, so it is only
+    retried for operations that can safely run twice: :meth:`block`, :meth:`unblock`,
+    :meth:`deactivate`, :meth:`reactivate` and :meth:`remove_role`. One user failing does
+    not stop the others, and every operation returns a :class:`UserOperationResult` for
+    each user.
+
+    Usage example::
+
+        bulk = BulkUserOperations(sdk.users, requests_per_second=10)
+        for result in bulk.deactivate(user_ids, block_user=True):
+            if result.error:
+                print(u"{} failed: {}".format(result.user_id, result.error))
+
+    Args:
+        user_service (:class:`UserService`): The service to run the operations with, such
+            as ``sdk.users``.
+        max_workers (int, optional): The number of requests run at once. Defaults to 4.
+        requests_per_second (float, optional): The maximum rate of requests, including
+            retries. Defaults to None, for no limit.
+        max_retries (int, optional): The maximum number of retries for each user.
+            Defaults to 3.
+    """
+
+    def __init__(
+        self, user_service, max_workers=None, requests_per_second=None, max_retries=None
+    ):
+        self._user_service = user_service
+        self._max_workers = max_workers
+        self._requests_per_second = requests_per_second
+        self._max_retries = max_retries
+
+    def block(self, user_ids):
+        """Blocks many users. See :meth:`UserService.block`.
+
+        Args:
+            user_ids (iter[int]): The IDs of the users. Duplicate IDs are blocked once.
+
+        Returns:
+            list: A :class:`UserOperationResult` for each user, in the order the users
+            complete.
+        """
+        return self.run(self._user_service.block, user_ids, idempotent=True)
+
+    def unblock(self, user_ids):
+        """Unblocks many users. See :meth:`UserService.unblock`.
+
+        Args:
+            user_ids (iter[int]): The IDs of the users. Duplicate IDs are unblocked once.
+
+        Returns:
+            list: A :class:`UserOperationResult` for each user, in the order the users
+            complete.
+        """
+        return self.run(self._user_service.unblock, user_ids, idempotent=True)
+
+    def deactivate(self, user_ids, block_user=None):
+        """Deactivates many users. See :meth:`UserService.deactivate`.
+
+        Args:
+            user_ids (iter[int]): The IDs of the users. Duplicate IDs are deactivated once.
+            block_user (bool, optional): Blocks the users upon deactivation. Defaults to
+                None.
+
+        Returns:
+            list: A :class:`UserOperationResult` for each user, in the order the users
+            complete.
+        """
+
+        def deactivate(user_id):
+            return self._user_service.deactivate(user_id, block_user=block_user)
+
+        return self.run(deactivate, user_ids, idempotent=True)
+
+    def reactivate(self, user_ids, unblock_user=None):
+        """Reactivates many users. See :meth:`UserService.reactivate`.
+
+        Args:
+            user_ids (iter[int]): The IDs of the users. Duplicate IDs are reactivated once.
+            unblock_user (bool, optional): Whether or not to unblock the users. Defaults to
+                None.
+
+        Returns:
+            list: A :class:`UserOperationResult` for each user, in the order the users
+            complete.
+        """
+
+        def reactivate(user_id):
+            return self._user_service.reactivate(user_id, unblock_user=unblock_user)
+
+        return self.run(reactivate, user_ids, idempotent=True)
+
+    def change_org_assignment(self, user_ids, org_id):
+        """Moves many users to an org. See :meth:`UserService.change_org_assignment`.
+
+        Args:
+            user_ids (iter[int]): The IDs of the users. Duplicate IDs are moved once.
+            org_id (int): The ID of the org to move the users to.
+
+        Returns:
+            list: A :class:`UserOperationResult` for each user, in the order the users
+            complete.
+        """
+
+        def change_org_assignment(user_id):
+            return self._user_service.change_org_assignment(user_id, org_id)
+
+        return self.run(change_org_assignment, user_ids)
+
+    def add_role(self, user_ids, role_name):
+        """Adds a role to many users. See :meth:`UserService.add_role`.
+
+        Args:
+            user_ids (iter[int]): The IDs of the users. Duplicate IDs are given the role
+                once.
+            role_name (str): The name of the role to add.
+
+        Returns:
+            list: A :class:`UserOperationResult` for each user, in the order the users
+            complete.
+        """
+
+        def add_role(user_id):
+            return self._user_service.add_role(user_id, role_name)
+
+        return self.run(add_role, user_ids)
+
+    def remove_role(self, user_ids, role_name):
+        """Removes a role from many users. See :meth:`UserService.remove_role`.
+
+        Args:
+            user_ids (iter[int]): The IDs of the users. Duplicate IDs have the role removed
+                once.
+            role_name (str): The name of the role to remove.
+
+        Returns:
+            list: A :class:`UserOperationResult` for each user, in the order the users
+            complete.
+        """
+
+        def remove_role(user_id):
+            return self._user_service.remove_role(user_id, role_name)
+
+        return self.run(remove_role, user_ids, idempotent=True)
+
+    def run(self, operation, user_ids, idempotent=False):
+        """Runs any operation for many users, such as a function that makes several
+        requests for one user.
+
+        Args:
+            operation (callable): Called with each user ID.
+            user_ids (iter): The IDs of the users. Duplicate IDs are run once.
+            idempotent (bool, optional): Whether running ``operation`` twice for a user
+                leaves the same state as running it once, so that it is retried after
+                server errors. Defaults to False.
+
+        Returns:
+            list: A :class:`UserOperationResult` for each user, in the order the users
+            complete, whose ``response`` is what ``operation`` returned and whose ``error``
+            is None when it succeeded.
+        """
+        return [
+            UserOperationResult(user_id, response, error)
+            for user_id, response, error in iter_bulk_results(
+                operation,
+                user_ids,
+                idempotent,
+                max_workers=self._max_workers,
+                requests_per_second=self._requests_per_second,
+                max_retries=self._max_retries,
+            )
+        ]
+
+
+_UserIndexes = namedtuple(
+    u"_UserIndexes", u"by_id, by_uid, by_username, by_email, missing"
+)
+
+
+def _add_user(indexes, user):
+    # every index refers to the same dict, so each user is stored once
+    indexes.by_id[str(user.get(u"userId"))] = user
+    indexes.by_uid[user.get(u"userUid")] = user
+    username = user.get(u"username")
+    if username:
+        indexes.by_username[username.lower()] = user
+    email = user.get(u"email")
+    if email:
+        indexes.by_email[email.lower()] = user
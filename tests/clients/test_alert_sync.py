@@ -0,0 +1,158 @@
+import json
+
+import pytest
+
+from py42.clients.alert_sync import AlertSync
+from py42.clients.alerts import AlertsClient
+from py42.sdk.queries.alerts.alert_query import AlertQuery
+from py42.sdk.queries.alerts.filters import Severity
+from py42.services._time_windows import parse_timestamp
+
+
+def _create_alert(number, state="OPEN", severity="HIGH", actor="test@example.com"):
+    return {
+        "id": "alert-{}".format(number),
+        "createdAt": "2020-01-01T00:00:{:02d}.1234567Z".format(number),
+        "state": state,
+        "severity": severity,
+        "actor": actor,
+        "ruleId": "rule-{}".format(number % 2),
+    }
+
+
+class FakeAlertServer(object):
+    """Answers the alert searches of an :class:`AlertSync` from a list of alerts."""
+
+    def __init__(self, alerts):
+        self.alerts = alerts
+        self.queries = []
+        self.detail_ids = []
+
+    def search_all(self, query, max_workers=None):
+        query_dict = json.loads(str(query))
+        self.queries.append(query_dict)
+        matches = list(self.alerts)
+        for group in query_dict["groups"]:
+            for f in group["filters"]:
+                if f["operator"] == "ON_OR_AFTER":
+                    bound = parse_timestamp(f["value"])
+                    matches = [
+                        a for a in matches if parse_timestamp(a["createdAt"]) >= bound
+                    ]
+            if group["filters"][0]["term"] == "state":
+                states = {f["value"] for f in group["filters"]}
+                matches = [a for a in matches if a["state"] in states]
+            if group["filters"][0]["term"] == "severity":
+                matches = [
+                    a for a in matches if a["severity"] == group["filters"][0]["value"]
+                ]
+        return iter(sorted(matches, key=lambda a: a["createdAt"]))
+
+    def get_details_chunked(self, alert_ids, max_workers=None, parse_observations=True):
+        self.detail_ids.extend(alert_ids)
+        for alert in self.alerts:
+            if alert["id"] in alert_ids:
+                yield dict(alert, observations=[{"data": "{}"}])
+
+
+@pytest.fixture
+def server(mocker):
+    alerts = [_create_alert(i) for i in range(5)]
+    fake = FakeAlertServer(alerts)
+    client = mocker.MagicMock(spec=AlertsClient)
+    client.search_all.side_effect = fake.search_all
+    client.get_details_chunked.side_effect = fake.get_details_chunked
+    fake.client = client
+    return fake
+
+
+@pytest.fixture
+def alert_sync(server, tmp_path):
+    alert_sync = AlertSync(server.client, str(tmp_path / "alerts.db"))
+    yield alert_sync
+    alert_sync.close()
+
+
+class TestAlertSync(object):
+    def test_sync_when_empty_mirrors_every_alert(self, server, alert_sync):
+        result = alert_sync.sync()
+        assert result.created == 5
+        assert alert_sync.count() == 5
+        assert alert_sync.high_water_mark == server.alerts[-1]["createdAt"]
+        created_at_filters = [
+            f for g in server.queries[0]["groups"] for f in g["filters"]
+        ]
+        assert created_at_filters == []
+
+    def test_sync_searches_from_high_water_mark(self, server, alert_sync):
+        alert_sync.sync()
+        server.alerts.append(_create_alert(7))
+        server.queries = []
+
+        result = alert_sync.sync()
+
+        assert result.created == 1
+        first_filter = server.queries[0]["groups"][0]["filters"][0]
+        assert first_filter["operator"] == "ON_OR_AFTER"
+        assert first_filter["value"] == "2020-01-01T00:00:04.123Z"
+        assert alert_sync.high_water_mark == server.alerts[-1]["createdAt"]
+
+    def test_sync_updates_state_of_active_alerts(self, server, alert_sync):
+        alert_sync.sync()
+        server.alerts[1]["state"] = "IN_PROGRESS"
+
+        result = alert_sync.sync()
+
+        assert result == (0, 1)
+        assert alert_sync.count(state="IN_PROGRESS") == 1
+        assert server.detail_ids == []
+
+    def test_sync_refreshes_alerts_that_left_active_states_from_details(
+        self, server, alert_sync
+    ):
+        alert_sync.sync()
+        server.alerts[2]["state"] = "RESOLVED"
+
+        result = alert_sync.sync()
+
+        assert result.updated == 1
+        assert server.detail_ids == ["alert-2"]
+        resolved = alert_sync.get_alerts(state="RESOLVED")
+        assert [a["id"] for a in resolved] == ["alert-2"]
+        assert "observations" not in resolved[0]
+
+    def test_sync_when_nothing_changed_updates_nothing(self, server, alert_sync):
+        alert_sync.sync()
+        assert alert_sync.sync() == (0, 0)
+
+    def test_sync_limits_alerts_to_query(self, server, tmp_path):
+        server.alerts[0]["severity"] = "LOW"
+        alert_sync = AlertSync(
+            server.client,
+            str(tmp_path / "alerts.db"),
+            query=AlertQuery(Severity.eq("LOW")),
+        )
+        alert_sync.sync()
+        assert [a["id"] for a in alert_sync.get_alerts()] == ["alert-0"]
+        alert_sync.close()
+
+    def test_get_alerts_filters_by_indexed_columns_newest_first(
+        self, server, alert_sync
+    ):
+        server.alerts[3]["actor"] = "other@example.com"
+        alert_sync.sync()
+        assert [a["id"] for a in alert_sync.get_alerts(rule_id="rule-1")] == [
+            "alert-3",
+            "alert-1",
+        ]
+        assert alert_sync.get_alerts(actor="other@example.com") == [server.alerts[3]]
+        assert len(alert_sync.get_alerts(severity="HIGH", limit=2)) == 2
+
+    def test_mirror_persists_across_instances(self, server, tmp_path):
+        path = str(tmp_path / "alerts.db")
+        first = AlertSync(server.client, path)
+        first.sync()
+        first.close()
+        second = AlertSync(server.client, path)
+        assert second.count() == 5
+        second.close()
@@ -9,6 +9,7 @@ from py42.exceptions import Py42InternalServerError
 from py42.exceptions import Py42InvalidRuleOperationError
 from py42.response import Py42Response
 from py42.services.alertrules import AlertRulesService
+from py42.services.alertrules import AlertRuleUsersResult
 from py42.services.alerts import AlertService
 
 TEST_RULE_ID = "rule-id"
@@ -193,3 +194,214 @@ class TestAlertRulesClient(object):
         mock_alerts_service.get_rules_page.assert_called_once_with(
             sort_key="key", sort_direction="dir", page_num=70, page_size=700
         )
+
+    def test_get_metadata_by_observer_id_when_metadata_index_enabled_uses_index(
+        self, mock_alerts_service, mock_alert_rules_service
+    ):
+        mock_alerts_service.get_all_rules.return_value = iter(
+            [TEST_SYSTEM_RULE_RESPONSE]
+        )
+        alert_rules_client = AlertRulesClient(
+            mock_alerts_service, mock_alert_rules_service
+        )
+        alert_rules_client.enable_metadata_index()
+        rule = alert_rules_client.get_metadata_by_observer_id(TEST_RULE_ID)
+        assert rule == TEST_SYSTEM_RULE_RESPONSE["ruleMetadata"][0]
+        assert not mock_alerts_service.get_rule_by_observer_id.called
+
+    def test_get_metadata_by_observer_id_when_metadata_index_disabled_queries_rule(
+        self, mock_alerts_service, mock_alert_rules_service
+    ):
+        mock_alerts_service.get_rule_by_observer_id.return_value = (
+            TEST_SYSTEM_RULE_RESPONSE
+        )
+        alert_rules_client = AlertRulesClient(
+            mock_alerts_service, mock_alert_rules_service
+        )
+        rule = alert_rules_client.get_metadata_by_observer_id(TEST_RULE_ID)
+        assert rule == TEST_SYSTEM_RULE_RESPONSE["ruleMetadata"][0]
+        mock_alerts_service.get_rule_by_observer_id.assert_called_once_with(
+            TEST_RULE_ID
+        )
+
+    def test_get_metadata_by_observer_id_when_rule_missing_returns_none(
+        self, mock_alerts_service, mock_alert_rules_service
+    ):
+        mock_alerts_service.get_rule_by_observer_id.return_value = {
+            "ruleMetadata": []
+        }
+        alert_rules_client = AlertRulesClient(
+            mock_alerts_service, mock_alert_rules_service
+        )
+        assert alert_rules_client.get_metadata_by_observer_id(TEST_RULE_ID) is None
+
+    def test_get_all_metadata_by_name_when_metadata_index_enabled_uses_index(
+        self, mock_alerts_service, mock_alert_rules_service
+    ):
+        rule = {"id": "1", "observerRuleId": "2", "name": "Test Rule"}
+        mock_alerts_service.get_all_rules.return_value = iter(
+            [{"ruleMetadata": [rule]}]
+        )
+        alert_rules_client = AlertRulesClient(
+            mock_alerts_service, mock_alert_rules_service
+        )
+        alert_rules_client.enable_metadata_index()
+        assert alert_rules_client.get_all_metadata_by_name("test rule") == [rule]
+        assert not mock_alerts_service.get_all_rules_by_name.called
+
+    def test_get_all_metadata_by_name_when_metadata_index_disabled_collects_pages(
+        self, mock_alerts_service, mock_alert_rules_service
+    ):
+        rules = [{"id": "1"}, {"id": "2"}]
+        mock_alerts_service.get_all_rules_by_name.return_value = iter(
+            [{"ruleMetadata": rules[:1]}, {"ruleMetadata": rules[1:]}]
+        )
+        alert_rules_client = AlertRulesClient(
+            mock_alerts_service, mock_alert_rules_service
+        )
+        assert alert_rules_client.get_all_metadata_by_name("test rule") == rules
+        mock_alerts_service.get_all_rules_by_name.assert_called_once_with("test rule")
+
+    def test_get_by_observer_id_when_metadata_index_enabled_returns_response(
+        self, mock_alerts_service, mock_alert_rules_service
+    ):
+        alert_rules_client = AlertRulesClient(
+            mock_alerts_service, mock_alert_rules_service
+        )
+        alert_rules_client.enable_metadata_index()
+        response = alert_rules_client.get_by_observer_id(TEST_RULE_ID)
+        assert response is mock_alerts_service.get_rule_by_observer_id.return_value
+        assert not mock_alerts_service.get_all_rules.called
+
+    def test_get_all_by_name_when_metadata_index_enabled_returns_responses(
+        self, mock_alerts_service, mock_alert_rules_service
+    ):
+        alert_rules_client = AlertRulesClient(
+            mock_alerts_service, mock_alert_rules_service
+        )
+        alert_rules_client.enable_metadata_index()
+        pages = alert_rules_client.get_all_by_name("test rule")
+        assert pages is mock_alerts_service.get_all_rules_by_name.return_value
+        assert not mock_alerts_service.get_all_rules.called
+
+    def test_add_user_when_metadata_index_enabled_and_system_rule_raises_invalid_rule_operation_error(
+        self, mock_alerts_service, mock_alert_rules_service, internal_server_error
+    ):
+        mock_alerts_service.get_all_rules.return_value = iter(
+            [TEST_SYSTEM_RULE_RESPONSE]
+        )
+        mock_alert_rules_service.add_user.side_effect = internal_server_error
+        alert_rules_client = AlertRulesClient(
+            mock_alerts_service, mock_alert_rules_service
+        )
+        alert_rules_client.enable_metadata_index()
+        with pytest.raises(Py42InvalidRuleOperationError):
+            alert_rules_client.add_user(TEST_RULE_ID, TEST_USER_ID)
+
+    def test_disable_metadata_index_queries_rule_metadata_again(
+        self, mock_alerts_service, mock_alert_rules_service
+    ):
+        alert_rules_client = AlertRulesClient(
+            mock_alerts_service, mock_alert_rules_service
+        )
+        alert_rules_client.enable_metadata_index()
+        alert_rules_client.disable_metadata_index()
+        assert alert_rules_client.metadata_index is None
+        alert_rules_client.get_metadata_by_observer_id(TEST_RULE_ID)
+        mock_alerts_service.get_rule_by_observer_id.assert_called_once_with(
+            TEST_RULE_ID
+        )
+
+    def test_add_users_calls_alert_rules_service_add_users_with_expected_value(
+        self, mocker, mock_alerts_service, mock_alert_rules_service
+    ):
+        mock_alert_rules_service.add_users.return_value = [
+            AlertRuleUsersResult([TEST_USER_ID], None)
+        ]
+        alert_rules_client = AlertRulesClient(
+            mock_alerts_service, mock_alert_rules_service
+        )
+        results = alert_rules_client.add_users(TEST_RULE_ID, [TEST_USER_ID])
+        mock_alert_rules_service.add_users.assert_called_once_with(
+            TEST_RULE_ID,
+            [TEST_USER_ID],
+            batch_size=None,
+            max_workers=None,
+            check_error=mocker.ANY,
+        )
+        assert results == [([TEST_USER_ID], None)]
+        assert not mock_alerts_service.get_rule_by_observer_id.called
+
+    def test_add_users_when_batch_fails_on_system_rule_raises_invalid_rule_type_error(
+        self,
+        mock_alerts_service_system_rule,
+        mock_alert_rules_service,
+        internal_server_error,
+    ):
+        def add_users(rule_id, user_ids, check_error=None, **kwargs):
+            check_error(internal_server_error)
+
+        mock_alert_rules_service.add_users.side_effect = add_users
+        alert_rules_client = AlertRulesClient(
+            mock_alerts_service_system_rule, mock_alert_rules_service
+        )
+        with pytest.raises(Py42InvalidRuleOperationError):
+            alert_rules_client.add_users(TEST_RULE_ID, [TEST_USER_ID, u"other-user"])
+
+    def test_add_users_when_batches_fail_on_alerting_rule_checks_rule_type_once(
+        self, mock_alerts_service, mock_alert_rules_service, internal_server_error
+    ):
+        rule = dict(TEST_SYSTEM_RULE_RESPONSE["ruleMetadata"][0], isSystem=False)
+        mock_alerts_service.get_rule_by_observer_id.return_value = {
+            "ruleMetadata": [rule]
+        }
+        results = [
+            AlertRuleUsersResult([TEST_USER_ID], internal_server_error),
+            AlertRuleUsersResult([u"other-user"], internal_server_error),
+        ]
+
+        def add_users(rule_id, user_ids, check_error=None, **kwargs):
+            for result in results:
+                check_error(result.error)
+            return results
+
+        mock_alert_rules_service.add_users.side_effect = add_users
+        alert_rules_client = AlertRulesClient(
+            mock_alerts_service, mock_alert_rules_service
+        )
+        assert alert_rules_client.add_users(TEST_RULE_ID, [TEST_USER_ID]) == results
+        assert mock_alerts_service.get_rule_by_observer_id.call_count == 1
+
+    def test_remove_users_calls_alert_rules_service_remove_users_with_expected_value(
+        self, mocker, mock_alerts_service, mock_alert_rules_service
+    ):
+        mock_alert_rules_service.remove_users.return_value = []
+        alert_rules_client = AlertRulesClient(
+            mock_alerts_service, mock_alert_rules_service
+        )
+        alert_rules_client.remove_users(
+            TEST_RULE_ID, [TEST_USER_ID], batch_size=10, max_workers=2
+        )
+        mock_alert_rules_service.remove_users.assert_called_once_with(
+            TEST_RULE_ID,
+            [TEST_USER_ID],
+            batch_size=10,
+            max_workers=2,
+            check_error=mocker.ANY,
+        )
+
+    def test_remove_users_raises_invalid_rule_type_error_when_removing_from_system_rule(
+        self,
+        mock_alerts_service_system_rule,
+        mock_alert_rules_service,
+        internal_server_error,
+    ):
+        def remove_users(rule_id, user_ids, check_error=None, **kwargs):
+            check_error(internal_server_error)
+
+        mock_alert_rules_service.remove_users.side_effect = remove_users
+        alert_rules_client = AlertRulesClient(
+            mock_alerts_service_system_rule, mock_alert_rules_service
+        )
+        with pytest.raises(Py42InvalidRuleOperationError):
+            alert_rules_client.remove_users(TEST_RULE_ID, [TEST_USER_ID])
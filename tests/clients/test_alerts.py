@@ -37,12 +37,43 @@ class TestAlertsClient(object):
         alert_client.search(mock_alert_query)
         mock_alerts_service.search.assert_called_once_with(mock_alert_query)
 
+    def test_alerts_client_calls_search_chunked_with_expected_value(
+        self, mock_alerts_service, mock_alert_rules_service, mock_alert_query,
+    ):
+        alert_client = AlertsClient(mock_alerts_service, mock_alert_rules_service)
+        alert_client.search_chunked(mock_alert_query, max_values=100, max_workers=2)
+        mock_alerts_service.search_chunked.assert_called_once_with(
+            mock_alert_query, max_values=100, max_workers=2
+        )
+
+    def test_alerts_client_calls_search_all_with_expected_value(
+        self, mock_alerts_service, mock_alert_rules_service, mock_alert_query,
+    ):
+        alert_client = AlertsClient(mock_alerts_service, mock_alert_rules_service)
+        alert_client.search_all(mock_alert_query, max_workers=2, max_results=100)
+        mock_alerts_service.search_all.assert_called_once_with(
+            mock_alert_query, max_workers=2, max_results=100
+        )
+
     def test_alerts_client_calls_get_details_with_expected_value(
         self, mock_alerts_service, mock_alert_rules_service
     ):
         alert_client = AlertsClient(mock_alerts_service, mock_alert_rules_service)
         alert_client.get_details(self._alert_ids)
-        mock_alerts_service.get_details.assert_called_once_with(self._alert_ids)
+        mock_alerts_service.get_details.assert_called_once_with(
+            self._alert_ids, parse_observations=True
+        )
+
+    def test_alerts_client_calls_get_details_chunked_with_expected_value(
+        self, mock_alerts_service, mock_alert_rules_service
+    ):
+        alert_client = AlertsClient(mock_alerts_service, mock_alert_rules_service)
+        alert_client.get_details_chunked(
+            self._alert_ids, batch_size=10, parse_observations=False
+        )
+        mock_alerts_service.get_details_chunked.assert_called_once_with(
+            self._alert_ids, batch_size=10, max_workers=None, parse_observations=False
+        )
 
     def test_alerts_client_calls_update_state_with_resolve_state_and_expected_value(
         self, mock_alerts_service, mock_alert_rules_service,
@@ -70,3 +101,19 @@ class TestAlertsClient(object):
         mock_alerts_service.update_state.assert_called_once_with(
             "RESOLVED", self._alert_ids, note=None
         )
+
+    def test_alerts_client_calls_bulk_update_state_with_expected_value(
+        self, mock_alerts_service, mock_alert_rules_service
+    ):
+        alert_client = AlertsClient(mock_alerts_service, mock_alert_rules_service)
+        alert_client.bulk_update_state(
+            "RESOLVED", self._alert_ids, note="stale", requests_per_second=5
+        )
+        mock_alerts_service.bulk_update_state.assert_called_once_with(
+            "RESOLVED",
+            self._alert_ids,
+            note="stale",
+            batch_size=None,
+            max_workers=None,
+            requests_per_second=5,
+        )
@@ -75,6 +75,44 @@ class TestArchiveClient(object):
             ["path/to/first/file", "path/to/second/file"], file_size_calc_timeout=10
         )
 
+    def test_download_from_backup_calls_archive_accessor_download_from_backup_with_expected_params(
+        self, archive_accessor_manager, archive_service, archive_accessor
+    ):
+        archive_accessor_manager.get_archive_accessor.return_value = archive_accessor
+        archive = ArchiveClient(archive_accessor_manager, archive_service)
+        archive.download_from_backup(
+            "path", "device_guid", "save/as/path", destination_guid="dest_guid"
+        )
+        archive_accessor_manager.get_archive_accessor.assert_called_once_with(
+            "device_guid",
+            destination_guid="dest_guid",
+            private_password=None,
+            encryption_key=None,
+        )
+        archive_accessor.download_from_backup.assert_called_once_with(
+            "path",
+            "save/as/path",
+            file_size_calc_timeout=10,
+            progress_callback=None,
+        )
+
+    def test_extract_from_backup_calls_archive_accessor_extract_from_backup_with_expected_params(
+        self, archive_accessor_manager, archive_service, archive_accessor
+    ):
+        archive_accessor_manager.get_archive_accessor.return_value = archive_accessor
+        archive = ArchiveClient(archive_accessor_manager, archive_service)
+        archive.extract_from_backup(
+            ["path/to/first/file", "path/to/second/file"],
+            "device_guid",
+            extract_to="extract/to/dir",
+        )
+        archive_accessor.extract_from_backup.assert_called_once_with(
+            ["path/to/first/file", "path/to/second/file"],
+            extract_to="extract/to/dir",
+            entry_callback=None,
+            file_size_calc_timeout=10,
+        )
+
     def test_get_backup_sets_calls_archive_service_get_backup_sets_with_expected_params(
         self, archive_accessor_manager, archive_service
     ):
@@ -1142,3 +1142,50 @@ class TestRestoreJobManager(object):
         restore_job_manager.get_stream(single_dir_selection)
         actual = storage_archive_service.start_restore.call_args[1]["zip_result"]
         assert actual is True
+
+    def test_download_to_writes_restore_result_to_path(
+        self, mocker, storage_archive_service, single_file_selection, tmpdir
+    ):
+        mock_start_restore_response(
+            mocker, storage_archive_service, GetWebRestoreJobResponses.NOT_DONE
+        )
+        mock_get_restore_status_responses(
+            mocker, storage_archive_service, [GetWebRestoreJobResponses.DONE]
+        )
+        response = stream_restore_result_response_mock(
+            mocker, storage_archive_service, []
+        )
+        response.iter_content_into.return_value = [b"file ", b"contents"]
+        response.headers = {}
+        response.status_code = 200
+        restore_job_manager = RestoreJobManager(
+            storage_archive_service, DEVICE_GUID, WEB_RESTORE_SESSION_ID
+        )
+        save_as = str(tmpdir.join("restored.txt"))
+        result = restore_job_manager.download_to(single_file_selection, save_as)
+        assert result.size == 13
+        with open(save_as, "rb") as f:
+            assert f.read() == b"file contents"
+        storage_archive_service.stream_restore_result.assert_called_once_with(
+            "899350590659304988", headers=None
+        )
+
+    def test_extract_to_when_single_file_selected_sets_zip_result_to_true(
+        self, mocker, storage_archive_service, single_file_selection, tmpdir
+    ):
+        mock_start_restore_response(
+            mocker, storage_archive_service, GetWebRestoreJobResponses.NOT_DONE
+        )
+        mock_get_restore_status_responses(
+            mocker, storage_archive_service, [GetWebRestoreJobResponses.DONE]
+        )
+        response = stream_restore_result_response_mock(
+            mocker, storage_archive_service, []
+        )
+        response.readinto.return_value = 0
+        restore_job_manager = RestoreJobManager(
+            storage_archive_service, DEVICE_GUID, WEB_RESTORE_SESSION_ID
+        )
+        restore_job_manager.extract_to(single_file_selection, extract_to=str(tmpdir))
+        actual = storage_archive_service.start_restore.call_args[1]["zip_result"]
+        assert actual is True
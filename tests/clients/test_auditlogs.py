@@ -75,3 +75,41 @@ class TestAuditLogsClient(object):
             affected_usernames=None,
             customParam="abc",
         )
+
+    def test_get_all_in_time_windows_calls_expected_auditlogs_service(
+        self, auditlog_service
+    ):
+        auditlog_client = AuditLogsClient(auditlog_service)
+        auditlog_client.get_all_in_time_windows(
+            1577836800, 1577923200, windows=10, max_workers=2, usernames="test"
+        )
+        auditlog_service.get_all_in_time_windows.assert_called_once_with(
+            1577836800,
+            1577923200,
+            windows=10,
+            max_workers=2,
+            event_types=None,
+            user_ids=None,
+            usernames="test",
+            user_ip_addresses=None,
+            affected_user_ids=None,
+            affected_usernames=None,
+        )
+
+    def test_export_calls_expected_auditlogs_service(self, auditlog_service):
+        auditlog_client = AuditLogsClient(auditlog_service)
+        output = object()
+        auditlog_client.export(output, format="CEF", event_types="test")
+        auditlog_service.export.assert_called_once_with(
+            output,
+            format="CEF",
+            page_size=None,
+            begin_time=None,
+            end_time=None,
+            event_types="test",
+            user_ids=None,
+            usernames=None,
+            user_ip_addresses=None,
+            affected_user_ids=None,
+            affected_usernames=None,
+        )
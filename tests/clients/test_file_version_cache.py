@@ -0,0 +1,124 @@
+import pytest
+
+from py42.clients.file_version_cache import DiskFileVersionCache
+from py42.clients.file_version_cache import FileVersionCache
+
+VERSION = {
+    "storageNodeURL": "https://host.com",
+    "archiveGuid": "archiveid",
+    "fileId": "fileid",
+    "versionTimestamp": 12345,
+    "fileMD5": "testmd5",
+    "fileSHA256": "testsha256",
+    "fileName": "not cached",
+}
+CACHED_VERSION = {k: v for k, v in VERSION.items() if k != "fileName"}
+
+
+@pytest.fixture(params=["memory", "disk"])
+def create_cache(request, tmpdir):
+    def create(**kwargs):
+        if request.param == "memory":
+            return FileVersionCache(**kwargs)
+        return DiskFileVersionCache(str(tmpdir.join("versions.db")), **kwargs)
+
+    return create
+
+
+@pytest.fixture
+def mock_time(mocker):
+    mock = mocker.patch("py42.clients.file_version_cache.time.time")
+    mock.return_value = 1000
+    return mock
+
+
+class TestFileVersionCache(object):
+    def test_get_when_not_cached_raises_key_error(self, create_cache):
+        cache = create_cache()
+        with pytest.raises(KeyError):
+            cache.get("testmd5", "testsha256")
+
+    def test_get_returns_version_record_set_for_hashes(self, create_cache):
+        cache = create_cache()
+        cache.set("testmd5", "testsha256", VERSION)
+        assert cache.get("TESTMD5", "TESTSHA256") == CACHED_VERSION
+
+    def test_get_returns_none_for_cached_missing_version(self, create_cache):
+        cache = create_cache()
+        cache.set("testmd5", "testsha256", None)
+        assert cache.get("testmd5", "testsha256") is None
+
+    def test_get_after_ttl_raises_key_error(self, create_cache, mock_time):
+        cache = create_cache(ttl=10)
+        cache.set("testmd5", "testsha256", VERSION)
+        mock_time.return_value = 1009
+        assert cache.get("testmd5", "testsha256") == CACHED_VERSION
+        mock_time.return_value = 1010
+        with pytest.raises(KeyError):
+            cache.get("testmd5", "testsha256")
+
+    def test_get_missing_version_after_negative_ttl_raises_key_error(
+        self, create_cache, mock_time
+    ):
+        cache = create_cache(ttl=100, negative_ttl=10)
+        cache.set("testmd5", "testsha256", None)
+        mock_time.return_value = 1010
+        with pytest.raises(KeyError):
+            cache.get("testmd5", "testsha256")
+
+    def test_find_returns_version_cached_for_either_hash(self, create_cache):
+        cache = create_cache()
+        cache.set("testmd5", "testsha256", VERSION)
+        assert cache.find(md5="TESTMD5") == CACHED_VERSION
+        assert cache.find(sha256="testsha256") == CACHED_VERSION
+
+    def test_find_when_hash_cached_as_missing_version_raises_key_error(
+        self, create_cache
+    ):
+        cache = create_cache()
+        cache.set("testmd5", "testsha256", None)
+        with pytest.raises(KeyError):
+            cache.find(sha256="testsha256")
+
+    def test_find_after_ttl_raises_key_error(self, create_cache, mock_time):
+        cache = create_cache(ttl=10)
+        cache.set("testmd5", "testsha256", VERSION)
+        mock_time.return_value = 1010
+        with pytest.raises(KeyError):
+            cache.find(md5="testmd5")
+
+    def test_find_after_clear_raises_key_error(self, create_cache):
+        cache = create_cache()
+        cache.set("testmd5", "testsha256", VERSION)
+        cache.clear()
+        with pytest.raises(KeyError):
+            cache.find(sha256="testsha256")
+
+    def test_find_when_version_evicted_raises_key_error(self):
+        cache = FileVersionCache(max_size=1)
+        cache.set("md5-1", "sha256-1", VERSION)
+        cache.set("md5-2", "sha256-2", VERSION)
+        with pytest.raises(KeyError):
+            cache.find(sha256="sha256-1")
+        assert cache.find(sha256="sha256-2") == CACHED_VERSION
+
+    def test_clear_removes_entries(self, create_cache):
+        cache = create_cache()
+        cache.set("testmd5", "testsha256", VERSION)
+        cache.clear()
+        with pytest.raises(KeyError):
+            cache.get("testmd5", "testsha256")
+
+    def test_set_when_max_size_exceeded_evicts_oldest(self):
+        cache = FileVersionCache(max_size=2)
+        cache.set("md5-1", "sha256-1", VERSION)
+        cache.set("md5-2", "sha256-2", VERSION)
+        cache.set("md5-3", "sha256-3", VERSION)
+        with pytest.raises(KeyError):
+            cache.get("md5-1", "sha256-1")
+        assert cache.get("md5-3", "sha256-3") == CACHED_VERSION
+
+    def test_disk_cache_is_shared_between_instances(self, tmpdir):
+        path = str(tmpdir.join("versions.db"))
+        DiskFileVersionCache(path).set("testmd5", "testsha256", VERSION)
+        assert DiskFileVersionCache(path).get("testmd5", "testsha256") == CACHED_VERSION
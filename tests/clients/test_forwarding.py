@@ -0,0 +1,382 @@
+import json
+import socket
+import threading
+
+import pytest
+from requests import HTTPError
+from requests import Session
+
+from py42.clients.alerts import AlertsClient
+from py42.clients.auditlogs import AuditLogsClient
+from py42.clients.forwarding import AlertSource
+from py42.clients.forwarding import AuditLogSource
+from py42.clients.forwarding import CefFormatter
+from py42.clients.forwarding import FileEventSource
+from py42.clients.forwarding import FileSink
+from py42.clients.forwarding import ForwardingPipeline
+from py42.clients.forwarding import HttpSink
+from py42.clients.forwarding import JsonFormatter
+from py42.clients.forwarding import LeefFormatter
+from py42.clients.forwarding import SyslogSink
+from py42.clients.securitydata import SecurityDataClient
+from py42.sdk.queries.fileevents.file_event_query import FileEventQuery
+from py42.services._time_windows import parse_timestamp
+
+
+def _create_alert(number):
+    return {
+        "id": "alert-{}".format(number),
+        "createdAt": "2020-01-01T00:00:{:02d}.1234567Z".format(number),
+        "severity": "HIGH",
+        "type$": "ALERT_SUMMARY",
+        "name": "Exfiltration",
+    }
+
+
+class RecordingSink(object):
+    def __init__(self, fail_times=0):
+        self.batches = []
+        self.fail_times = fail_times
+        self._lock = threading.Lock()
+
+    def send(self, messages):
+        with self._lock:
+            if self.fail_times:
+                self.fail_times -= 1
+                raise IOError("collector unavailable")
+            self.batches.append(messages)
+
+    @property
+    def messages(self):
+        return sorted(m for batch in self.batches for m in batch)
+
+
+@pytest.fixture
+def alerts_client(mocker):
+    alerts = [_create_alert(i) for i in range(10)]
+    client = mocker.MagicMock(spec=AlertsClient)
+    client.queries = []
+
+    def search_all(query):
+        query_dict = json.loads(str(query))
+        client.queries.append(query_dict)
+        bounds = [
+            parse_timestamp(f["value"])
+            for g in query_dict["groups"]
+            for f in g["filters"]
+            if f["operator"] == "ON_OR_AFTER"
+        ]
+        return iter(
+            a
+            for a in alerts
+            if not bounds or parse_timestamp(a["createdAt"]) >= bounds[0]
+        )
+
+    client.search_all.side_effect = search_all
+    return client
+
+
+def _create_file_event(number, second=None):
+    return {
+        "eventId": str(number),
+        "insertionTimestamp": "2020-01-01T00:00:{:02d}.000Z".format(
+            number if second is None else second
+        ),
+    }
+
+
+def _create_file_event_query(page_size):
+    query = FileEventQuery()
+    query.page_size = page_size
+    return query
+
+
+class FakeFileEventServer(object):
+    """Answers file event searches from a list of events sorted by insertion time."""
+
+    def __init__(self, events):
+        self.events = events
+        self.queries = []
+
+    def search_file_events(self, query):
+        query_dict = json.loads(str(query))
+        self.queries.append(query_dict)
+        matches = self.events
+        for group in query_dict["groups"]:
+            for f in group["filters"]:
+                if f["operator"] == "ON_OR_AFTER":
+                    bound = parse_timestamp(f["value"])
+                    matches = [
+                        e
+                        for e in matches
+                        if parse_timestamp(e["insertionTimestamp"]) >= bound
+                    ]
+        start = (query_dict["pgNum"] - 1) * query_dict["pgSize"]
+        return {"fileEvents": matches[start:][: query_dict["pgSize"]]}
+
+
+@pytest.fixture
+def file_event_server(mocker):
+    server = FakeFileEventServer([_create_file_event(i) for i in range(10)])
+    server.client = mocker.MagicMock(spec=SecurityDataClient)
+    server.client.search_file_events.side_effect = server.search_file_events
+    return server
+
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(mocker):
+    return mocker.patch("py42.clients.forwarding.time.sleep")
+
+
+class TestFormatters(object):
+    def test_json_formatter_formats_compact_sorted_json(self):
+        assert JsonFormatter().format({"b": 1, "a": [1, 2]}) == '{"a":[1,2],"b":1}'
+
+    def test_cef_formatter_formats_header_and_escaped_extension(self):
+        event = {
+            "type$": "ALERT|SUMMARY",
+            "severity": "HIGH",
+            "description": "a=b\\c\nd",
+            "actor": None,
+            "observations": [{"id": 1}],
+        }
+        line = CefFormatter(version="1.0").format(event)
+        assert line == (
+            "CEF:0|Code42|py42|1.0|ALERT\\|SUMMARY|ALERT\\|SUMMARY|8|"
+            'description=a\\=b\\\\c\\nd observations=[{"id":1}] severity=HIGH '
+            "type=ALERT|SUMMARY"
+        )
+
+    def test_cef_formatter_when_no_severity_uses_medium_severity(self):
+        line = CefFormatter().format({"eventType": "CREATED"})
+        assert line.split("|")[6] == "5"
+
+    def test_leef_formatter_formats_tab_delimited_attributes(self):
+        event = {"eventType": "CREATED", "fileName": "a\tb.txt", "size": 3}
+        line = LeefFormatter(version="1.0").format(event)
+        assert line == (
+            "LEEF:2.0|Code42|py42|1.0|CREATED|x09|"
+            "eventType=CREATED\tfileName=a b.txt\tsize=3"
+        )
+
+
+class TestSinks(object):
+    def test_file_sink_appends_one_message_per_line(self, tmp_path):
+        path = str(tmp_path / "events.log")
+        sink = FileSink(path)
+        sink.send(["first", "second"])
+        sink.send([u"thïrd"])
+        sink.close()
+        with open(path, "rb") as f:
+            assert f.read() == u"first\nsecond\nthïrd\n".encode("utf-8")
+
+    def test_http_sink_posts_newline_delimited_batch(self, mocker):
+        session = mocker.MagicMock(spec=Session)
+        sink = HttpSink(
+            "https://collector.example.com", headers={"Authorization": "token"}, session=session
+        )
+        sink.send(["first", "second"])
+        args, kwargs = session.post.call_args
+        assert args[0] == "https://collector.example.com"
+        assert kwargs["data"] == b"first\nsecond"
+        assert kwargs["headers"]["Authorization"] == "token"
+        session.post.return_value.raise_for_status.assert_called_once_with()
+
+    def test_http_sink_when_collector_rejects_batch_raises(self, mocker):
+        session = mocker.MagicMock(spec=Session)
+        session.post.return_value.raise_for_status.side_effect = HTTPError("503")
+        with pytest.raises(HTTPError):
+            HttpSink("https://collector.example.com", session=session).send(["a"])
+
+    def test_syslog_sink_sends_rfc_5424_datagram_per_message_over_udp(self):
+        server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        server.bind(("127.0.0.1", 0))
+        server.settimeout(5)
+        sink = SyslogSink("127.0.0.1", port=server.getsockname()[1], facility=16)
+        sink.send(["first", "second"])
+        datagrams = [server.recv(1024), server.recv(1024)]
+        sink.close()
+        server.close()
+        assert datagrams[0].startswith(b"<134>1 ")
+        assert datagrams[0].endswith(b" py42 - - - first")
+        assert datagrams[1].endswith(b" - - - second")
+
+    def test_syslog_sink_sends_newline_terminated_messages_over_tcp(self):
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(("127.0.0.1", 0))
+        server.listen(1)
+        received = []
+
+        def accept():
+            conn, _ = server.accept()
+            data = b""
+            while data.count(b"\n") < 2:
+                data += conn.recv(1024)
+            received.append(data)
+            conn.close()
+
+        thread = threading.Thread(target=accept)
+        thread.start()
+        sink = SyslogSink(
+            "127.0.0.1", port=server.getsockname()[1], protocol="tcp", app_name="c42"
+        )
+        sink.send(["first", "second"])
+        thread.join(5)
+        sink.close()
+        server.close()
+        lines = received[0].split(b"\n")
+        assert lines[0].endswith(b" c42 - - - first")
+        assert lines[1].endswith(b" c42 - - - second")
+        assert lines[2] == b""
+
+    def test_syslog_sink_when_protocol_unsupported_raises_value_error(self):
+        with pytest.raises(ValueError):
+            SyslogSink("127.0.0.1", protocol="http")
+
+
+class TestForwardingPipeline(object):
+    def test_run_sends_every_event_in_batches_and_saves_checkpoint(
+        self, alerts_client, tmp_path
+    ):
+        sink = RecordingSink()
+        path = str(tmp_path / "checkpoints.json")
+        pipeline = ForwardingPipeline(
+            AlertSource(alerts_client), JsonFormatter(), sink, path, batch_size=3
+        )
+
+        result = pipeline.run()
+
+        assert result == (10, 4, "2020-01-01T00:00:09.123Z")
+        assert len(sink.messages) == 10
+        assert all(len(batch) <= 3 for batch in sink.batches)
+        with open(path) as f:
+            assert json.load(f) == {"alerts": "2020-01-01T00:00:09.123Z"}
+        assert alerts_client.queries[0]["srtDirection"] == "asc"
+
+    def test_run_resumes_from_checkpoint(self, alerts_client, tmp_path):
+        path = str(tmp_path / "checkpoints.json")
+        ForwardingPipeline(
+            AlertSource(alerts_client), JsonFormatter(), RecordingSink(), path
+        ).run()
+        sink = RecordingSink()
+        pipeline = ForwardingPipeline(
+            AlertSource(alerts_client), JsonFormatter(), sink, path
+        )
+
+        result = pipeline.run()
+
+        bound = alerts_client.queries[-1]["groups"][0]["filters"][0]
+        assert bound["operator"] == "ON_OR_AFTER"
+        assert bound["value"] == "2020-01-01T00:00:09.123Z"
+        # delivery is at-least-once, so the newest alert is sent again
+        assert result.events == 1
+
+    def test_run_retries_failed_batch(self, alerts_client, no_retry_delay):
+        sink = RecordingSink(fail_times=2)
+        pipeline = ForwardingPipeline(
+            AlertSource(alerts_client), JsonFormatter(), sink, batch_size=5
+        )
+        assert pipeline.run().events == 10
+        assert len(sink.messages) == 10
+        assert no_retry_delay.call_count == 2
+
+    def test_run_when_retries_run_out_raises_error_and_keeps_last_checkpoint(
+        self, alerts_client, tmp_path
+    ):
+        sink = RecordingSink(fail_times=100)
+        path = str(tmp_path / "checkpoints.json")
+        pipeline = ForwardingPipeline(
+            AlertSource(alerts_client), JsonFormatter(), sink, path, max_retries=1
+        )
+        with pytest.raises(IOError):
+            pipeline.run()
+        assert pipeline.checkpoint is None
+
+    def test_run_when_source_is_unordered_saves_checkpoint_only_after_every_batch(
+        self, mocker, tmp_path
+    ):
+        client = mocker.MagicMock(spec=AuditLogsClient)
+        events = [
+            {"timestamp": "2020-01-01T00:00:0{}.000Z".format(i), "type$": "login"}
+            for i in reversed(range(6))
+        ]
+        client.get_all.return_value = [{"events": events[:3]}, {"events": events[3:]}]
+        sink = RecordingSink(fail_times=100)
+        path = str(tmp_path / "checkpoints.json")
+        source = AuditLogSource(client, event_types="login")
+        pipeline = ForwardingPipeline(
+            source, CefFormatter(), sink, path, batch_size=2, max_retries=0
+        )
+        with pytest.raises(IOError):
+            pipeline.run()
+        assert pipeline.checkpoint is None
+
+        sink.fail_times = 0
+        result = pipeline.run()
+
+        assert result.checkpoint == "2020-01-01T00:00:05.000Z"
+        assert client.get_all.call_args[1]["event_types"] == "login"
+
+    def test_run_pauses_source_while_queue_is_full(self, alerts_client):
+        released = threading.Event()
+        read = []
+
+        class BlockedSink(object):
+            def send(self, messages):
+                assert released.wait(5)
+
+        def events(checkpoint):
+            for i in range(100):
+                read.append(i)
+                if i == 50:
+                    released.set()
+                yield _create_alert(i % 60)
+
+        source = AlertSource(alerts_client)
+        source.iter_events = events
+        pipeline = ForwardingPipeline(
+            source, JsonFormatter(), BlockedSink(), batch_size=1, queue_size=2, max_workers=1
+        )
+        thread = threading.Thread(target=pipeline.run)
+        thread.start()
+        thread.join(0.5)
+        # one batch being sent, two queued and one waiting to be queued
+        assert len(read) <= 5
+        released.set()
+        thread.join(5)
+        assert len(read) == 100
+
+    def test_file_event_source_searches_on_or_after_last_insertion_timestamp(
+        self, file_event_server
+    ):
+        source = FileEventSource(file_event_server.client, _create_file_event_query(3))
+
+        events = list(source.iter_events("2020-01-01T00:00:00.000Z"))
+
+        assert [e["eventId"] for e in events] == [str(i) for i in range(10)]
+        queries = file_event_server.queries
+        assert [q["pgNum"] for q in queries] == [1, 1, 1, 1, 1]
+        assert queries[0]["srtKey"] == "insertionTimestamp"
+        bounds = [q["groups"][0]["filters"][0] for q in queries]
+        assert all(b["operator"] == "ON_OR_AFTER" for b in bounds)
+        assert [b["value"] for b in bounds] == [
+            "2020-01-01T00:00:00.000Z",
+            "2020-01-01T00:00:02.000Z",
+            "2020-01-01T00:00:04.000Z",
+            "2020-01-01T00:00:06.000Z",
+            "2020-01-01T00:00:08.000Z",
+        ]
+        assert source.get_checkpoint(events[-1]) == "2020-01-01T00:00:09.000Z"
+
+    def test_file_event_source_when_page_shares_one_timestamp_pages_within_it(
+        self, file_event_server
+    ):
+        file_event_server.events = [
+            _create_file_event(i, second=1 if i < 5 else i) for i in range(8)
+        ]
+        source = FileEventSource(file_event_server.client, _create_file_event_query(2))
+
+        events = list(source.iter_events(None))
+
+        assert [e["eventId"] for e in events] == [str(i) for i in range(8)]
+        assert [q["pgNum"] for q in file_event_server.queries][:4] == [1, 1, 2, 3]
@@ -2,6 +2,7 @@ import json
 
 import pytest
 
+from py42.clients.file_version_cache import FileVersionCache
 from py42.clients.securitydata import PlanStorageInfo
 from py42.clients.securitydata import SecurityDataClient
 from py42.exceptions import Py42ChecksumNotFoundError
@@ -318,6 +319,46 @@ class TestSecurityClient(object):
         security_client.search_file_events(RAW_QUERY)
         file_event_service.search.assert_called_once_with(RAW_QUERY)
 
+    def test_search_file_events_chunked_calls_through_to_service(
+        self,
+        security_service,
+        file_event_service,
+        preservation_data_service,
+        saved_search_service,
+        storage_service_factory,
+    ):
+        security_client = SecurityDataClient(
+            security_service,
+            file_event_service,
+            preservation_data_service,
+            saved_search_service,
+            storage_service_factory,
+        )
+        security_client.search_file_events_chunked(RAW_QUERY, max_values=10)
+        file_event_service.search_chunked.assert_called_once_with(
+            RAW_QUERY, max_values=10, max_workers=None
+        )
+
+    def test_search_file_events_in_time_windows_calls_through_to_service(
+        self,
+        security_service,
+        file_event_service,
+        preservation_data_service,
+        saved_search_service,
+        storage_service_factory,
+    ):
+        security_client = SecurityDataClient(
+            security_service,
+            file_event_service,
+            preservation_data_service,
+            saved_search_service,
+            storage_service_factory,
+        )
+        security_client.search_file_events_in_time_windows(RAW_QUERY, 0, 10, windows=8)
+        file_event_service.search_in_time_windows.assert_called_once_with(
+            RAW_QUERY, 0, 10, windows=8
+        )
+
     def test_get_security_plan_storage_info_one_location_returns_location_info(
         self,
         security_service_one_location,
@@ -1313,3 +1354,348 @@ class TestSecurityClient(object):
             security_client.stream_file_by_md5("mdhash")
 
         assert e.value.args[0] == PDS_EXCEPTION_MESSAGE.format("mdhash")
+
+    def test_download_file_by_sha256_calls_download_file_with_version_checksums(
+        self,
+        mocker,
+        security_service,
+        file_event_service,
+        preservation_data_service,
+        saved_search_service,
+        storage_service_factory,
+        file_event_search,
+        file_version_list,
+    ):
+        file_event_service.search.return_value = file_event_search
+        preservation_data_service.get_file_version_list.return_value = file_version_list
+        storage_node_client = mocker.MagicMock(spec=StoragePreservationDataService)
+        storage_service_factory.create_preservation_data_service.return_value = (
+            storage_node_client
+        )
+        security_client = SecurityDataClient(
+            security_service,
+            file_event_service,
+            preservation_data_service,
+            saved_search_service,
+            storage_service_factory,
+        )
+
+        security_client.download_file_by_sha256("testsha256-2", "path/to/file")
+        storage_node_client.download_file.assert_called_once_with(
+            "archiveid-2",
+            "fileid-2",
+            12344,
+            "path/to/file",
+            md5="testmd5-2",
+            sha256="testsha256-2",
+            progress_callback=None,
+        )
+
+    def test_download_file_by_md5_when_search_returns_empty_response_raises_py42_checksum_not_found_error(
+        self,
+        security_service,
+        file_event_service,
+        preservation_data_service,
+        saved_search_service,
+        storage_service_factory,
+        file_event_search,
+    ):
+        file_event_search.text = '{"fileEvents": []}'
+        file_event_service.search.return_value = file_event_search
+        security_client = SecurityDataClient(
+            security_service,
+            file_event_service,
+            preservation_data_service,
+            saved_search_service,
+            storage_service_factory,
+        )
+
+        with pytest.raises(Py42ChecksumNotFoundError):
+            security_client.download_file_by_md5("mdhash", "path/to/file")
+
+    def test_stream_files_by_sha256_searches_once_and_sinks_each_file(
+        self,
+        mocker,
+        security_service,
+        file_event_service,
+        preservation_data_service,
+        saved_search_service,
+        storage_service_factory,
+        file_event_search,
+        file_version_list,
+        file_download,
+    ):
+        file_event_service.search.return_value = file_event_search
+        preservation_data_service.get_file_version_list.return_value = file_version_list
+        storage_node_client = mocker.MagicMock(spec=StoragePreservationDataService)
+        storage_node_client.get_download_token.return_value = file_download
+        stream = mocker.MagicMock(spec=Py42Response)
+        storage_node_client.get_file.return_value = stream
+        storage_service_factory.create_preservation_data_service.return_value = (
+            storage_node_client
+        )
+        security_client = SecurityDataClient(
+            security_service,
+            file_event_service,
+            preservation_data_service,
+            saved_search_service,
+            storage_service_factory,
+        )
+        sink = mocker.MagicMock(return_value="sunk")
+
+        results = security_client.stream_files_by_sha256(
+            ["TESTSHA256-2", "testsha256-2"], sink
+        )
+
+        assert file_event_service.search.call_count == 1
+        query = str(file_event_service.search.call_args[0][0])
+        assert '"term":"sha256Checksum", "value":"TESTSHA256-2"' in query
+        sink.assert_called_once_with("TESTSHA256-2", stream)
+        assert results == [("TESTSHA256-2", "sunk", None)]
+        stream.close.assert_called_once_with()
+
+    def test_stream_files_by_md5_reports_missing_hash_without_aborting_batch(
+        self,
+        mocker,
+        security_service,
+        file_event_service,
+        preservation_data_service,
+        saved_search_service,
+        storage_service_factory,
+        file_event_search,
+        file_version_list,
+        file_download,
+    ):
+        file_event_service.search.return_value = file_event_search
+        preservation_data_service.get_file_version_list.return_value = file_version_list
+        storage_node_client = mocker.MagicMock(spec=StoragePreservationDataService)
+        storage_node_client.get_download_token.return_value = file_download
+        stream = mocker.MagicMock(spec=Py42Response)
+        storage_node_client.get_file.return_value = stream
+        storage_service_factory.create_preservation_data_service.return_value = (
+            storage_node_client
+        )
+        security_client = SecurityDataClient(
+            security_service,
+            file_event_service,
+            preservation_data_service,
+            saved_search_service,
+            storage_service_factory,
+        )
+        sink = mocker.MagicMock(return_value="sunk")
+
+        results = security_client.stream_files_by_md5(["mdhash", "testmd5-2"], sink)
+
+        assert results[0].checksum == "mdhash"
+        assert isinstance(results[0].error, Py42ChecksumNotFoundError)
+        assert results[1] == ("testmd5-2", "sunk", None)
+        sink.assert_called_once_with("testmd5-2", stream)
+        stream.close.assert_called_once_with()
+
+    def test_stream_files_by_sha256_when_sink_raises_reports_error(
+        self,
+        mocker,
+        security_service,
+        file_event_service,
+        preservation_data_service,
+        saved_search_service,
+        storage_service_factory,
+        file_event_search,
+        file_version_list,
+        file_download,
+    ):
+        file_event_service.search.return_value = file_event_search
+        preservation_data_service.get_file_version_list.return_value = file_version_list
+        storage_node_client = mocker.MagicMock(spec=StoragePreservationDataService)
+        storage_node_client.get_download_token.return_value = file_download
+        stream = mocker.MagicMock(spec=Py42Response)
+        storage_node_client.get_file.return_value = stream
+        storage_service_factory.create_preservation_data_service.return_value = (
+            storage_node_client
+        )
+        security_client = SecurityDataClient(
+            security_service,
+            file_event_service,
+            preservation_data_service,
+            saved_search_service,
+            storage_service_factory,
+        )
+        error = IOError("disk full")
+        sink = mocker.MagicMock(side_effect=error)
+
+        results = security_client.stream_files_by_sha256(["testsha256-2"], sink)
+
+        assert results == [("testsha256-2", None, error)]
+        stream.close.assert_called_once_with()
+
+    def test_stream_files_by_sha256_searches_once_per_batch(
+        self,
+        mocker,
+        security_service,
+        file_event_service,
+        preservation_data_service,
+        saved_search_service,
+        storage_service_factory,
+        file_event_search,
+    ):
+        mocker.patch("py42.clients.securitydata.HASH_SEARCH_BATCH_SIZE", 2)
+        file_event_search.text = '{"fileEvents": []}'
+        file_event_service.search.return_value = file_event_search
+        security_client = SecurityDataClient(
+            security_service,
+            file_event_service,
+            preservation_data_service,
+            saved_search_service,
+            storage_service_factory,
+        )
+
+        results = security_client.stream_files_by_sha256(
+            ["hash1", "hash2", "hash3"], mocker.MagicMock()
+        )
+
+        assert file_event_service.search.call_count == 2
+        assert all(isinstance(r.error, Py42ChecksumNotFoundError) for r in results)
+
+    def test_stream_files_by_sha256_when_search_page_is_full_searches_missing_hash_alone(
+        self,
+        mocker,
+        security_service,
+        file_event_service,
+        preservation_data_service,
+        saved_search_service,
+        storage_service_factory,
+        file_event_search,
+        file_version_list,
+        file_download,
+    ):
+        mocker.patch("py42.settings.security_events_per_page", 1)
+        file_event_service.search.return_value = file_event_search
+        preservation_data_service.get_file_version_list.return_value = file_version_list
+        storage_node_client = mocker.MagicMock(spec=StoragePreservationDataService)
+        storage_node_client.get_download_token.return_value = file_download
+        storage_service_factory.create_preservation_data_service.return_value = (
+            storage_node_client
+        )
+        security_client = SecurityDataClient(
+            security_service,
+            file_event_service,
+            preservation_data_service,
+            saved_search_service,
+            storage_service_factory,
+        )
+
+        security_client.stream_files_by_sha256(
+            ["testsha256-2", "shahash"], mocker.MagicMock()
+        )
+
+        assert file_event_service.search.call_count == 2
+        query = str(file_event_service.search.call_args[0][0])
+        assert '"value":"shahash"' in query
+        assert '"value":"testsha256-2"' not in query
+
+    def test_stream_file_by_sha256_with_file_version_cache_resolves_version_once(
+        self,
+        mocker,
+        security_service,
+        file_event_service,
+        preservation_data_service,
+        saved_search_service,
+        storage_service_factory,
+        file_event_search,
+        file_version_list,
+        file_download,
+    ):
+        file_event_service.search.return_value = file_event_search
+        preservation_data_service.get_file_version_list.return_value = file_version_list
+        storage_node_client = mocker.MagicMock(spec=StoragePreservationDataService)
+        storage_node_client.get_download_token.return_value = file_download
+        storage_service_factory.create_preservation_data_service.return_value = (
+            storage_node_client
+        )
+        security_client = SecurityDataClient(
+            security_service,
+            file_event_service,
+            preservation_data_service,
+            saved_search_service,
+            storage_service_factory,
+            file_version_cache=FileVersionCache(),
+        )
+
+        security_client.stream_file_by_sha256("testsha256-2")
+        security_client.stream_file_by_sha256("testsha256-2")
+
+        assert preservation_data_service.get_file_version_list.call_count == 1
+        assert storage_node_client.get_download_token.call_count == 2
+        storage_node_client.get_download_token.assert_called_with(
+            "archiveid-2", "fileid-2", 12344
+        )
+
+    def test_stream_file_by_sha256_with_file_version_cache_searches_hash_once(
+        self,
+        mocker,
+        security_service,
+        file_event_service,
+        preservation_data_service,
+        saved_search_service,
+        storage_service_factory,
+        file_event_search,
+        file_version_list,
+        file_download,
+    ):
+        file_event_service.search.return_value = file_event_search
+        preservation_data_service.get_file_version_list.return_value = file_version_list
+        storage_node_client = mocker.MagicMock(spec=StoragePreservationDataService)
+        storage_node_client.get_download_token.return_value = file_download
+        storage_service_factory.create_preservation_data_service.return_value = (
+            storage_node_client
+        )
+        security_client = SecurityDataClient(
+            security_service,
+            file_event_service,
+            preservation_data_service,
+            saved_search_service,
+            storage_service_factory,
+            file_version_cache=FileVersionCache(),
+        )
+
+        security_client.stream_file_by_sha256("testsha256-2")
+        security_client.stream_file_by_sha256("testsha256-2")
+        security_client.stream_files_by_sha256(["testsha256-2"], mocker.MagicMock())
+
+        assert file_event_service.search.call_count == 1
+        assert storage_node_client.get_download_token.call_count == 3
+
+    def test_stream_file_by_sha256_with_file_version_cache_caches_missing_version(
+        self,
+        mocker,
+        security_service,
+        file_event_service,
+        preservation_data_service,
+        saved_search_service,
+        storage_service_factory,
+        file_event_search,
+        file_version_list,
+        file_location,
+    ):
+        file_event_service.search.return_value = file_event_search
+        file_version_list.text = '{"versions": []}'
+        preservation_data_service.get_file_version_list.return_value = file_version_list
+        file_location.text = '{"locations": []}'
+        file_event_service.get_file_location_detail_by_sha256.return_value = (
+            file_location
+        )
+        security_client = SecurityDataClient(
+            security_service,
+            file_event_service,
+            preservation_data_service,
+            saved_search_service,
+            storage_service_factory,
+        )
+        security_client.file_version_cache = FileVersionCache()
+
+        for _ in range(2):
+            with pytest.raises(Py42Error):
+                security_client.stream_file_by_sha256("testsha256-2")
+
+        assert preservation_data_service.get_file_version_list.call_count == 1
+        assert file_event_service.get_file_location_detail_by_sha256.call_count == 1
@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 import json
+import socket
+import threading
 
 import pytest
 from requests import HTTPError
@@ -166,3 +168,46 @@ def mock_connection(mocker):
 def mock_successful_connection(mock_connection, successful_response):
     mock_connection.get.return_value = successful_response
     return mock_connection
+
+
+class SocketServer(object):
+    """A local TCP server that answers each connection it accepts with the next handler,
+    called with the socket and the request bytes."""
+
+    def __init__(self, handlers):
+        self.requests = []
+        self._handlers = list(handlers)
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.bind(("127.0.0.1", 0))
+        self._server.listen(len(self._handlers))
+        self.url = "http://127.0.0.1:{}/".format(self._server.getsockname()[1])
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def close(self):
+        self._server.close()
+        self._thread.join(5)
+
+    def _run(self):
+        for handler in self._handlers:
+            conn, _ = self._server.accept()
+            request = b""
+            while b"\r\n\r\n" not in request:
+                request += conn.recv(65536)
+            self.requests.append(request)
+            handler(conn, request)
+
+
+@pytest.fixture
+def socket_server():
+    servers = []
+
+    def serve(*handlers):
+        server = SocketServer(handlers)
+        servers.append(server)
+        return server
+
+    yield serve
+    for server in servers:
+        server.close()
@@ -421,6 +421,46 @@ def test_filter_group_when_changed_filter_clause_has_correct_json_representation
     )
 
 
+def test_filter_group_when_filter_list_changed_in_place_has_correct_json_representation():
+    group = create_is_in_filter_group("term", ["value2", "value1"])
+    str(group)
+    group.filter_list.append(create_query_filter("term", "IS", "value0"))
+    assert (
+        str(group) == '{"filterClause":"OR", "filters"'
+        ':[{"operator":"IS", "term":"term", "value":"value0"},'
+        '{"operator":"IS", "term":"term", "value":"value1"},'
+        '{"operator":"IS", "term":"term", "value":"value2"}]}'
+    )
+    group.filter_list[0] = create_query_filter("term", "IS", "value3")
+    assert create_query_filter("term", "IS", "value3") in group
+    assert create_query_filter("term", "IS", "value2") not in group
+
+
+def test_filter_group_with_equal_filters_has_equal_hash():
+    group = create_is_in_filter_group("term", ["value1", "value2"])
+    other = create_is_in_filter_group("term", ["value2", "value1", "value1"])
+    assert group == other
+    assert hash(group) == hash(other)
+    assert len({group, other}) == 1
+
+
+def test_filter_group_hash_changes_when_filter_clause_changes():
+    group = create_is_in_filter_group("term", ["value1", "value2"])
+    hash_before = hash(group)
+    group.filter_clause = "AND"
+    assert hash(group) != hash_before
+
+
+def test_query_filter_not_equal_to_filter_with_different_value():
+    assert create_query_filter("term", "IS", "value1") != create_query_filter(
+        "term", "IS", "value2"
+    )
+    assert not (
+        create_query_filter("term", "IS", "value1")
+        != create_query_filter("term", "IS", "value1")
+    )
+
+
 class TestQueryFilterTimestampField:
     @pytest.mark.parametrize(
         "timestamp",
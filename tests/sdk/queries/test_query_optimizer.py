@@ -0,0 +1,180 @@
+import pytest
+
+from py42._compat import str
+from py42.exceptions import Py42UnsatisfiableQueryError
+from py42.sdk.queries.alerts.alert_query import AlertQuery
+from py42.sdk.queries.alerts.filters import Severity
+from py42.sdk.queries.fileevents.file_event_query import FileEventQuery
+from py42.sdk.queries.fileevents.filters import EventTimestamp
+from py42.sdk.queries.fileevents.filters import ExposureType
+from py42.sdk.queries.fileevents.filters import FileName
+from py42.sdk.queries.fileevents.filters import MD5
+from py42.sdk.queries.query_filter import create_filter_group
+from py42.sdk.queries.query_filter import create_query_filter
+
+JAN_1 = u"2020-01-01 00:00:00"
+JAN_5 = u"2020-01-05 00:00:00"
+JAN_10 = u"2020-01-10 00:00:00"
+JAN_20 = u"2020-01-20 00:00:00"
+JAN_30 = u"2020-01-30 00:00:00"
+
+
+def test_optimize_returns_copy_and_leaves_query_unchanged():
+    query = FileEventQuery.all(FileName.eq(u"a.txt"), FileName.eq(u"a.txt"))
+    query.page_number = 3
+    before = str(query)
+    optimized = query.optimize()
+    assert optimized is not query
+    assert isinstance(optimized, FileEventQuery)
+    assert optimized.page_number == 3
+    assert str(query) == before
+
+
+def test_optimize_removes_duplicate_groups_and_filters():
+    query = FileEventQuery.all(
+        FileName.eq(u"a.txt"),
+        FileName.eq(u"a.txt"),
+        create_filter_group(
+            [create_query_filter(u"md5Checksum", u"IS", u"1")] * 2, u"AND"
+        ),
+    )
+    optimized = query.optimize()
+    assert optimized._filter_group_list == [FileName.eq(u"a.txt"), MD5.eq(u"1")]
+
+
+def test_optimize_joins_single_filter_groups_with_and():
+    group = create_filter_group([create_query_filter(u"fileName", u"IS", u"a")], u"OR")
+    optimized = FileEventQuery.all(group, MD5.eq(u"1")).optimize()
+    assert FileName.eq(u"a") in optimized._filter_group_list
+
+
+def test_optimize_when_single_group_remains_uses_and_group_clause():
+    query = FileEventQuery.any(FileName.eq(u"a.txt"), FileName.eq(u"a.txt"))
+    optimized = query.optimize()
+    assert optimized._group_clause == u"AND"
+    assert optimized._filter_group_list == [FileName.eq(u"a.txt")]
+
+
+def test_optimize_equivalent_queries_serialize_the_same():
+    first = FileEventQuery.all(FileName.eq(u"a"), MD5.is_in([u"1", u"2"]))
+    second = FileEventQuery.all(MD5.is_in([u"2", u"1"]), FileName.eq(u"a"))
+    assert str(first.optimize()) == str(second.optimize())
+
+
+def test_optimize_all_query_intersects_ranges_on_same_term():
+    query = FileEventQuery.all(
+        EventTimestamp.in_range(JAN_1, JAN_20),
+        EventTimestamp.in_range(JAN_10, JAN_30),
+        EventTimestamp.on_or_after(JAN_5),
+    )
+    optimized = query.optimize()
+    assert optimized._filter_group_list == [EventTimestamp.in_range(JAN_10, JAN_20)]
+
+
+def test_optimize_all_query_folds_bounds_within_group():
+    group = create_filter_group(
+        EventTimestamp.in_range(JAN_1, JAN_30).filter_list
+        + EventTimestamp.in_range(JAN_5, JAN_20).filter_list,
+        u"AND",
+    )
+    optimized = FileEventQuery.all(group).optimize()
+    assert optimized._filter_group_list == [EventTimestamp.in_range(JAN_5, JAN_20)]
+
+
+def test_optimize_all_query_when_ranges_do_not_overlap_raises_unsatisfiable_error():
+    query = FileEventQuery.all(
+        EventTimestamp.on_or_before(JAN_5), EventTimestamp.on_or_after(JAN_10)
+    )
+    with pytest.raises(Py42UnsatisfiableQueryError):
+        query.optimize()
+
+
+def test_optimize_any_query_combines_overlapping_ranges():
+    query = FileEventQuery.any(
+        EventTimestamp.in_range(JAN_1, JAN_10),
+        EventTimestamp.in_range(JAN_5, JAN_20),
+        EventTimestamp.on_or_after(JAN_30),
+    )
+    optimized = query.optimize()
+    assert sorted(optimized._filter_group_list, key=str) == sorted(
+        [EventTimestamp.in_range(JAN_1, JAN_20), EventTimestamp.on_or_after(JAN_30)],
+        key=str,
+    )
+    assert optimized._group_clause == u"OR"
+
+
+def test_optimize_any_query_when_range_unbounded_absorbs_later_ranges():
+    query = FileEventQuery.any(
+        EventTimestamp.on_or_after(JAN_5), EventTimestamp.in_range(JAN_10, JAN_20)
+    )
+    assert query.optimize()._filter_group_list == [EventTimestamp.on_or_after(JAN_5)]
+
+
+def test_optimize_any_query_collapses_eq_groups_on_same_term_into_is_in():
+    query = FileEventQuery.any(
+        FileName.eq(u"a"),
+        MD5.eq(u"1"),
+        FileName.eq(u"b"),
+        FileName.is_in([u"c", u"a"]),
+    )
+    optimized = query.optimize()
+    assert sorted(optimized._filter_group_list, key=str) == sorted(
+        [FileName.is_in([u"a", u"b", u"c"]), MD5.eq(u"1")], key=str
+    )
+
+
+def test_optimize_all_query_does_not_collapse_eq_groups():
+    query = FileEventQuery.all(FileName.eq(u"a"), FileName.eq(u"b"))
+    assert len(query.optimize()._filter_group_list) == 2
+
+
+def test_optimize_all_query_removes_is_in_group_satisfied_by_required_filter():
+    query = FileEventQuery.all(FileName.eq(u"a"), FileName.is_in([u"a", u"b"]))
+    assert query.optimize()._filter_group_list == [FileName.eq(u"a")]
+
+
+@pytest.mark.parametrize(
+    "groups",
+    [
+        (FileName.eq(u"a"), FileName.not_eq(u"a")),
+        (FileName.eq(u"a"), FileName.not_in([u"a", u"b"])),
+        (ExposureType.exists(), ExposureType.not_exists()),
+    ],
+)
+def test_optimize_all_query_when_contradictory_raises_unsatisfiable_error(groups):
+    with pytest.raises(Py42UnsatisfiableQueryError):
+        FileEventQuery.all(*groups).optimize()
+
+
+def test_optimize_any_query_removes_contradictory_groups():
+    contradictory = create_filter_group(
+        [
+            create_query_filter(u"fileName", u"IS", u"a"),
+            create_query_filter(u"fileName", u"IS_NOT", u"a"),
+        ],
+        u"AND",
+    )
+    query = FileEventQuery.any(contradictory, MD5.eq(u"1"))
+    assert query.optimize()._filter_group_list == [MD5.eq(u"1")]
+
+
+def test_optimize_any_query_when_every_group_contradictory_raises_unsatisfiable_error():
+    contradictory = create_filter_group(
+        [
+            create_query_filter(u"fileName", u"IS", u"a"),
+            create_query_filter(u"fileName", u"IS_NOT", u"a"),
+        ],
+        u"AND",
+    )
+    with pytest.raises(Py42UnsatisfiableQueryError):
+        FileEventQuery.any(contradictory).optimize()
+
+
+def test_optimize_alert_query_keeps_alert_query_settings():
+    query = AlertQuery.any(Severity.eq(Severity.HIGH), Severity.eq(Severity.LOW))
+    optimized = query.optimize()
+    assert isinstance(optimized, AlertQuery)
+    assert optimized.sort_key == u"CreatedAt"
+    assert optimized._filter_group_list == [
+        Severity.is_in([Severity.HIGH, Severity.LOW])
+    ]
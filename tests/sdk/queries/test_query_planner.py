@@ -0,0 +1,85 @@
+import pytest
+
+from py42.exceptions import Py42Error
+from py42.sdk.queries.alerts.alert_query import AlertQuery
+from py42.sdk.queries.alerts.filters.alert_filter import Actor
+from py42.sdk.queries.fileevents.file_event_query import FileEventQuery
+from py42.sdk.queries.fileevents.filters.file_filter import FileName
+from py42.sdk.queries.fileevents.filters.file_filter import SHA256
+from py42.sdk.queries.query_planner import plan_queries
+
+
+def _get_values(group):
+    return sorted(f.value for f in group.filter_list)
+
+
+def test_plan_queries_when_groups_are_small_returns_query_unchanged():
+    query = FileEventQuery.all(SHA256.is_in(["a", "b"]), FileName.eq("test.txt"))
+    plan = plan_queries(query, max_values=2)
+    assert [str(q) for q in plan.queries] == [str(query)]
+    assert plan.excluded_values == {}
+
+
+def test_plan_queries_splits_oversized_is_in_group_into_queries():
+    query = FileEventQuery.all(SHA256.is_in(["a", "b", "c"]), FileName.eq("test.txt"))
+    query.page_size = 50
+    query.sort_key = "eventTimestamp"
+    plan = plan_queries(query, max_values=2)
+    assert len(plan.queries) == 2
+    assert [_get_values(q._filter_group_list[0]) for q in plan.queries] == [
+        ["a", "b"],
+        ["c"],
+    ]
+    for planned in plan.queries:
+        assert str(planned._filter_group_list[1]) == str(FileName.eq("test.txt"))
+        assert planned.page_size == 50
+        assert planned.sort_key == "eventTimestamp"
+
+
+def test_plan_queries_does_not_change_original_query():
+    query = FileEventQuery.all(SHA256.is_in(["a", "b", "c"]))
+    expected = str(query)
+    plan = plan_queries(query, max_values=2)
+    plan.queries[0].page_number = 5
+    assert str(query) == expected
+
+
+def test_plan_queries_with_two_oversized_is_in_groups_returns_every_combination():
+    query = AlertQuery.all(Actor.is_in(["a", "b", "c"]), Actor.is_in(["d", "e", "f"]))
+    plan = plan_queries(query, max_values=2)
+    assert len(plan.queries) == 4
+
+
+def test_plan_queries_when_combinations_exceed_max_queries_raises_py42_error():
+    values = ["a", "b", "c", "d", "e"]
+    query = AlertQuery.all(Actor.is_in(values), Actor.is_in(values))
+    assert len(plan_queries(query, max_values=2, max_queries=9).queries) == 9
+    with pytest.raises(Py42Error):
+        plan_queries(query, max_values=2, max_queries=8)
+
+
+def test_plan_queries_when_any_query_chunks_exceed_max_queries_raises_py42_error():
+    query = FileEventQuery.any(SHA256.is_in(["a", "b", "c", "d", "e"]))
+    with pytest.raises(Py42Error):
+        plan_queries(query, max_values=2, max_queries=2)
+
+
+def test_plan_queries_with_oversized_not_in_group_returns_excluded_values():
+    query = FileEventQuery.all(FileName.not_in(["a", "b", "c"]))
+    plan = plan_queries(query, max_values=2)
+    assert len(plan.queries) == 1
+    assert len(plan.queries[0]._filter_group_list[0].filter_list) == 2
+    assert plan.excluded_values == {"fileName": {"c"}}
+
+
+def test_plan_queries_with_any_query_searches_each_chunk_separately():
+    query = FileEventQuery.any(SHA256.is_in(["a", "b", "c"]), FileName.eq("test.txt"))
+    plan = plan_queries(query, max_values=2)
+    groups = [[_get_values(g) for g in q._filter_group_list] for q in plan.queries]
+    assert groups == [[["test.txt"]], [["a", "b"]], [["c"]]]
+
+
+def test_plan_queries_with_any_query_and_oversized_not_in_group_raises_py42_error():
+    query = FileEventQuery.any(FileName.not_in(["a", "b", "c"]))
+    with pytest.raises(Py42Error):
+        plan_queries(query, max_values=2)
@@ -0,0 +1,86 @@
+import json
+import random
+
+import pytest
+
+from py42._compat import str
+from py42.sdk.queries.alerts.alert_query import AlertQuery
+from py42.sdk.queries.fileevents.file_event_query import FileEventQuery
+from py42.sdk.queries.query_filter import create_filter_group
+from py42.sdk.queries.query_filter import create_query_filter
+from py42.sdk.queries.query_serializer import serialize_filter
+from py42.sdk.queries.query_serializer import serialize_filter_group
+
+_FUZZ_CHARACTERS = u'abcXYZ019 "\\/\b\f\n\r\t\x00\x1f\x7f\u00e9\u2028\u4e2d\U0001f600{}[]:,'
+
+
+def _random_text(rng):
+    return u"".join(rng.choice(_FUZZ_CHARACTERS) for _ in range(rng.randint(0, 12)))
+
+
+def _random_filter(rng):
+    value = None if rng.random() < 0.1 else _random_text(rng)
+    return create_query_filter(_random_text(rng), _random_text(rng), value)
+
+
+def _random_group(rng):
+    filters = [_random_filter(rng) for _ in range(rng.randint(1, 6))]
+    return create_filter_group(filters, rng.choice([u"AND", u"OR", _random_text(rng)]))
+
+
+def test_serialize_filter_escapes_quotes_and_backslashes():
+    serialized = serialize_filter(u'te"rm', u"IS", u'C:\\Users\\"test"')
+    assert serialized == (
+        u'{"operator":"IS", "term":"te\\"rm", "value":"C:\\\\Users\\\\\\"test\\""}'
+    )
+    assert json.loads(serialized)[u"value"] == u'C:\\Users\\"test"'
+
+
+def test_serialize_filter_escapes_control_characters():
+    serialized = serialize_filter(u"term", u"IS", u"line1\nline2\ttab\x01")
+    assert json.loads(serialized)[u"value"] == u"line1\nline2\ttab\x01"
+
+
+def test_serialize_filter_keeps_non_ascii_characters():
+    assert serialize_filter(u"term", u"IS", u"caf\u00e9") == (
+        u'{"operator":"IS", "term":"term", "value":"caf\u00e9"}'
+    )
+
+
+def test_serialize_filter_when_value_is_none_serializes_null():
+    assert serialize_filter(u"term", u"EXISTS", None) == (
+        u'{"operator":"EXISTS", "term":"term", "value":null}'
+    )
+
+
+def test_serialize_filter_when_value_is_not_str_serializes_str_of_value():
+    assert serialize_filter(u"fileSize", u"GREATER_THAN", 2048) == (
+        u'{"operator":"GREATER_THAN", "term":"fileSize", "value":"2048"}'
+    )
+
+
+def test_serialize_filter_group_when_no_filters_serializes_empty_list():
+    assert serialize_filter_group(u"AND", []) == u'{"filterClause":"AND", "filters":[]}'
+
+
+def test_file_event_query_str_when_value_has_quote_is_valid_json():
+    query = FileEventQuery.all(
+        create_filter_group([create_query_filter(u"fileName", u"IS", u'a"b')], u"OR")
+    )
+    query_dict = json.loads(str(query))
+    assert query_dict[u"groups"][0][u"filters"][0][u"value"] == u'a"b'
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_query_str_round_trips_random_filters(seed):
+    rng = random.Random(seed)
+    groups = [_random_group(rng) for _ in range(rng.randint(0, 5))]
+    for query_class in (FileEventQuery, AlertQuery):
+        query = query_class(*groups, group_clause=rng.choice([u"AND", u"OR"]))
+        query.sort_key = _random_text(rng)
+        query.sort_direction = _random_text(rng)
+        assert json.loads(str(query)) == dict(query)
+        for group in groups:
+            assert json.loads(str(group)) == dict(group)
+            for query_filter in group.filter_list:
+                assert json.loads(str(query_filter)) == dict(query_filter)
@@ -0,0 +1,159 @@
+import hashlib
+
+import pytest
+import requests
+from requests.exceptions import ChunkedEncodingError
+
+from py42.exceptions import Py42ChecksumMismatchError
+from py42.exceptions import Py42Error
+from py42.response import Py42Response
+from py42.services.storage._download import download_to
+
+CONTENT = b"0123456789abcdefghij"
+
+
+def _create_stream_response(mocker, chunks, status_code=200, headers=None):
+    response = mocker.MagicMock(spec=Py42Response)
+    response.status_code = status_code
+    response.headers = headers or {}
+
+    def iter_content_into(buffer=None):
+        for chunk in chunks:
+            if isinstance(chunk, Exception):
+                raise chunk
+            buffer[: len(chunk)] = chunk
+            yield memoryview(buffer)[: len(chunk)]
+
+    response.iter_content_into.side_effect = iter_content_into
+    return response
+
+
+class TestDownloadTo(object):
+    @pytest.fixture
+    def save_as(self, tmpdir):
+        return str(tmpdir.join("download.bin"))
+
+    def read(self, path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    def test_download_to_writes_all_chunks_to_path(self, mocker, save_as):
+        response = _create_stream_response(mocker, [CONTENT[:10], CONTENT[10:]])
+        stream_func = mocker.MagicMock(return_value=response)
+        result = download_to(stream_func, save_as)
+        assert self.read(save_as) == CONTENT
+        assert result.path == save_as
+        assert result.size == len(CONTENT)
+        stream_func.assert_called_once_with(None)
+
+    def test_download_to_reads_into_buffer_of_given_chunk_size(self, mocker, save_as):
+        response = _create_stream_response(mocker, [CONTENT])
+        download_to(mocker.MagicMock(return_value=response), save_as, chunk_size=42)
+        buffer = response.iter_content_into.call_args[0][0]
+        assert len(buffer) == 42
+
+    def test_download_to_when_connection_drops_and_server_accepts_ranges_resumes_with_range_header(
+        self, mocker, save_as
+    ):
+        first = _create_stream_response(
+            mocker,
+            [CONTENT[:10], ChunkedEncodingError("dropped")],
+            headers={"Accept-Ranges": "bytes", "Content-Length": "20"},
+        )
+        second = _create_stream_response(
+            mocker,
+            [CONTENT[10:]],
+            status_code=206,
+            headers={"Content-Range": "bytes 10-19/20"},
+        )
+        stream_func = mocker.MagicMock(side_effect=[first, second])
+        download_to(stream_func, save_as, sha256=hashlib.sha256(CONTENT).hexdigest())
+        assert self.read(save_as) == CONTENT
+        stream_func.assert_called_with({"Range": "bytes=10-"})
+
+    def test_download_to_when_connection_drops_and_server_does_not_accept_ranges_starts_over(
+        self, mocker, save_as
+    ):
+        first = _create_stream_response(
+            mocker, [CONTENT[:10], ChunkedEncodingError("dropped")]
+        )
+        second = _create_stream_response(mocker, [CONTENT])
+        stream_func = mocker.MagicMock(side_effect=[first, second])
+        download_to(stream_func, save_as, md5=hashlib.md5(CONTENT).hexdigest())
+        assert self.read(save_as) == CONTENT
+        stream_func.assert_called_with(None)
+
+    def test_download_to_when_server_ignores_range_starts_over(self, mocker, save_as):
+        first = _create_stream_response(
+            mocker,
+            [CONTENT[:10], ChunkedEncodingError("dropped")],
+            headers={"Accept-Ranges": "bytes"},
+        )
+        second = _create_stream_response(mocker, [CONTENT], status_code=200)
+        stream_func = mocker.MagicMock(side_effect=[first, second])
+        download_to(stream_func, save_as, md5=hashlib.md5(CONTENT).hexdigest())
+        assert self.read(save_as) == CONTENT
+
+    def test_download_to_when_retries_exhausted_raises_py42_error(
+        self, mocker, save_as
+    ):
+        responses = [
+            _create_stream_response(mocker, [ChunkedEncodingError("dropped")])
+            for _ in range(3)
+        ]
+        stream_func = mocker.MagicMock(side_effect=responses)
+        with pytest.raises(Py42Error):
+            download_to(stream_func, save_as, max_retries=2)
+        assert stream_func.call_count == 3
+
+    def test_download_to_when_checksum_does_not_match_raises_checksum_mismatch_error(
+        self, mocker, save_as
+    ):
+        response = _create_stream_response(mocker, [CONTENT])
+        with pytest.raises(Py42ChecksumMismatchError) as err:
+            download_to(mocker.MagicMock(return_value=response), save_as, md5="abc")
+        assert err.value.path == save_as
+
+    def test_download_to_calls_progress_callback_with_bytes_written_and_total(
+        self, mocker, save_as
+    ):
+        response = _create_stream_response(
+            mocker, [CONTENT[:10], CONTENT[10:]], headers={"Content-Length": "20"}
+        )
+        callback = mocker.MagicMock()
+        download_to(
+            mocker.MagicMock(return_value=response),
+            save_as,
+            progress_callback=callback,
+        )
+        calls = callback.call_args_list
+        assert [c[0][:2] for c in calls] == [(10, 20), (20, 20)]
+
+    def test_download_to_when_server_closes_socket_early_resumes_from_last_byte(
+        self, socket_server, save_as
+    ):
+        content = CONTENT * 50
+
+        def respond_partially(conn, request):
+            head = "HTTP/1.1 200 OK\r\nAccept-Ranges: bytes\r\nContent-Length: {}\r\n\r\n"
+            conn.sendall(head.format(len(content)).encode() + content[:100])
+            conn.close()
+
+        def respond_with_rest(conn, request):
+            head = (
+                "HTTP/1.1 206 Partial Content\r\nAccept-Ranges: bytes\r\n"
+                "Content-Length: {}\r\n\r\n"
+            )
+            conn.sendall(head.format(len(content) - 100).encode() + content[100:])
+            conn.close()
+
+        server = socket_server(respond_partially, respond_with_rest)
+
+        def stream(headers):
+            return Py42Response(requests.get(server.url, headers=headers, stream=True))
+
+        result = download_to(stream, save_as, chunk_size=64)
+
+        assert self.read(save_as) == content
+        assert result.size == len(content)
+        assert b"Range: bytes=100-" in server.requests[1]
@@ -58,3 +58,32 @@ class TestStoragePreservationDataService(object):
             params={"PDSDownloadToken": "token"},
             stream=True,
         )
+
+    def test_get_file_merges_given_headers(
+        self, mock_successful_connection, mock_request
+    ):
+        mock_successful_connection.host_address = "https://host.com"
+        service = StoragePreservationDataService(
+            mock_successful_connection, mock_successful_connection
+        )
+        service.get_file("token", headers={"Range": "bytes=10-"})
+        mock_successful_connection.get.assert_called_once_with(
+            "https://host.com/c42api/v3/GetFile",
+            headers={"Accept": "*/*", "Range": "bytes=10-"},
+            params={"PDSDownloadToken": "token"},
+            stream=True,
+        )
+
+    def test_download_file_calls_download_to_with_expected_params(
+        self, mocker, mock_successful_connection
+    ):
+        download_to = mocker.patch(
+            "py42.services.storage.preservationdata.download_to"
+        )
+        service = StoragePreservationDataService(
+            mock_successful_connection, mock_successful_connection
+        )
+        service.download_file("abc", "fabc", 1223, "path", md5="md5", sha256="sha")
+        download_to.assert_called_once_with(
+            mocker.ANY, "path", md5="md5", sha256="sha", progress_callback=None
+        )
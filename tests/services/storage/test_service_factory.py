@@ -89,6 +89,25 @@ class TestStorageServiceFactory(object):
         service = factory.create_preservation_data_service("testhost.com")
         assert type(service) == StoragePreservationDataService
 
+    def test_preservation_data_service_with_same_host_returns_same_service(
+        self, mock_successful_connection, mock_device_service, mock_connection_manager
+    ):
+        factory = StorageServiceFactory(
+            mock_successful_connection, mock_device_service, mock_connection_manager
+        )
+        service = factory.create_preservation_data_service("https://testhost.com")
+        assert factory.create_preservation_data_service("https://TESTHOST.com") is service
+        assert mock_successful_connection.clone.call_count == 1
+
+    def test_preservation_data_service_with_different_hosts_returns_different_services(
+        self, mock_successful_connection, mock_device_service, mock_connection_manager
+    ):
+        factory = StorageServiceFactory(
+            mock_successful_connection, mock_device_service, mock_connection_manager
+        )
+        service = factory.create_preservation_data_service("https://host-1.com")
+        assert factory.create_preservation_data_service("https://host-2.com") is not service
+
 
 class TestStorageSessionManager(object):
     def test_get_storage_session_calls_session_factory_with_token_provider(
@@ -0,0 +1,161 @@
+import io
+import os
+import struct
+import zipfile
+import zlib
+
+import pytest
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+from urllib3 import HTTPResponse
+
+from py42.exceptions import Py42ChecksumMismatchError
+from py42.exceptions import Py42Error
+from py42.response import Py42Response
+from py42.services.storage._zipstream import extract_zip_stream
+
+TEXT_CONTENT = b"hello world " * 20000
+BINARY_CONTENT = bytes(bytearray(range(256))) * 4000
+
+
+def _create_streamed_response(body):
+    response = Response()
+    response.status_code = 200
+    response.headers = CaseInsensitiveDict()
+    response.raw = HTTPResponse(
+        body=io.BytesIO(body), preload_content=False, decode_content=False
+    )
+    return Py42Response(response)
+
+
+def _build_zip(entries, compression=zipfile.ZIP_DEFLATED):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression) as zf:
+        for name, content in entries:
+            zf.writestr(name, content)
+    return buffer.getvalue()
+
+
+def _build_streamed_zip(entries):
+    """Builds a zip the way streaming writers do: sizes and CRC follow each entry in a data
+    descriptor instead of being set in the local file header."""
+    body = b""
+    for name, content in entries:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+        compressed = compressor.compress(content) + compressor.flush()
+        name = name.encode("utf-8")
+        body += struct.pack(
+            "<IHHHHHIIIHH", 0x04034B50, 20, 0x08, 8, 0, 0, 0, 0, 0, len(name), 0
+        )
+        body += name + compressed
+        body += struct.pack(
+            "<IIII",
+            0x08074B50,
+            zlib.crc32(content) & 0xFFFFFFFF,
+            len(compressed),
+            len(content),
+        )
+    return body + struct.pack("<I", 0x06054B50)
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class TestExtractZipStream(object):
+    def test_extract_zip_stream_writes_each_entry_under_extract_to(self, tmpdir):
+        body = _build_zip([("a/b.txt", TEXT_CONTENT), ("c.bin", BINARY_CONTENT)])
+        extract_to = str(tmpdir)
+        entries = extract_zip_stream(
+            _create_streamed_response(body), extract_to=extract_to
+        )
+        assert [e.name for e in entries] == ["a/b.txt", "c.bin"]
+        assert _read(os.path.join(extract_to, "a", "b.txt")) == TEXT_CONTENT
+        assert _read(os.path.join(extract_to, "c.bin")) == BINARY_CONTENT
+        assert entries[0].size == len(TEXT_CONTENT)
+
+    def test_extract_zip_stream_extracts_stored_entries(self, tmpdir):
+        body = _build_zip([("c.bin", BINARY_CONTENT)], zipfile.ZIP_STORED)
+        extract_zip_stream(_create_streamed_response(body), extract_to=str(tmpdir))
+        assert _read(str(tmpdir.join("c.bin"))) == BINARY_CONTENT
+
+    def test_extract_zip_stream_extracts_entries_followed_by_data_descriptors(
+        self, tmpdir
+    ):
+        body = _build_streamed_zip(
+            [("first.txt", TEXT_CONTENT), ("second.bin", BINARY_CONTENT)]
+        )
+        entries = extract_zip_stream(
+            _create_streamed_response(body), extract_to=str(tmpdir)
+        )
+        assert len(entries) == 2
+        assert _read(str(tmpdir.join("first.txt"))) == TEXT_CONTENT
+        assert _read(str(tmpdir.join("second.bin"))) == BINARY_CONTENT
+
+    def test_extract_zip_stream_creates_directory_entries(self, tmpdir):
+        body = _build_zip([("empty/", b""), ("a.txt", b"a")])
+        entries = extract_zip_stream(
+            _create_streamed_response(body), extract_to=str(tmpdir)
+        )
+        assert tmpdir.join("empty").isdir()
+        assert [e.name for e in entries] == ["a.txt"]
+
+    def test_extract_zip_stream_when_given_entry_callback_hands_entries_to_callback(
+        self, tmpdir
+    ):
+        body = _build_streamed_zip([("a.txt", TEXT_CONTENT), ("b.txt", b"b")])
+        received = {}
+
+        def callback(name, content):
+            received[name] = b"".join(content)
+
+        entries = extract_zip_stream(
+            _create_streamed_response(body), entry_callback=callback
+        )
+        assert received == {"a.txt": TEXT_CONTENT, "b.txt": b"b"}
+        assert entries[0].path is None
+        assert not tmpdir.listdir()
+
+    def test_extract_zip_stream_when_callback_does_not_read_content_continues_with_next_entry(
+        self,
+    ):
+        body = _build_zip([("a.txt", TEXT_CONTENT), ("b.txt", b"b")])
+        names = []
+        extract_zip_stream(
+            _create_streamed_response(body),
+            entry_callback=lambda name, content: names.append(name),
+        )
+        assert names == ["a.txt", "b.txt"]
+
+    def test_extract_zip_stream_when_entry_path_escapes_extract_to_raises_py42_error(
+        self, tmpdir
+    ):
+        body = _build_zip([("../evil.txt", b"evil")])
+        with pytest.raises(Py42Error):
+            extract_zip_stream(
+                _create_streamed_response(body), extract_to=str(tmpdir)
+            )
+
+    def test_extract_zip_stream_when_crc_does_not_match_raises_checksum_mismatch_error(
+        self, tmpdir
+    ):
+        body = bytearray(_build_zip([("a.txt", b"abcdef")], zipfile.ZIP_STORED))
+        # corrupt the stored content, which directly follows the 30 byte header and name
+        body[30 + len("a.txt")] ^= 0xFF
+        with pytest.raises(Py42ChecksumMismatchError):
+            extract_zip_stream(
+                _create_streamed_response(bytes(body)), extract_to=str(tmpdir)
+            )
+
+    def test_extract_zip_stream_when_not_a_zip_raises_py42_error(self, tmpdir):
+        with pytest.raises(Py42Error):
+            extract_zip_stream(
+                _create_streamed_response(b"not a zip file"), extract_to=str(tmpdir)
+            )
+
+    def test_extract_zip_stream_without_extract_to_or_callback_raises_py42_error(
+        self,
+    ):
+        with pytest.raises(Py42Error):
+            extract_zip_stream(_create_streamed_response(b""))
@@ -1,7 +1,11 @@
 import json
 
 import pytest
+from requests import HTTPError
+from requests import Response
 
+from py42.exceptions import Py42InternalServerError
+from py42.exceptions import Py42InvalidRuleOperationError
 from py42.services.alertrules import AlertRulesService
 from py42.services.detectionlists.user_profile import DetectionListUserService
 
@@ -81,3 +85,103 @@ class TestAlertRulesService(object):
             posted_data["tenantId"] == user_context.get_current_tenant_id()
             and posted_data["ruleId"] == u"rule-id"
         )
+
+    def test_add_users_fetches_each_profile_once_and_posts_users_in_batches(
+        self, mock_connection, user_context, mock_detection_list_user_service
+    ):
+        alert_rule_service = AlertRulesService(
+            mock_connection, user_context, mock_detection_list_user_service
+        )
+        user_ids = [u"user-{}".format(i) for i in range(5)] + [u"user-0"]
+        results = alert_rule_service.add_users(u"rule-id", user_ids, batch_size=2)
+
+        assert mock_detection_list_user_service.get_by_id.call_count == 5
+        assert mock_connection.post.call_count == 3
+        posted_ids = []
+        for call in mock_connection.post.call_args_list:
+            assert call[0][0] == "/svc/api/v1/Rules/add-users"
+            posted_data = call[1]["json"]
+            assert posted_data["ruleId"] == u"rule-id"
+            assert len(posted_data["userList"]) <= 2
+            for user in posted_data["userList"]:
+                assert user["userAliasList"] == [u"user.aliases@code42.com"]
+                posted_ids.append(user["userIdFromAuthority"])
+        assert sorted(posted_ids) == sorted(user_ids[:5])
+        assert sorted(i for r in results for i in r.user_ids) == sorted(user_ids[:5])
+        assert all(r.error is None for r in results)
+
+    def test_add_users_reports_users_whose_profile_could_not_be_fetched(
+        self, mock_connection, user_context, mock_detection_list_user_service
+    ):
+        profile = mock_detection_list_user_service.get_by_id.return_value
+        error = Exception("not found")
+
+        def get_by_id(user_id):
+            if user_id == u"missing":
+                raise error
+            return profile
+
+        mock_detection_list_user_service.get_by_id.side_effect = get_by_id
+        alert_rule_service = AlertRulesService(
+            mock_connection, user_context, mock_detection_list_user_service
+        )
+        results = alert_rule_service.add_users(u"rule-id", [u"user-id", u"missing"])
+
+        assert (([u"missing"], error)) in results
+        assert ([u"user-id"], None) in results
+        posted_data = mock_connection.post.call_args[1]["json"]
+        assert [u["userIdFromAuthority"] for u in posted_data["userList"]] == [
+            u"user-id"
+        ]
+
+    def test_remove_users_posts_user_ids_in_batches(
+        self, mock_connection, user_context, mock_detection_list_user_service
+    ):
+        alert_rule_service = AlertRulesService(
+            mock_connection, user_context, mock_detection_list_user_service
+        )
+        user_ids = [u"user-{}".format(i) for i in range(5)]
+        results = alert_rule_service.remove_users(
+            u"rule-id", user_ids, batch_size=2, max_workers=1
+        )
+
+        assert mock_connection.post.call_count == 3
+        posted = [
+            call[1]["json"]["userIdList"] for call in mock_connection.post.call_args_list
+        ]
+        assert posted == [user_ids[0:2], user_ids[2:4], user_ids[4:]]
+        assert mock_connection.post.call_args[0][0] == "/svc/api/v1/Rules/remove-users"
+        assert [r.user_ids for r in results] == posted
+        assert not mock_detection_list_user_service.get_by_id.called
+
+    def test_remove_users_when_check_error_raises_invalid_rule_operation_error_stops(
+        self, mocker, mock_connection, user_context, mock_detection_list_user_service
+    ):
+        base_err = mocker.MagicMock(spec=HTTPError)
+        base_err.response = mocker.MagicMock(spec=Response)
+        mock_connection.post.side_effect = Py42InternalServerError(base_err)
+
+        def check_error(error):
+            raise Py42InvalidRuleOperationError(
+                base_err, u"rule-id", u"DepartingEmployee"
+            )
+
+        alert_rule_service = AlertRulesService(
+            mock_connection, user_context, mock_detection_list_user_service
+        )
+        user_ids = [u"user-{}".format(i) for i in range(40)]
+        with pytest.raises(Py42InvalidRuleOperationError):
+            alert_rule_service.remove_users(
+                u"rule-id",
+                user_ids,
+                batch_size=2,
+                max_workers=1,
+                check_error=check_error,
+            )
+
+        # the failed batch is not split, and the rest are not sent
+        posted = [
+            call[1]["json"]["userIdList"] for call in mock_connection.post.call_args_list
+        ]
+        assert all(len(batch) == 2 for batch in posted)
+        assert len(posted) < 5
@@ -1,14 +1,19 @@
 import json
+import time
+from datetime import datetime
 
 import pytest
 from requests import Response
 from tests.conftest import TENANT_ID_FROM_RESPONSE
 
+from py42.exceptions import Py42Error
 from py42.response import Py42Response
 from py42.sdk.queries.alerts.alert_query import AlertQuery
+from py42.sdk.queries.alerts.filters import Actor
 from py42.sdk.queries.alerts.filters import AlertState
 from py42.services._connection import Connection
 from py42.services.alerts import AlertService
+from py42.services.alerts import RuleMetadataIndex
 
 TEST_RESPONSE = """
 {"type$": "RULE_METADATA_SEARCH_RESPONSE",
@@ -65,6 +70,49 @@ def mock_get_all_session(mocker, py42_response):
     return connection
 
 
+def _parse_time(value):
+    # both query timestamps and the seven-digit fractions of createdAt
+    return datetime.strptime(value.rstrip("Z")[:26], "%Y-%m-%dT%H:%M:%S.%f")
+
+
+def _create_alerts(count):
+    return [
+        {
+            "id": "alert-{:02d}".format(i),
+            "createdAt": "2020-01-01T00:{:02d}:00.{:07d}Z".format(i, i * 1000 + 500),
+        }
+        for i in range(count)
+    ]
+
+
+def _create_alert_search(mocker, alerts, requests):
+    """Returns a mock ``post`` that pages through ``alerts`` like the alert search."""
+
+    def post(uri, data=None):
+        query = json.loads(data)
+        requests.append(query)
+        matches = list(alerts)
+        for group in query["groups"]:
+            for f in group["filters"]:
+                if f["term"] != "createdAt":
+                    continue
+                bound = _parse_time(f["value"])
+                if f["operator"] == "ON_OR_AFTER":
+                    matches = [a for a in matches if _parse_time(a["createdAt"]) >= bound]
+                else:
+                    matches = [a for a in matches if _parse_time(a["createdAt"]) <= bound]
+        sort_key = query["srtKey"]
+        sort_key = "createdAt" if sort_key == "CreatedAt" else sort_key
+        matches.sort(key=lambda a: a[sort_key], reverse=query["srtDirection"] == "desc")
+        start = query["pgNum"] * query["pgSize"]
+        page = matches[slice(start, start + query["pgSize"])]
+        response = mocker.MagicMock(spec=Response)
+        response.text = json.dumps({"alerts": page, "totalCount": len(matches)})
+        return Py42Response(response)
+
+    return post
+
+
 class TestAlertService(object):
     @pytest.fixture
     def successful_post(self, mock_connection, successful_response):
@@ -100,6 +148,123 @@ class TestAlertService(object):
         alert_service.search(query)
         assert mock_connection.post.call_args[0][0] == u"/svc/api/v1/query-alerts"
 
+    def test_search_chunked_splits_is_in_values_and_dedupes_alerts_by_id(
+        self, mocker, mock_connection, user_context
+    ):
+        def post(uri, data=None):
+            query = json.loads(data)
+            actors = [f["value"] for f in query["groups"][0]["filters"]]
+            alerts = [{"id": "shared", "createdAt": "2020-01-01"}] + [
+                {"id": actor, "actor": actor, "createdAt": "2020-01-0{}".format(actor)}
+                for actor in actors
+            ]
+            alerts.sort(key=lambda a: a["createdAt"], reverse=True)
+            response = mocker.MagicMock(spec=Response)
+            response.text = json.dumps({"alerts": alerts, "totalCount": len(alerts)})
+            return Py42Response(response)
+
+        mock_connection.post.side_effect = post
+        alert_service = AlertService(mock_connection, user_context)
+        query = AlertQuery(Actor.is_in(["2", "3", "4", "5", "6"]))
+
+        alerts = list(alert_service.search_chunked(query, max_values=2))
+
+        assert mock_connection.post.call_count == 3
+        assert [a["id"] for a in alerts] == ["6", "5", "4", "3", "2", "shared"]
+
+    def test_search_all_pages_through_every_alert(
+        self, mocker, mock_connection, user_context
+    ):
+        alerts = _create_alerts(11)
+        requests = []
+        mock_connection.post.side_effect = _create_alert_search(
+            mocker, alerts, requests
+        )
+        alert_service = AlertService(mock_connection, user_context)
+        query = AlertQuery(AlertState.eq("OPEN"))
+        query.page_size = 3
+
+        results = list(alert_service.search_all(query, max_workers=2))
+
+        assert [a["id"] for a in results] == [a["id"] for a in reversed(alerts)]
+        assert sorted(r["pgNum"] for r in requests) == [0, 1, 2, 3]
+        assert query.page_number == 0
+
+    def test_search_all_when_too_many_alerts_splits_into_created_at_windows(
+        self, mocker, mock_connection, user_context
+    ):
+        alerts = _create_alerts(23)
+        requests = []
+        mock_connection.post.side_effect = _create_alert_search(
+            mocker, alerts, requests
+        )
+        alert_service = AlertService(mock_connection, user_context)
+        query = AlertQuery(AlertState.eq("OPEN"))
+        query.page_size = 2
+
+        results = list(alert_service.search_all(query, max_results=5))
+
+        assert [a["id"] for a in results] == [a["id"] for a in reversed(alerts)]
+        assert all(r["pgNum"] * r["pgSize"] < 5 for r in requests)
+        filters = [f for r in requests for g in r["groups"] for f in g["filters"]]
+        assert any(f["term"] == "createdAt" for f in filters)
+
+    @pytest.mark.parametrize("spread_ms", [1, 2])
+    def test_search_all_when_too_many_alerts_within_milliseconds_pages_through_window(
+        self, mocker, mock_connection, user_context, spread_ms
+    ):
+        alerts = [
+            {
+                "id": "alert-{:02d}".format(i),
+                "createdAt": "2020-01-01T00:00:00.{:07d}Z".format(
+                    i % (spread_ms + 1) * 10000
+                ),
+            }
+            for i in range(9)
+        ]
+        requests = []
+        search = _create_alert_search(mocker, alerts, requests)
+
+        def post(uri, data=None):
+            # fails rather than hangs if the windows keep being split
+            assert len(requests) < 50
+            return search(uri, data=data)
+
+        mock_connection.post.side_effect = post
+        alert_service = AlertService(mock_connection, user_context)
+        query = AlertQuery(AlertState.eq("OPEN"))
+        query.page_size = 2
+
+        results = list(alert_service.search_all(query, max_results=2))
+
+        assert sorted(a["id"] for a in results) == [a["id"] for a in alerts]
+
+    def test_search_all_when_split_and_not_sorted_by_created_at_merges_windows(
+        self, mocker, mock_connection, user_context
+    ):
+        alerts = _create_alerts(12)
+        mock_connection.post.side_effect = _create_alert_search(mocker, alerts, [])
+        alert_service = AlertService(mock_connection, user_context)
+        query = AlertQuery(AlertState.eq("OPEN"))
+        query.sort_key = "id"
+        query.sort_direction = "asc"
+
+        results = list(alert_service.search_all(query, max_results=4))
+
+        assert [a["id"] for a in results] == [a["id"] for a in alerts]
+
+    def test_search_all_when_too_many_alerts_and_groups_joined_with_or_raises_error(
+        self, mocker, mock_connection, user_context
+    ):
+        mock_connection.post.side_effect = _create_alert_search(
+            mocker, _create_alerts(6), []
+        )
+        alert_service = AlertService(mock_connection, user_context)
+        query = AlertQuery.any(AlertState.eq("OPEN"), Actor.eq("test@example.com"))
+
+        with pytest.raises(Py42Error):
+            list(alert_service.search_all(query, max_results=2))
+
     def test_get_details_when_not_given_tenant_id_posts_expected_data(
         self, mock_connection, user_context, py42_response
     ):
@@ -182,6 +347,115 @@ class TestAlertService(object):
         expected_observation_data = '{"invalid_json": ][ }'
         assert observation_data == expected_observation_data
 
+    def test_get_details_when_not_parsing_observations_leaves_data_as_str(
+        self, mocker, mock_connection, user_context
+    ):
+        requests_response = mocker.MagicMock(spec=Response)
+        requests_response.text = TEST_PARSEABLE_ALERT_DETAIL_RESPONSE
+        mock_connection.post.return_value = Py42Response(requests_response)
+        alert_service = AlertService(mock_connection, user_context)
+        response = alert_service.get_details("alert_id", parse_observations=False)
+        observation_data = response["alerts"][0]["observations"][0]["data"]
+        assert json.loads(observation_data)["example_key"] == "example_string_value"
+
+    def test_get_details_chunked_requests_unique_ids_in_batches(
+        self, mocker, mock_connection, user_context
+    ):
+        def post(uri, **kwargs):
+            alerts = [
+                {"id": alert_id, "observations": [{"data": '{"key": "value"}'}]}
+                for alert_id in kwargs["json"]["alertIds"]
+            ]
+            response = mocker.MagicMock(spec=Response)
+            response.text = json.dumps({"alerts": alerts})
+            return Py42Response(response)
+
+        mock_connection.post.side_effect = post
+        alert_service = AlertService(mock_connection, user_context)
+        alert_ids = ["ALERT_{}".format(i) for i in range(7)] + ["ALERT_0"]
+
+        alerts = list(alert_service.get_details_chunked(alert_ids, batch_size=3))
+
+        assert sorted(a["id"] for a in alerts) == sorted(set(alert_ids))
+        assert mock_connection.post.call_count == 3
+        batches = [c[1]["json"]["alertIds"] for c in mock_connection.post.call_args_list]
+        assert sorted(len(b) for b in batches) == [1, 3, 3]
+        assert all(a["observations"][0]["data"] == {"key": "value"} for a in alerts)
+
+    @pytest.mark.parametrize(
+        "alert_ids, expected",
+        [
+            ("ALERT_1", ["ALERT_1"]),
+            ({"ALERT_1", "ALERT_2"}, ["ALERT_1", "ALERT_2"]),
+            ((a for a in ["ALERT_1", "ALERT_2", "ALERT_1"]), ["ALERT_1", "ALERT_2"]),
+        ],
+    )
+    def test_get_details_chunked_accepts_single_id_or_any_iterable(
+        self, mock_connection, user_context, successful_response, alert_ids, expected
+    ):
+        successful_response.text = '{"alerts": []}'
+        mock_connection.post.return_value = Py42Response(successful_response)
+        alert_service = AlertService(mock_connection, user_context)
+
+        list(alert_service.get_details_chunked(alert_ids))
+
+        posted_ids = mock_connection.post.call_args[1]["json"]["alertIds"]
+        assert sorted(posted_ids) == expected
+
+    def test_get_details_chunked_when_batch_fails_raises_error(
+        self, mock_connection, user_context
+    ):
+        mock_connection.post.side_effect = Py42Error("failed")
+        alert_service = AlertService(mock_connection, user_context)
+        with pytest.raises(Py42Error):
+            list(alert_service.get_details_chunked(["ALERT_1", "ALERT_2"]))
+
+    @pytest.mark.parametrize(
+        "alert_ids, expected",
+        [
+            ("A", ["A"]),
+            ({"A", "B"}, ["A", "B"]),
+            ((a for a in ["A", "B", "A"]), ["A", "B"]),
+        ],
+    )
+    def test_bulk_update_state_accepts_single_id_or_any_iterable(
+        self, mock_connection, user_context, successful_response, alert_ids, expected
+    ):
+        mock_connection.post.return_value = successful_response
+        alert_service = AlertService(mock_connection, user_context)
+
+        results = alert_service.bulk_update_state("RESOLVED", alert_ids)
+
+        posted_ids = mock_connection.post.call_args[1]["json"]["alertIds"]
+        assert sorted(posted_ids) == expected
+        assert [sorted(r.alert_ids) for r in results] == [expected]
+
+    def test_bulk_update_state_reports_failed_ids_after_splitting_failed_batch(
+        self, mocker, mock_connection, user_context, successful_response
+    ):
+        def post(uri, **kwargs):
+            if "BAD" in kwargs["json"]["alertIds"]:
+                raise Py42Error("bad alert")
+            return successful_response
+
+        mock_connection.post.side_effect = post
+        alert_service = AlertService(mock_connection, user_context)
+        alert_ids = ["A", "B", "C", "BAD", "E", "A"]
+
+        results = alert_service.bulk_update_state(
+            "RESOLVED", alert_ids, note="stale", batch_size=4
+        )
+
+        succeeded = sorted(i for r in results if r.error is None for i in r.alert_ids)
+        failed = [r for r in results if r.error is not None]
+        assert succeeded == ["A", "B", "E"]
+        assert [r.alert_ids for r in failed] == [["C", "BAD"]]
+        assert isinstance(failed[0].error, Py42Error)
+        posted = [c[1]["json"] for c in mock_connection.post.call_args_list]
+        assert all(p["state"] == "RESOLVED" and p["note"] == "stale" for p in posted)
+        # the failed batch of four and its two halves, and the batch of one
+        assert len(posted) == 4
+
     def test_update_state_when_not_given_tenant_id_posts_expected_data(
         self, mock_connection, user_context, successful_post
     ):
@@ -354,3 +628,69 @@ class TestAlertService(object):
         mock_connection.post.assert_called_once_with(
             "/svc/api/v1/rules/query-rule-metadata", json=data
         )
+
+
+def _create_rule(number, name=None):
+    return {
+        "id": "rule-{}".format(number),
+        "observerRuleId": "observer-{}".format(number),
+        "name": name or "Rule {}".format(number),
+    }
+
+
+@pytest.fixture
+def mock_rules_alert_service(mocker):
+    service = mocker.MagicMock(spec=AlertService)
+    service.rules = [_create_rule(1), _create_rule(2, "Shared"), _create_rule(3, "shared")]
+    service.get_all_rules.side_effect = lambda: iter(
+        [{"ruleMetadata": service.rules[:2]}, {"ruleMetadata": service.rules[2:]}]
+    )
+    return service
+
+
+class TestRuleMetadataIndex(object):
+    def test_looks_up_rules_by_observer_id_id_and_name(self, mock_rules_alert_service):
+        index = RuleMetadataIndex(mock_rules_alert_service)
+        assert index.get_by_observer_id("observer-1")["id"] == "rule-1"
+        assert index.get_by_id("rule-3")["observerRuleId"] == "observer-3"
+        assert [r["id"] for r in index.get_all_by_name("SHARED")] == ["rule-2", "rule-3"]
+        assert mock_rules_alert_service.get_all_rules.call_count == 1
+
+    def test_when_rule_missing_reloads_at_most_once_per_min_refresh_interval(
+        self, mock_rules_alert_service
+    ):
+        index = RuleMetadataIndex(mock_rules_alert_service, min_refresh_interval=60)
+        assert index.get_by_observer_id("observer-4") is None
+        assert index.get_all_by_name("missing") == []
+        assert mock_rules_alert_service.get_all_rules.call_count == 1
+
+    def test_when_rule_missing_and_index_older_than_interval_reloads(
+        self, mock_rules_alert_service
+    ):
+        index = RuleMetadataIndex(mock_rules_alert_service, min_refresh_interval=0)
+        index.get_by_id("rule-1")
+        mock_rules_alert_service.rules.append(_create_rule(4))
+        assert index.get_by_observer_id("observer-4")["id"] == "rule-4"
+        assert mock_rules_alert_service.get_all_rules.call_count == 2
+
+    def test_when_older_than_ttl_reloads_in_background(self, mock_rules_alert_service):
+        index = RuleMetadataIndex(mock_rules_alert_service, ttl=0)
+        index.get_by_id("rule-1")
+        mock_rules_alert_service.rules[0] = _create_rule(1, "Renamed")
+        # answered from the loaded rules while the reload runs
+        assert index.get_by_id("rule-1") is not None
+        for _ in range(100):
+            if index.get_all_by_name("renamed"):
+                break
+            time.sleep(0.01)
+        assert index.get_all_by_name("renamed")[0]["id"] == "rule-1"
+
+    def test_when_background_reload_fails_keeps_loaded_rules(
+        self, mock_rules_alert_service
+    ):
+        index = RuleMetadataIndex(mock_rules_alert_service, ttl=0)
+        index.get_by_id("rule-1")
+        mock_rules_alert_service.get_all_rules.side_effect = Py42Error("failed")
+        assert index.get_by_id("rule-1")["id"] == "rule-1"
+        time.sleep(0.05)
+        assert index.get_by_id("rule-2")["id"] == "rule-2"
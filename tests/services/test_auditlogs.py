@@ -1,7 +1,26 @@
+import io
+import json
 from datetime import datetime as dt
 
+import pytest
+from requests import Response
+
+from py42.exceptions import Py42Error
+from py42.response import Py42Response
 from py42.services.auditlogs import AuditLogsService
 
+CSV_HEADER = b"timestamp,actorName,type\n"
+
+
+def _create_text_responses(mocker, pages):
+    responses = []
+    for page in pages:
+        response = mocker.MagicMock(spec=Response)
+        response._content_consumed = True
+        response.content = page
+        responses.append(Py42Response(response))
+    return responses
+
 
 class TestAuditLogService(object):
     def test_get_all_calls_expected_uri_and_params(self, mock_connection):
@@ -359,3 +378,165 @@ class TestAuditLogService(object):
         mock_connection.post.assert_called_once_with(
             "/rpc/search/search-audit-log", json=expected_data, headers=None
         )
+
+    def test_get_all_in_time_windows_pages_each_window_and_yields_newest_first(
+        self, mocker, mock_connection
+    ):
+        requests = []
+
+        def post(uri, **kwargs):
+            data = kwargs["json"]
+            requests.append(data)
+            start = data["dateRange"]["startTime"]
+            page = data["page"]
+            # two full pages of one event followed by an empty page for each window
+            events = [{"window": start, "page": page}] if page < 2 else []
+            response = mocker.MagicMock(spec=Response)
+            response.text = json.dumps({"events": events})
+            return Py42Response(response)
+
+        mock_connection.post.side_effect = post
+        service = AuditLogsService(mock_connection)
+        events = list(
+            service.get_all_in_time_windows(
+                dt(2020, 1, 1),
+                dt(2020, 1, 2),
+                windows=4,
+                max_workers=2,
+                page_size=1,
+                event_types="test_type",
+            )
+        )
+
+        assert len(requests) == 12
+        starts = [event["window"] for event in events]
+        assert starts == sorted(starts, reverse=True)
+        assert len(set(starts)) == 4
+        assert [event["page"] for event in events[:2]] == [0, 1]
+        assert starts[0] == "2020-01-01T18:00:00.000Z"
+        last_window = [r for r in requests if r["dateRange"]["startTime"] == starts[0]]
+        assert last_window[0]["dateRange"]["endTime"] == "2020-01-02T00:00:00.000Z"
+        assert all(r["eventTypes"] == ["test_type"] for r in requests)
+
+    @pytest.mark.parametrize("end_inclusive", [True, False])
+    def test_get_all_in_time_windows_yields_events_on_window_bounds_once(
+        self, mocker, mock_connection, end_inclusive
+    ):
+        # one event each millisecond of the first 20 ms, newest first
+        timestamps = [
+            "2020-01-01T00:00:00.{:03d}Z".format(ms) for ms in reversed(range(20))
+        ]
+        server_events = [{"timestamp": t, "type$": "login"} for t in timestamps]
+
+        def post(uri, **kwargs):
+            data = kwargs["json"]
+            start = data["dateRange"]["startTime"]
+            end = data["dateRange"]["endTime"]
+            events = [
+                e
+                for e in server_events
+                if start <= e["timestamp"]
+                and (e["timestamp"] <= end if end_inclusive else e["timestamp"] < end)
+            ]
+            page_size = data["pageSize"]
+            first = data["page"] * page_size
+            page = events[first:][:page_size]
+            response = mocker.MagicMock(spec=Response)
+            response.text = json.dumps({"events": page})
+            return Py42Response(response)
+
+        mock_connection.post.side_effect = post
+        service = AuditLogsService(mock_connection)
+        events = list(
+            service.get_all_in_time_windows(
+                dt(2020, 1, 1),
+                dt(2020, 1, 1, 0, 0, 0, 19000),
+                windows=4,
+                page_size=2,
+            )
+        )
+
+        expected = server_events if end_inclusive else server_events[1:]
+        assert events == expected
+
+    def test_export_csv_writes_pages_with_one_header_until_short_page(
+        self, mocker, mock_connection
+    ):
+        pages = [
+            CSV_HEADER + b'1,a@example.com,login\n2,"b\nc",login\n',
+            CSV_HEADER + b"3,d@example.com,logout\n",
+        ]
+        mock_connection.post.side_effect = _create_text_responses(mocker, pages)
+        output = io.BytesIO()
+        service = AuditLogsService(mock_connection)
+
+        result = service.export(output, format="csv", page_size=2, usernames="a")
+
+        rows = [page.split(b"\n", 1)[1] for page in pages]
+        expected = CSV_HEADER + b"".join(rows)
+        assert output.getvalue() == expected
+        assert result == (3, len(expected))
+        assert mock_connection.post.call_count == 2
+        args, kwargs = mock_connection.post.call_args
+        assert args[0] == "/rpc/search/search-audit-log"
+        assert kwargs["headers"] == {"Accept": "text/csv"}
+        assert kwargs["stream"] is True
+        assert kwargs["json"]["page"] == 1
+        assert kwargs["json"]["actorNames"] == ["a"]
+
+    def test_export_cef_counts_lines_and_writes_to_socket(
+        self, mocker, mock_connection
+    ):
+        pages = [b"CEF:0|a\nCEF:0|b\n", b"CEF:0|c\nCEF:0|d", b""]
+        mock_connection.post.side_effect = _create_text_responses(mocker, pages)
+        sock = mocker.MagicMock(spec=["sendall"])
+        service = AuditLogsService(mock_connection)
+
+        result = service.export(sock, format="CEF", page_size=2)
+
+        assert result.events == 4
+        assert b"".join(c[0][0] for c in sock.sendall.call_args_list) == b"".join(
+            pages
+        )
+        assert mock_connection.post.call_count == 3
+        assert mock_connection.post.call_args[1]["headers"] == {
+            "Accept": "text/x-cef"
+        }
+
+    def test_export_when_page_does_not_end_with_newline_separates_next_page(
+        self, mocker, mock_connection
+    ):
+        pages = [
+            CSV_HEADER + b"1,a@example.com,login\n2,b@example.com,login",
+            CSV_HEADER + b"3,c@example.com,login\n4,d@example.com,login",
+            CSV_HEADER,
+        ]
+        mock_connection.post.side_effect = _create_text_responses(mocker, pages)
+        output = io.BytesIO()
+        service = AuditLogsService(mock_connection)
+
+        result = service.export(output, format="CSV", page_size=2)
+
+        assert output.getvalue() == CSV_HEADER + (
+            b"1,a@example.com,login\n2,b@example.com,login\n"
+            b"3,c@example.com,login\n4,d@example.com,login"
+        )
+        assert result.events == 4
+
+    def test_export_when_write_fails_closes_response(self, mocker, mock_connection):
+        response = mocker.MagicMock(spec=Py42Response)
+        response.iter_content_into.return_value = iter([memoryview(b"CEF:0|a\n")])
+        mock_connection.post.return_value = response
+        output = mocker.MagicMock(spec=["write"])
+        output.write.side_effect = IOError("disk full")
+        service = AuditLogsService(mock_connection)
+
+        with pytest.raises(IOError):
+            service.export(output, format="CEF")
+        response.close.assert_called_once_with()
+
+    def test_export_when_format_not_text_raises_py42_error(self, mock_connection):
+        service = AuditLogsService(mock_connection)
+        with pytest.raises(Py42Error):
+            service.export(io.BytesIO(), format="JSON")
+        assert not mock_connection.post.called
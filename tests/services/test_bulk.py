@@ -0,0 +1,113 @@
+import pytest
+import requests
+from requests import ConnectionError
+from requests import ConnectTimeout
+from requests import HTTPError
+from requests import Response
+from urllib3.exceptions import MaxRetryError
+from urllib3.exceptions import NewConnectionError
+
+from py42.exceptions import Py42BadRequestError
+from py42.exceptions import Py42HTTPError
+from py42.exceptions import Py42InternalServerError
+from py42.services._bulk import iter_bulk_results
+
+
+def _create_error(mocker, error_class, status_code):
+    exception = mocker.MagicMock(spec=HTTPError)
+    exception.response = mocker.MagicMock(spec=Response)
+    exception.response.status_code = status_code
+    return error_class(exception)
+
+
+class FlakyOperation(object):
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = []
+
+    def __call__(self, item):
+        self.calls.append(item)
+        if self.errors:
+            raise self.errors.pop(0)
+        return u"done-{}".format(item)
+
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(mocker):
+    return mocker.patch("py42.services._bulk.time.sleep")
+
+
+def _run(func, items, idempotent, **kwargs):
+    return sorted(iter_bulk_results(func, items, idempotent, **kwargs), key=str)
+
+
+class TestIterBulkResults(object):
+    def test_yields_result_of_each_unique_item(self):
+        operation = FlakyOperation([])
+        results = _run(operation, [1, 2, 2, 3], False)
+        assert results == [
+            (1, "done-1", None),
+            (2, "done-2", None),
+            (3, "done-3", None),
+        ]
+        assert sorted(operation.calls) == [1, 2, 3]
+
+    def test_when_server_error_and_idempotent_retries_with_backoff(
+        self, mocker, no_retry_delay
+    ):
+        errors = [_create_error(mocker, Py42InternalServerError, 503)] * 2
+        operation = FlakyOperation(errors)
+        assert _run(operation, [1], True) == [(1, "done-1", None)]
+        assert [c[0][0] for c in no_retry_delay.call_args_list] == [0.5, 1.0]
+
+    def test_when_server_error_and_not_idempotent_does_not_retry(self, mocker):
+        error = _create_error(mocker, Py42InternalServerError, 500)
+        operation = FlakyOperation([error, ConnectionError()])
+        assert _run(operation, [1], False) == [(1, None, error)]
+        assert operation.calls == [1]
+
+    def test_when_request_never_reached_server_retries_even_if_not_idempotent(
+        self, mocker
+    ):
+        errors = [_create_error(mocker, Py42HTTPError, 429), ConnectTimeout()]
+        operation = FlakyOperation(errors)
+        assert _run(operation, [1], False) == [(1, "done-1", None)]
+        assert operation.calls == [1, 1, 1]
+
+    def test_when_connection_refused_retries_even_if_not_idempotent(self):
+        refused = NewConnectionError(None, "Connection refused")
+        error = ConnectionError(MaxRetryError(None, "/", refused))
+        operation = FlakyOperation([error])
+        assert _run(operation, [1], False) == [(1, "done-1", None)]
+        assert operation.calls == [1, 1]
+
+    def test_when_connection_refused_on_real_socket_retries(self, socket_server):
+        server = socket_server()
+        server.close()
+
+        def operation(item):
+            if operation.calls:
+                return "done"
+            operation.calls.append(item)
+            return requests.get(server.url)
+
+        operation.calls = []
+        assert _run(operation, [1], False) == [(1, "done", None)]
+
+    def test_when_client_error_does_not_retry(self, mocker):
+        error = _create_error(mocker, Py42BadRequestError, 400)
+        operation = FlakyOperation([error])
+        assert _run(operation, [1], True) == [(1, None, error)]
+
+    def test_when_retries_run_out_yields_last_error(self, mocker):
+        errors = [ConnectionError(), ConnectionError()]
+        operation = FlakyOperation(errors)
+        assert _run(operation, [1], True, max_retries=1) == [(1, None, errors[1])]
+        assert operation.calls == [1, 1]
+
+    def test_waits_on_rate_limiter_before_every_attempt(self, mocker):
+        limiter = mocker.patch("py42.services._bulk.RateLimiter")
+        operation = FlakyOperation([ConnectionError()])
+        _run(operation, [1, 2], True, requests_per_second=5)
+        limiter.assert_called_once_with(5)
+        assert limiter.return_value.wait.call_count == 3
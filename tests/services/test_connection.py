@@ -259,3 +259,14 @@ class TestConnection(object):
         connection = Connection(mock_host_resolver, mock_auth, success_requests_session)
         with pytest.raises(Py42Error):
             connection.get(URL)
+
+    def test_connection_request_headers_do_not_carry_over_to_later_requests(
+        self, mock_host_resolver, mock_auth, success_requests_session
+    ):
+        connection = Connection(mock_host_resolver, mock_auth, success_requests_session)
+        connection.get(URL, headers={"Range": "bytes=10-"})
+        connection.get(URL)
+        first_request = success_requests_session.prepare_request.call_args_list[0][0][0]
+        second_request = success_requests_session.prepare_request.call_args_list[1][0][0]
+        assert first_request.headers["Range"] == "bytes=10-"
+        assert "Range" not in second_request.headers
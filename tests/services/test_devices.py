@@ -1,9 +1,16 @@
 # -*- coding: utf-8 -*-
+import json
+
 import pytest
+from requests import HTTPError
 from requests import Response
 
 import py42
+from py42.exceptions import Py42InternalServerError
+from py42.exceptions import Py42NotFoundError
 from py42.response import Py42Response
+from py42.services.devices import BulkDeviceOperations
+from py42.services.devices import DeviceInventory
 from py42.services.devices import DeviceService
 
 COMPUTER_URI = "/api/Computer"
@@ -132,3 +139,240 @@ class TestDeviceService(object):
         service.get_agent_state = mocker.Mock()
         service.get_agent_full_disk_access_state("DEVICE_ID")
         service.get_agent_state.assert_called_once_with("DEVICE_ID", "fullDiskAccess")
+
+
+def _create_device(number, org_uid="org-1", user_uid="user-1"):
+    return {
+        "computerId": number,
+        "guid": "guid-{}".format(number),
+        "name": "Device {}".format(number),
+        "osHostname": "HOST-{}".format(number % 2),
+        "orgUid": org_uid,
+        "userUid": user_uid,
+        "status": "Active",
+        "notes": "not kept",
+        "backupUsage": [
+            {
+                "targetComputerGuid": "destination-1",
+                "archiveBytes": number * 100,
+                "alerts": ["not kept"],
+            }
+        ],
+    }
+
+
+@pytest.fixture
+def mock_inventory_device_service(mocker):
+    service = mocker.MagicMock(spec=DeviceService)
+    service.devices = [
+        _create_device(1),
+        _create_device(2, user_uid="user-2"),
+        _create_device(3, org_uid="org-2"),
+    ]
+    service.get_all.side_effect = lambda **kwargs: iter(
+        [{"computers": service.devices[:2]}, {"computers": service.devices[2:]}]
+    )
+    return service
+
+
+class TestDeviceInventory(object):
+    def test_looks_up_devices_by_each_index(self, mock_inventory_device_service):
+        inventory = DeviceInventory(mock_inventory_device_service, active=True)
+        assert inventory.get_by_guid("guid-1")["computerId"] == 1
+        assert inventory.get_by_id(2)["guid"] == "guid-2"
+        assert [d["computerId"] for d in inventory.get_all_by_org_uid("org-1")] == [1, 2]
+        assert [d["computerId"] for d in inventory.get_all_by_user_uid("user-1")] == [
+            1,
+            3,
+        ]
+        assert [d["computerId"] for d in inventory.get_all_by_hostname("host-1")] == [
+            1,
+            3,
+        ]
+        assert len(inventory) == 3
+        mock_inventory_device_service.get_all.assert_called_once_with(
+            include_backup_usage=False, include_counts=False, active=True
+        )
+
+    def test_keeps_only_configured_fields(self, mock_inventory_device_service):
+        inventory = DeviceInventory(mock_inventory_device_service, fields=["name"])
+        assert inventory.get_by_guid("guid-1") == {
+            "computerId": 1,
+            "guid": "guid-1",
+            "osHostname": "HOST-1",
+            "userUid": "user-1",
+            "orgUid": "org-1",
+            "name": "Device 1",
+        }
+
+    def test_stores_values_shared_by_devices_once(self, mock_inventory_device_service):
+        mock_inventory_device_service.devices = [
+            json.loads(json.dumps(d)) for d in mock_inventory_device_service.devices
+        ]
+        inventory = DeviceInventory(mock_inventory_device_service)
+        first = inventory.get_by_guid("guid-1")
+        second = inventory.get_by_guid("guid-2")
+        assert first["orgUid"] is second["orgUid"]
+
+    def test_when_backup_usage_included_keeps_summary_of_each_destination(
+        self, mock_inventory_device_service
+    ):
+        inventory = DeviceInventory(
+            mock_inventory_device_service, include_backup_usage=True
+        )
+        usage = inventory.get_by_guid("guid-2")["backupUsage"]
+        assert len(usage) == 1
+        assert usage[0]["targetComputerGuid"] == "destination-1"
+        assert usage[0]["archiveBytes"] == 200
+        assert "alerts" not in usage[0]
+
+    def test_when_guid_missing_requests_only_that_device(
+        self, mocker, mock_inventory_device_service
+    ):
+        response = mocker.MagicMock(spec=Response)
+        response.text = json.dumps({"data": _create_device(4, org_uid="org-2")})
+        mock_inventory_device_service.get_by_guid.return_value = Py42Response(response)
+        inventory = DeviceInventory(mock_inventory_device_service)
+        assert inventory.get_by_guid("guid-4")["computerId"] == 4
+        assert [d["computerId"] for d in inventory.get_all_by_org_uid("org-2")] == [3, 4]
+        mock_inventory_device_service.get_by_guid.assert_called_once_with(
+            "guid-4", include_backup_usage=False
+        )
+        assert mock_inventory_device_service.get_all.call_count == 1
+
+    def test_when_device_does_not_exist_requests_it_once(
+        self, mocker, mock_inventory_device_service
+    ):
+        base_err = mocker.MagicMock(spec=HTTPError)
+        base_err.response = mocker.MagicMock(spec=Response)
+        mock_inventory_device_service.get_by_id.side_effect = Py42NotFoundError(
+            base_err
+        )
+        inventory = DeviceInventory(mock_inventory_device_service)
+        assert inventory.get_by_id(42) is None
+        assert inventory.get_by_id(42) is None
+        assert mock_inventory_device_service.get_by_id.call_count == 1
+
+    def test_when_lookup_finds_no_devices_does_not_reload(
+        self, mocker, mock_inventory_device_service
+    ):
+        clock = mocker.patch("py42.services._cached_index.time.time")
+        clock.return_value = 0
+        inventory = DeviceInventory(mock_inventory_device_service)
+        assert len(inventory) == 3
+        # past any interval between reloads, but within the TTL
+        clock.return_value = 120
+        assert inventory.get_all_by_hostname("missing") == []
+        assert inventory.get_all_by_org_uid("missing") == []
+        assert inventory.get_all_by_user_uid("missing") == []
+        assert mock_inventory_device_service.get_all.call_count == 1
+
+
+class FakeDeviceServer(object):
+    """Pages through devices by offset, like the computer API, where deactivating a device
+    removes it from ``active=True`` results."""
+
+    def __init__(self, count, page_size):
+        self.active = list(range(1, count + 1))
+        self.page_size = page_size
+        self.pages_requested = 0
+
+    def get_all(self, active=None, org_uid=None, include_counts=True):
+        page_num = 0
+        while True:
+            self.pages_requested += 1
+            start = page_num * self.page_size
+            devices = [{"computerId": i} for i in self.active[start:][: self.page_size]]
+            yield {"computers": devices}
+            if len(devices) < self.page_size:
+                return
+            page_num += 1
+
+    def deactivate(self, device_id):
+        self.active.remove(device_id)
+        return "deactivated"
+
+
+@pytest.fixture
+def mock_bulk_device_service(mocker):
+    mocker.patch("py42.services._bulk.time.sleep")
+    return mocker.MagicMock(spec=DeviceService)
+
+
+class TestBulkDeviceOperations(object):
+    def test_deauthorize_returns_result_of_each_device_once(
+        self, mock_bulk_device_service
+    ):
+        bulk = BulkDeviceOperations(mock_bulk_device_service, max_workers=2)
+        results = bulk.deauthorize(iter([1, 2, 2, 3]))
+        assert isinstance(results, list)
+        assert sorted(r.device_id for r in results) == [1, 2, 3]
+        assert all(r.error is None for r in results)
+        assert mock_bulk_device_service.deauthorize.call_count == 3
+
+    @pytest.mark.parametrize(
+        "operation", ["block", "unblock", "deactivate", "reactivate", "deauthorize"]
+    )
+    def test_operation_retries_server_errors(
+        self, mocker, mock_bulk_device_service, operation
+    ):
+        exception = mocker.MagicMock(spec=HTTPError)
+        exception.response = mocker.MagicMock(spec=Response)
+        exception.response.status_code = 503
+        method = getattr(mock_bulk_device_service, operation)
+        method.side_effect = [Py42InternalServerError(exception), "ok"]
+        bulk = BulkDeviceOperations(mock_bulk_device_service)
+        assert getattr(bulk, operation)([7]) == [(7, "ok", None)]
+        assert method.call_count == 2
+
+    def test_when_one_device_fails_reports_error_for_that_device_only(
+        self, mock_bulk_device_service
+    ):
+        error = ValueError("bad device")
+
+        def block(device_id):
+            if device_id == 2:
+                raise error
+            return "blocked"
+
+        mock_bulk_device_service.block.side_effect = block
+        results = BulkDeviceOperations(mock_bulk_device_service).block([1, 2, 3])
+        assert {r.device_id: r.error for r in results} == {1: None, 2: error, 3: None}
+
+    def test_iter_device_ids_passes_filters_to_get_all(self, mock_bulk_device_service):
+        mock_bulk_device_service.get_all.side_effect = lambda **kwargs: iter(
+            [{"computers": [{"computerId": 1}, {"computerId": 2}]}]
+        )
+        bulk = BulkDeviceOperations(mock_bulk_device_service)
+        assert list(bulk.iter_device_ids(org_uid="org-1", active=False)) == [1, 2]
+        mock_bulk_device_service.get_all.assert_called_with(
+            org_uid="org-1", active=False, include_counts=False
+        )
+
+    def test_iter_device_ids_when_operation_shifts_pages_includes_every_device(self):
+        server = FakeDeviceServer(25, page_size=5)
+        bulk = BulkDeviceOperations(server, max_workers=1)
+
+        results = bulk.deactivate(bulk.iter_device_ids(active=True))
+
+        assert sorted(r.device_id for r in results) == list(range(1, 26))
+        assert server.active == []
+
+    def test_iter_device_ids_reads_pages_as_ids_are_consumed(self):
+        server = FakeDeviceServer(25, page_size=5)
+        device_ids = BulkDeviceOperations(server).iter_device_ids(active=True)
+        assert next(device_ids) == 1
+        assert server.pages_requested == 1
+
+    def test_iter_device_ids_when_not_filtering_by_state_requests_pages_once(self):
+        server = FakeDeviceServer(25, page_size=5)
+        bulk = BulkDeviceOperations(server)
+        assert list(bulk.iter_device_ids(org_uid="org-1")) == list(range(1, 26))
+        assert server.pages_requested == 6
+
+    def test_iter_device_ids_when_requery_false_requests_pages_once(self):
+        server = FakeDeviceServer(25, page_size=5)
+        bulk = BulkDeviceOperations(server)
+        device_ids = list(bulk.iter_device_ids(requery=False, active=True))
+        assert device_ids == list(range(1, 26))
+        assert server.pages_requested == 6
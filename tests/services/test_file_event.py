@@ -1,6 +1,16 @@
 # -*- coding: utf-8 -*-
+import json
+import threading
+import time
+
 import pytest
+from requests import Response
 
+from py42.exceptions import Py42Error
+from py42.response import Py42Response
+from py42.sdk.queries.fileevents.file_event_query import FileEventQuery
+from py42.sdk.queries.fileevents.filters.file_filter import FileName
+from py42.sdk.queries.fileevents.filters.file_filter import SHA256
 from py42.services._connection import Connection
 from py42.services.fileevent import FileEventService
 
@@ -9,6 +19,63 @@ RAW_QUERY = "RAW JSON QUERY"
 RAW_UNICODE_QUERY = u"RAW UNICODE JSON QUERY 我能吞"
 
 
+def _to_milliseconds(timestamp):
+    # timestamps in the tests are all within the first minute of the epoch
+    return int(timestamp[17:19]) * 1000 + int(timestamp[20:23])
+
+
+def _to_timestamp(milliseconds):
+    return "1970-01-01T00:00:{:02d}.{:03d}Z".format(
+        milliseconds // 1000, milliseconds % 1000
+    )
+
+
+def _matches_filter(event, query_filter):
+    value = event.get(query_filter["term"])
+    operator = query_filter["operator"]
+    if operator == "ON_OR_AFTER":
+        return _to_milliseconds(value) >= _to_milliseconds(query_filter["value"])
+    if operator == "ON_OR_BEFORE":
+        return _to_milliseconds(value) <= _to_milliseconds(query_filter["value"])
+    if operator == "IS_NOT":
+        return value != query_filter["value"]
+    return value == query_filter["value"]
+
+
+def _matches_group(event, group):
+    matches = [_matches_filter(event, f) for f in group["filters"]]
+    return any(matches) if group["filterClause"] == "OR" else all(matches)
+
+
+def _create_file_event_search(mocker, events, max_results=10000):
+    """Returns a mock ``post`` that pages through the ``events`` matching the query, and
+    like the forensic search fails to page past the first ``max_results``."""
+
+    def post(uri, data=None):
+        query = json.loads(data)
+        matches = [
+            e for e in events if all(_matches_group(e, g) for g in query["groups"])
+        ]
+        matches.sort(
+            key=lambda e: (e[query["srtKey"]], e["eventId"]),
+            reverse=query["srtDir"] == "desc",
+        )
+        page_end = query["pgNum"] * query["pgSize"]
+        page_start = page_end - query["pgSize"]
+        if page_start >= max_results:
+            raise Py42Error("Paged past the first {} results.".format(max_results))
+        response = mocker.MagicMock(spec=Response)
+        response.text = json.dumps(
+            {
+                "fileEvents": matches[slice(page_start, page_end)],
+                "totalCount": len(matches),
+            }
+        )
+        return Py42Response(response)
+
+    return post
+
+
 class TestFileEventService(object):
     @pytest.fixture
     def connection(self, mocker):
@@ -40,3 +107,252 @@ class TestFileEventService(object):
             u"/forensic-search/queryservice/api/v1/filelocations",
             params={"sha256": "abc"},
         )
+
+    @pytest.fixture
+    def windowed_connection(self, mocker, connection):
+        # serves one event per second from 0 to 9
+        events = [
+            {
+                "eventId": str(second),
+                "eventTimestamp": _to_timestamp(second * 1000),
+                "fileName": "test.txt",
+            }
+            for second in range(10)
+        ]
+        connection.post.side_effect = _create_file_event_search(mocker, events)
+        return connection
+
+    def test_search_in_time_windows_merges_windows_in_sort_order(
+        self, windowed_connection
+    ):
+        service = FileEventService(windowed_connection)
+        query = FileEventQuery.all(FileName.eq("test.txt"))
+        query.page_size = 2
+        query.sort_key = "eventTimestamp"
+        query.sort_direction = "desc"
+
+        events = service.search_in_time_windows(query, 0, 9.999, windows=3)
+
+        assert [e["eventId"] for e in events] == [str(i) for i in range(9, -1, -1)]
+        # windows holding 4, 3 and 3 events, paged two at a time
+        assert windowed_connection.post.call_count == 6
+
+    def test_search_in_time_windows_adds_time_range_to_each_window_query(
+        self, windowed_connection
+    ):
+        service = FileEventService(windowed_connection)
+        query = FileEventQuery.all(FileName.eq("test.txt"))
+
+        list(service.search_in_time_windows(str(query), 0, 9.999, windows=2))
+
+        queries = [
+            json.loads(c[1]["data"]) for c in windowed_connection.post.call_args_list
+        ]
+        ranges = sorted(
+            [f["value"] for f in q["groups"][-1]["filters"]] for q in queries
+        )
+        assert ranges == [
+            ["1970-01-01T00:00:00.000Z", "1970-01-01T00:00:04.999Z"],
+            ["1970-01-01T00:00:05.000Z", "1970-01-01T00:00:09.999Z"],
+        ]
+        assert all(
+            q["groups"][0]["filters"][0]["value"] == "test.txt" for q in queries
+        )
+
+    def test_search_in_time_windows_when_window_has_too_many_events_splits_it(
+        self, mocker, connection
+    ):
+        # 15,000 events within the first 2 seconds, 7 or 8 per millisecond
+        events = [
+            {
+                "eventId": str(i),
+                "eventTimestamp": _to_timestamp(i % 2000),
+                "fileName": "test.txt",
+            }
+            for i in range(15000)
+        ]
+        connection.post.side_effect = _create_file_event_search(mocker, events)
+        service = FileEventService(connection)
+        query = FileEventQuery.all(FileName.eq("test.txt"))
+        query.sort_key = "eventTimestamp"
+        query.sort_direction = "asc"
+
+        results = list(service.search_in_time_windows(query, 0, 9.999, windows=2))
+
+        assert len(results) == 15000
+        assert len({e["eventId"] for e in results}) == 15000
+        timestamps = [e["eventTimestamp"] for e in results]
+        assert timestamps == sorted(timestamps)
+
+    def test_search_in_time_windows_when_millisecond_has_too_many_events_raises_error(
+        self, mocker, connection
+    ):
+        events = [
+            {
+                "eventId": str(i),
+                "eventTimestamp": _to_timestamp(5),
+                "fileName": "test.txt",
+            }
+            for i in range(3)
+        ]
+        connection.post.side_effect = _create_file_event_search(
+            mocker, events, max_results=2
+        )
+        service = FileEventService(connection)
+        query = FileEventQuery.all(FileName.eq("test.txt"))
+
+        with pytest.raises(Py42Error):
+            list(service.search_in_time_windows(query, 0, 9.999, max_results=2))
+
+    def test_search_in_time_windows_when_query_is_any_raises_py42_error(
+        self, connection
+    ):
+        service = FileEventService(connection)
+        query = FileEventQuery.any(FileName.eq("test.txt"))
+        with pytest.raises(Py42Error):
+            service.search_in_time_windows(query, 0, 9)
+
+    def test_search_chunked_pages_each_chunk_and_merges_in_sort_order(
+        self, mocker, connection
+    ):
+        def post(uri, data=None):
+            query = json.loads(data)
+            hashes = sorted(f["value"] for f in query["groups"][0]["filters"])
+            events = [{"eventId": h, "sha256Checksum": h} for h in hashes]
+            page_end = query["pgNum"] * query["pgSize"]
+            page_start = page_end - query["pgSize"]
+            response = mocker.MagicMock(spec=Response)
+            response.text = json.dumps(
+                {
+                    "fileEvents": events[slice(page_start, page_end)],
+                    "totalCount": len(events),
+                }
+            )
+            return Py42Response(response)
+
+        connection.post.side_effect = post
+        service = FileEventService(connection)
+        query = FileEventQuery.all(SHA256.is_in(["e", "a", "d", "b", "c"]))
+        query.page_size = 2
+
+        events = list(service.search_chunked(query, max_values=3))
+
+        assert [e["eventId"] for e in events] == ["a", "b", "c", "d", "e"]
+        # the chunks of 3 and 2 hashes take 2 pages and 1 page
+        assert connection.post.call_count == 3
+
+    def test_search_chunked_reads_pages_as_events_are_consumed(
+        self, mocker, connection
+    ):
+        def post(uri, data=None):
+            query = json.loads(data)
+            start = (query["pgNum"] - 1) * query["pgSize"]
+            events = [{"eventId": str(i)} for i in range(start, start + query["pgSize"])]
+            response = mocker.MagicMock(spec=Response)
+            response.text = json.dumps({"fileEvents": events, "totalCount": 100})
+            return Py42Response(response)
+
+        connection.post.side_effect = post
+        service = FileEventService(connection)
+        query = FileEventQuery.all(SHA256.is_in(["a", "b"]))
+        query.page_size = 2
+
+        events = service.search_chunked(query)
+        first_events = [next(events) for _ in range(4)]
+
+        assert [e["eventId"] for e in first_events] == ["0", "1", "2", "3"]
+        # the page being merged and the next one fetched ahead
+        assert connection.post.call_count <= 3
+
+    def test_search_chunked_when_chunk_has_too_many_events_splits_it_into_windows(
+        self, mocker, connection
+    ):
+        events = [
+            {
+                "eventId": str(i),
+                "sha256Checksum": "a",
+                "eventTimestamp": _to_timestamp(i % 1000),
+            }
+            for i in range(12000)
+        ] + [
+            {"eventId": h, "sha256Checksum": h, "eventTimestamp": _to_timestamp(5)}
+            for h in ("b", "c")
+        ]
+        connection.post.side_effect = _create_file_event_search(mocker, events)
+        service = FileEventService(connection)
+        query = FileEventQuery.all(SHA256.is_in(["a", "b", "c"]))
+        query.sort_key = "eventTimestamp"
+
+        results = list(service.search_chunked(query, max_values=1))
+
+        assert len(results) == 12002
+        timestamps = [e["eventTimestamp"] for e in results]
+        assert timestamps == sorted(timestamps)
+
+    def test_search_chunked_starts_at_most_max_workers_queries_at_once(
+        self, mocker, connection
+    ):
+        lock = threading.Lock()
+        running = []
+        most_running = []
+
+        def post(uri, data=None):
+            with lock:
+                running.append(data)
+                most_running.append(len(running))
+            time.sleep(0.01)
+            with lock:
+                running.remove(data)
+            value = json.loads(data)["groups"][0]["filters"][0]["value"]
+            response = mocker.MagicMock(spec=Response)
+            response.text = json.dumps(
+                {"fileEvents": [{"eventId": value}], "totalCount": 1}
+            )
+            return Py42Response(response)
+
+        connection.post.side_effect = post
+        service = FileEventService(connection)
+        query = FileEventQuery.all(SHA256.is_in(["a", "b", "c", "d", "e", "f"]))
+
+        events = list(service.search_chunked(query, max_values=1, max_workers=2))
+
+        assert sorted(e["eventId"] for e in events) == ["a", "b", "c", "d", "e", "f"]
+        assert max(most_running) == 2
+
+    def test_search_chunked_filters_out_not_in_values_past_max_values(
+        self, mocker, connection
+    ):
+        response = mocker.MagicMock(spec=Response)
+        response.text = json.dumps(
+            {
+                "fileEvents": [
+                    {"eventId": "1", "fileName": "c.txt"},
+                    {"eventId": "2", "fileName": "d.txt"},
+                ],
+                "totalCount": 2,
+            }
+        )
+        connection.post.return_value = Py42Response(response)
+        service = FileEventService(connection)
+        query = FileEventQuery.all(FileName.not_in(["a.txt", "b.txt", "c.txt"]))
+
+        events = list(service.search_chunked(query, max_values=2))
+
+        assert [e["eventId"] for e in events] == ["2"]
+        posted = json.loads(connection.post.call_args[1]["data"])
+        assert len(posted["groups"][0]["filters"]) == 2
+
+    @pytest.mark.parametrize(
+        "event", [{"eventId": "1"}, {"eventId": "1", "fileName": ["a.txt", "c.txt"]}]
+    )
+    def test_search_chunked_when_not_in_field_cannot_be_compared_raises_py42_error(
+        self, mocker, connection, event
+    ):
+        response = mocker.MagicMock(spec=Response)
+        response.text = json.dumps({"fileEvents": [event], "totalCount": 1})
+        connection.post.return_value = Py42Response(response)
+        service = FileEventService(connection)
+        query = FileEventQuery.all(FileName.not_in(["a.txt", "b.txt", "c.txt"]))
+
+        with pytest.raises(Py42Error):
+            list(service.search_chunked(query, max_values=2))
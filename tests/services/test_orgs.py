@@ -5,6 +5,7 @@ from requests import Response
 import py42.settings
 from py42.response import Py42Response
 from py42.services.orgs import OrgService
+from py42.services.orgs import OrgTree
 
 COMPUTER_URI = "/api/Org"
 
@@ -81,3 +82,98 @@ class TestOrgService(object):
         service.get_agent_state = mocker.Mock()
         service.get_agent_full_disk_access_states("ORG_ID")
         service.get_agent_state.assert_called_once_with("ORG_ID", "fullDiskAccess")
+
+
+def _create_org(org_id, parent_id=None):
+    return {
+        "orgId": org_id,
+        "orgUid": "org-{}".format(org_id),
+        "orgName": "Org {}".format(org_id),
+        "parentOrgId": parent_id,
+        "parentOrgUid": "org-{}".format(parent_id) if parent_id else None,
+    }
+
+
+@pytest.fixture
+def mock_tree_org_service(mocker):
+    service = mocker.MagicMock(spec=OrgService)
+    # 1 -> (2 -> (4, 5), 3); 6's parent is not visible
+    service.orgs = [
+        _create_org(1),
+        _create_org(2, 1),
+        _create_org(3, 1),
+        _create_org(4, 2),
+        _create_org(5, 2),
+        _create_org(6, 99),
+    ]
+    service.get_all.side_effect = lambda: iter(
+        [{"orgs": service.orgs[:3]}, {"orgs": service.orgs[3:]}]
+    )
+    return service
+
+
+class TestOrgTree(object):
+    def test_resolves_org_uids_and_ids(self, mock_tree_org_service):
+        tree = OrgTree(mock_tree_org_service)
+        assert tree.get_by_uid("org-2")["orgId"] == 2
+        assert tree.get_by_id(3)["orgUid"] == "org-3"
+        assert tree.get_uid("4") == "org-4"
+        assert tree.get_id("org-5") == 5
+        assert len(tree) == 6
+        mock_tree_org_service.get_all.assert_called_once_with()
+
+    def test_gets_parents_children_and_ancestors(self, mock_tree_org_service):
+        tree = OrgTree(mock_tree_org_service)
+        assert tree.get_parent("org-4")["orgUid"] == "org-2"
+        assert tree.get_parent("org-1") is None
+        assert [o["orgId"] for o in tree.get_children("org-1")] == [2, 3]
+        assert tree.get_children("org-4") == []
+        assert [o["orgId"] for o in tree.get_ancestors("org-5")] == [2, 1]
+
+    def test_orgs_without_visible_parent_are_roots(self, mock_tree_org_service):
+        tree = OrgTree(mock_tree_org_service)
+        assert [o["orgId"] for o in tree.get_roots()] == [1, 6]
+        assert tree.get_parent("org-6") is None
+
+    def test_iter_subtree_yields_each_org_before_its_children(
+        self, mock_tree_org_service
+    ):
+        tree = OrgTree(mock_tree_org_service)
+        assert [o["orgId"] for o in tree.iter_subtree("org-1")] == [1, 2, 4, 5, 3]
+        assert [o["orgId"] for o in tree.iter_subtree("org-2", include_root=False)] == [
+            4,
+            5,
+        ]
+
+    def test_iter_subtree_when_parents_form_cycle_yields_each_org_once(
+        self, mock_tree_org_service
+    ):
+        mock_tree_org_service.orgs = [_create_org(1, 2), _create_org(2, 1)]
+        tree = OrgTree(mock_tree_org_service)
+        assert [o["orgId"] for o in tree.iter_subtree("org-1")] == [1, 2]
+        assert [o["orgId"] for o in tree.get_ancestors("org-1")] == [2]
+
+    def test_lookup_of_missing_org_reloads_tree(self, mock_tree_org_service):
+        tree = OrgTree(mock_tree_org_service, min_refresh_interval=0)
+        tree.get_by_uid("org-1")
+        mock_tree_org_service.orgs.append(_create_org(7, 3))
+
+        assert [o["orgId"] for o in tree.iter_subtree("org-7")] == [7]
+        assert [o["orgId"] for o in tree.get_children("org-3")] == [7]
+        assert mock_tree_org_service.get_all.call_count == 2
+
+    def test_lookup_of_missing_org_reloads_tree_at_most_once_per_interval(
+        self, mock_tree_org_service
+    ):
+        tree = OrgTree(mock_tree_org_service)
+        assert tree.get_by_uid("org-7") is None
+        assert list(tree.iter_subtree("org-8")) == []
+        assert tree.get_children("org-9") == []
+        assert mock_tree_org_service.get_all.call_count == 1
+
+    def test_when_ttl_expired_reloads_tree(self, mocker, mock_tree_org_service):
+        mocker.patch("py42.services._cached_index.submit", side_effect=lambda f: f())
+        tree = OrgTree(mock_tree_org_service, ttl=0)
+        tree.get_by_uid("org-1")
+        tree.get_by_uid("org-1")
+        assert mock_tree_org_service.get_all.call_count == 2
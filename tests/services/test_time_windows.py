@@ -0,0 +1,78 @@
+from datetime import datetime
+
+import pytest
+
+from py42.exceptions import Py42Error
+from py42.services._time_windows import merge_sorted
+from py42.services._time_windows import parse_timestamp
+from py42.services._time_windows import split_time_range
+
+
+def test_split_time_range_returns_disjoint_windows_covering_range():
+    windows = split_time_range(0, 4, 4)
+    assert windows == [
+        (datetime(1970, 1, 1, 0, 0, 0), datetime(1970, 1, 1, 0, 0, 0, 999000)),
+        (datetime(1970, 1, 1, 0, 0, 1), datetime(1970, 1, 1, 0, 0, 1, 999000)),
+        (datetime(1970, 1, 1, 0, 0, 2), datetime(1970, 1, 1, 0, 0, 2, 999000)),
+        (datetime(1970, 1, 1, 0, 0, 3), datetime(1970, 1, 1, 0, 0, 4)),
+    ]
+
+
+def test_split_time_range_accepts_str_and_datetime():
+    windows = split_time_range("2020-01-01 00:00:00", datetime(2020, 1, 3), 2)
+    assert windows == [
+        (datetime(2020, 1, 1), datetime(2020, 1, 1, 23, 59, 59, 999000)),
+        (datetime(2020, 1, 2), datetime(2020, 1, 3)),
+    ]
+
+
+def test_split_time_range_when_range_is_shorter_than_windows_returns_one_per_millisecond():
+    windows = split_time_range(1.0, 1.001, 10)
+    assert len(windows) == 2
+
+
+def test_split_time_range_when_end_before_begin_raises_py42_error():
+    with pytest.raises(Py42Error):
+        split_time_range(10, 5, 2)
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    [
+        ("2020-02-14T20:11:29.5563480Z", datetime(2020, 2, 14, 20, 11, 29, 556000)),
+        ("2020-02-14T20:11:29.5Z", datetime(2020, 2, 14, 20, 11, 29, 500000)),
+        ("2020-02-14T20:11:29Z", datetime(2020, 2, 14, 20, 11, 29)),
+    ],
+)
+def test_parse_timestamp_truncates_to_milliseconds(value, expected):
+    assert parse_timestamp(value) == expected
+
+
+def test_parse_timestamp_when_unrecognized_raises_py42_error():
+    with pytest.raises(Py42Error):
+        parse_timestamp("yesterday")
+
+
+def test_merge_sorted_merges_ascending_iterables():
+    merged = merge_sorted([[1, 4, 7], [2, 5], [], [0, 3, 6]], key=lambda x: x)
+    assert list(merged) == [0, 1, 2, 3, 4, 5, 6, 7]
+
+
+def test_merge_sorted_when_reverse_merges_descending_iterables():
+    merged = merge_sorted([[7, 4, 1], [5, 2], [6, 3, 0]], key=lambda x: x, reverse=True)
+    assert list(merged) == [7, 6, 5, 4, 3, 2, 1, 0]
+
+
+def test_merge_sorted_sorts_none_first_and_keeps_ties_in_iterable_order():
+    items = [[{"k": None, "i": 0}, {"k": "b", "i": 1}], [{"k": "b", "i": 2}]]
+    merged = merge_sorted(items, key=lambda x: x["k"])
+    assert [item["i"] for item in merged] == [0, 1, 2]
+
+
+def test_merge_sorted_reads_iterables_lazily():
+    def iterable():
+        yield 1
+        raise AssertionError("read too far")
+
+    merged = merge_sorted([iterable(), [2]], key=lambda x: x)
+    assert next(merged) == 1
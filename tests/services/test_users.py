@@ -1,9 +1,17 @@
 # -*- coding: utf-8 -*-
+import json
+import time
+
 import pytest
+from requests import HTTPError
 from requests import Response
 
 import py42.settings
+from py42.exceptions import Py42InternalServerError
+from py42.exceptions import Py42NotFoundError
 from py42.response import Py42Response
+from py42.services.users import BulkUserOperations
+from py42.services.users import UserDirectory
 from py42.services.users import UserService
 
 USER_URI = "/api/User"
@@ -171,3 +179,165 @@ class TestUserService(object):
                 "q": "q",
             },
         )
+
+
+def _create_user(number):
+    return {
+        "userId": number,
+        "userUid": "uid-{}".format(number),
+        "username": "User{}@Example.com".format(number),
+        "email": "user{}@example.com".format(number),
+    }
+
+
+def _create_response(mocker, data):
+    response = mocker.MagicMock(spec=Response)
+    response.text = json.dumps(data)
+    return Py42Response(response)
+
+
+@pytest.fixture
+def mock_directory_user_service(mocker):
+    service = mocker.MagicMock(spec=UserService)
+    service.users = [_create_user(i) for i in range(1, 4)]
+    service.get_all.side_effect = lambda **kwargs: iter(
+        [{"users": service.users[:2]}, {"users": service.users[2:]}]
+    )
+    return service
+
+
+class TestUserDirectory(object):
+    def test_looks_up_users_by_id_uid_username_and_email(
+        self, mock_directory_user_service
+    ):
+        directory = UserDirectory(mock_directory_user_service, active=True)
+        assert directory.get_by_id(1)["userUid"] == "uid-1"
+        assert directory.get_by_id("2")["userUid"] == "uid-2"
+        assert directory.get_by_uid("uid-3")["userId"] == 3
+        assert directory.get_by_username("user1@example.COM")["userId"] == 1
+        assert directory.get_by_email("USER2@example.com")["userId"] == 2
+        assert len(directory) == 3
+        mock_directory_user_service.get_all.assert_called_once_with(active=True)
+
+    def test_when_user_missing_requests_only_that_user_and_adds_it(
+        self, mocker, mock_directory_user_service
+    ):
+        mock_directory_user_service.get_by_uid.return_value = _create_response(
+            mocker, {"data": _create_user(4)}
+        )
+        directory = UserDirectory(mock_directory_user_service)
+        assert directory.get_by_uid("uid-4")["userId"] == 4
+        # now indexed by every key
+        assert directory.get_by_email("user4@example.com")["userUid"] == "uid-4"
+        mock_directory_user_service.get_by_uid.assert_called_once_with("uid-4")
+        assert mock_directory_user_service.get_all.call_count == 1
+
+    def test_when_user_does_not_exist_requests_it_once_until_reload(
+        self, mocker, mock_directory_user_service
+    ):
+        base_err = mocker.MagicMock(spec=HTTPError)
+        base_err.response = mocker.MagicMock(spec=Response)
+        mock_directory_user_service.get_by_id.side_effect = Py42NotFoundError(base_err)
+        mock_directory_user_service.get_by_username.return_value = _create_response(
+            mocker, {"users": []}
+        )
+        directory = UserDirectory(mock_directory_user_service)
+        assert directory.get_by_id(42) is None
+        assert directory.get_by_id(42) is None
+        assert directory.get_by_username("nobody") is None
+        assert mock_directory_user_service.get_by_id.call_count == 1
+
+        directory.refresh()
+        assert directory.get_by_id(42) is None
+        assert mock_directory_user_service.get_by_id.call_count == 2
+
+    def test_when_older_than_ttl_reloads_in_background(
+        self, mock_directory_user_service
+    ):
+        directory = UserDirectory(mock_directory_user_service, ttl=0)
+        directory.get_by_id(1)
+        mock_directory_user_service.users[0] = dict(
+            _create_user(1), email="renamed@example.com"
+        )
+        assert directory.get_by_id(1) is not None
+        for _ in range(100):
+            if directory.get_by_id(1)["email"] == "renamed@example.com":
+                break
+            time.sleep(0.01)
+        assert directory.get_by_email("renamed@example.com")["userId"] == 1
+
+
+@pytest.fixture
+def mock_bulk_user_service(mocker):
+    mocker.patch("py42.services._bulk.time.sleep")
+    return mocker.MagicMock(spec=UserService)
+
+
+def _create_http_error(mocker, error_class, status_code):
+    exception = mocker.MagicMock(spec=HTTPError)
+    exception.response = mocker.MagicMock(spec=Response)
+    exception.response.status_code = status_code
+    return error_class(exception)
+
+
+class TestBulkUserOperations(object):
+    def test_deactivate_deactivates_each_user_once(self, mock_bulk_user_service):
+        bulk = BulkUserOperations(mock_bulk_user_service)
+        results = bulk.deactivate([1, 2, 1], block_user=True)
+        assert sorted(r.user_id for r in results) == [1, 2]
+        assert all(r.error is None for r in results)
+        response = mock_bulk_user_service.deactivate.return_value
+        assert all(r.response is response for r in results)
+        assert mock_bulk_user_service.deactivate.call_count == 2
+        mock_bulk_user_service.deactivate.assert_any_call(1, block_user=True)
+
+    def test_change_org_assignment_moves_each_user(self, mock_bulk_user_service):
+        bulk = BulkUserOperations(mock_bulk_user_service, max_workers=2)
+        bulk.change_org_assignment(iter([1, 2, 3]), 42)
+        call_args_list = mock_bulk_user_service.change_org_assignment.call_args_list
+        assert sorted(c[0] for c in call_args_list) == [(1, 42), (2, 42), (3, 42)]
+
+    def test_add_and_remove_role_pass_role_name(self, mock_bulk_user_service):
+        bulk = BulkUserOperations(mock_bulk_user_service)
+        bulk.add_role([1], "Desktop User")
+        bulk.remove_role([1], "Desktop User")
+        mock_bulk_user_service.add_role.assert_called_once_with(1, "Desktop User")
+        mock_bulk_user_service.remove_role.assert_called_once_with(1, "Desktop User")
+
+    def test_when_one_user_fails_reports_error_for_that_user_only(
+        self, mocker, mock_bulk_user_service
+    ):
+        error = _create_http_error(mocker, Py42NotFoundError, 404)
+
+        def block(user_id):
+            if user_id == 2:
+                raise error
+            return "blocked"
+
+        mock_bulk_user_service.block.side_effect = block
+        results = BulkUserOperations(mock_bulk_user_service).block([1, 2, 3])
+        errors = {r.user_id: r.error for r in results}
+        assert errors == {1: None, 2: error, 3: None}
+
+    def test_retries_server_errors_only_for_idempotent_operations(
+        self, mocker, mock_bulk_user_service
+    ):
+        error = _create_http_error(mocker, Py42InternalServerError, 500)
+        mock_bulk_user_service.block.side_effect = [error, "ok"]
+        mock_bulk_user_service.add_role.side_effect = [error, "ok"]
+        bulk = BulkUserOperations(mock_bulk_user_service)
+
+        assert bulk.block([1])[0].error is None
+        assert bulk.add_role([1], "Desktop User")[0].error is not None
+        assert mock_bulk_user_service.block.call_count == 2
+        assert mock_bulk_user_service.add_role.call_count == 1
+
+    def test_run_runs_custom_operation(self, mock_bulk_user_service):
+        def offboard(user_id):
+            mock_bulk_user_service.remove_role(user_id, "Admin")
+            return mock_bulk_user_service.deactivate(user_id)
+
+        results = BulkUserOperations(mock_bulk_user_service).run(
+            offboard, [1], idempotent=True
+        )
+        assert results == [(1, mock_bulk_user_service.deactivate.return_value, None)]
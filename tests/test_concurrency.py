@@ -0,0 +1,222 @@
+import threading
+import time
+
+import pytest
+
+from py42._concurrency import chain_prefetched
+from py42._concurrency import iter_batch_results
+from py42._concurrency import iter_batches
+from py42._concurrency import iter_concurrently
+from py42._concurrency import RateLimiter
+from py42._concurrency import submit
+
+
+def test_iter_batches_splits_items_into_lists_of_size():
+    assert list(iter_batches(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+
+def test_iter_batches_when_no_items_yields_nothing():
+    assert list(iter_batches([], 2)) == []
+
+
+def test_iter_concurrently_yields_result_for_each_item():
+    outcomes = list(iter_concurrently(lambda x: x * 2, range(20), max_workers=3))
+    assert sorted(outcomes) == [(i, i * 2, None) for i in range(20)]
+
+
+def test_iter_concurrently_yields_error_without_aborting_other_items():
+    def func(x):
+        if x == 3:
+            raise ValueError("bad item")
+        return x
+
+    outcomes = {}
+    for item, result, error in iter_concurrently(func, range(6)):
+        outcomes[item] = (result, error)
+    assert len(outcomes) == 6
+    assert isinstance(outcomes[3][1], ValueError)
+    assert outcomes[5] == (5, None)
+
+
+def test_iter_concurrently_runs_calls_on_multiple_threads():
+    barrier = threading.Event()
+    started = []
+    lock = threading.Lock()
+
+    def func(x):
+        with lock:
+            started.append(x)
+            if len(started) == 2:
+                barrier.set()
+        # both calls have to be running at once for either to finish
+        assert barrier.wait(5)
+        return x
+
+    outcomes = list(iter_concurrently(func, [1, 2], max_workers=2))
+    assert sorted(result for _, result, _ in outcomes) == [1, 2]
+
+
+def test_iter_concurrently_pulls_items_lazily():
+    pulled = []
+
+    def items():
+        for i in range(100):
+            pulled.append(i)
+            yield i
+
+    outcomes = iter_concurrently(lambda x: x, items(), max_workers=2)
+    next(outcomes)
+    outcomes.close()
+    assert len(pulled) < 100
+
+
+@pytest.mark.parametrize("max_workers", [None, 1, 8])
+def test_iter_concurrently_when_no_items_yields_nothing(max_workers):
+    assert list(iter_concurrently(lambda x: x, [], max_workers=max_workers)) == []
+
+
+def test_iter_batch_results_yields_result_for_each_batch():
+    outcomes = list(iter_batch_results(sum, range(10), 4))
+    assert sorted(outcomes) == [
+        ([0, 1, 2, 3], 6, None),
+        ([4, 5, 6, 7], 22, None),
+        ([8, 9], 17, None),
+    ]
+
+
+def test_iter_batch_results_when_batch_fails_retries_each_half_once():
+    calls = []
+
+    def func(batch):
+        calls.append(batch)
+        if 2 in batch:
+            raise ValueError("bad item")
+        return len(batch)
+
+    outcomes = list(iter_batch_results(func, range(8), 8))
+
+    assert calls == [list(range(8)), [0, 1, 2, 3], [4, 5, 6, 7]]
+    assert outcomes[0][:2] == ([0, 1, 2, 3], None)
+    assert isinstance(outcomes[0][2], ValueError)
+    assert outcomes[1] == ([4, 5, 6, 7], 4, None)
+
+
+def test_iter_batch_results_when_single_item_batch_fails_yields_error():
+    def func(batch):
+        raise ValueError("bad item")
+
+    outcomes = list(iter_batch_results(func, [1], 5))
+    assert len(outcomes) == 1
+    assert isinstance(outcomes[0][2], ValueError)
+
+
+def test_iter_batch_results_when_fatal_error_raises_it_and_stops_sending_batches():
+    calls = []
+
+    def func(batch):
+        calls.append(batch)
+        raise KeyError("fatal")
+
+    outcomes = iter_batch_results(
+        func, range(40), 2, max_workers=1, fatal_errors=(KeyError,)
+    )
+    with pytest.raises(KeyError):
+        list(outcomes)
+    # no batch is split, and at most the batches queued behind the first are sent
+    assert all(len(batch) == 2 for batch in calls)
+    assert len(calls) < 5
+
+
+def test_iter_batch_results_waits_on_rate_limiter_for_each_call(mocker):
+    rate_limiter = mocker.MagicMock(spec=RateLimiter)
+
+    def func(batch):
+        if len(batch) > 1:
+            raise ValueError("bad batch")
+
+    list(iter_batch_results(func, range(4), 2, rate_limiter=rate_limiter))
+    # two batches, each failing and retried as two halves
+    assert rate_limiter.wait.call_count == 6
+
+
+def test_rate_limiter_spaces_calls_across_threads():
+    rate_limiter = RateLimiter(50)
+    times = []
+    lock = threading.Lock()
+
+    def wait():
+        rate_limiter.wait()
+        with lock:
+            times.append(time.time())
+
+    threads = [threading.Thread(target=wait) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    times.sort()
+    # five calls at 50 per second take at least four intervals of 20ms
+    assert times[-1] - times[0] >= 0.07
+
+
+def test_chain_prefetched_yields_items_of_each_iterable_in_order():
+    iterables = [range(3), [], range(3, 5), range(5, 9)]
+    assert list(chain_prefetched(iterables, max_workers=2)) == list(range(9))
+
+
+def test_chain_prefetched_reads_iterables_ahead_concurrently():
+    barrier = threading.Event()
+    started = []
+    lock = threading.Lock()
+
+    def items(x):
+        with lock:
+            started.append(x)
+            if len(started) == 2:
+                barrier.set()
+        # the second iterable has to be read while the first waits
+        assert barrier.wait(5)
+        yield x
+
+    iterables = (items(x) for x in range(2))
+    assert list(chain_prefetched(iterables, max_workers=2)) == [0, 1]
+
+
+def test_chain_prefetched_bounds_items_read_ahead():
+    produced = []
+
+    def items():
+        for i in range(100):
+            produced.append(i)
+            yield i
+
+    chained = chain_prefetched([items()], buffer_size=2)
+    assert next(chained) == 0
+    time.sleep(0.2)
+    # the item yielded, the full buffer and the item waiting to be put
+    assert len(produced) <= 4
+    chained.close()
+
+
+def test_chain_prefetched_raises_error_of_iterable_when_reached():
+    def items():
+        yield 1
+        raise ValueError("bad page")
+
+    chained = chain_prefetched([items(), [2]])
+    assert next(chained) == 1
+    with pytest.raises(ValueError):
+        next(chained)
+
+
+def test_submit_result_returns_value_of_call():
+    assert submit(lambda x, y: x + y, 1, 2).result() == 3
+
+
+def test_submit_result_raises_error_of_call():
+    def func():
+        raise ValueError("bad call")
+
+    pending = submit(func)
+    with pytest.raises(ValueError):
+        pending.result()
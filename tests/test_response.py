@@ -1,5 +1,16 @@
+import gzip
+import io
+import socket
+import struct
+import threading
+
 import pytest
+import requests
 from requests import Response
+from requests.exceptions import ChunkedEncodingError
+from requests.exceptions import ConnectionError
+from requests.structures import CaseInsensitiveDict
+from urllib3 import HTTPResponse
 
 from py42.exceptions import Py42Error
 from py42.response import Py42Response
@@ -14,6 +25,38 @@ JSON_DICT_NO_DATA_NODE = '{"item_list_key": {"foo": "foo_val", "bar": "bar_val"}
 
 PLAIN_TEXT = "TEST_PLAIN_TEXT"
 
+STREAM_CONTENT = b"0123456789" * 1000
+
+
+def _create_streamed_response(body, headers=None):
+    response = Response()
+    response.status_code = 200
+    response.headers = CaseInsensitiveDict(headers or {})
+    response.raw = HTTPResponse(
+        body=io.BytesIO(body),
+        headers=headers or {},
+        preload_content=False,
+        decode_content=False,
+    )
+    return response
+
+
+def _send_head(conn, content_length):
+    conn.sendall(
+        "HTTP/1.1 200 OK\r\nContent-Length: {}\r\n\r\n".format(content_length).encode()
+    )
+
+
+def _read_all(response):
+    return b"".join(bytes(c) for c in response.iter_content_into(bytearray(64)))
+
+
+def _gzip(data):
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode="wb") as f:
+        f.write(data)
+    return buffer.getvalue()
+
 
 class TestPy42Response(object):
     @pytest.fixture
@@ -142,6 +185,123 @@ class TestPy42Response(object):
             chunk_size=128, decode_unicode=True
         )
 
+    def test_iter_content_uses_large_default_chunk_size(self, mock_response_not_json):
+        response = Py42Response(mock_response_not_json)
+        response.iter_content()
+        mock_response_not_json.iter_content.assert_called_once_with(
+            chunk_size=1024 * 1024, decode_unicode=False
+        )
+
+    def test_readinto_reads_streamed_content_into_buffer(self):
+        response = Py42Response(_create_streamed_response(STREAM_CONTENT))
+        buffer = bytearray(16)
+        assert response.readinto(buffer) == 16
+        assert bytes(buffer) == STREAM_CONTENT[:16]
+
+    def test_readinto_when_content_exhausted_returns_zero(self):
+        response = Py42Response(_create_streamed_response(b"abc"))
+        buffer = bytearray(16)
+        assert response.readinto(buffer) == 3
+        assert response.readinto(buffer) == 0
+
+    def test_iter_content_into_yields_all_content_using_given_buffer(self):
+        response = Py42Response(_create_streamed_response(STREAM_CONTENT))
+        buffer = bytearray(1000)
+        chunks = [bytes(chunk) for chunk in response.iter_content_into(buffer)]
+        assert len(chunks) == 10
+        assert b"".join(chunks) == STREAM_CONTENT
+        assert bytes(buffer) == STREAM_CONTENT[-1000:]
+
+    def test_iter_content_into_decodes_compressed_content(self):
+        response = Py42Response(
+            _create_streamed_response(
+                _gzip(STREAM_CONTENT), headers={"Content-Encoding": "gzip"}
+            )
+        )
+        content = b"".join(bytes(c) for c in response.iter_content_into())
+        assert content == STREAM_CONTENT
+
+    def test_iter_content_into_when_content_already_consumed_yields_content(self):
+        requests_response = _create_streamed_response(STREAM_CONTENT)
+        assert requests_response.content == STREAM_CONTENT
+        response = Py42Response(requests_response)
+        content = b"".join(bytes(c) for c in response.iter_content_into())
+        assert content == STREAM_CONTENT
+
+    def test_iter_content_into_when_consumed_state_is_unknown_yields_content(
+        self, mocker
+    ):
+        requests_response = mocker.MagicMock(spec=Response)
+        requests_response.status_code = 200
+        requests_response.content = STREAM_CONTENT
+        response = Py42Response(requests_response)
+        assert repr(response) == "<Py42Response [status=200, data='<streamed>']>"
+        content = b"".join(bytes(c) for c in response.iter_content_into())
+        assert content == STREAM_CONTENT
+
+    def test_iter_content_into_when_raw_has_no_length_remaining_reads_through_raw(
+        self, mocker
+    ):
+        body = io.BytesIO(STREAM_CONTENT)
+        raw = mocker.MagicMock(spec=["_fp", "read", "closed", "tell"])
+        raw._fp = io.BytesIO(b"not read")
+        raw.closed = False
+        raw.tell.return_value = 0
+        raw.read.side_effect = lambda size, decode_content: body.read(size)
+        requests_response = Response()
+        requests_response._content_consumed = False
+        requests_response.raw = raw
+        response = Py42Response(requests_response)
+        assert response.readinto(bytearray(100)) == 100
+        assert raw.read.call_count == 1
+
+    def test_close_closes_requests_response(self, mock_response_not_json):
+        Py42Response(mock_response_not_json).close()
+        mock_response_not_json.close.assert_called_once_with()
+
+    def test_iter_content_into_reads_whole_body_from_socket(self, socket_server):
+        def respond(conn, request):
+            _send_head(conn, 1000)
+            conn.sendall(STREAM_CONTENT[:1000])
+            conn.close()
+
+        server = socket_server(respond)
+        response = Py42Response(requests.get(server.url, stream=True))
+        assert _read_all(response) == STREAM_CONTENT[:1000]
+
+    def test_iter_content_into_when_server_closes_before_content_length_raises_chunked_encoding_error(
+        self, socket_server
+    ):
+        def respond(conn, request):
+            _send_head(conn, 1000)
+            conn.sendall(STREAM_CONTENT[:100])
+            conn.close()
+
+        server = socket_server(respond)
+        response = Py42Response(requests.get(server.url, stream=True))
+        with pytest.raises(ChunkedEncodingError):
+            _read_all(response)
+
+    def test_readinto_when_server_resets_connection_raises_connection_error(
+        self, socket_server
+    ):
+        body_read = threading.Event()
+
+        def respond(conn, request):
+            _send_head(conn, 1000)
+            conn.sendall(STREAM_CONTENT[:100])
+            body_read.wait(5)
+            # closing with a zero linger time sends RST instead of FIN
+            conn.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+            conn.close()
+
+        server = socket_server(respond)
+        response = Py42Response(requests.get(server.url, stream=True))
+        assert response.readinto(bytearray(100)) == 100
+        body_read.set()
+        with pytest.raises(ConnectionError):
+            response.readinto(bytearray(100))
+
     def test_iter_can_be_looped_over_multiple_times(
         self, mock_response_dict_no_data_node
     ):